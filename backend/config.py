@@ -10,6 +10,9 @@ The module includes:
 - Model path resolution functions
 - Environment-based configuration loading
 
+The CulicidaeLab library is only imported when predictor settings are
+requested, so importing this module does not load the ML stack.
+
 Example:
     >>> from backend.config import settings, get_predictor_model_path
     >>> model_path = get_predictor_model_path()
@@ -17,10 +20,10 @@ Example:
 """
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from culicidaelab import get_settings
 from dotenv import load_dotenv
 import os
 import pathlib
+from typing import Literal
 
 
 load_dotenv()
@@ -41,6 +44,8 @@ def get_predictor_model_path():
         >>> print(f"Model located at: {model_path}")
         Model located at: /path/to/models/segmenter_weights.pt
     """
+    from culicidaelab import get_settings
+
     settings = get_settings()
     model_path = settings.get_model_weights_path("segmenter")
 
@@ -61,6 +66,8 @@ def get_predictor_settings():
         >>> predictor_config = get_predictor_settings()
         >>> threshold = predictor_config.get_confidence_threshold()
     """
+    from culicidaelab import get_settings
+
     return get_settings()
 
 
@@ -76,6 +83,92 @@ class AppSettings(BaseSettings):
         API_V1_STR (str): Base path prefix for API version 1 endpoints.
         DATABASE_PATH (str): File system path to the LanceDB database directory.
         SAVE_PREDICTED_IMAGES (str | bool): Whether to save predicted images to disk.
+        PREDICTION_BATCH_MAX_SIZE (int): Maximum number of concurrent /predict requests
+            classified in one batched model call. A value of 1 disables batching.
+        PREDICTION_BATCH_MAX_WAIT_MS (float): How long the first request of a batch
+            waits for companions before the batch is run, in milliseconds.
+        PREDICTION_BATCH_STREAM_CONCURRENCY (int): Maximum number of images from one
+            /predict/batch request that are classified at the same time.
+        PREDICTION_CACHE_MAX_ENTRIES (int): Maximum number of prediction results kept in
+            the content-addressed result cache. A value of 0 disables the cache.
+        PREDICTION_CACHE_TTL_SECONDS (float): Lifetime of a cached prediction result.
+        PREDICTION_CACHE_DIR (str | None): Directory for persisting cached prediction
+            results across restarts. If None, the cache is kept in memory only.
+        PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS (float): How long the result of a photo
+            is reused for near-identical photos (same perceptual hash within
+            PREDICTION_NEAR_DUPLICATE_MAX_DISTANCE bits). 0 disables the reuse.
+        PREDICTION_NEAR_DUPLICATE_MAX_DISTANCE (int): Largest Hamming distance, out of 64
+            bits, at which two photos count as the same.
+        PREDICTION_NEAR_DUPLICATE_MAX_ENTRIES (int): Maximum number of recent results kept
+            for near-duplicate lookups.
+        PREDICTION_EXECUTOR (str): Where inference runs: "default" (shared thread
+            executor), "thread" (dedicated thread pool) or "process" (worker
+            processes, each holding a warm model).
+        PREDICTION_EXECUTOR_WORKERS (int): Size of the dedicated inference pool.
+            0 means one worker per CPU core.
+        PREDICTION_MAX_UPLOAD_BYTES (int): Maximum request body size accepted by
+            /predict. Larger uploads are rejected with 413 while they stream in.
+            0 disables the limit.
+        PREDICTION_BATCH_MAX_UPLOAD_BYTES (int): Maximum request body size accepted
+            by /predict/batch. 0 disables the limit.
+        PREDICTION_ARCHIVE_MAX_MEMBERS (int): Maximum number of members in a zip archive
+            uploaded to /predict/batch or /predict/jobs. 0 disables the limit.
+        PREDICTION_ARCHIVE_MAX_BYTES (int): Maximum uncompressed size of all members of
+            an uploaded zip archive. Each member is also limited to
+            PREDICTION_MAX_UPLOAD_BYTES. 0 disables the limit.
+        PREDICTION_DECODE_MAX_SIDE (int): Longest side, in pixels, that uploads are
+            decoded at for inference and thumbnails. Larger JPEGs are scaled down by
+            the decoder itself. 0 decodes at full resolution.
+        PREDICTION_DECODE_WORKERS (int): Size of the thread pool that decodes uploads
+            before inference. 0 means one thread per CPU core, up to 8.
+        PREDICTION_SERVER_TIMING (bool): Whether /predict responses carry a Server-Timing
+            header with the time spent in each stage (read, decode, queue_wait,
+            inference, ...). Stage histograms are exported either way.
+        PREDICTED_IMAGE_WRITER_QUEUE_SIZE (int): Maximum number of predicted images
+            waiting to be saved. Further saves are dropped while the queue is full.
+        PREDICTED_IMAGE_WRITER_WORKERS (int): Number of predicted images saved at once.
+        PREDICTED_IMAGE_WRITER_DRAIN_SECONDS (float): How long shutdown waits for queued
+            image saves to finish.
+        PREDICTION_JOBS_WORKERS (int): Prediction jobs (POST /predict/jobs) processed
+            at once.
+        PREDICTION_JOBS_MAX_QUEUE (int): Prediction jobs allowed to wait for a worker
+            before new ones are rejected with 429.
+        PREDICTION_JOBS_MAX_RETAINED (int): Finished prediction jobs kept for polling.
+        PREDICTION_JOBS_RETENTION_SECONDS (float): How long a finished prediction job
+            is kept for polling.
+        PREDICTION_JOBS_SPOOL_DIR (str | None): Directory where the images of queued
+            prediction jobs are spooled until they are classified. When None, the
+            system temporary directory is used.
+        PREDICTION_FAST_MODEL_PATH (str | None): ONNX file of a cheaper variant of the
+            classifier (same labels and pre-processing, e.g. a distilled or quantized
+            export). When set, it runs first and the full model only sees images it
+            is unsure about.
+        PREDICTION_ESCALATION_THRESHOLD (float): Top confidence below which a fast
+            tier prediction is escalated to the full model.
+        PREDICTION_WARMUP_ITERATIONS (int): Synthetic inferences run at start-up before
+            the worker reports itself ready. 0 skips the model warm-up.
+        GEO_OBSERVATION_STORE_ENABLED (bool): Whether /geo/observations filters an
+            in-memory columnar snapshot of the observations table instead of
+            querying LanceDB. Needs the version 2 observations schema.
+        GEO_OBSERVATION_STORE_REFRESH_SECONDS (float): Minimum time between checks for
+            new versions of the observations table by the snapshot.
+        GEO_TILE_CACHE_MAX_ENTRIES (int): Maximum number of rendered observation tiles
+            kept in memory. 0 disables the tile cache.
+        GEO_TILE_CACHE_DIR (str | None): Directory for persisting rendered observation
+            tiles. When None, tiles are only cached in memory.
+        GEO_TILE_CACHE_DISK_MAX_ENTRIES (int): Maximum number of persisted tiles.
+        GEO_TILE_MAX_FEATURES (int): Maximum number of observations in one tile.
+        DEPLOYMENT_ROLE (str): Which endpoints this worker serves: "all" (default),
+            "catalog" (species, diseases, filters, geo and observations, without
+            loading the ML stack) or "inference" (prediction endpoints only).
+        ADMIN_TOKEN (str | None): Token required in the X-Admin-Token header of admin
+            endpoints such as the model reload. The admin API is disabled when unset.
+        ADMISSION_CONTROL_ENABLED (bool): Whether API requests are limited per route
+            group (inference, geo, catalog, writes) and rejected with 429 when saturated.
+        ADMISSION_<GROUP>_CONCURRENCY (int): Requests of a route group processed at once.
+        ADMISSION_<GROUP>_QUEUE (int): Requests of a route group allowed to wait for a
+            free slot before new ones are rejected.
+        ADMISSION_RETRY_AFTER_SECONDS (int): Retry-After value sent with 429 responses.
         BACKEND_CORS_ORIGINS (list[str]): List of allowed CORS origins for frontend access.
 
     Example:
@@ -98,6 +191,61 @@ class AppSettings(BaseSettings):
     DATABASE_PATH: str = os.environ.get("CULICIDAELAB_DATABASE_PATH", ".lancedb")
     SAVE_PREDICTED_IMAGES: str | bool = os.environ.get("CULICIDAELAB_SAVE_PREDICTED_IMAGES", False)
 
+    PREDICTION_BATCH_MAX_SIZE: int = 1
+    PREDICTION_BATCH_MAX_WAIT_MS: float = 10.0
+    PREDICTION_BATCH_STREAM_CONCURRENCY: int = 4
+
+    PREDICTION_CACHE_MAX_ENTRIES: int = 1024
+    PREDICTION_CACHE_TTL_SECONDS: float = 3600.0
+    PREDICTION_CACHE_DIR: str | None = None
+    PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS: float = 0.0
+    PREDICTION_NEAR_DUPLICATE_MAX_DISTANCE: int = 4
+    PREDICTION_NEAR_DUPLICATE_MAX_ENTRIES: int = 4096
+
+    PREDICTION_EXECUTOR: Literal["default", "thread", "process"] = "default"
+    PREDICTION_EXECUTOR_WORKERS: int = 0
+    PREDICTION_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    PREDICTION_BATCH_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+    PREDICTION_ARCHIVE_MAX_MEMBERS: int = 10000
+    PREDICTION_ARCHIVE_MAX_BYTES: int = 1024 * 1024 * 1024
+    PREDICTION_DECODE_MAX_SIDE: int = 512
+    PREDICTION_DECODE_WORKERS: int = 0
+    PREDICTION_WARMUP_ITERATIONS: int = 1
+    PREDICTION_FAST_MODEL_PATH: str | None = None
+    PREDICTION_ESCALATION_THRESHOLD: float = 0.8
+    PREDICTION_SERVER_TIMING: bool = False
+
+    PREDICTED_IMAGE_WRITER_QUEUE_SIZE: int = 256
+    PREDICTED_IMAGE_WRITER_WORKERS: int = 2
+    PREDICTED_IMAGE_WRITER_DRAIN_SECONDS: float = 10.0
+
+    PREDICTION_JOBS_WORKERS: int = 2
+    PREDICTION_JOBS_MAX_QUEUE: int = 64
+    PREDICTION_JOBS_MAX_RETAINED: int = 1000
+    PREDICTION_JOBS_RETENTION_SECONDS: float = 3600.0
+    PREDICTION_JOBS_SPOOL_DIR: str | None = None
+
+    GEO_OBSERVATION_STORE_ENABLED: bool = False
+    GEO_OBSERVATION_STORE_REFRESH_SECONDS: float = 5.0
+    GEO_TILE_CACHE_MAX_ENTRIES: int = 4096
+    GEO_TILE_CACHE_DIR: str | None = None
+    GEO_TILE_CACHE_DISK_MAX_ENTRIES: int = 65536
+    GEO_TILE_MAX_FEATURES: int = 5000
+
+    DEPLOYMENT_ROLE: Literal["all", "catalog", "inference"] = "all"
+    ADMIN_TOKEN: str | None = None
+
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_INFERENCE_CONCURRENCY: int = 4
+    ADMISSION_INFERENCE_QUEUE: int = 16
+    ADMISSION_GEO_CONCURRENCY: int = 16
+    ADMISSION_GEO_QUEUE: int = 64
+    ADMISSION_CATALOG_CONCURRENCY: int = 64
+    ADMISSION_CATALOG_QUEUE: int = 256
+    ADMISSION_WRITES_CONCURRENCY: int = 8
+    ADMISSION_WRITES_QUEUE: int = 32
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
     BACKEND_CORS_ORIGINS: str = "http://localhost:8765,http://127.0.0.1:8765"
 
     @property
@@ -107,6 +255,16 @@ class AppSettings(BaseSettings):
             return [origin.strip() for origin in self.BACKEND_CORS_ORIGINS.split(",")]
         return self.BACKEND_CORS_ORIGINS
 
+    @property
+    def serves_catalog(self) -> bool:
+        """Whether this worker serves the catalog, geo and observation endpoints."""
+        return self.DEPLOYMENT_ROLE in ("all", "catalog")
+
+    @property
+    def serves_inference(self) -> bool:
+        """Whether this worker serves the prediction endpoints and loads the model."""
+        return self.DEPLOYMENT_ROLE in ("all", "inference")
+
     @property
     def classifier_settings(self):
         """Returns the fully initialized settings object from the culicidaelab library.
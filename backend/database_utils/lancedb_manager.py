@@ -9,6 +9,7 @@ The module supports:
 - Table creation and retrieval with schema validation
 - Data insertion and table management for species, diseases, regions,
   data sources, map layers, and observations
+- Scalar indexes on the columns the services filter by
 """
 
 from __future__ import annotations
@@ -17,6 +18,7 @@ import lancedb
 import pyarrow as pa
 from typing import Any, cast
 from lancedb import AsyncConnection
+from lancedb.index import Bitmap, BTree, LabelList
 from backend.config import settings
 
 
@@ -90,6 +92,10 @@ MAP_LAYERS_SCHEMA = pa.schema(
     ],
 )
 
+# Version 1 of the observations table. The observed date is a "YYYY-MM-DD"
+# string and the location a [lat, lon] list, so neither can be filtered by
+# LanceDB. Kept for reading tables that have not been migrated yet (see
+# backend/scripts/migrate_observations.py).
 OBSERVATIONS_SCHEMA = pa.schema(
     [
         pa.field("type", pa.string()),
@@ -110,6 +116,88 @@ OBSERVATIONS_SCHEMA = pa.schema(
     ],
 )
 
+OBSERVATIONS_SCHEMA_VERSION = 2
+SCHEMA_VERSION_KEY = "schema_version"
+
+# Version 2 stores the observed date as date32 and the location as separate
+# lat/lon columns, so date range and bounding box filters can run as LanceDB
+# predicates. Species names repeat across many rows and are dictionary-encoded.
+OBSERVATIONS_SCHEMA_V2 = pa.schema(
+    [
+        pa.field("type", pa.string()),
+        pa.field("id", pa.string(), nullable=False),
+        pa.field("species_scientific_name", pa.dictionary(pa.int32(), pa.string())),
+        pa.field("observed_at", pa.date32()),
+        pa.field("count", pa.int32()),
+        pa.field("observer_id", pa.string()),
+        pa.field("location_accuracy_m", pa.float32()),
+        pa.field("notes", pa.string()),
+        pa.field("data_source", pa.string()),
+        pa.field("image_filename", pa.string()),
+        pa.field("model_id", pa.string()),
+        pa.field("confidence", pa.float32()),
+        pa.field("geometry_type", pa.string()),
+        pa.field("lat", pa.float64()),
+        pa.field("lon", pa.float64()),
+        pa.field("metadata", pa.string()),
+    ],
+    metadata={SCHEMA_VERSION_KEY: str(OBSERVATIONS_SCHEMA_VERSION)},
+)
+
+
+def schema_version(schema: pa.Schema) -> int:
+    """Return the version recorded in a table schema.
+
+    Args:
+        schema: The schema of an existing table.
+
+    Returns:
+        The version stored under ``schema_version`` in the schema metadata,
+        or 1 for tables created before schemas were versioned.
+    """
+    value = (schema.metadata or {}).get(SCHEMA_VERSION_KEY.encode())
+    return int(value) if value else 1
+
+
+def observation_location(record: dict[str, Any]) -> list[float] | None:
+    """Return the [lat, lon] location of an observation row of either schema version.
+
+    Args:
+        record: A row of the observations table.
+
+    Returns:
+        The location as [lat, lon], or None if the row has no location.
+    """
+    if record.get("lat") is not None and record.get("lon") is not None:
+        return [record["lat"], record["lon"]]
+    coordinates = record.get("coordinates")
+    if isinstance(coordinates, list) and len(coordinates) == 2:
+        return coordinates
+    return None
+
+
+# Scalar indexes per table, as column -> index type. BTREE suits columns with
+# many distinct values and range filters, BITMAP columns with few distinct
+# values, and LABEL_LIST list columns filtered with array_has. Columns missing
+# from a table's schema version are skipped.
+SCALAR_INDEXES: dict[str, dict[str, str]] = {
+    "observations": {
+        "id": "BTREE",
+        "species_scientific_name": "BITMAP",
+        "observer_id": "BTREE",
+        "observed_at": "BTREE",
+        "lat": "BTREE",
+        "lon": "BTREE",
+    },
+    "species": {"id": "BTREE", "vector_status": "BITMAP"},
+    "diseases": {"id": "BTREE", "vectors": "LABEL_LIST"},
+    "regions": {"id": "BTREE"},
+    "data_sources": {"id": "BTREE"},
+    "map_layers": {"layer_type": "BITMAP"},
+}
+
+INDEX_CONFIGS = {"BTREE": BTree, "BITMAP": Bitmap, "LABEL_LIST": LabelList}
+
 
 class LanceDBManager:
     """A high-level manager for LanceDB database operations.
@@ -199,7 +287,7 @@ class LanceDBManager:
             return None
 
     async def create_or_overwrite_table(self, table_name: str, data: list[dict[str, Any]], schema: pa.Schema):
-        """Create or overwrite a table with the provided data.
+        """Create or overwrite a table with the provided data and build its scalar indexes.
 
         Args:
             table_name: Name of the table to create or overwrite.
@@ -223,11 +311,80 @@ class LanceDBManager:
             print(f"Creating/overwriting table '{table_name}' with {len(data)} records.")
             tbl = await db.create_table(table_name, data=data, schema=schema, mode="overwrite")
             print(f"Table '{table_name}' created/overwritten successfully.")
+            await self.ensure_indexes(table_name)
             return tbl
         except Exception as e:
             print(f"Error creating/overwriting table {table_name}: {e}")
             raise
 
+    async def index_status(self, table_name: str) -> list[dict[str, Any]]:
+        """Report the coverage of a table's scalar indexes.
+
+        Args:
+            table_name: Name of the table.
+
+        Returns:
+            One entry per column in `SCALAR_INDEXES` that the table has, with
+            the column, index type, index name, indexed and unindexed row
+            counts, and a status: "current", "stale" (rows were added since
+            the index was last updated), "missing", or "unsupported" (the
+            column type cannot be indexed, e.g. dictionary-encoded columns).
+            Empty if the table does not exist.
+        """
+        table = await self.get_table(table_name)
+        if table is None:
+            return []
+        schema = await table.schema()
+        indices = {tuple(index.columns): index for index in await table.list_indices()}
+        total_rows = await table.count_rows()
+
+        report = []
+        for column, index_type in SCALAR_INDEXES.get(table_name, {}).items():
+            if column not in schema.names:
+                continue
+            entry: dict[str, Any] = {"column": column, "index_type": index_type, "name": None}
+            index = indices.get((column,))
+            if pa.types.is_dictionary(schema.field(column).type):
+                entry.update(status="unsupported", indexed_rows=0, unindexed_rows=total_rows)
+            elif index is None:
+                entry.update(status="missing", indexed_rows=0, unindexed_rows=total_rows)
+            else:
+                stats = await table.index_stats(index.name)
+                unindexed = stats.num_unindexed_rows if stats else 0
+                entry.update(
+                    name=index.name,
+                    status="stale" if unindexed else "current",
+                    indexed_rows=stats.num_indexed_rows if stats else 0,
+                    unindexed_rows=unindexed,
+                )
+            report.append(entry)
+        return report
+
+    async def ensure_indexes(self, table_name: str) -> list[dict[str, Any]]:
+        """Create missing scalar indexes and bring stale ones up to date.
+
+        Missing indexes are built from scratch. Stale indexes are updated
+        incrementally with `optimize`, which indexes only the rows added
+        since the last update. `optimize` also compacts small data files and
+        removes table versions older than LanceDB's default retention (7 days).
+
+        Args:
+            table_name: Name of the table.
+
+        Returns:
+            The `index_status` of the table after the update.
+        """
+        status = await self.index_status(table_name)
+        if not status:
+            return status
+        table = await self.get_table(table_name)
+        for entry in status:
+            if entry["status"] == "missing":
+                await table.create_index(entry["column"], config=INDEX_CONFIGS[entry["index_type"]]())
+        if any(entry["status"] == "stale" for entry in status):
+            await table.optimize()
+        return await self.index_status(table_name)
+
 
 lancedb_manager = LanceDBManager(settings.DATABASE_PATH)
 
@@ -8,6 +8,7 @@ The module includes:
 - Database connection dependency
 - Cache access helpers for translation data
 - Species data cache dependency
+- Admin token check for operational endpoints
 
 Example:
     >>> from backend.dependencies import get_db, get_region_cache
@@ -18,7 +19,10 @@ Example:
     >>>     pass
 """
 
-from fastapi import Request, HTTPException
+import secrets
+
+from fastapi import Header, Request, HTTPException
+from backend.config import settings
 from backend.database_utils.lancedb_manager import get_lancedb_manager, LanceDBManager
 
 
@@ -140,3 +144,19 @@ def get_species_cache(request: Request) -> list[str]:
         >>>     return {"species": species_list}
     """
     return get_cache(request, "SPECIES_NAMES")
+
+
+def require_admin_token(x_admin_token: str | None = Header(default=None)):
+    """Reject requests that do not carry the configured admin token.
+
+    Args:
+        x_admin_token (str | None): Value of the X-Admin-Token header.
+
+    Raises:
+        HTTPException: If `ADMIN_TOKEN` is not configured (403 Forbidden)
+        HTTPException: If the header is missing or wrong (401 Unauthorized)
+    """
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled. Set CULICIDAELAB_ADMIN_TOKEN to enable it.")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
@@ -3,6 +3,9 @@
 This module initializes and configures the FastAPI application, including:
 - Application startup and shutdown lifecycle management
 - CORS middleware configuration
+- Per-route-group admission control and upload size limits
+- Deployment roles (`DEPLOYMENT_ROLE`): catalog-only workers never import the
+  inference stack, inference-only workers skip the catalog caches
 - Static file serving setup
 - API router registration
 - Health check and root endpoints
@@ -19,21 +22,26 @@ Example:
     >>> uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload
 """
 
+import asyncio
 from contextlib import asynccontextmanager
 import os
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from backend.config import settings
 from backend.logging_config import setup_logging, get_logger, log_with_context
-from backend.routers import filters, species, geo, diseases, prediction, observation
+from backend.routers import filters, species, geo, diseases, observation, metrics
 from backend.services.cache_service import (
     load_all_region_translations,
     load_all_datasource_translations,
     load_all_species_names,
 )
+from backend.services.admission_control import AdmissionControlMiddleware, build_bulkheads
 from backend.services.database import get_db
+from backend.services.readiness_service import ReadinessState, run_startup_warmup
+from backend.services.upload_service import UploadSizeLimitMiddleware
 
 # Initialize logging
 setup_logging()
@@ -46,7 +54,10 @@ async def lifespan(app: FastAPI):
 
     This context manager handles the initialization of database connections,
     cache loading, and other startup tasks when the FastAPI application starts,
-    and cleanup when it shuts down.
+    and cleanup when it shuts down. Opening the LanceDB tables and warming up
+    the classifier run in a background task, so liveness checks answer
+    immediately while the readiness endpoint reports 503 until warm-up is done.
+    Only the parts used by the configured `DEPLOYMENT_ROLE` are initialised.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -66,19 +77,27 @@ async def lifespan(app: FastAPI):
     """
     log_with_context(logger, "info", "Application startup initiated")
 
+    log_with_context(logger, "info", "Deployment role", role=settings.DEPLOYMENT_ROLE)
+    prediction_service = prediction_jobs = None
+    if settings.serves_inference:
+        from backend.services.prediction_jobs import prediction_jobs
+        from backend.services.prediction_service import prediction_service
+
     try:
-        db_conn = get_db()
-        supported_languages = ["en", "ru"]
+        db_conn = None
+        if settings.serves_catalog:
+            db_conn = get_db()
+            supported_languages = ["en", "ru"]
 
-        # Load caches with logging
-        log_with_context(logger, "info", "Loading region translations", languages=supported_languages)
-        app.state.REGION_TRANSLATIONS = load_all_region_translations(db_conn, supported_languages)
+            # Load caches with logging
+            log_with_context(logger, "info", "Loading region translations", languages=supported_languages)
+            app.state.REGION_TRANSLATIONS = load_all_region_translations(db_conn, supported_languages)
 
-        log_with_context(logger, "info", "Loading datasource translations", languages=supported_languages)
-        app.state.DATASOURCE_TRANSLATIONS = load_all_datasource_translations(db_conn, supported_languages)
+            log_with_context(logger, "info", "Loading datasource translations", languages=supported_languages)
+            app.state.DATASOURCE_TRANSLATIONS = load_all_datasource_translations(db_conn, supported_languages)
 
-        log_with_context(logger, "info", "Loading species names")
-        app.state.SPECIES_NAMES = load_all_species_names(db_conn)
+            log_with_context(logger, "info", "Loading species names")
+            app.state.SPECIES_NAMES = load_all_species_names(db_conn)
 
         # Log cache initialization status
         cache_status = {
@@ -94,6 +113,17 @@ async def lifespan(app: FastAPI):
 
         log_with_context(logger, "info", "Application startup completed successfully", **cache_status)
 
+        components = (["database"] if settings.serves_catalog else []) + (["model"] if settings.serves_inference else [])
+        app.state.READINESS = ReadinessState(components)
+        warmup_task = asyncio.create_task(
+            run_startup_warmup(
+                app.state.READINESS,
+                db_conn,
+                prediction_service,
+                iterations=settings.PREDICTION_WARMUP_ITERATIONS,
+            ),
+        )
+
     except Exception as e:
         log_with_context(logger, "error", "Application startup failed", error=str(e), error_type=type(e).__name__)
         raise
@@ -101,10 +131,32 @@ async def lifespan(app: FastAPI):
     yield
 
     log_with_context(logger, "info", "Application shutdown initiated")
+    warmup_task.cancel()
+    if prediction_service is not None:
+        await prediction_jobs.close()
+        await prediction_service.close()
 
 
 app = FastAPI(title=settings.APP_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json", lifespan=lifespan)
 
+if settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        bulkheads=build_bulkheads(settings),
+        api_prefix=settings.API_V1_STR,
+    )
+
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        f"{settings.API_V1_STR}/predict": settings.PREDICTION_MAX_UPLOAD_BYTES,
+        f"{settings.API_V1_STR}/predict/batch": settings.PREDICTION_BATCH_MAX_UPLOAD_BYTES,
+        f"{settings.API_V1_STR}/predict/jobs": settings.PREDICTION_BATCH_MAX_UPLOAD_BYTES,
+    },
+)
+
+# Added last so it is the outermost middleware: the 429 and 413 responses sent by the
+# middlewares above carry the CORS headers too, so browsers can read them.
 if settings.BACKEND_CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -136,12 +188,19 @@ app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 api_router_prefix = settings.API_V1_STR.replace("/api", "")
 
-app.include_router(filters.router, prefix=settings.API_V1_STR, tags=["Filters"])
-app.include_router(species.router, prefix=settings.API_V1_STR, tags=["Species"])
-app.include_router(diseases.router, prefix=settings.API_V1_STR, tags=["Diseases"])
-app.include_router(geo.router, prefix=settings.API_V1_STR, tags=["GeoData"])
-app.include_router(prediction.router, prefix=settings.API_V1_STR, tags=["Prediction"])
-app.include_router(observation.router, prefix=settings.API_V1_STR, tags=["Observation"])
+if settings.serves_catalog:
+    app.include_router(filters.router, prefix=settings.API_V1_STR, tags=["Filters"])
+    app.include_router(species.router, prefix=settings.API_V1_STR, tags=["Species"])
+    app.include_router(diseases.router, prefix=settings.API_V1_STR, tags=["Diseases"])
+    app.include_router(geo.router, prefix=settings.API_V1_STR, tags=["GeoData"])
+    app.include_router(observation.router, prefix=settings.API_V1_STR, tags=["Observation"])
+if settings.serves_inference:
+    # Imported here so that catalog-only workers never load the inference stack.
+    from backend.routers import admin, prediction
+
+    app.include_router(prediction.router, prefix=settings.API_V1_STR, tags=["Prediction"])
+    app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["Admin"])
+app.include_router(metrics.router, prefix=settings.API_V1_STR, tags=["Metrics"])
 
 
 @app.get(f"{settings.API_V1_STR}/", tags=["Root"])
@@ -202,13 +261,15 @@ async def health_check():
 
         # Check cache status
         cache_status = {
-            "caches_loaded": all(
+            "caches_loaded": not settings.serves_catalog
+            or all(
                 [
                     hasattr(app.state, "REGION_TRANSLATIONS"),
                     hasattr(app.state, "DATASOURCE_TRANSLATIONS"),
                     hasattr(app.state, "SPECIES_NAMES"),
                 ],
             ),
+            "ready": hasattr(app.state, "READINESS") and app.state.READINESS.is_ready,
         }
         health_data.update(cache_status)
 
@@ -230,6 +291,33 @@ async def api_health_check():
     return await health_check()
 
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness endpoint for load balancers (root level).
+
+    Unlike `/health`, which only reports that the process is alive, this
+    endpoint returns 200 only after the LanceDB tables have been opened and
+    the classifier has been warmed up, and 503 before that or if warm-up failed.
+
+    Returns:
+        JSONResponse: Readiness summary with per-component status.
+    """
+    readiness = getattr(app.state, "READINESS", None)
+    if readiness is None:
+        return JSONResponse(status_code=503, content={"ready": False, "components": {}, "errors": {}})
+    return JSONResponse(status_code=200 if readiness.is_ready else 503, content=readiness.as_dict())
+
+
+@app.get(f"{settings.API_V1_STR}/ready", tags=["Health"])
+async def api_readiness_check():
+    """Readiness endpoint for API at /api/ready.
+
+    Returns:
+        JSONResponse: Readiness summary with per-component status.
+    """
+    return await readiness_check()
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -1,3 +1,5 @@
-from backend.routers import filters, species, geo, diseases, prediction
+from backend.routers import filters, species, geo, diseases, metrics
 
-__all__ = ["filters", "species", "geo", "diseases", "prediction"]
+# `prediction` is not imported here: it pulls in the inference stack, which
+# catalog-only workers never load. Import it explicitly where it is needed.
+__all__ = ["filters", "species", "geo", "diseases", "prediction", "metrics"]
@@ -0,0 +1,77 @@
+"""
+Admin API endpoints for operating a running CulicidaeLab server.
+
+Every endpoint requires the X-Admin-Token header to match the
+`ADMIN_TOKEN` setting; the admin API is disabled when no token is configured.
+Endpoints act on the worker process that receives the request, so in a
+multi-worker deployment each worker has to be addressed.
+
+The module includes the following endpoints:
+- GET /admin/model: Active classifier version and reload state
+- POST /admin/model/reload: Load a new classifier in the background and switch to it
+"""
+
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from backend.dependencies import require_admin_token
+from backend.schemas.prediction_schemas import ModelReloadRequest, ModelStatus
+from backend.services.prediction_service import ReloadInProgress, prediction_service
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/admin/model", response_model=ModelStatus)
+async def get_model_status() -> ModelStatus:
+    """Return the classifier version serving requests and the state of the last reload.
+
+    Returns:
+        ModelStatus: Model ID, generation, in-flight requests and reload state.
+
+    Example:
+        ```
+        GET /api/admin/model
+        X-Admin-Token: <token>
+        ```
+    """
+    return ModelStatus(**prediction_service.model_status())
+
+
+@router.post("/admin/model/reload", response_model=ModelStatus, status_code=status.HTTP_202_ACCEPTED)
+async def reload_model(request: ModelReloadRequest) -> ModelStatus:
+    """Load and warm a new classifier in the background, then switch traffic to it.
+
+    Requests keep being served by the current model while the new one loads.
+    Poll `GET /admin/model` until `generation` reaches the returned
+    `reload_generation`, or `reload_state` becomes `failed`.
+
+    Args:
+        request (ModelReloadRequest): Optional ONNX file of the new model (the
+            library-configured classifier is reloaded if omitted) and the
+            number of warm-up inferences.
+
+    Returns:
+        ModelStatus: The current status, with `reload_state` set to `loading`.
+
+    Raises:
+        HTTPException: If `model_path` does not point to a file (400 Bad Request)
+        HTTPException: If a reload is already running (409 Conflict)
+
+    Example:
+        ```
+        POST /api/admin/model/reload
+        X-Admin-Token: <token>
+        {"model_path": "/models/culico-net-cls-v2.onnx"}
+        ```
+    """
+    if request.model_path is not None and not Path(request.model_path).is_file():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Model file '{request.model_path}' not found",
+        )
+    try:
+        prediction_service.start_reload(request.model_path, request.warmup_iterations)
+    except ReloadInProgress as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return ModelStatus(**prediction_service.model_status())
@@ -7,32 +7,231 @@ endpoints support various layer types and filtering options for spatial analysis
 and mapping applications.
 
 The module includes the following endpoints:
+- GET /geo/observations/clusters: Retrieve observations aggregated into map grid
+  cells for a zoom level, for low-zoom map views
+- GET /geo/observations/tiles/{z}/{x}/{y}.{fmt}: Retrieve the observations in a
+  Web Mercator map tile, as GeoJSON or as a Mapbox Vector Tile
 - GET /geo/{layer_type}: Retrieve geographic features for a specific layer type
-  with optional spatial, temporal, and species-based filtering
+  with optional spatial, temporal, and species-based filtering, radius queries
+  and nearest-neighbour queries
 
-All endpoints return GeoJSON-compliant data structures suitable for mapping
-applications and geographic information systems (GIS). The endpoints support
+The layer endpoint returns GeoJSON-compliant data structures suitable for mapping
+applications and geographic information systems (GIS); the clusters endpoint
+returns one aggregate per grid cell and the tiles endpoint returns cacheable
+per-tile payloads. The endpoints support
 bounding box filtering, date range filtering, and species-specific queries.
+
+The endpoints are plain functions, so FastAPI runs them in its thread pool:
+the LanceDB queries and the refreshes of the resident observation snapshot
+they may trigger never block the event loop.
 """
 
-from fastapi import APIRouter, Depends, Query, HTTPException, Path
+import math
+
+from fastapi import APIRouter, Depends, Query, HTTPException, Path, Response
+from fastapi.responses import StreamingResponse
 import lancedb
 from backend.services import database, geo_service
-from backend.schemas.geo_schemas import GeoJSONFeatureCollection
+from backend.schemas.geo_schemas import GeoJSONFeatureCollection, ObservationClusterCollection
+from backend.services.observation_clusters import MAX_CLUSTER_ZOOM
+from backend.services.tile_cache import MAX_TILE_ZOOM
+from backend.services.vector_tiles import MVT_MEDIA_TYPE
 
 router = APIRouter()
 
 VALID_LAYER_TYPES = ["distribution", "observations", "modeled", "breeding_sites"]
+MAX_KNN = 1000
+TILE_MEDIA_TYPES = {"geojson": "application/geo+json", "mvt": MVT_MEDIA_TYPE}
+
+
+def _parse_bbox(value: str) -> tuple[float, float, float, float]:
+    """Parse a "min_lon,min_lat,max_lon,max_lat" query parameter, raising a 400 error if it is malformed."""
+    try:
+        coords = [float(c.strip()) for c in value.split(",")]
+        if len(coords) != 4:
+            raise ValueError("Bounding box must have 4 coordinates.")
+        if not all(math.isfinite(c) for c in coords):
+            raise ValueError("Bounding box coordinates must be finite numbers.")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid bbox format: {e}. Use min_lon,min_lat,max_lon,max_lat",
+        )
+    return coords[0], coords[1], coords[2], coords[3]
+
+
+def _parse_point_query(value: str, name: str, last: str) -> tuple[float, float, float]:
+    """Parse a "lon,lat,<last>" query parameter, raising a 400 error if it is malformed."""
+    try:
+        parts = [float(part.strip()) for part in value.split(",")]
+        if len(parts) != 3:
+            raise ValueError("expected 3 numbers")
+        if not all(math.isfinite(part) for part in parts):
+            raise ValueError("values must be finite numbers")
+        lon, lat, extra = parts
+        if not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0):
+            raise ValueError("lon must be within [-180, 180] and lat within [-90, 90]")
+        if extra <= 0:
+            raise ValueError(f"{last} must be positive")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format: {e}. Use lon,lat,{last}")
+    return lon, lat, extra
+
+
+@router.get("/geo/observations/clusters", response_model=ObservationClusterCollection)
+def get_observation_clusters(
+    db: lancedb.DBConnection = Depends(database.get_db),
+    zoom: int = Query(..., ge=0, le=MAX_CLUSTER_ZOOM, description="Map zoom level"),
+    bbox: str | None = Query(None, description="Viewport: min_lon,min_lat,max_lon,max_lat"),
+    species: str | None = Query(None, description="Comma-separated list of species scientific names to filter by"),
+    start_date: str | None = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
+    end_date: str | None = Query(None, description="End date for filtering (YYYY-MM-DD)"),
+):
+    """
+    Retrieve observations aggregated into map grid cells for a zoom level.
+
+    At low zoom levels the map cannot usefully show individual observations.
+    This endpoint groups the observations matching the filters into the cells
+    of a grid that follows the map tiles (4 x 4 cells per tile at the requested
+    zoom) and returns the cells intersecting the viewport. Each cluster has the
+    number of observations, their centroid, a per-species breakdown and the
+    bounds of its cell, so the payload size depends on the viewport, not on the
+    number of observations.
+
+    Args:
+        db (lancedb.DBConnection): Database connection for querying observations.
+        zoom (int): Map zoom level, 0 to 20.
+        bbox (str | None): Viewport in the format "min_lon,min_lat,max_lon,max_lat".
+            If omitted, clusters for the whole world are returned.
+        species (str | None): Comma-separated list of species scientific names to filter by.
+        start_date (str | None): Start date for temporal filtering in YYYY-MM-DD format.
+        end_date (str | None): End date for temporal filtering in YYYY-MM-DD format.
+
+    Returns:
+        ObservationClusterCollection: The zoom level, the total number of
+            observations in the returned clusters and the clusters, largest first.
+
+    Raises:
+        HTTPException: If zoom is out of range (422) or if the bbox or date format
+            is incorrect (400).
+
+    Examples:
+        World view:
+        ```
+        GET /geo/observations/clusters?zoom=2
+        ```
+
+        Aedes aegypti clusters over the eastern United States:
+        ```
+        GET /geo/observations/clusters?zoom=5&bbox=-90.0,25.0,-65.0,45.0&species=Aedes%20aegypti
+        ```
+    """
+    species_list = [s.strip() for s in species.split(",") if s.strip()] if species else None
+    bbox_filter = _parse_bbox(bbox) if bbox else None
+
+    if start_date and not geo_service.is_valid_date_str(start_date):
+        raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
+    if end_date and not geo_service.is_valid_date_str(end_date):
+        raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+
+    return geo_service.get_observation_clusters(
+        db=db,
+        zoom=zoom,
+        bbox_filter=bbox_filter,
+        species_list=species_list,
+        start_date_str=start_date,
+        end_date_str=end_date,
+    )
+
+
+@router.get("/geo/observations/tiles/{z}/{x}/{y}.{fmt}", response_class=Response)
+def get_observation_tile(
+    z: int = Path(..., ge=0, le=MAX_TILE_ZOOM, description="Zoom level"),
+    x: int = Path(..., ge=0, description="Tile column, from west to east"),
+    y: int = Path(..., ge=0, description="Tile row, from north to south"),
+    fmt: str = Path(..., description=f"Tile format: {', '.join(TILE_MEDIA_TYPES)}"),
+    db: lancedb.DBConnection = Depends(database.get_db),
+    species: str | None = Query(None, description="Comma-separated list of species scientific names to filter by"),
+    start_date: str | None = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
+    end_date: str | None = Query(None, description="End date for filtering (YYYY-MM-DD)"),
+):
+    """
+    Retrieve the observations in a Web Mercator map tile.
+
+    Tiles follow the XYZ scheme used by web maps, so a map client can request
+    the observation layer tile by tile and every client browsing an area asks
+    for the same tiles. Rendered tiles are cached in memory and optionally on
+    disk; a tile is re-rendered once observations are added inside it. A tile
+    holds at most GEO_TILE_MAX_FEATURES observations; use the clusters
+    endpoint for low zoom levels.
+
+    Args:
+        z (int): Zoom level, 0 to 20.
+        x (int): Tile column, below 2**z.
+        y (int): Tile row, below 2**z.
+        fmt (str): "geojson" for a GeoJSON FeatureCollection like the layer
+            endpoint returns, or "mvt" for a Mapbox Vector Tile with an
+            "observations" point layer.
+        db (lancedb.DBConnection): Database connection for querying observations.
+        species (str | None): Comma-separated list of species scientific names to filter by.
+        start_date (str | None): Start date for temporal filtering in YYYY-MM-DD format.
+        end_date (str | None): End date for temporal filtering in YYYY-MM-DD format.
+
+    Returns:
+        Response: The encoded tile, with the media type of its format.
+
+    Raises:
+        HTTPException: If z is out of range (422), or if the tile does not
+            exist at its zoom level, the format is unknown or a date format is
+            incorrect (400).
+
+    Examples:
+        Vector tile over New York City:
+        ```
+        GET /geo/observations/tiles/10/301/385.mvt
+        ```
+
+        GeoJSON tile of Aedes aegypti observations:
+        ```
+        GET /geo/observations/tiles/5/9/12.geojson?species=Aedes%20aegypti
+        ```
+    """
+    if fmt not in TILE_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid tile format '{fmt}'. Use one of: {', '.join(TILE_MEDIA_TYPES)}"
+        )
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=400, detail=f"Tile {z}/{x}/{y} does not exist at zoom level {z}")
+    species_list = [s.strip() for s in species.split(",") if s.strip()] if species else None
+
+    if start_date and not geo_service.is_valid_date_str(start_date):
+        raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
+    if end_date and not geo_service.is_valid_date_str(end_date):
+        raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
+
+    content = geo_service.get_observation_tile(
+        db=db,
+        z=z,
+        x=x,
+        y=y,
+        fmt=fmt,
+        species_list=species_list,
+        start_date_str=start_date,
+        end_date_str=end_date,
+    )
+    return Response(content=content, media_type=TILE_MEDIA_TYPES[fmt])
 
 
 @router.get("/geo/{layer_type}", response_model=GeoJSONFeatureCollection)
-async def get_geographic_layer(
+def get_geographic_layer(
     layer_type: str = Path(..., description=f"Type of geographic layer. Valid types: {', '.join(VALID_LAYER_TYPES)}"),
     db: lancedb.DBConnection = Depends(database.get_db),
     species: str | None = Query(None, description="Comma-separated list of species scientific names to filter by"),
     bbox: str | None = Query(None, description="Bounding box filter: min_lon,min_lat,max_lon,max_lat"),
     start_date: str | None = Query(None, description="Start date for filtering (YYYY-MM-DD)"),
     end_date: str | None = Query(None, description="End date for filtering (YYYY-MM-DD)"),
+    near: str | None = Query(None, description="Radius filter: lon,lat,radius_km"),
+    knn: str | None = Query(None, description="Nearest observations: lon,lat,k"),
 ):
     """
     Retrieve geographic features for a specific layer type with optional filtering.
@@ -43,6 +242,8 @@ async def get_geographic_layer(
 
     The endpoint returns GeoJSON FeatureCollection data that can be directly consumed
     by mapping libraries and GIS applications for visualization and spatial analysis.
+    The collection is streamed in chunks as matching rows are read, so large layers
+    start arriving immediately and are never held in memory as a whole.
 
     Args:
         layer_type (str): The type of geographic layer to retrieve. Must be one of:
@@ -60,15 +261,22 @@ async def get_geographic_layer(
         end_date (str | None): End date for temporal filtering in YYYY-MM-DD format.
             Only features observed on or before this date will be included.
             Example: "2023-12-31".
+        near (str | None): Radius filter in the format "lon,lat,radius_km". Only features
+            within radius_km kilometres of the point are included, closest first, each
+            with a ``distance_km`` property. Example: "-74.0,40.7,5".
+        knn (str | None): Nearest-neighbour query in the format "lon,lat,k". Returns the
+            k features closest to the point that match the other filters, closest first,
+            each with a ``distance_km`` property. k is at most 1000. Example: "-74.0,40.7,10".
 
     Returns:
-        GeoJSONFeatureCollection: A GeoJSON FeatureCollection containing the requested
+        StreamingResponse: A GeoJSON FeatureCollection containing the requested
             geographic features. Each feature includes geometry (Point) and properties
             with observation metadata such as species information, observation dates,
             and location details.
 
     Raises:
-        HTTPException: If layer_type is invalid (400) or if bbox format is incorrect (400).
+        HTTPException: If layer_type is invalid (400), if the bbox, near or knn format is
+            incorrect (400) or if both near and knn are given (400).
 
     Examples:
         Basic usage - retrieve all observation features:
@@ -96,6 +304,16 @@ async def get_geographic_layer(
         GET /geo/observations?species=Aedes%20aegypti&bbox=-74.0,40.7,-71.0,45.0
         ```
 
+        Observations within 5 km of a trap:
+        ```
+        GET /geo/observations?near=-74.0,40.7,5
+        ```
+
+        The 10 Aedes aegypti observations closest to a trap:
+        ```
+        GET /geo/observations?species=Aedes%20aegypti&knn=-74.0,40.7,10
+        ```
+
         Combined filters - all parameters:
         ```
         GET /geo/observations?species=Culex%20quinquefasciatus
@@ -113,31 +331,35 @@ async def get_geographic_layer(
     if species:
         species_list = [s.strip() for s in species.split(",") if s.strip()]
 
-    bbox_filter: tuple[float, float, float, float] | None = None
-    if bbox:
-        try:
-            coords = [float(c.strip()) for c in bbox.split(",")]
-            if len(coords) == 4:
-                bbox_filter = (coords[0], coords[1], coords[2], coords[3])
-            else:
-                raise ValueError("Bounding box must have 4 coordinates.")
-        except ValueError as e:
+    bbox_filter = _parse_bbox(bbox) if bbox else None
+
+    if near and knn:
+        raise HTTPException(status_code=400, detail="Use either near or knn, not both.")
+    near_filter = _parse_point_query(near, "near", "radius_km") if near else None
+    knn_filter: tuple[float, float, int] | None = None
+    if knn:
+        lon, lat, k = _parse_point_query(knn, "knn", "k")
+        if k != int(k) or k > MAX_KNN:
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid bbox format: {e}. Use min_lon,min_lat,max_lon,max_lat",
+                detail=f"Invalid knn format: k must be a whole number up to {MAX_KNN}.",
             )
+        knn_filter = (lon, lat, int(k))
 
     if start_date and not geo_service.is_valid_date_str(start_date):
         raise HTTPException(status_code=400, detail="Invalid start_date format. Use YYYY-MM-DD")
     if end_date and not geo_service.is_valid_date_str(end_date):
         raise HTTPException(status_code=400, detail="Invalid end_date format. Use YYYY-MM-DD")
 
-    geojson_collection = geo_service.get_geo_layer(
+    # Streamed without building the response model; the model only documents the schema.
+    chunks = geo_service.stream_geo_layer(
         db=db,
         layer_type=layer_type,
         species_list=species_list,
         bbox_filter=bbox_filter,
         start_date_str=start_date,
         end_date_str=end_date,
+        near=near_filter,
+        knn=knn_filter,
     )
-    return geojson_collection
+    return StreamingResponse(chunks, media_type="application/json")
@@ -0,0 +1,32 @@
+"""
+Metrics API endpoint for the CulicidaeLab server.
+
+This module exposes the in-process metrics registry in the Prometheus text
+exposition format so that the monitoring stack can scrape cache, queue and
+latency metrics from each backend worker.
+
+The module includes the following endpoints:
+- GET /metrics: Render all registered metrics for Prometheus
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.services.metrics import REGISTRY
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Return all registered metrics in the Prometheus text format.
+
+    Returns:
+        PlainTextResponse: The rendered metrics, one sample per line.
+
+    Example:
+        ```
+        GET /api/metrics
+        ```
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -7,6 +7,9 @@ coordinates with the prediction service, and returns structured results.
 Main Components:
     - APIRouter instance configured for prediction endpoints
     - predict_species endpoint for species identification
+    - predict_species_batch endpoint streaming NDJSON results for many images
+    - prediction job endpoints: submit images, poll the job, or follow its
+      progress as server-sent events
 
 The prediction system supports:
     - Multiple image formats (JPEG, PNG, etc.)
@@ -24,13 +27,139 @@ Example:
     >>> # Now available at POST /api/v1/predict
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, status
+import asyncio
+import json
+import mimetypes
+import zipfile
+from collections.abc import AsyncIterator
+from typing import BinaryIO, NamedTuple
 
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from backend.config import settings
+from backend.schemas.prediction_schemas import PredictionJobStatus
+from backend.services.prediction_jobs import JobQueueFull, prediction_jobs
 from backend.services.prediction_service import prediction_service, PredictionResult
+from backend.services.stage_timing import collect_stages, record_stage
+from backend.services.upload_service import (
+    ArchiveTooLarge,
+    check_archive_limits,
+    read_archive_member,
+    take_upload_file,
+    upload_buffer,
+    upload_read_seconds,
+)
 
 
 router = APIRouter()
 
+ZIP_CONTENT_TYPES = ("application/zip", "application/x-zip-compressed")
+
+
+def _is_zip_upload(file: UploadFile) -> bool:
+    """Return True if an uploaded part is a zip archive of images."""
+    return file.content_type in ZIP_CONTENT_TYPES or (file.filename or "").lower().endswith(".zip")
+
+
+class _UploadPart(NamedTuple):
+    """An uploaded part taken over from its request; `archive` is set for zip archives."""
+
+    filename: str
+    file: BinaryIO
+    archive: zipfile.ZipFile | None
+
+
+def _open_upload_parts(files: list[UploadFile]) -> list[_UploadPart]:
+    """Take over the data of every uploaded part and open the zip archives.
+
+    The parts stay readable after the endpoint returns, so a streamed response
+    can read them; close them with `_close_upload_parts`.
+
+    Raises:
+        HTTPException: If a zip archive is invalid (400 Bad Request)
+        ArchiveTooLarge: If a zip archive declares more members or uncompressed
+            bytes than allowed (413 Request Entity Too Large)
+    """
+    parts: list[_UploadPart] = []
+    try:
+        for file in files:
+            data = take_upload_file(file)
+            parts.append(_UploadPart(file.filename or "", data, None))
+            if _is_zip_upload(file):
+                parts[-1] = parts[-1]._replace(archive=zipfile.ZipFile(data))
+                check_archive_limits(
+                    parts[-1].archive,
+                    max_member_bytes=settings.PREDICTION_MAX_UPLOAD_BYTES,
+                    max_total_bytes=settings.PREDICTION_ARCHIVE_MAX_BYTES,
+                    max_members=settings.PREDICTION_ARCHIVE_MAX_MEMBERS,
+                )
+    except zipfile.BadZipFile as e:
+        _close_upload_parts(parts)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid zip archive: {e}")
+    except ArchiveTooLarge:
+        _close_upload_parts(parts)
+        raise
+    return parts
+
+
+def _close_upload_parts(parts: list[_UploadPart]):
+    for part in parts:
+        if part.archive is not None:
+            part.archive.close()
+        part.file.close()
+
+
+async def _iter_uploaded_images(parts: list[_UploadPart]) -> AsyncIterator[tuple[str, bytes]]:
+    """Yield (filename, contents) for every image in the uploaded parts.
+
+    Image parts are read one at a time. The image members of zip archives are
+    read one at a time as well; directories, non-image members and empty
+    members are skipped. Members are decompressed with a hard limit of
+    `PREDICTION_MAX_UPLOAD_BYTES` each and `PREDICTION_ARCHIVE_MAX_BYTES` per
+    archive, whatever sizes their headers declare.
+
+    Raises:
+        ArchiveTooLarge: If a member or an archive decompresses to more bytes than allowed.
+    """
+    for part in parts:
+        if part.archive is not None:
+            total = 0
+            for member in part.archive.infolist():
+                content_type, _ = mimetypes.guess_type(member.filename)
+                if member.is_dir() or member.file_size == 0 or not (content_type or "").startswith("image/"):
+                    continue
+                data = await asyncio.to_thread(
+                    read_archive_member, part.archive, member, settings.PREDICTION_MAX_UPLOAD_BYTES
+                )
+                total += len(data)
+                if settings.PREDICTION_ARCHIVE_MAX_BYTES > 0 and total > settings.PREDICTION_ARCHIVE_MAX_BYTES:
+                    raise ArchiveTooLarge(
+                        f"Zip archive '{part.filename}' expands to more than "
+                        f"{settings.PREDICTION_ARCHIVE_MAX_BYTES} bytes"
+                    )
+                yield member.filename, data
+        else:
+            yield part.filename, await asyncio.to_thread(part.file.read)
+
+
+def _validate_batch_parts(files: list[UploadFile]):
+    """Check that every part is a non-empty image or a zip archive.
+
+    Raises:
+        HTTPException: If a part is neither an image nor a zip archive, or is empty (400 Bad Request)
+    """
+    for file in files:
+        if _is_zip_upload(file):
+            continue
+        if not file.content_type or not file.content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File '{file.filename}' must be an image or a zip archive, got {file.content_type}",
+            )
+        if file.size == 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Empty file '{file.filename}'")
+
 
 @router.post(
     "/predict",
@@ -39,6 +168,8 @@ router = APIRouter()
     description="Upload an image of a mosquito to identify its species using AI.",
 )
 async def predict_species(
+    request: Request,
+    response: Response,
     file: UploadFile = File(...),
 ) -> PredictionResult:
     """Predict mosquito species from an uploaded image.
@@ -61,9 +192,16 @@ async def predict_species(
             - confidence: Confidence score of the top prediction
             - image_url_species: URL to processed image (if saving enabled)
 
+    The time spent in each stage of the request is recorded in the
+    ``culicidaelab_prediction_stage_seconds`` histogram and, when
+    `PREDICTION_SERVER_TIMING` is enabled, returned in a ``Server-Timing``
+    header.
+
     Raises:
         HTTPException: If the file is not an image (400 Bad Request)
         HTTPException: If the file is empty (400 Bad Request)
+        HTTPException: If the upload exceeds `PREDICTION_MAX_UPLOAD_BYTES`
+            (413 Request Entity Too Large, raised while the body streams in)
         HTTPException: If prediction fails (500 Internal Server Error)
 
     Example:
@@ -97,14 +235,19 @@ async def predict_species(
             )
 
         print("[ROUTER] Reading file contents...")
-        contents = await file.read()
-        if not contents:
-            print("[ROUTER] ERROR: Empty file uploaded. Raising 400 Bad Request.")
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
+        with collect_stages() as stages, upload_buffer(file) as contents:
+            read_seconds = upload_read_seconds(request)
+            if read_seconds is not None:
+                record_stage("read", read_seconds)
+            if not contents:
+                print("[ROUTER] ERROR: Empty file uploaded. Raising 400 Bad Request.")
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty file")
 
-        print("[ROUTER] File contents read ({len(contents)} bytes). Calling prediction_service...")
-        result, error = await prediction_service.predict_species(contents, file.filename)
-        print("[ROUTER] Prediction service returned. Result: {result is not None}, Error: '{error}'")
+            print(f"[ROUTER] File contents read ({len(contents)} bytes). Calling prediction_service...")
+            result, error = await prediction_service.predict_species(contents, file.filename)
+        if settings.PREDICTION_SERVER_TIMING:
+            response.headers["Server-Timing"] = stages.server_timing()
+        print(f"[ROUTER] Prediction service returned. Result: {result is not None}, Error: '{error}'")
 
         if error:
             print("[ROUTER] ERROR: Prediction service returned an error. Raising 500 Internal Server Error.")
@@ -128,3 +271,204 @@ async def predict_species(
         # Catch any other unexpected errors
         print(f"[ROUTER] CRITICAL ERROR in /predict: {type(e).__name__} - {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Prediction failed: {str(e)}")
+
+
+@router.post(
+    "/predict/batch",
+    response_class=StreamingResponse,
+    summary="Predict mosquito species for many images",
+    description=(
+        "Upload many images (or zip archives of images) in one multipart request. "
+        "Results are streamed back as newline-delimited JSON, one line per image, "
+        "in the order the images finish classifying."
+    ),
+)
+async def predict_species_batch(
+    files: list[UploadFile] = File(...),
+) -> StreamingResponse:
+    """Predict mosquito species for a batch of uploaded images.
+
+    All parts are validated before streaming starts: every part must be an image
+    or a valid zip archive, and none may be empty. Images are then classified with a
+    bounded number in flight (`PREDICTION_BATCH_STREAM_CONCURRENCY`), and each
+    result is written to the response as soon as it is available, so neither
+    the uploaded images nor the results are all held in memory at once.
+
+    Args:
+        files (list[UploadFile]): Image files and/or zip archives of images.
+
+    Returns:
+        StreamingResponse: An `application/x-ndjson` stream. Each line is a JSON
+            object with `index` (position of the image in the upload), `filename`,
+            and either `result` (a `PredictionResult`) or `error` (a message).
+
+    Raises:
+        HTTPException: If a part is neither an image nor a zip archive (400 Bad Request)
+        HTTPException: If a part is empty or a zip archive is invalid (400 Bad Request)
+        HTTPException: If a zip archive holds more than `PREDICTION_ARCHIVE_MAX_MEMBERS`
+            members or declares more uncompressed bytes than allowed (413 Request
+            Entity Too Large)
+
+    Example:
+        >>> # curl -X POST "http://localhost:8000/api/predict/batch" \\
+        >>> #      -F "files=@trap_001.jpg" -F "files=@trap_002.jpg" -F "files=@campaign.zip"
+        >>> # {"index": 1, "filename": "trap_002.jpg", "result": {...}}
+        >>> # {"index": 0, "filename": "trap_001.jpg", "result": {...}}
+    """
+    print(f"\n--- [ROUTER] Received request for /predict/batch with {len(files)} part(s) ---")
+    _validate_batch_parts(files)
+    # The response body is produced after this endpoint returns, when FastAPI has closed the uploads.
+    parts = _open_upload_parts(files)
+
+    async def _ndjson_lines() -> AsyncIterator[str]:
+        try:
+            async for index, filename, result, error in prediction_service.predict_many(
+                _iter_uploaded_images(parts),
+                concurrency=settings.PREDICTION_BATCH_STREAM_CONCURRENCY,
+            ):
+                line: dict = {"index": index, "filename": filename}
+                if result is not None:
+                    line["result"] = result.model_dump()
+                else:
+                    line["error"] = error or "Prediction failed with no specific error"
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        except zipfile.BadZipFile as e:
+            yield json.dumps({"error": f"Invalid zip archive: {e}"}) + "\n"
+        except ArchiveTooLarge as e:
+            yield json.dumps({"error": e.detail}) + "\n"
+        finally:
+            _close_upload_parts(parts)
+
+    return StreamingResponse(_ndjson_lines(), media_type="application/x-ndjson")
+
+
+@router.post(
+    "/predict/jobs",
+    response_model=PredictionJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Submit images for asynchronous prediction",
+    description=(
+        "Upload one or more images (or zip archives of images) and get a job id back "
+        "immediately. Poll `GET /predict/jobs/{job_id}` or follow "
+        "`GET /predict/jobs/{job_id}/events` for the results."
+    ),
+)
+async def submit_prediction_job(
+    files: list[UploadFile] = File(...),
+) -> PredictionJobStatus:
+    """Queue a prediction job for the uploaded images.
+
+    The request returns as soon as the upload has been spooled to disk
+    (`PREDICTION_JOBS_SPOOL_DIR`); classification runs on the job worker pool
+    (`PREDICTION_JOBS_WORKERS`).
+
+    Args:
+        files (list[UploadFile]): Image files and/or zip archives of images.
+
+    Returns:
+        PredictionJobStatus: The queued job, with status `queued` and no results yet.
+
+    Raises:
+        HTTPException: If a part is neither an image nor a zip archive (400 Bad Request)
+        HTTPException: If a part is empty, or a zip archive is invalid or holds
+            no images (400 Bad Request)
+        HTTPException: If a zip archive holds more than `PREDICTION_ARCHIVE_MAX_MEMBERS`
+            members or expands to more bytes than allowed, checked before anything
+            is spooled (413 Request Entity Too Large)
+        HTTPException: If `PREDICTION_JOBS_MAX_QUEUE` jobs are already waiting
+            (429 Too Many Requests)
+
+    Example:
+        >>> # curl -X POST "http://localhost:8000/api/predict/jobs" \\
+        >>> #      -F "files=@trap_001.jpg" -F "files=@campaign.zip"
+        >>> # {"id": "9f1c...", "status": "queued", "total": 41, ...}
+    """
+    _validate_batch_parts(files)
+    parts = _open_upload_parts(files)
+    try:
+        job = await prediction_jobs.submit(_iter_uploaded_images(parts))
+    except zipfile.BadZipFile as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid zip archive: {e}")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    finally:
+        _close_upload_parts(parts)
+    print(f"[ROUTER] Queued prediction job {job.id} with {job.total} image(s).")
+    return PredictionJobStatus(**job.snapshot())
+
+
+@router.get(
+    "/predict/jobs/{job_id}",
+    response_model=PredictionJobStatus,
+    summary="Get an asynchronous prediction job",
+    description="Return the status of a prediction job and the results of the images classified so far.",
+)
+async def get_prediction_job(job_id: str) -> PredictionJobStatus:
+    """Return the current status and results of a prediction job.
+
+    Args:
+        job_id (str): The id returned by `POST /predict/jobs`.
+
+    Returns:
+        PredictionJobStatus: The job status with one entry per classified image.
+
+    Raises:
+        HTTPException: If the job is unknown or has expired (404 Not Found)
+    """
+    job = prediction_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Prediction job '{job_id}' not found")
+    return PredictionJobStatus(**job.snapshot())
+
+
+@router.get(
+    "/predict/jobs/{job_id}/events",
+    response_class=StreamingResponse,
+    summary="Follow an asynchronous prediction job",
+    description=(
+        "Server-sent events for a prediction job: `progress` when its status changes, "
+        "`item` for every classified image and a final `done` with the full job."
+    ),
+)
+async def stream_prediction_job_events(job_id: str) -> StreamingResponse:
+    """Stream the progress of a prediction job as server-sent events.
+
+    Events already emitted are replayed first, so connecting after the job
+    started or finished still delivers every result. A comment line is sent
+    while the job is idle to keep proxies from closing the connection.
+
+    Args:
+        job_id (str): The id returned by `POST /predict/jobs`.
+
+    Returns:
+        StreamingResponse: A `text/event-stream` response.
+
+    Raises:
+        HTTPException: If the job is unknown or has expired (404 Not Found)
+
+    Example:
+        >>> # curl -N "http://localhost:8000/api/predict/jobs/9f1c.../events"
+        >>> # event: item
+        >>> # data: {"index": 0, "filename": "trap_001.jpg", "result": {...}}
+    """
+    if prediction_jobs.get(job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Prediction job '{job_id}' not found")
+
+    async def _event_stream() -> AsyncIterator[str]:
+        async for event, data in prediction_jobs.events(job_id):
+            if data is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        _event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
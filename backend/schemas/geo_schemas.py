@@ -53,3 +53,29 @@ class MapLayerResponse(BaseModel):
     layer_type: str
     layer_name: str
     geojson_data: GeoJSONFeatureCollection
+
+
+class ObservationCluster(BaseModel):
+    """A grid cell of aggregated observations.
+
+    Represents the observations of one map grid cell at a zoom level, with
+    their centroid, total count and per-species breakdown.
+    """
+
+    lat: float
+    lon: float
+    count: int
+    species: dict[str, int]
+    bbox: list[float]
+
+
+class ObservationClusterCollection(BaseModel):
+    """Response model for aggregated observation clusters.
+
+    Contains the clusters of the requested zoom level and the total number of
+    observations they hold.
+    """
+
+    zoom: int
+    total: int
+    clusters: list[ObservationCluster]
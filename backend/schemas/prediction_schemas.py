@@ -7,7 +7,7 @@ and model validation in API endpoints.
 
 from __future__ import annotations
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PredictionResult(BaseModel):
@@ -19,3 +19,46 @@ class PredictionResult(BaseModel):
     model_id: str
     confidence: float
     image_url_species: str | None = None
+
+
+class PredictionJobItem(BaseModel):
+    """Outcome for one image of an asynchronous prediction job."""
+
+    index: int
+    filename: str
+    result: PredictionResult | None = None
+    error: str | None = None
+
+
+class PredictionJobStatus(BaseModel):
+    """Status of an asynchronous prediction job."""
+
+    id: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    results: list[PredictionJobItem] = []
+
+
+class ModelReloadRequest(BaseModel):
+    """Request body for reloading the classifier."""
+
+    model_path: str | None = None
+    warmup_iterations: int = Field(default=1, ge=1, le=64)
+
+
+class ModelStatus(BaseModel):
+    """State of the classifier serving predictions on this worker."""
+
+    model_id: str
+    generation: int
+    in_flight: int
+    retiring_generations: list[int]
+    reload_state: str
+    reload_generation: int
+    reload_error: str | None = None
@@ -0,0 +1,413 @@
+"""Prediction throughput and latency benchmark.
+
+Drives a fixed image corpus through the prediction path and reports
+images/sec and latency percentiles for every combination of the swept
+settings. The corpus is either generated from a fixed seed or loaded from a
+directory, and its digest is written to the report, so two reports can only
+be compared when they ran the same images.
+
+Two targets are supported:
+
+- ``service``: `PredictionService` in this process. Concurrency, batch size,
+  executor kind and executor workers are swept; a fresh service is built for
+  every combination with the result cache and image saving disabled, and it
+  is warmed up before measuring. The mean time per stage (see
+  `backend.services.stage_timing`) is reported as well.
+- ``http``: ``POST /predict`` on a running server given by ``--url``. Only
+  concurrency is swept, since the other settings belong to the server. The
+  server's result cache should be disabled
+  (``CULICIDAELAB_PREDICTION_CACHE_MAX_ENTRIES=0``), otherwise repeated corpus
+  images are answered from it.
+
+The report is JSON; progress messages go to stderr, so a report printed to
+stdout can be piped straight into another tool. With ``--compare`` a previous report is loaded and every
+matching run is checked for a throughput drop or a p95 latency increase
+beyond ``--max-regression``; the command exits with status 1 if any run
+regressed, so it can gate a deploy.
+
+Example:
+    Sweep the in-process service and save a baseline:
+
+        python -m backend.scripts.benchmark_prediction --concurrency 1,8,32 \\
+            --batch-size 1,8 --executor default,process --output reports/bench_main.json
+
+    Run the same sweep on a branch and compare against the baseline:
+
+        python -m backend.scripts.benchmark_prediction --concurrency 1,8,32 \\
+            --batch-size 1,8 --executor default,process --compare reports/bench_main.json
+
+    Benchmark a running server over HTTP:
+
+        python -m backend.scripts.benchmark_prediction --target http --url http://localhost:8000/api
+"""
+
+import argparse
+import asyncio
+import hashlib
+import io
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from backend.config import settings
+from backend.services.stage_timing import collect_stages
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+REPORT_VERSION = 1
+
+
+def generate_corpus(count: int, size: tuple[int, int] = (1024, 768), seed: int = 0) -> list[tuple[str, bytes]]:
+    """Generate a reproducible corpus of JPEG images.
+
+    Args:
+        count (int): Number of images.
+        size (tuple[int, int]): Width and height of every image.
+        seed (int): Random seed; the same seed always yields the same bytes.
+
+    Returns:
+        list[tuple[str, bytes]]: Pairs of filename and encoded image.
+    """
+    rng = np.random.default_rng(seed)
+    corpus = []
+    for index in range(count):
+        # Smooth gradients plus noise compress like photos rather than like pure noise.
+        base = rng.integers(0, 256, size=(size[1] // 32, size[0] // 32, 3), dtype=np.uint8)
+        image = Image.fromarray(base).resize(size, Image.Resampling.BICUBIC)
+        noise = rng.normal(0, 12, size=(size[1], size[0], 3))
+        pixels = np.clip(np.asarray(image, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        corpus.append((f"synthetic_{index:04d}.jpg", buffer.getvalue()))
+    return corpus
+
+
+def load_corpus(directory: str | Path) -> list[tuple[str, bytes]]:
+    """Load every image in a directory, sorted by name.
+
+    Raises:
+        ValueError: If the directory contains no images.
+    """
+    paths = sorted(path for path in Path(directory).iterdir() if path.suffix.lower() in IMAGE_SUFFIXES)
+    if not paths:
+        raise ValueError(f"No images found in '{directory}'.")
+    return [(path.name, path.read_bytes()) for path in paths]
+
+
+def corpus_digest(corpus: list[tuple[str, bytes]]) -> str:
+    """Return a SHA-256 digest identifying the corpus content and order."""
+    digest = hashlib.sha256()
+    for _, image_data in corpus:
+        digest.update(hashlib.sha256(image_data).digest())
+    return digest.hexdigest()
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float, stages: dict[str, float] | None = None) -> dict:
+    """Summarize one run.
+
+    Args:
+        latencies (list[float]): Per-request latency in seconds, successful requests only.
+        errors (int): Number of failed requests.
+        elapsed (float): Wall-clock duration of the run in seconds.
+        stages (dict[str, float] | None): Total seconds per stage over the run.
+
+    Returns:
+        dict: ``requests``, ``errors``, ``images_per_second``, ``latency_ms``
+            (mean, p50, p95, p99, max) and, if given, ``stages_ms`` (mean per request).
+    """
+    requests = len(latencies) + errors
+    summary: dict = {
+        "requests": requests,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 4),
+        "images_per_second": round(len(latencies) / elapsed, 3) if elapsed > 0 else 0.0,
+        "latency_ms": {},
+    }
+    if latencies:
+        values = np.asarray(latencies) * 1000
+        summary["latency_ms"] = {
+            "mean": round(float(values.mean()), 3),
+            "p50": round(float(np.percentile(values, 50)), 3),
+            "p95": round(float(np.percentile(values, 95)), 3),
+            "p99": round(float(np.percentile(values, 99)), 3),
+            "max": round(float(values.max()), 3),
+        }
+    if stages is not None and requests:
+        summary["stages_ms"] = {stage: round(seconds * 1000 / requests, 3) for stage, seconds in stages.items()}
+    return summary
+
+
+async def drive(corpus: list[tuple[str, bytes]], predict, concurrency: int, rounds: int) -> dict:
+    """Send the corpus `rounds` times through `predict` with bounded concurrency.
+
+    Args:
+        corpus: Images to send.
+        predict: Coroutine function taking (filename, image_data) and returning
+            True on success.
+        concurrency: Requests in flight at once.
+        rounds: Passes over the corpus.
+
+    Returns:
+        dict: The run summary from `summarize`.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in itertools.chain.from_iterable(itertools.repeat(corpus, rounds)):
+        queue.put_nowait(item)
+    latencies: list[float] = []
+    errors = 0
+    stages: dict[str, float] = {}
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            filename, image_data = queue.get_nowait()
+            with collect_stages() as request_stages:
+                started = time.perf_counter()
+                try:
+                    ok = await predict(filename, image_data)
+                except Exception as e:
+                    print(f"[BENCH] Request for '{filename}' failed: {type(e).__name__} - {e}", file=sys.stderr)
+                    ok = False
+                latency = time.perf_counter() - started
+            if ok:
+                latencies.append(latency)
+            else:
+                errors += 1
+            for stage, seconds in request_stages.durations.items():
+                stages[stage] = stages.get(stage, 0.0) + seconds
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    return summarize(latencies, errors, time.perf_counter() - started, stages or None)
+
+
+async def bench_service(corpus: list[tuple[str, bytes]], args: argparse.Namespace) -> list[dict]:
+    """Run the in-process sweep over executor, workers, batch size and concurrency."""
+    from backend.services.prediction_service import PredictionService
+
+    overrides = {"PREDICTION_CACHE_MAX_ENTRIES": 0, "PREDICTION_CACHE_DIR": None, "SAVE_PREDICTED_IMAGES": False}
+    swept = ("PREDICTION_EXECUTOR", "PREDICTION_EXECUTOR_WORKERS", "PREDICTION_BATCH_MAX_SIZE")
+    original = {name: getattr(settings, name) for name in (*overrides, *swept)}
+    results = []
+    try:
+        for executor, workers, batch_size in itertools.product(args.executor, args.workers, args.batch_size):
+            for name, value in {
+                **overrides,
+                "PREDICTION_EXECUTOR": executor,
+                "PREDICTION_EXECUTOR_WORKERS": workers,
+                "PREDICTION_BATCH_MAX_SIZE": batch_size,
+            }.items():
+                setattr(settings, name, value)
+            service = PredictionService()
+            try:
+                await service.warm_up(args.warmup)
+
+                async def predict(filename: str, image_data: bytes) -> bool:
+                    result, error = await service.predict_species(image_data, filename)
+                    if error:
+                        print(f"[BENCH] {error}", file=sys.stderr)
+                    return result is not None
+
+                for concurrency in args.concurrency:
+                    config = {
+                        "target": "service",
+                        "executor": executor,
+                        "workers": workers,
+                        "batch_size": batch_size,
+                        "concurrency": concurrency,
+                    }
+                    print(f"[BENCH] Running {config}", file=sys.stderr)
+                    results.append({**config, **await drive(corpus, predict, concurrency, args.rounds)})
+            finally:
+                await service.close()
+    finally:
+        for name, value in original.items():
+            setattr(settings, name, value)
+    return results
+
+
+async def bench_http(corpus: list[tuple[str, bytes]], args: argparse.Namespace) -> list[dict]:
+    """Run the HTTP sweep over concurrency against a running server."""
+    import httpx
+
+    url = args.url.rstrip("/") + "/predict"
+    results = []
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+
+        async def predict(filename: str, image_data: bytes) -> bool:
+            response = await client.post(url, files={"file": (filename, image_data, "image/jpeg")})
+            if response.status_code != 200:
+                print(f"[BENCH] {filename}: HTTP {response.status_code} {response.text[:200]}", file=sys.stderr)
+            return response.status_code == 200
+
+        for _ in range(args.warmup):
+            await predict(*corpus[0])
+        for concurrency in args.concurrency:
+            config = {"target": "http", "url": url, "concurrency": concurrency}
+            print(f"[BENCH] Running {config}", file=sys.stderr)
+            results.append({**config, **await drive(corpus, predict, concurrency, args.rounds)})
+    return results
+
+
+def run_key(run: dict) -> tuple:
+    """Return the settings identifying a run, used to match runs between reports."""
+    return tuple(run.get(name) for name in ("target", "executor", "workers", "batch_size", "concurrency"))
+
+
+def compare_reports(baseline: dict, current: dict, max_regression: float) -> list[dict]:
+    """Compare matching runs of two reports.
+
+    A run regressed if its images/sec dropped, or its p95 latency rose, by
+    more than `max_regression` (a fraction) relative to the baseline.
+
+    Returns:
+        list[dict]: One entry per matching run with the baseline and current
+            throughput and p95, their relative changes and a ``regressed`` flag.
+    """
+    baseline_runs = {run_key(run): run for run in baseline.get("runs", [])}
+    comparisons = []
+    for run in current.get("runs", []):
+        previous = baseline_runs.get(run_key(run))
+        if previous is None or not previous["images_per_second"] or not previous["latency_ms"]:
+            continue
+        throughput_change = run["images_per_second"] / previous["images_per_second"] - 1
+        p95_change = run["latency_ms"].get("p95", float("inf")) / previous["latency_ms"]["p95"] - 1
+        comparisons.append(
+            {
+                "run": dict(zip(("target", "executor", "workers", "batch_size", "concurrency"), run_key(run))),
+                "images_per_second": [previous["images_per_second"], run["images_per_second"]],
+                "p95_ms": [previous["latency_ms"]["p95"], run["latency_ms"].get("p95")],
+                "throughput_change": round(throughput_change, 4),
+                "p95_change": round(p95_change, 4),
+                "regressed": throughput_change < -max_regression or p95_change > max_regression,
+            },
+        )
+    return comparisons
+
+
+def git_revision() -> str | None:
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_list(value: str, kind=int) -> list:
+    """Parse a comma-separated command line list."""
+    return [kind(item.strip()) for item in value.split(",") if item.strip()]
+
+
+async def main() -> int:
+    """Parse arguments, run the benchmark, write the report and compare it if asked."""
+    parser = argparse.ArgumentParser(description="Benchmark prediction throughput and latency.")
+    parser.add_argument("--target", choices=("service", "http"), default="service", help="What to benchmark.")
+    parser.add_argument("--url", default="http://localhost:8000/api", help="API base URL for --target http.")
+    parser.add_argument("--corpus", help="Directory of images to use instead of a generated corpus.")
+    parser.add_argument("--images", type=int, default=32, help="Generated corpus size (default: 32).")
+    parser.add_argument("--seed", type=int, default=0, help="Generated corpus seed (default: 0).")
+    parser.add_argument("--rounds", type=int, default=3, help="Passes over the corpus per run (default: 3).")
+    parser.add_argument("--warmup", type=int, default=2, help="Warm-up inferences before measuring (default: 2).")
+    parser.add_argument("--concurrency", type=parse_list, default=[1, 8], help="Comma-separated (default: 1,8).")
+    parser.add_argument("--batch-size", type=parse_list, default=[1], help="Comma-separated (default: 1).")
+    parser.add_argument(
+        "--executor",
+        type=lambda value: parse_list(value, str),
+        default=[settings.PREDICTION_EXECUTOR],
+        help=f"Comma-separated executor kinds (default: {settings.PREDICTION_EXECUTOR}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=parse_list,
+        default=[settings.PREDICTION_EXECUTOR_WORKERS],
+        help="Comma-separated executor pool sizes, 0 for one per core.",
+    )
+    parser.add_argument("--timeout", type=float, default=60.0, help="HTTP request timeout in seconds.")
+    parser.add_argument("--output", help="Path of the JSON report (printed to stdout if omitted).")
+    parser.add_argument("--compare", help="Previous report to compare against.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="Allowed throughput drop or p95 increase as a fraction (default: 0.1).",
+    )
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        source = str(args.corpus)
+    else:
+        corpus = generate_corpus(args.images, seed=args.seed)
+        source = f"generated(seed={args.seed})"
+    print(f"[BENCH] Corpus: {len(corpus)} images from {source}", file=sys.stderr)
+
+    runs = await (bench_http(corpus, args) if args.target == "http" else bench_service(corpus, args))
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": {
+            "source": source,
+            "images": len(corpus),
+            "bytes": sum(len(image_data) for _, image_data in corpus),
+            "digest": corpus_digest(corpus),
+        },
+        "rounds": args.rounds,
+        "runs": runs,
+    }
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline.get("corpus", {}).get("digest") != report["corpus"]["digest"]:
+            print(
+                "[BENCH] Warning: the baseline was run on a different corpus; results are not comparable.",
+                file=sys.stderr,
+            )
+        report["comparison"] = {
+            "baseline": args.compare,
+            "baseline_revision": baseline.get("git_revision"),
+            "max_regression": args.max_regression,
+            "runs": compare_reports(baseline, report, args.max_regression),
+        }
+        regressed = [entry for entry in report["comparison"]["runs"] if entry["regressed"]]
+        for entry in regressed:
+            print(
+                f"[BENCH] REGRESSION {entry['run']}: images/sec {entry['images_per_second']}, "
+                f"p95 ms {entry['p95_ms']}",
+                file=sys.stderr,
+            )
+        exit_code = 1 if regressed else 0
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(rendered, encoding="utf-8")
+        print(f"[BENCH] Report saved to {output_path}", file=sys.stderr)
+    else:
+        print(rendered)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,91 @@
+"""Garbage collection for content-addressed predicted images.
+
+Predicted images are stored under the SHA-256 digest of the uploaded photo
+(see `backend.services.image_writer`). This command removes stored images
+that no observation references any more. An observation references an image
+when its digest appears in the observation's ``image_filename`` or in its
+``metadata`` (which holds the prediction details, including
+``image_url_species``).
+
+Files younger than the grace period are always kept, so images of predictions
+that have not been submitted as observations yet are not removed.
+
+Example:
+    Show what would be removed without deleting anything:
+
+        python -m backend.scripts.gc_predicted_images --dry-run
+
+    Remove unreferenced images older than two days:
+
+        python -m backend.scripts.gc_predicted_images --min-age-hours 48
+"""
+
+import argparse
+import asyncio
+import json
+
+from backend.config import settings
+from backend.database_utils.lancedb_manager import LanceDBManager
+from backend.services.image_writer import DIGEST_PATTERN, PREDICTED_IMAGES_DIR, collect_garbage
+
+
+async def fetch_referenced_digests() -> set[str]:
+    """Collect every image digest referenced by an observation.
+
+    Returns:
+        set[str]: Hex SHA-256 digests found in the observations table.
+
+    Raises:
+        RuntimeError: If the observations table does not exist.
+    """
+    manager = LanceDBManager(uri=settings.DATABASE_PATH)
+    await manager.connect()
+    table = await manager.get_table("observations")
+    if table is None:
+        raise RuntimeError(f"Table 'observations' not found in LanceDB at {settings.DATABASE_PATH}.")
+
+    digests: set[str] = set()
+    arrow_table = await table.query().select(["image_filename", "metadata"]).to_arrow()
+    for column in ("image_filename", "metadata"):
+        for value in arrow_table.column(column).to_pylist():
+            if value:
+                digests.update(DIGEST_PATTERN.findall(value))
+    await manager.close()
+    return digests
+
+
+async def main() -> None:
+    """Parse arguments, find referenced digests and remove unreferenced images."""
+    parser = argparse.ArgumentParser(description="Remove predicted images that no observation references.")
+    parser.add_argument(
+        "--images-dir",
+        default=PREDICTED_IMAGES_DIR,
+        help=f"Predicted images directory (default: {PREDICTED_IMAGES_DIR}).",
+    )
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=24.0,
+        help="Keep images younger than this many hours (default: 24).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be deleted without deleting anything.",
+    )
+    args = parser.parse_args()
+
+    referenced = await fetch_referenced_digests()
+    report = collect_garbage(
+        args.images_dir,
+        referenced,
+        min_age_seconds=args.min_age_hours * 3600,
+        dry_run=args.dry_run,
+    )
+    report["referenced_digests"] = len(referenced)
+    report["dry_run"] = args.dry_run
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Scalar index maintenance for the LanceDB tables.
+
+The services filter tables by columns such as ``id``, ``species_scientific_name``,
+``observed_at`` and ``vectors``. Without scalar indexes every such filter scans
+the whole table. This command creates the indexes listed in
+`backend.database_utils.lancedb_manager.SCALAR_INDEXES` that are missing and
+updates the ones that do not cover rows appended since they were built, then
+reports the coverage of every index.
+
+Tables created by ``populate_lancedb.py`` and migrated by
+``migrate_observations.py`` are indexed already. Run this command after bulk
+imports, or periodically, since observations submitted through the API are
+not indexed until the next run. Queries stay correct in the meantime, but they
+scan the unindexed rows.
+
+Example:
+    Report index coverage without changing anything:
+
+        python -m backend.scripts.maintain_indexes --report
+
+    Create and update the indexes of the observations table:
+
+        python -m backend.scripts.maintain_indexes --table observations
+"""
+
+import argparse
+import asyncio
+import json
+
+from backend.config import settings
+from backend.database_utils.lancedb_manager import SCALAR_INDEXES, LanceDBManager
+
+
+async def main() -> None:
+    """Parse arguments, then update or report the scalar indexes."""
+    parser = argparse.ArgumentParser(description="Create, update and report scalar indexes of the LanceDB tables.")
+    parser.add_argument(
+        "--db-path",
+        default=settings.DATABASE_PATH,
+        help=f"LanceDB database path (default: {settings.DATABASE_PATH}).",
+    )
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=sorted(SCALAR_INDEXES),
+        help="Table to maintain; may be repeated (default: all tables).",
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Only report index coverage and staleness; do not change any index.",
+    )
+    args = parser.parse_args()
+
+    manager = LanceDBManager(uri=args.db_path)
+    await manager.connect()
+    report = {}
+    for table_name in args.table or SCALAR_INDEXES:
+        if args.report:
+            report[table_name] = await manager.index_status(table_name)
+        else:
+            report[table_name] = await manager.ensure_indexes(table_name)
+    await manager.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,257 @@
+"""Versioned schema migrations of the observations table.
+
+The observations table records its schema version in the schema metadata
+(see `backend.database_utils.lancedb_manager.schema_version`). This command
+upgrades a table to the latest version, `OBSERVATIONS_SCHEMA_VERSION`:
+
+    - Version 1 stores the observed date as a string and the location as a
+      [lat, lon] ``coordinates`` list.
+    - Version 2 stores the observed date as ``date32`` and the location as
+      ``lat``/``lon`` columns, and dictionary-encodes the species name, so
+      date, bounding box and species filters can run as LanceDB predicates.
+
+The table is read from a fixed snapshot and rewritten in streaming batches,
+so memory use does not grow with the table. The rewrite is committed as a
+single new version of the same table: readers see either the old rows or the
+migrated ones, never a mix. The version migrated from is recorded in the new
+schema and the old version is kept by LanceDB, so ``--rollback`` can restore
+it until old versions are cleaned up. The scalar indexes of the table are
+rebuilt afterwards (see ``maintain_indexes.py``).
+
+If observations are written while the migration runs, the migration is
+undone and the command fails; run it again when the table is quiet.
+
+Example:
+    Migrate the configured database:
+
+        python -m backend.scripts.migrate_observations
+
+    Undo the last migration:
+
+        python -m backend.scripts.migrate_observations --rollback
+"""
+
+import argparse
+import asyncio
+import json
+from collections.abc import Callable, Iterator
+
+import lancedb
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from backend.config import settings
+from backend.database_utils.lancedb_manager import (
+    OBSERVATIONS_SCHEMA,
+    OBSERVATIONS_SCHEMA_V2,
+    OBSERVATIONS_SCHEMA_VERSION,
+    LanceDBManager,
+    schema_version,
+)
+
+MIGRATED_FROM_KEY = "migrated_from_version"
+
+SCHEMAS: dict[int, pa.Schema] = {1: OBSERVATIONS_SCHEMA, 2: OBSERVATIONS_SCHEMA_V2}
+
+
+class MigrationError(Exception):
+    """Raised when a migration cannot be applied or was undone."""
+
+
+def _conform(columns: dict[str, pa.Array], num_rows: int, schema: pa.Schema) -> pa.RecordBatch:
+    """Build a batch of `schema`, casting known columns and filling missing ones with nulls."""
+    arrays = []
+    for field in schema:
+        column = columns.get(field.name)
+        arrays.append(pa.nulls(num_rows, field.type) if column is None else column.cast(field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def upgrade_v1_to_v2(batch: pa.RecordBatch) -> pa.RecordBatch:
+    """Convert a batch of version 1 rows to version 2.
+
+    Dates that are not ``YYYY-MM-DD`` (optionally followed by a time) and
+    locations that are not a pair become nulls.
+
+    Args:
+        batch: Rows of the version 1 schema.
+
+    Returns:
+        The same rows in the version 2 schema.
+    """
+    columns = {name: batch.column(name) for name in batch.schema.names}
+
+    observed_at = columns.pop("observed_at", None)
+    if observed_at is not None:
+        day = pc.utf8_slice_codeunits(observed_at.cast(pa.string()), 0, 10)
+        parsed = pc.strptime(day, format="%Y-%m-%d", unit="s", error_is_null=True)
+        columns["observed_at"] = parsed.cast(pa.date32())
+
+    coordinates = columns.pop("coordinates", None)
+    if coordinates is not None:
+        coordinates = coordinates.cast(pa.list_(pa.float64()))
+        is_pair = pc.fill_null(pc.equal(pc.list_value_length(coordinates), 2), False)
+        # list_element fails on short lists, so substitute a placeholder pair first.
+        pairs = pc.if_else(is_pair, coordinates, pa.scalar([0.0, 0.0], type=coordinates.type))
+        missing = pa.scalar(None, type=pa.float64())
+        columns["lat"] = pc.if_else(is_pair, pc.list_element(pairs, 0), missing)
+        columns["lon"] = pc.if_else(is_pair, pc.list_element(pairs, 1), missing)
+
+    species = columns.get("species_scientific_name")
+    if species is not None:
+        columns["species_scientific_name"] = species.cast(pa.string()).dictionary_encode()
+
+    return _conform(columns, batch.num_rows, OBSERVATIONS_SCHEMA_V2)
+
+
+# Maps each version to the function upgrading a batch from the previous version.
+MIGRATIONS: dict[int, Callable[[pa.RecordBatch], pa.RecordBatch]] = {2: upgrade_v1_to_v2}
+
+
+def migrate_batches(batches: Iterator[pa.RecordBatch], from_version: int, to_version: int) -> Iterator[pa.RecordBatch]:
+    """Upgrade batches step by step from one schema version to another.
+
+    Args:
+        batches: Rows of the `from_version` schema.
+        from_version: Schema version of the rows.
+        to_version: Schema version to produce.
+
+    Yields:
+        pa.RecordBatch: The rows in the `to_version` schema.
+    """
+    steps = [MIGRATIONS[version] for version in range(from_version + 1, to_version + 1)]
+    for batch in batches:
+        for step in steps:
+            batch = step(batch)
+        yield batch
+
+
+def migrate_observations(
+    db: lancedb.DBConnection,
+    table_name: str = "observations",
+    to_version: int = OBSERVATIONS_SCHEMA_VERSION,
+    batch_size: int = 10_000,
+) -> dict:
+    """Rewrite a table in a newer schema version as one atomic commit.
+
+    Args:
+        db: The database connection.
+        table_name: The observations table.
+        to_version: Schema version to migrate to.
+        batch_size: Rows read, converted and written at a time.
+
+    Returns:
+        dict: Report with the schema versions, row count and table versions.
+
+    Raises:
+        MigrationError: If `to_version` is unknown, or rows were written or
+            lost while the migration ran (the migration is undone first).
+    """
+    if to_version not in SCHEMAS:
+        raise MigrationError(f"Unknown observations schema version {to_version}.")
+    table = db.open_table(table_name)
+    from_version = schema_version(table.schema)
+    report = {"table": table_name, "from_schema": from_version, "to_schema": to_version}
+    if from_version >= to_version:
+        return {**report, "migrated": False, "rows": table.count_rows()}
+
+    # Read from a snapshot, so the rewrite does not see its own output or later writes.
+    snapshot = table.to_lance()
+    snapshot_version = snapshot.version
+    rows = snapshot.count_rows()
+    target = SCHEMAS[to_version]
+    metadata = {**(target.metadata or {}), MIGRATED_FROM_KEY.encode(): str(snapshot_version).encode()}
+    target = target.with_metadata(metadata)
+    batches = migrate_batches(snapshot.to_batches(batch_size=batch_size), from_version, to_version)
+    table.add(pa.RecordBatchReader.from_batches(target, batches), mode="overwrite")
+
+    migrated_version = table.version
+    if migrated_version - 1 != snapshot_version:
+        # Another writer committed between the snapshot and the rewrite; its rows are not in the rewrite.
+        table.restore(migrated_version - 1)
+        raise MigrationError(
+            f"Table '{table_name}' changed while it was being migrated; the migration was undone. Run it again.",
+        )
+    if table.count_rows() != rows:
+        table.restore(snapshot_version)
+        raise MigrationError(f"Migrated table '{table_name}' does not have {rows} rows; the migration was undone.")
+    return {
+        **report,
+        "migrated": True,
+        "rows": rows,
+        "previous_version": snapshot_version,
+        "version": migrated_version,
+    }
+
+
+def rollback_observations(db: lancedb.DBConnection, table_name: str = "observations") -> dict:
+    """Restore the table version the last migration started from.
+
+    Args:
+        db: The database connection.
+        table_name: The observations table.
+
+    Returns:
+        dict: Report with the schema version and table version restored.
+
+    Raises:
+        MigrationError: If the table was not created by a migration.
+    """
+    table = db.open_table(table_name)
+    previous = (table.schema.metadata or {}).get(MIGRATED_FROM_KEY.encode())
+    if previous is None:
+        raise MigrationError(f"Table '{table_name}' was not created by a migration; nothing to roll back.")
+    from_schema = schema_version(table.schema)
+    table.restore(int(previous))
+    return {
+        "table": table_name,
+        "from_schema": from_schema,
+        "to_schema": schema_version(table.schema),
+        "restored_version": int(previous),
+        "version": table.version,
+    }
+
+
+def main() -> None:
+    """Parse arguments and migrate or roll back the observations table."""
+    parser = argparse.ArgumentParser(description="Migrate the observations table to a newer schema version.")
+    parser.add_argument(
+        "--db-path",
+        default=settings.DATABASE_PATH,
+        help=f"LanceDB database path (default: {settings.DATABASE_PATH}).",
+    )
+    parser.add_argument("--table", default="observations", help="Observations table name (default: observations).")
+    parser.add_argument(
+        "--to-version",
+        type=int,
+        default=OBSERVATIONS_SCHEMA_VERSION,
+        help=f"Schema version to migrate to (default: {OBSERVATIONS_SCHEMA_VERSION}).",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10_000,
+        help="Rows converted at a time (default: 10000).",
+    )
+    parser.add_argument(
+        "--rollback",
+        action="store_true",
+        help="Restore the table version the last migration started from.",
+    )
+    args = parser.parse_args()
+
+    db = lancedb.connect(args.db_path)
+    try:
+        if args.rollback:
+            report = rollback_observations(db, args.table)
+        else:
+            report = migrate_observations(db, args.table, args.to_version, args.batch_size)
+    except MigrationError as e:
+        raise SystemExit(str(e))
+    # The rewritten table version has no indexes on the new columns yet.
+    report["indexes"] = asyncio.run(LanceDBManager(uri=args.db_path).ensure_indexes(args.table))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -27,13 +27,14 @@ Example:
 import json
 import asyncio
 import os
+from datetime import date
 from pathlib import Path
 import pyarrow as pa
 from backend.database_utils.lancedb_manager import (
     LanceDBManager,
     SPECIES_SCHEMA,
     DISEASES_SCHEMA,
-    OBSERVATIONS_SCHEMA,
+    OBSERVATIONS_SCHEMA_V2,
     REGIONS_SCHEMA,
     DATA_SOURCES_SCHEMA,
     MAP_LAYERS_SCHEMA,
@@ -204,7 +205,7 @@ async def populate_observations_table(manager: LanceDBManager):
     """Populate the observations table with field observation data.
 
     Reads observation data from sample_observations.geojson and creates
-    or overwrites the observations table in LanceDB using OBSERVATIONS_SCHEMA.
+    or overwrites the observations table in LanceDB using OBSERVATIONS_SCHEMA_V2.
     Processes GeoJSON features and transforms them into observation records
     with proper field mapping and type handling.
 
@@ -238,19 +239,22 @@ async def populate_observations_table(manager: LanceDBManager):
         for feature in geojson_data.get("features", []):
             props = feature.get("properties", {})
             geom = feature.get("geometry", {})
+            # Sample coordinates are stored as [lat, lon].
+            lat, lon = geom.get("coordinates") or (None, None)
+            observed_at = props.get("observed_at")
             record = {
                 "type": feature.get("type"),
                 "id": props.get("id"),
                 "species_scientific_name": props.get("species_scientific_name"),
-                "observed_at": props.get("observed_at"),
+                "observed_at": date.fromisoformat(observed_at[:10]) if observed_at else None,
                 "count": props.get("count"),
                 "observer_id": props.get("observer_id"),
                 "data_source": json.dumps(props.get("data_source")),
                 "location_accuracy_m": props.get("location_accuracy_m"),
                 "notes": props.get("notes"),
                 "geometry_type": geom.get("type"),
-                # Ensure coordinates is a non-empty list of floats to avoid NullType issues
-                "coordinates": geom.get("coordinates"),
+                "lat": lat,
+                "lon": lon,
                 "image_filename": props.get("image_filename"),
                 "model_id": props.get("model_id"),
                 "confidence": props.get("confidence"),
@@ -260,7 +264,7 @@ async def populate_observations_table(manager: LanceDBManager):
             observations_records.append(record)
 
     if observations_records:
-        await manager.create_or_overwrite_table("observations", observations_records, OBSERVATIONS_SCHEMA)
+        await manager.create_or_overwrite_table("observations", observations_records, OBSERVATIONS_SCHEMA_V2)
         print("Observations table populated successfully.")
 
 
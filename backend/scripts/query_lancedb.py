@@ -117,7 +117,7 @@ async def main() -> None:
     limit = None if args.limit == 0 else args.limit
     records = await fetch_records(args.table, limit=limit)
 
-    print(json.dumps(records, indent=2, ensure_ascii=False))
+    print(json.dumps(records, indent=2, ensure_ascii=False, default=str))
 
 
 if __name__ == "__main__":
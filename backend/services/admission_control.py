@@ -0,0 +1,252 @@
+"""
+Admission control and per-route-group bulkheads.
+
+This module isolates the API's route groups from each other so that a burst
+on one of them cannot starve the rest of the process. Every group (inference,
+geo, catalog and writes) gets its own `Bulkhead`: a fixed number of requests
+run concurrently, a bounded number wait in a FIFO queue, and anything beyond
+that is rejected immediately with ``429 Too Many Requests`` and a
+``Retry-After`` header instead of piling up in the shared thread pool.
+
+The limits are applied by `AdmissionControlMiddleware`, a plain ASGI
+middleware, so a slot is held until the response body has been fully sent,
+which matters for streaming endpoints such as ``/predict/batch``.
+
+Example:
+    >>> from backend.services.admission_control import AdmissionControlMiddleware, build_bulkheads
+    >>> app.add_middleware(AdmissionControlMiddleware, bulkheads=build_bulkheads(settings))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+
+from backend.services.metrics import counter, gauge, histogram
+
+ROUTE_GROUPS = ("inference", "geo", "catalog", "writes")
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+CATALOG_PATHS = ("/species", "/vector-species", "/diseases", "/filter_options")
+
+BULKHEAD_IN_FLIGHT = gauge(
+    "culicidaelab_bulkhead_in_flight",
+    "Requests currently being processed, by route group.",
+    ["group"],
+)
+BULKHEAD_QUEUE_DEPTH = gauge(
+    "culicidaelab_bulkhead_queue_depth",
+    "Requests waiting for a free slot, by route group.",
+    ["group"],
+)
+BULKHEAD_WAIT_SECONDS = histogram(
+    "culicidaelab_bulkhead_wait_seconds",
+    "Time admitted requests spent waiting for a free slot, by route group.",
+    ["group"],
+)
+BULKHEAD_REJECTED = counter(
+    "culicidaelab_bulkhead_rejected_total",
+    "Requests rejected with 429 because the route group's queue was full.",
+    ["group"],
+)
+
+
+class BulkheadFull(Exception):
+    """Raised when a bulkhead has no free slot and its wait queue is full."""
+
+    def __init__(self, bulkhead: Bulkhead):
+        super().__init__(f"Too many concurrent {bulkhead.name} requests")
+        self.bulkhead = bulkhead
+
+
+class Bulkhead:
+    """Concurrency limit with a bounded FIFO wait queue.
+
+    Attributes:
+        name (str): Route group name, used in metrics and error messages.
+        max_concurrency (int): Number of requests allowed to run at once.
+        max_queue (int): Number of requests allowed to wait for a slot. 0 means
+            requests are rejected as soon as every slot is busy.
+        retry_after_seconds (int): Value sent in the ``Retry-After`` header.
+        active (int): Requests currently holding a slot.
+
+    Example:
+        >>> bulkhead = Bulkhead("inference", max_concurrency=4, max_queue=16)
+        >>> await bulkhead.acquire()
+        >>> try:
+        ...     ...
+        ... finally:
+        ...     bulkhead.release()
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, retry_after_seconds: int = 1):
+        """Initialize the bulkhead.
+
+        Args:
+            name: Route group name.
+            max_concurrency: Concurrent request limit. Values below 1 are treated as 1.
+            max_queue: Wait queue length. Negative values are treated as 0.
+            retry_after_seconds: Hint returned to rejected clients.
+        """
+        self.name = name
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after_seconds = max(0, int(retry_after_seconds))
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        BULKHEAD_IN_FLIGHT.set_function(lambda: self.active, group=name)
+        BULKHEAD_QUEUE_DEPTH.set_function(lambda: len(self._waiters), group=name)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests currently waiting for a slot."""
+        return len(self._waiters)
+
+    async def acquire(self) -> float:
+        """Take a slot, waiting in the queue if every slot is busy.
+
+        Returns:
+            float: Time spent waiting for the slot, in seconds.
+
+        Raises:
+            BulkheadFull: If no slot is free and the wait queue is full.
+        """
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            BULKHEAD_WAIT_SECONDS.observe(0.0, group=self.name)
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            BULKHEAD_REJECTED.inc(group=self.name)
+            raise BulkheadFull(self)
+
+        started = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the request went away; pass it on.
+                self.release()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        waited = time.perf_counter() - started
+        BULKHEAD_WAIT_SECONDS.observe(waited, group=self.name)
+        return waited
+
+    def release(self):
+        """Give the slot to the next waiting request, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+
+def build_bulkheads(settings) -> dict[str, Bulkhead]:
+    """Create one bulkhead per route group from the application settings.
+
+    Args:
+        settings (AppSettings): Settings providing ``ADMISSION_<GROUP>_CONCURRENCY``,
+            ``ADMISSION_<GROUP>_QUEUE`` and ``ADMISSION_RETRY_AFTER_SECONDS``.
+
+    Returns:
+        dict[str, Bulkhead]: Bulkheads keyed by route group name.
+    """
+    return {
+        group: Bulkhead(
+            group,
+            max_concurrency=getattr(settings, f"ADMISSION_{group.upper()}_CONCURRENCY"),
+            max_queue=getattr(settings, f"ADMISSION_{group.upper()}_QUEUE"),
+            retry_after_seconds=settings.ADMISSION_RETRY_AFTER_SECONDS,
+        )
+        for group in ROUTE_GROUPS
+    }
+
+
+def route_group(method: str, path: str, api_prefix: str = "/api") -> str | None:
+    """Return the route group a request belongs to, or None if it is not limited.
+
+    Health, readiness, metrics and static file requests are never limited, so
+    monitoring keeps working while the API is saturated. Prediction job
+    submissions count as writes; the job pool bounds their inference itself.
+
+    Args:
+        method (str): HTTP method.
+        path (str): Request path.
+        api_prefix (str): Prefix under which the API routers are mounted.
+
+    Returns:
+        str | None: One of `ROUTE_GROUPS`, or None.
+    """
+    if not path.startswith(api_prefix + "/"):
+        return None
+    route = path[len(api_prefix) :]
+    if route.startswith("/predict/jobs"):
+        # Submitting a job only buffers the upload; polling and progress streams
+        # are cheap but long-lived, so they must not hold inference slots.
+        return "writes" if method in WRITE_METHODS else None
+    if route.startswith("/predict"):
+        return "inference"
+    if method in WRITE_METHODS:
+        return "writes"
+    if route.startswith("/geo/"):
+        return "geo"
+    if any(route == prefix or route.startswith(prefix + "/") for prefix in CATALOG_PATHS):
+        return "catalog"
+    return None
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware that runs each API request inside its route group's bulkhead.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        bulkheads (dict[str, Bulkhead]): Bulkheads keyed by route group name.
+        api_prefix (str): Prefix under which the API routers are mounted.
+    """
+
+    def __init__(self, app, bulkheads: dict[str, Bulkhead], api_prefix: str = "/api"):
+        self.app = app
+        self.bulkheads = bulkheads
+        self.api_prefix = api_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        group = route_group(scope["method"], scope["path"], self.api_prefix)
+        bulkhead = self.bulkheads.get(group) if group else None
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await bulkhead.acquire()
+        except BulkheadFull as e:
+            await self._reject(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
+
+    @staticmethod
+    async def _reject(send, error: BulkheadFull):
+        """Send a 429 response without touching the wrapped application."""
+        body = json.dumps({"detail": f"{error}. Please retry later."}).encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"retry-after", str(error.bulkhead.retry_after_seconds).encode("ascii")),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -4,7 +4,8 @@ Geographic data service for handling spatial queries and filtering.
 This module provides functionality for querying and filtering geographic data,
 particularly observation data with spatial and temporal filtering capabilities.
 It supports bounding box filtering, date range filtering, and species-based
-filtering for geographic visualization.
+filtering for geographic visualization. `stream_geo_layer` encodes large
+layers straight to GeoJSON chunks for streaming responses.
 
 Example:
     >>> from backend.services.geo_service import get_geo_layer
@@ -14,10 +15,45 @@ Example:
 """
 
 import lancedb
+from backend.config import settings as app_settings
+from backend.database_utils.lancedb_manager import OBSERVATIONS_SCHEMA_VERSION, observation_location, schema_version
 from backend.services.database import get_table
-from backend.schemas.geo_schemas import GeoJSONFeatureCollection, GeoJSONFeature, GeoJSONGeometry
-from shapely.geometry import box, Point
-from datetime import datetime
+from backend.services.observation_clusters import ClusterAggregate, aggregate_cells, cell_bounds, cell_x, cell_y
+from backend.services.observation_store import CLUSTER_CACHE_ENTRIES, ObservationMatches, ObservationStore
+from backend.services.tile_cache import TileCache
+from backend.services.vector_tiles import encode_point_layer, tile_pixels
+from backend.schemas.geo_schemas import (
+    GeoJSONFeatureCollection,
+    GeoJSONFeature,
+    GeoJSONGeometry,
+    ObservationCluster,
+    ObservationClusterCollection,
+)
+from collections import OrderedDict
+from datetime import date, datetime
+import json
+import threading
+from typing import Iterable, Iterator
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+TILE_FORMATS = ("geojson", "mvt")
+GEOJSON_STREAM_BATCH_ROWS = 1024
+FEATURE_COLLECTION_START = b'{"type":"FeatureCollection","features":['
+FEATURE_COLLECTION_END = b"]}"
+
+observation_store = ObservationStore(refresh_seconds=app_settings.GEO_OBSERVATION_STORE_REFRESH_SECONDS)
+tile_cache = TileCache(
+    max_entries=app_settings.GEO_TILE_CACHE_MAX_ENTRIES,
+    persist_dir=app_settings.GEO_TILE_CACHE_DIR,
+    max_disk_entries=app_settings.GEO_TILE_CACHE_DISK_MAX_ENTRIES,
+)
+observation_store.add_listener(tile_cache.invalidate)
+# Cluster aggregates of version 1 tables, which the snapshot cannot hold, keyed by table version, zoom and filters.
+_v1_clusters: OrderedDict[tuple, ClusterAggregate] = OrderedDict()
+_v1_clusters_lock = threading.Lock()
 
 
 def is_valid_date_str(date_str: str) -> bool:
@@ -54,6 +90,234 @@ def is_valid_date_str(date_str: str) -> bool:
         return False
 
 
+def _sql_string(value: str) -> str:
+    """Quote a value as a SQL string literal."""
+    return "'" + value.replace("'", "''") + "'"
+
+
+def build_observation_filter(
+    species_list: list[str] | None = None,
+    bbox_filter: tuple[float, float, float, float] | None = None,
+    start_date_str: str | None = None,
+    end_date_str: str | None = None,
+    version: int = OBSERVATIONS_SCHEMA_VERSION,
+) -> str | None:
+    """Compile observation filters into a single LanceDB ``where`` expression.
+
+    Species are matched with ``IN``, and the bounding box and date range with
+    inclusive range comparisons, so LanceDB evaluates every filter while
+    scanning. Version 2 tables compare the ``lat``/``lon`` and date32
+    ``observed_at`` columns. Version 1 tables compare the elements of the
+    ``coordinates`` list, stored as [lat, lon], and the ``YYYY-MM-DD``
+    strings, which sort like dates.
+
+    Args:
+        species_list (list[str] | None): Species scientific names to keep.
+        bbox_filter (tuple[float, float, float, float] | None): Bounding box as
+            (min_lon, min_lat, max_lon, max_lat). A box with min_lon greater
+            than max_lon crosses the antimeridian.
+        start_date_str (str | None): First date to keep, YYYY-MM-DD. Ignored if invalid.
+        end_date_str (str | None): Last date to keep, YYYY-MM-DD. Ignored if invalid.
+        version (int): Schema version of the observations table.
+
+    Returns:
+        str | None: The expression, or None if no filter applies.
+
+    Example:
+        >>> build_observation_filter(["Aedes aegypti"], start_date_str="2023-01-01")
+        "species_scientific_name IN ('Aedes aegypti') AND observed_at >= DATE '2023-01-01'"
+    """
+    conditions = []
+    if species_list:
+        conditions.append(f"species_scientific_name IN ({', '.join(_sql_string(s) for s in species_list)})")
+
+    if bbox_filter:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox_filter)
+        lat, lon = ("lat", "lon") if version >= 2 else ("coordinates[1]", "coordinates[2]")
+        if min_lon <= max_lon:
+            conditions.append(f"{lon} >= {min_lon} AND {lon} <= {max_lon}")
+        else:
+            conditions.append(f"({lon} >= {min_lon} OR {lon} <= {max_lon})")
+        conditions.append(f"{lat} >= {min_lat} AND {lat} <= {max_lat}")
+
+    date_literal = "DATE {}" if version >= 2 else "{}"
+    if start_date_str and is_valid_date_str(start_date_str):
+        conditions.append(f"observed_at >= {date_literal.format(_sql_string(start_date_str))}")
+    if end_date_str and is_valid_date_str(end_date_str):
+        conditions.append(f"observed_at <= {date_literal.format(_sql_string(end_date_str))}")
+
+    return " AND ".join(conditions) or None
+
+
+def load_observation_store(db: lancedb.DBConnection) -> bool:
+    """Load the resident `observation_store` snapshot ahead of the first map request.
+
+    Args:
+        db (lancedb.DBConnection): The database connection object.
+
+    Returns:
+        bool: True if the snapshot was loaded, False if the observations table
+            uses the version 1 schema, which the snapshot cannot hold.
+    """
+    tbl = get_table(db, "observations")
+    if schema_version(tbl.schema) < 2:
+        return False
+    observation_store.refresh(tbl)
+    return True
+
+
+def _match_observation_store(
+    tbl,
+    species_list: list[str] | None,
+    bbox_filter: tuple[float, float, float, float] | None,
+    start_date_str: str | None,
+    end_date_str: str | None,
+    limit: int,
+    near: tuple[float, float, float] | None = None,
+    knn: tuple[float, float, int] | None = None,
+) -> ObservationMatches:
+    """Filter observations with the resident snapshot, refreshing it if it is due."""
+    observation_store.maybe_refresh(tbl)
+    return observation_store.query(
+        species_list=species_list,
+        bbox_filter=bbox_filter,
+        start_date=start_date_str if start_date_str and is_valid_date_str(start_date_str) else None,
+        end_date=end_date_str if end_date_str and is_valid_date_str(end_date_str) else None,
+        near=near,
+        knn=knn,
+        limit=limit,
+    )
+
+
+def _take_matches(tbl, matches: ObservationMatches, start: int = 0, stop: int | None = None) -> list[dict]:
+    """Fetch the rows of `matches[start:stop]` by row id, in the order of the matches.
+
+    `tbl` must be checked out at `matches.version`. Rows matched by `near` or
+    `knn` carry their distance from the point as ``distance_km``.
+    """
+    row_ids = matches.row_ids[start:stop].tolist()
+    if not row_ids:
+        return []
+    rows = {row.pop("_rowid"): row for row in tbl.take_row_ids(row_ids).with_row_id().to_list()}
+    records = [rows[row_id] for row_id in row_ids]
+    if matches.distances_km is not None:
+        for record, distance in zip(records, matches.distances_km[start:stop].tolist()):
+            record["distance_km"] = round(distance, 3)
+    return records
+
+
+def _query_observation_store(
+    tbl,
+    species_list: list[str] | None,
+    bbox_filter: tuple[float, float, float, float] | None,
+    start_date_str: str | None,
+    end_date_str: str | None,
+    limit: int,
+    near: tuple[float, float, float] | None = None,
+    knn: tuple[float, float, int] | None = None,
+) -> list[dict]:
+    """Filter observations with the resident snapshot and fetch the matching rows by row id.
+
+    Rows are returned in the order of the matches. Rows matched by `near` or
+    `knn` carry their distance from the point as ``distance_km``.
+    """
+    matches = _match_observation_store(
+        tbl, species_list, bbox_filter, start_date_str, end_date_str, limit, near=near, knn=knn
+    )
+    if len(matches.row_ids) == 0:
+        return []
+    # Row ids are only valid for the version the snapshot was read from.
+    tbl.checkout(matches.version)
+    return _take_matches(tbl, matches)
+
+
+def _pushdown_query(
+    tbl,
+    version: int,
+    species_list: list[str] | None,
+    bbox_filter: tuple[float, float, float, float] | None,
+    start_date_str: str | None,
+    end_date_str: str | None,
+):
+    """Return a LanceDB query of the observations matching the filters."""
+    query = tbl.search()
+    expression = build_observation_filter(
+        species_list=species_list,
+        bbox_filter=bbox_filter,
+        start_date_str=start_date_str,
+        end_date_str=end_date_str,
+        version=version,
+    )
+    if expression:
+        query = query.where(expression)
+    return query
+
+
+def _feature_properties(record: dict) -> dict:
+    """Return the properties of an observation row, without its location columns."""
+    # Version 2 rows store the date as a date.
+    if isinstance(record.get("observed_at"), date):
+        record["observed_at"] = record["observed_at"].isoformat()
+    return {k: v for k, v in record.items() if k not in ["geometry_type", "coordinates", "lat", "lon"]}
+
+
+def _json_default(value):
+    """Encode the dates and timestamps of observation rows as ISO 8601 strings."""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_GEOJSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def _feature_json(record: dict) -> str:
+    """Encode an observation row of either schema version as a GeoJSON point feature."""
+    return _GEOJSON_ENCODER.encode(
+        {
+            "type": "Feature",
+            "properties": _feature_properties(record),
+            "geometry": {"type": record.get("geometry_type") or "Point", "coordinates": observation_location(record)},
+        }
+    )
+
+
+def _feature_collection_chunks(layer_type: str, batches: Iterable[list[dict]]) -> Iterator[bytes]:
+    """Encode batches of observation rows as the chunks of one GeoJSON FeatureCollection.
+
+    The opening bytes are produced before the first batch is read. An error
+    while reading the batches ends the collection early, so the output is
+    always a complete JSON document.
+    """
+    yield FEATURE_COLLECTION_START
+    separator = b""
+    try:
+        for records in batches:
+            if records:
+                yield separator + ",".join(_feature_json(record) for record in records).encode("utf-8")
+                separator = b","
+    except Exception as e:
+        print(f"General error streaming geo layer '{layer_type}': {e}")
+    yield FEATURE_COLLECTION_END
+
+
+def _records_to_features(records: list[dict]) -> list[GeoJSONFeature]:
+    """Convert observation rows of either schema version to GeoJSON point features."""
+    features = []
+    for record in records:
+        # Version 2 rows store the location as lat/lon columns.
+        coordinates = observation_location(record)
+        feature = GeoJSONFeature(
+            properties=_feature_properties(record),
+            geometry=GeoJSONGeometry(
+                type=record.get("geometry_type", "Point"),
+                coordinates=coordinates,
+            ),
+        )
+        features.append(feature)
+    return features
+
+
 def get_geo_layer(
     db: lancedb.DBConnection,
     layer_type: str,
@@ -62,12 +326,21 @@ def get_geo_layer(
     start_date_str: str | None = None,
     end_date_str: str | None = None,
     limit: int = 10000,
+    near: tuple[float, float, float] | None = None,
+    knn: tuple[float, float, int] | None = None,
 ) -> GeoJSONFeatureCollection:
     """Retrieve geographic features for a specific layer with optional filtering.
 
     This function queries observation data and applies multiple filters including
-    species, bounding box, and date range filters. It returns GeoJSON formatted
-    features suitable for mapping applications.
+    species, bounding box, and date range filters. The filters are compiled into
+    a single LanceDB predicate (see `build_observation_filter`), so only matching
+    rows are read and `limit` counts matching rows. When
+    GEO_OBSERVATION_STORE_ENABLED is set and the table uses the version 2 schema,
+    the filters run on the resident `observation_store` snapshot and its spatial
+    index instead. Radius (`near`) and nearest-neighbour (`knn`) queries always
+    use the snapshot, so they need the version 2 schema; their features are
+    ordered by distance and carry a ``distance_km`` property. It returns
+    GeoJSON formatted features suitable for mapping applications.
 
     Args:
         db (lancedb.DBConnection): The database connection object.
@@ -82,8 +355,12 @@ def get_geo_layer(
             If None, no start date filtering is applied.
         end_date_str (str | None, optional): End date in YYYY-MM-DD format.
             If None, no end date filtering is applied.
-        limit (int, optional): Maximum number of records to return.
+        limit (int, optional): Maximum number of matching records to return.
             Defaults to 10000.
+        near (tuple[float, float, float] | None, optional): (lon, lat, radius_km)
+            to keep observations within radius_km of the point.
+        knn (tuple[float, float, int] | None, optional): (lon, lat, k) to keep
+            the k observations closest to the point.
 
     Returns:
         GeoJSONFeatureCollection: A GeoJSON FeatureCollection containing the
@@ -109,58 +386,307 @@ def get_geo_layer(
 
     try:
         tbl = get_table(db, "observations")
+        version = schema_version(tbl.schema)
 
-        query = tbl.search()
-        if species_list:
-            species_filter = " OR ".join([f"species_scientific_name = '{s}'" for s in species_list])
-            query = query.where(species_filter)
+        if (near or knn) and version < 2:
+            print("near and knn queries need the version 2 observations schema; run migrate_observations.")
+            return GeoJSONFeatureCollection(features=[])
+        if (near or knn or app_settings.GEO_OBSERVATION_STORE_ENABLED) and version >= 2:
+            records = _query_observation_store(
+                tbl, species_list, bbox_filter, start_date_str, end_date_str, limit, near=near, knn=knn
+            )
+        else:
+            query = _pushdown_query(tbl, version, species_list, bbox_filter, start_date_str, end_date_str)
+            # The filter runs inside LanceDB, so the limit applies to matching rows only.
+            records = query.limit(limit).to_list()
+
+        return GeoJSONFeatureCollection(features=_records_to_features(records))
+
+    except Exception as e:
+        print(f"General error getting geo layer '{layer_type}': {e}")
+        # Return empty collection on error
+        return GeoJSONFeatureCollection(features=[])
 
-        all_records = query.limit(limit).to_list()
 
-        # Perform filtering in Python for criteria not easily handled by LanceDB FTS
-        filtered_features = []
-        bbox_polygon = box(*bbox_filter) if bbox_filter else None
-        start_date_obj = (
-            datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            if start_date_str and is_valid_date_str(start_date_str)
-            else None
+def stream_geo_layer(
+    db: lancedb.DBConnection,
+    layer_type: str,
+    species_list: list[str] | None = None,
+    bbox_filter: tuple[float, float, float, float] | None = None,
+    start_date_str: str | None = None,
+    end_date_str: str | None = None,
+    limit: int = 10000,
+    near: tuple[float, float, float] | None = None,
+    knn: tuple[float, float, int] | None = None,
+) -> Iterator[bytes]:
+    """Stream the GeoJSON FeatureCollection of `get_geo_layer` as encoded chunks.
+
+    Selects the same features as `get_geo_layer`, but reads the matching rows
+    GEOJSON_STREAM_BATCH_ROWS at a time and encodes each batch straight to
+    JSON, without building Pydantic models. Memory use therefore depends on
+    the batch size rather than on the number of features, and the first
+    chunk is available before any row is read.
+
+    The query is planned before this function returns; if that fails, the
+    stream holds an empty collection. Errors while reading rows end the
+    collection early.
+
+    Args:
+        db (lancedb.DBConnection): The database connection object.
+        layer_type (str): The type of layer to retrieve. Only "observations"
+            has features.
+        species_list (list[str] | None, optional): Species scientific names to keep.
+        bbox_filter (tuple[float, float, float, float] | None, optional): A
+            bounding box as (min_lon, min_lat, max_lon, max_lat).
+        start_date_str (str | None, optional): Start date in YYYY-MM-DD format.
+        end_date_str (str | None, optional): End date in YYYY-MM-DD format.
+        limit (int, optional): Maximum number of matching records to return.
+            Defaults to 10000.
+        near (tuple[float, float, float] | None, optional): (lon, lat, radius_km)
+            to keep observations within radius_km of the point.
+        knn (tuple[float, float, int] | None, optional): (lon, lat, k) to keep
+            the k observations closest to the point.
+
+    Returns:
+        Iterator[bytes]: UTF-8 chunks that together form one GeoJSON
+            FeatureCollection, e.g. for a `StreamingResponse`.
+
+    Example:
+        >>> chunks = stream_geo_layer(db, "observations", species_list=["Aedes aegypti"])
+        >>> collection = json.loads(b"".join(chunks))
+    """
+    batches: Iterable[list[dict]] = ()
+    if layer_type == "observations":
+        try:
+            batches = _observation_batches(
+                db, species_list, bbox_filter, start_date_str, end_date_str, limit, near=near, knn=knn
+            )
+        except Exception as e:
+            print(f"General error getting geo layer '{layer_type}': {e}")
+    return _feature_collection_chunks(layer_type, batches)
+
+
+def _observation_batches(
+    db: lancedb.DBConnection,
+    species_list: list[str] | None,
+    bbox_filter: tuple[float, float, float, float] | None,
+    start_date_str: str | None,
+    end_date_str: str | None,
+    limit: int,
+    near: tuple[float, float, float] | None = None,
+    knn: tuple[float, float, int] | None = None,
+) -> Iterable[list[dict]]:
+    """Plan an observation query like `get_geo_layer` and return a lazy iterator of row batches."""
+    tbl = get_table(db, "observations")
+    version = schema_version(tbl.schema)
+
+    if (near or knn) and version < 2:
+        print("near and knn queries need the version 2 observations schema; run migrate_observations.")
+        return ()
+    if (near or knn or app_settings.GEO_OBSERVATION_STORE_ENABLED) and version >= 2:
+        matches = _match_observation_store(
+            tbl, species_list, bbox_filter, start_date_str, end_date_str, limit, near=near, knn=knn
         )
-        end_date_obj = (
-            datetime.strptime(end_date_str, "%Y-%m-%d").date()
-            if end_date_str and is_valid_date_str(end_date_str)
-            else None
+        if len(matches.row_ids) == 0:
+            return ()
+        # Row ids are only valid for the version the snapshot was read from.
+        tbl.checkout(matches.version)
+        return (
+            _take_matches(tbl, matches, start, start + GEOJSON_STREAM_BATCH_ROWS)
+            for start in range(0, len(matches.row_ids), GEOJSON_STREAM_BATCH_ROWS)
         )
 
-        for record in all_records:
-            # Bounding Box Filter
-            if bbox_polygon and record.get("coordinates"):
-                point = Point(record["coordinates"])
-                if not bbox_polygon.contains(point):
-                    continue
-
-            # Date Range Filter
-            if (start_date_obj or end_date_obj) and record.get("observed_at"):
-                try:
-                    record_date = datetime.strptime(record["observed_at"], "%Y-%m-%d").date()
-                    if start_date_obj and record_date < start_date_obj:
-                        continue
-                    if end_date_obj and record_date > end_date_obj:
-                        continue
-                except (ValueError, TypeError):
-                    continue
-
-            feature = GeoJSONFeature(
-                properties={k: v for k, v in record.items() if k not in ["geometry_type", "coordinates"]},
-                geometry=GeoJSONGeometry(
-                    type=record.get("geometry_type", "Point"),
-                    coordinates=record.get("coordinates"),
-                ),
+    query = _pushdown_query(tbl, version, species_list, bbox_filter, start_date_str, end_date_str)
+    reader = query.limit(limit).to_batches(GEOJSON_STREAM_BATCH_ROWS)
+    return (batch.to_pylist() for batch in reader)
+
+
+def get_observation_clusters(
+    db: lancedb.DBConnection,
+    zoom: int,
+    bbox_filter: tuple[float, float, float, float] | None = None,
+    species_list: list[str] | None = None,
+    start_date_str: str | None = None,
+    end_date_str: str | None = None,
+) -> ObservationClusterCollection:
+    """Aggregate observations into map grid cells for a zoom level.
+
+    The observations matching the filters are grouped into the cells of the
+    zoom level's grid (see `backend.services.observation_clusters`); cells
+    intersecting the bounding box are returned, largest first, with their
+    count, centroid and per-species breakdown. Aggregates are computed on
+    the resident `observation_store` snapshot, or for version 1 tables on
+    the location and species columns scanned from LanceDB, and cached per
+    zoom level and filters.
+
+    Args:
+        db (lancedb.DBConnection): The database connection object.
+        zoom (int): Map zoom level.
+        bbox_filter (tuple[float, float, float, float] | None, optional): The
+            viewport as (min_lon, min_lat, max_lon, max_lat). If None, every
+            cell is returned.
+        species_list (list[str] | None, optional): Species scientific names to keep.
+        start_date_str (str | None, optional): Start date in YYYY-MM-DD format.
+        end_date_str (str | None, optional): End date in YYYY-MM-DD format.
+
+    Returns:
+        ObservationClusterCollection: The clusters, or an empty collection if
+            the table cannot be read.
+
+    Example:
+        >>> clusters = get_observation_clusters(db, zoom=3, bbox_filter=(-130.0, 20.0, -60.0, 55.0))
+        >>> print(clusters.total)
+    """
+    try:
+        tbl = get_table(db, "observations")
+        start_date = start_date_str if start_date_str and is_valid_date_str(start_date_str) else None
+        end_date = end_date_str if end_date_str and is_valid_date_str(end_date_str) else None
+        if schema_version(tbl.schema) < 2:
+            aggregate = _v1_observation_clusters(tbl, zoom, species_list, start_date, end_date)
+        else:
+            observation_store.maybe_refresh(tbl)
+            aggregate = observation_store.clusters(
+                zoom, species_list=species_list, start_date=start_date, end_date=end_date
             )
-            filtered_features.append(feature)
+        clusters = [ObservationCluster(**cluster) for cluster in aggregate.to_clusters(aggregate.select(bbox_filter))]
+        return ObservationClusterCollection(
+            zoom=zoom,
+            total=sum(cluster.count for cluster in clusters),
+            clusters=clusters,
+        )
+
+    except Exception as e:
+        print(f"General error getting observation clusters at zoom {zoom}: {e}")
+        return ObservationClusterCollection(zoom=zoom, total=0, clusters=[])
+
+
+def _v1_observation_clusters(
+    tbl,
+    zoom: int,
+    species_list: list[str] | None,
+    start_date_str: str | None,
+    end_date_str: str | None,
+) -> ClusterAggregate:
+    """Aggregate a version 1 table per grid cell from its scanned coordinates, caching the result per table version."""
+    dataset = tbl.to_lance()
+    key = (dataset.version, zoom, tuple(sorted(species_list or ())), start_date_str, end_date_str)
+    with _v1_clusters_lock:
+        aggregate = _v1_clusters.get(key)
+        if aggregate is not None:
+            _v1_clusters.move_to_end(key)
+            return aggregate
+
+    expression = build_observation_filter(
+        species_list=species_list, start_date_str=start_date_str, end_date_str=end_date_str, version=1
+    )
+    table = dataset.to_table(columns=["coordinates", "species_scientific_name"], filter=expression)
+    located = pc.fill_null(pc.equal(pc.list_value_length(table.column("coordinates")), 2), False)
+    table = table.filter(located)
+    coordinates = table.column("coordinates")
+    species = table.column("species_scientific_name").cast(pa.string()).combine_chunks().dictionary_encode()
+    aggregate = aggregate_cells(
+        pc.list_element(coordinates, 0).to_numpy().astype(np.float64),
+        pc.list_element(coordinates, 1).to_numpy().astype(np.float64),
+        pc.fill_null(species.indices, -1).to_numpy().astype(np.int64),
+        species.dictionary.to_pylist(),
+        zoom,
+    )
+    with _v1_clusters_lock:
+        _v1_clusters[key] = aggregate
+        while len(_v1_clusters) > CLUSTER_CACHE_ENTRIES:
+            _v1_clusters.popitem(last=False)
+    return aggregate
+
+
+def get_observation_tile(
+    db: lancedb.DBConnection,
+    z: int,
+    x: int,
+    y: int,
+    fmt: str,
+    species_list: list[str] | None = None,
+    start_date_str: str | None = None,
+    end_date_str: str | None = None,
+) -> bytes:
+    """Render the observations in a Web Mercator map tile.
+
+    The tile holds the observations matching the filters whose location falls
+    in tile (z, x, y), at most GEO_TILE_MAX_FEATURES of them. Observations are
+    selected on the resident `observation_store` snapshot, so this needs the
+    version 2 observations schema. Rendered tiles are kept in `tile_cache`,
+    which drops a tile once observations are added inside it.
+
+    Args:
+        db (lancedb.DBConnection): The database connection object.
+        z (int): Zoom level.
+        x (int): Tile column, 0 to 2**z - 1 from west to east.
+        y (int): Tile row, 0 to 2**z - 1 from north to south.
+        fmt (str): "geojson" for a GeoJSON FeatureCollection with [lat, lon]
+            coordinates like `get_geo_layer`, or "mvt" for a Mapbox Vector Tile
+            with an "observations" point layer.
+        species_list (list[str] | None, optional): Species scientific names to keep.
+        start_date_str (str | None, optional): Start date in YYYY-MM-DD format.
+        end_date_str (str | None, optional): End date in YYYY-MM-DD format.
+
+    Returns:
+        bytes: The encoded tile; an empty tile if the table cannot be read or
+            uses the version 1 schema.
+
+    Raises:
+        ValueError: If the tile does not exist at its zoom level or `fmt` is
+            not a supported format.
+
+    Example:
+        >>> content = get_observation_tile(db, 5, 9, 12, "mvt", species_list=["Aedes aegypti"])
+    """
+    if fmt not in TILE_FORMATS:
+        raise ValueError(f"Unsupported tile format '{fmt}'. Use one of {', '.join(TILE_FORMATS)}.")
+    if z < 0 or not (0 <= x < 1 << z and 0 <= y < 1 << z):
+        raise ValueError(f"Tile {z}/{x}/{y} does not exist.")
+
+    tile = (z, x, y)
+    key = tile_cache.make_key(z, x, y, fmt, species_list, start_date_str, end_date_str)
+    try:
+        tbl = get_table(db, "observations")
+        if schema_version(tbl.schema) < 2:
+            print("Observation tiles need the version 2 observations schema; run migrate_observations.")
+            return _encode_tile([], tile, fmt)
 
-        return GeoJSONFeatureCollection(features=filtered_features)
+        observation_store.maybe_refresh(tbl)
+        cached = tile_cache.get(key, tile)
+        if cached is not None:
+            return cached
+
+        # Read before querying; a refresh in between only makes the cached tile expire early.
+        version = observation_store.version
+        records = _query_observation_store(
+            tbl,
+            species_list,
+            tuple(cell_bounds(x, y, z)),
+            start_date_str,
+            end_date_str,
+            app_settings.GEO_TILE_MAX_FEATURES,
+        )
+        # Tile edges belong to one tile only, the one the tile cache invalidates for them.
+        records = [
+            record
+            for record in records
+            if int(cell_x(record["lon"], z)) == x and int(cell_y(record["lat"], z)) == y
+        ]
+        content = _encode_tile(records, tile, fmt)
+        tile_cache.put(key, tile, version, content)
+        return content
 
     except Exception as e:
-        print(f"General error getting geo layer '{layer_type}': {e}")
-        # Return empty collection on error
-        return GeoJSONFeatureCollection(features=[])
+        print(f"General error getting observation tile {z}/{x}/{y}.{fmt}: {e}")
+        return _encode_tile([], tile, fmt)
+
+
+def _encode_tile(records: list[dict], tile: tuple[int, int, int], fmt: str) -> bytes:
+    """Encode version 2 observation rows as a GeoJSON or Mapbox Vector Tile."""
+    if fmt == "geojson":
+        return b"".join(_feature_collection_chunks("observations", [records]))
+    lat = np.array([record["lat"] for record in records], dtype=np.float64)
+    lon = np.array([record["lon"] for record in records], dtype=np.float64)
+    px, py = tile_pixels(lat, lon, *tile)
+    return encode_point_layer("observations", px, py, [_feature_properties(record) for record in records])
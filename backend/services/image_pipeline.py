@@ -0,0 +1,97 @@
+"""
+Single-decode image pipeline for uploaded photos.
+
+Uploaded images are decoded once per prediction, and the decoded image is
+shared by the classifier and the thumbnail generator. Large photos are
+decoded at reduced resolution: JPEGs use Pillow's draft mode, which lets the
+JPEG decoder scale by 1/2, 1/4 or 1/8 while decoding, and other formats are
+reduced by an integer factor right after decoding. Neither the classifier
+(224 px input) nor the thumbnails (224 and 100 px) need more than a few
+hundred pixels, so a 12 MP phone photo never has to be held at full size.
+
+Example:
+    >>> from backend.services.image_pipeline import decode_image, encode_thumbnails
+    >>> decoded = decode_image(image_data, max_side=512)
+    >>> predictions = serve(image=decoded.image, predictor_type="classifier")
+    >>> thumbnails = encode_thumbnails(decoded, [(224, 224), (100, 100)])
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+
+from PIL import Image
+
+
+@dataclass
+class DecodedImage:
+    """An uploaded image decoded once for inference and thumbnails.
+
+    Attributes:
+        image (Image.Image): The decoded RGB image, possibly at reduced resolution.
+        format (str): Format of the uploaded file, e.g. "JPEG" or "PNG".
+        original_size (tuple[int, int]): Width and height of the uploaded image.
+    """
+
+    image: Image.Image
+    format: str
+    original_size: tuple[int, int]
+
+
+def decode_image(image_data: bytes | memoryview, max_side: int = 512) -> DecodedImage:
+    """Decode an uploaded image to RGB, reducing large images while decoding.
+
+    The result is never smaller than `max_side` on its longest side unless the
+    upload itself is, so downstream resizing still starts from enough pixels.
+
+    Args:
+        image_data (bytes | memoryview): The raw uploaded image data.
+        max_side (int): Target size of the longest side. 0 decodes at full size.
+
+    Returns:
+        DecodedImage: The decoded image together with its source format and size.
+
+    Raises:
+        PIL.UnidentifiedImageError: If the data is not a supported image.
+    """
+    image = Image.open(io.BytesIO(image_data))
+    image_format = image.format or "JPEG"
+    original_size = image.size
+
+    large = max_side > 0 and max(original_size) > max_side
+    if large and image_format in ("JPEG", "MPO"):
+        # Lets libjpeg skip DCT coefficients instead of decoding every pixel.
+        image.draft("RGB", (max_side, max_side))
+
+    image = image.convert("RGB") if image.mode != "RGB" else image
+    image.load()
+
+    factor = max(image.size) // max_side if large else 1
+    if factor > 1:
+        image = image.reduce(factor)
+    return DecodedImage(image=image, format=image_format, original_size=original_size)
+
+
+def encode_thumbnails(decoded: DecodedImage, sizes: list[tuple[int, int]]) -> list[bytes]:
+    """Encode thumbnails of a decoded image in the upload's format.
+
+    Sizes are applied in order to one working copy, so each thumbnail is
+    resized from the previous one; list them from largest to smallest. The
+    shared decoded image itself is not modified.
+
+    Args:
+        decoded (DecodedImage): The decoded upload.
+        sizes (list[tuple[int, int]]): Bounding boxes, largest first.
+
+    Returns:
+        list[bytes]: Encoded thumbnails, one per size.
+    """
+    thumbnail = decoded.image.copy()
+    encoded = []
+    for size in sizes:
+        thumbnail.thumbnail(size)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, format=decoded.format)
+        encoded.append(buffer.getvalue())
+    return encoded
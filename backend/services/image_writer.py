@@ -0,0 +1,324 @@
+"""
+Bounded background writer and content-addressed storage for predicted images.
+
+Saving the uploaded photo and its thumbnails is not needed to answer a
+prediction request, so `PredictionService` hands it to a `PredictedImageWriter`
+instead of awaiting it. The writer keeps a bounded queue drained by a fixed
+number of worker tasks; encoding and file writes run in a small dedicated
+thread pool. When the queue is full new saves are dropped and counted rather
+than piling up in memory, and on shutdown the queue is drained for a bounded
+amount of time.
+
+Images are stored under the SHA-256 digest of their content, sharded by the
+first two hex characters::
+
+    predicted/original/3f/3fa9...c2.jpg
+    predicted/224x224/3f/3fa9...c2.jpg
+    predicted/100x100/3f/3fa9...c2.jpg
+
+An upload that is already stored, or already queued, is neither re-encoded
+nor rewritten. `collect_garbage` removes stored images that no observation
+references any more.
+
+Example:
+    >>> from backend.services.image_writer import PredictedImageWriter, predicted_image_name
+    >>> writer = PredictedImageWriter("backend/static/images/predicted", max_queue=256, workers=2)
+    >>> writer.submit(image_data, predicted_image_name(digest, "JPEG"), decoded)
+    True
+    >>> await writer.close()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from backend.services.image_pipeline import DecodedImage, decode_image, encode_thumbnails
+from backend.services.metrics import counter, gauge, histogram
+
+PREDICTED_IMAGES_DIR = "backend/static/images/predicted"
+PREDICTED_IMAGES_URL = "/static/images/predicted"
+THUMBNAIL_SIZES = {"224x224": (224, 224), "100x100": (100, 100)}
+IMAGE_FOLDERS = ("original", *THUMBNAIL_SIZES)
+IMAGE_EXTENSIONS = {"JPEG": ".jpg", "MPO": ".jpg", "PNG": ".png", "WEBP": ".webp", "GIF": ".gif", "BMP": ".bmp"}
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+WRITER_QUEUE_DEPTH = gauge(
+    "culicidaelab_image_writer_queue_depth",
+    "Predicted images waiting to be written.",
+)
+WRITER_DROPPED = counter(
+    "culicidaelab_image_writer_dropped_total",
+    "Predicted images not saved because the writer queue was full or closed.",
+)
+WRITER_WRITES = counter(
+    "culicidaelab_image_writer_writes_total",
+    "Predicted image saves by outcome (ok, duplicate, error).",
+    ["outcome"],
+)
+WRITER_LATENCY = histogram(
+    "culicidaelab_image_writer_write_seconds",
+    "Time taken to encode and write one predicted image and its thumbnails.",
+)
+
+
+def predicted_image_name(digest: str, image_format: str) -> str:
+    """Return the content-addressed file name for an image.
+
+    Args:
+        digest (str): Hex SHA-256 digest of the uploaded image bytes.
+        image_format (str): Pillow format name of the upload, e.g. "JPEG".
+
+    Returns:
+        str: The digest plus an extension matching the format.
+    """
+    return f"{digest}{IMAGE_EXTENSIONS.get(image_format, '.' + image_format.lower())}"
+
+
+def predicted_image_relpath(folder: str, filename: str) -> str:
+    """Return the path of a stored image relative to the predicted images directory."""
+    return f"{folder}/{filename[:2]}/{filename}"
+
+
+def predicted_image_url(folder: str, filename: str) -> str:
+    """Return the static URL under which a stored image is served."""
+    return f"{PREDICTED_IMAGES_URL}/{predicted_image_relpath(folder, filename)}"
+
+
+class PredictedImageWriter:
+    """Saves predicted images and their thumbnails from a bounded background queue.
+
+    Attributes:
+        base_dir (Path): Directory holding the ``original`` and thumbnail folders.
+        max_queue (int): Maximum number of saves waiting in the queue.
+        workers (int): Number of saves processed at the same time.
+        decode_max_side (int): Decode size used when no decoded image is supplied.
+    """
+
+    def __init__(
+        self,
+        base_dir: str | Path = PREDICTED_IMAGES_DIR,
+        max_queue: int = 256,
+        workers: int = 2,
+        decode_max_side: int = 512,
+    ):
+        """Initialize the writer.
+
+        The queue, worker tasks and thread pool are created lazily on first
+        use, so the writer can be constructed at import time.
+
+        Args:
+            base_dir: Output directory for predicted images.
+            max_queue: Queue capacity. Values below 1 are treated as 1.
+            workers: Worker count. Values below 1 are treated as 1.
+            decode_max_side: Passed to `decode_image` for saves without a decoded image.
+        """
+        self.base_dir = Path(base_dir)
+        self.max_queue = max(1, int(max_queue))
+        self.workers = max(1, int(workers))
+        self.decode_max_side = decode_max_side
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending: set[str] = set()
+        self._directories: set[Path] = set()
+        self._directories_lock = threading.Lock()
+        WRITER_QUEUE_DEPTH.set_function(lambda: self.queue_depth)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of saves waiting in the queue."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, image_data: bytes | memoryview, filename: str, decoded: DecodedImage | None = None) -> bool:
+        """Queue an image for saving without waiting for it.
+
+        Args:
+            image_data (bytes | memoryview): The raw uploaded image, saved as the
+                original. A memoryview is copied, since the upload buffer it
+                points into is released when the request finishes.
+            filename (str): File name used in every output folder.
+            decoded (DecodedImage | None): The image as decoded for inference,
+                reused for the thumbnails.
+
+        Returns:
+            bool: True if the save was queued or the same file is already
+                queued, False if it was dropped because the queue is full.
+        """
+        queue = self._ensure_workers()
+        if filename in self._pending:
+            WRITER_WRITES.inc(outcome="duplicate")
+            return True
+        if queue.full():
+            WRITER_DROPPED.inc()
+            print(f"[WRITER] Queue full ({self.max_queue}). Dropping predicted image '{filename}'.")
+            return False
+        if not isinstance(image_data, bytes):
+            image_data = bytes(image_data)
+        queue.put_nowait((image_data, filename, decoded))
+        self._pending.add(filename)
+        return True
+
+    async def write(self, image_data: bytes | memoryview, filename: str, decoded: DecodedImage | None = None):
+        """Save an image now, bypassing the queue, and wait until it is written.
+
+        Raises:
+            Exception: Any error raised while encoding or writing the files.
+        """
+        await self._process((image_data, filename, decoded), raise_errors=True)
+
+    async def close(self, timeout: float = 10.0):
+        """Drain the queue for up to `timeout` seconds, then stop the workers.
+
+        Saves still queued when the timeout expires are dropped and counted.
+        """
+        if self._queue is not None and self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                remaining = self._queue.qsize()
+                WRITER_DROPPED.inc(remaining)
+                print(f"[WRITER] Drain timed out after {timeout}s. Dropping {remaining} queued image(s).")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, True)
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        """Create the queue and worker tasks for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._loop = loop
+            self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+        return self._queue
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image-writer")
+        return self._pool
+
+    async def _run(self):
+        """Worker loop: take a save from the queue and process it."""
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._process(job)
+            finally:
+                self._pending.discard(job[1])
+                queue.task_done()
+
+    async def _process(self, job: tuple[bytes, str, DecodedImage | None], raise_errors: bool = False):
+        started = time.perf_counter()
+        try:
+            written = await asyncio.get_running_loop().run_in_executor(self._get_pool(), self._write_files, *job)
+            WRITER_WRITES.inc(outcome="ok" if written else "duplicate")
+        except Exception as e:
+            WRITER_WRITES.inc(outcome="error")
+            print(f"Error saving predicted image '{job[1]}': {type(e).__name__} - {str(e)}")
+            if raise_errors:
+                raise
+        finally:
+            WRITER_LATENCY.observe(time.perf_counter() - started)
+
+    def _path(self, folder: str, filename: str) -> Path:
+        return self.base_dir / predicted_image_relpath(folder, filename)
+
+    def _ensure_directory(self, directory: Path):
+        """Create an output folder the first time this writer uses it."""
+        if directory in self._directories:
+            return
+        with self._directories_lock:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._directories.add(directory)
+
+    def _write_files(self, image_data: bytes, filename: str, decoded: DecodedImage | None) -> bool:
+        """Encode the thumbnails and write all files; runs in the writer's thread pool.
+
+        Returns:
+            bool: False if every file was already stored and nothing was written.
+        """
+        paths = [self._path(folder, filename) for folder in IMAGE_FOLDERS]
+        if all(path.exists() for path in paths) and self._touch(paths):
+            return False
+
+        if decoded is None:
+            decoded = decode_image(image_data, self.decode_max_side)
+        thumbnails = encode_thumbnails(decoded, list(THUMBNAIL_SIZES.values()))
+
+        # The original is written last, so its presence marks a complete entry.
+        for path, data in [*zip(paths[1:], thumbnails), (paths[0], image_data)]:
+            self._ensure_directory(path.parent)
+            tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def _touch(paths: list[Path]) -> bool:
+        """Refresh the mtime of stored files, so `collect_garbage` keeps a reused image.
+
+        Returns:
+            bool: False if a file disappeared meanwhile and the entry must be rewritten.
+        """
+        try:
+            for path in paths:
+                os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+
+def collect_garbage(
+    base_dir: str | Path,
+    referenced_digests: set[str],
+    min_age_seconds: float = 86400.0,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """Delete stored images whose digest no observation references.
+
+    Only content-addressed files (named by a SHA-256 digest inside a shard
+    folder) are considered. Files younger than `min_age_seconds` are kept, so
+    images of predictions that have not been submitted as observations yet,
+    or whose results are still cached, survive.
+
+    Args:
+        base_dir (str | Path): The predicted images directory.
+        referenced_digests (set[str]): Digests referenced by observations.
+        min_age_seconds (float): Minimum file age before it may be deleted.
+        dry_run (bool): Only count what would be deleted.
+
+    Returns:
+        dict[str, int]: Counts of ``scanned``, ``kept``, ``deleted`` files and
+            ``freed_bytes``.
+    """
+    base_dir = Path(base_dir)
+    cutoff = time.time() - min_age_seconds
+    report = {"scanned": 0, "kept": 0, "deleted": 0, "freed_bytes": 0}
+    for folder in IMAGE_FOLDERS:
+        for path in (base_dir / folder).glob("??/*"):
+            digest = path.name.split(".", 1)[0]
+            if not path.is_file() or not DIGEST_PATTERN.fullmatch(digest):
+                continue
+            report["scanned"] += 1
+            stat = path.stat()
+            if digest in referenced_digests or stat.st_mtime > cutoff:
+                report["kept"] += 1
+                continue
+            if not dry_run:
+                path.unlink(missing_ok=True)
+            report["deleted"] += 1
+            report["freed_bytes"] += stat.st_size
+    return report
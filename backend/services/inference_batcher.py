@@ -0,0 +1,221 @@
+"""
+Micro-batching scheduler for model inference.
+
+This module provides an asyncio-based scheduler that collects concurrent
+inference requests for a short, bounded window and runs them as a single
+batched call off the event loop. Up to `max_concurrent_batches` batches run at
+once, so a pool with several workers is kept busy. Each caller awaits its own
+future, so the batching is transparent to the code that submits work.
+
+The time each request waits for its batch to form is recorded as the
+``batch_wait`` stage, and the stages of the batched call it was part of are
+added to the request's stage timings.
+
+Example:
+    >>> from backend.services.inference_batcher import InferenceBatcher
+    >>> batcher = InferenceBatcher(run_batch, max_batch_size=16, max_wait_ms=10)
+    >>> prediction = await batcher.submit(image_data)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from backend.services.stage_timing import StageTimings, collect_stages, current_stages, record_stage
+
+
+class InferenceBatcher:
+    """Collects concurrent inference requests and runs them in batches.
+
+    A single background task drains the request queue. It waits for the first
+    request, then keeps collecting until either `max_batch_size` items are
+    queued or `max_wait_ms` has elapsed, and hands the whole batch to
+    `batch_fn` off the event loop in a task of its own. At most
+    `max_concurrent_batches` batches run at once; while all of them are busy,
+    new requests accumulate in the queue and form the next batch.
+
+    If the batched call fails, the items are retried one by one so that a
+    single bad image does not fail the requests it happened to be batched
+    with.
+
+    Attributes:
+        batch_fn (Callable[[list[Any]], list[Any]]): Synchronous function that
+            takes a list of inputs and returns a list of results in the same
+            order.
+        max_batch_size (int): Maximum number of items passed to one call.
+        max_wait_ms (float): Maximum time the first item of a batch waits for
+            companions before the batch is run.
+        run_in_executor (Callable[..., Awaitable[Any]]): Coroutine function used
+            to run `batch_fn` off the event loop, `asyncio.to_thread` by default.
+        max_concurrent_batches (int): Maximum number of batches running at once,
+            normally the worker count of the executor behind `run_in_executor`.
+
+    Example:
+        >>> batcher = InferenceBatcher(lambda xs: [x * 2 for x in xs], max_batch_size=8, max_wait_ms=5)
+        >>> await batcher.submit(21)
+        42
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[list[Any]], list[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        run_in_executor: Callable[..., Awaitable[Any]] | None = None,
+        max_concurrent_batches: int = 1,
+    ):
+        """Initialize the batcher.
+
+        The queue and the worker task are created lazily on the first call to
+        `submit`, so the batcher can be constructed at import time outside of
+        a running event loop.
+
+        Args:
+            batch_fn: Function that runs inference for a list of inputs.
+            max_batch_size: Maximum number of items per batch. Values below 1
+                are treated as 1.
+            max_wait_ms: Collection window in milliseconds.
+            run_in_executor: Optional replacement for `asyncio.to_thread`, for
+                example `InferenceExecutor.run`.
+            max_concurrent_batches: Maximum number of batches in flight. Values
+                below 1 are treated as 1.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.run_in_executor = run_in_executor or asyncio.to_thread
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._batches: set[asyncio.Task] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item for batched inference and wait for its result.
+
+        Args:
+            item: A single input accepted by `batch_fn`.
+
+        Returns:
+            Any: The result produced for this item.
+
+        Raises:
+            Exception: Whatever `batch_fn` raised while processing this item.
+        """
+        queue = self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((item, future, current_stages(), time.perf_counter()))
+        return await future
+
+    async def close(self):
+        """Stop the worker and running batches, and fail any requests still waiting for a result."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        for task in self._batches:
+            task.cancel()
+        await asyncio.gather(*self._batches, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference batcher was closed"))
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Create the queue and worker task for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._loop = loop
+            # Run the worker in an empty context so that it does not inherit the
+            # stage timings of the request that happened to start it.
+            self._worker = loop.create_task(self._run(), context=contextvars.Context())
+        return self._queue  # type: ignore[return-value]
+
+    async def _run(self):
+        """Worker loop: wait for a free batch slot, collect a batch, dispatch it, repeat."""
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrent_batches)
+        while True:
+            await slots.acquire()
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = loop.create_task(self._dispatch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _dispatch(self, batch: list[tuple[Any, asyncio.Future, StageTimings | None, float]]):
+        """Execute a batch, failing its requests if the batcher is closed while it runs."""
+        try:
+            await self._execute(batch)
+        except asyncio.CancelledError:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Inference batcher was closed"))
+            raise
+
+    async def _execute(self, batch: list[tuple[Any, asyncio.Future, StageTimings | None, float]]):
+        """Run one batch and resolve the futures of its requests."""
+        dispatched = time.perf_counter()
+        for _, _, stages, enqueued in batch:
+            record_stage("batch_wait", dispatched - enqueued, stages)
+        items = [item for item, *_ in batch]
+        with collect_stages() as batch_stages:
+            try:
+                results = await self.run_in_executor(self.batch_fn, items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"Batch function returned {len(results)} results for {len(items)} inputs")
+            except Exception as batch_exc:
+                if len(batch) == 1:
+                    self._resolve(batch[0], batch_stages, exception=batch_exc)
+                    return
+                # Retry individually so one failing input does not fail its neighbours.
+                for entry in batch:
+                    try:
+                        result = (await self.run_in_executor(self.batch_fn, [entry[0]]))[0]
+                    except Exception as item_exc:
+                        self._resolve(entry, batch_stages, exception=item_exc)
+                    else:
+                        self._resolve(entry, batch_stages, result=result)
+                return
+
+        for entry, result in zip(batch, results):
+            self._resolve(entry, batch_stages, result=result)
+
+    @staticmethod
+    def _resolve(
+        entry: tuple[Any, asyncio.Future, StageTimings | None, float],
+        batch_stages: StageTimings,
+        result: Any = None,
+        exception: BaseException | None = None,
+    ):
+        """Set a request's outcome unless it already gave up, adding the batch's stages to its own."""
+        _, future, stages, _ = entry
+        if future.done():
+            return
+        if stages is not None:
+            stages.merge(batch_stages)
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
@@ -0,0 +1,328 @@
+"""
+Execution backends for running model inference off the event loop.
+
+This module decides where the synchronous classifier calls made by
+`PredictionService` actually run:
+
+- ``default``: the event loop's default thread executor (`asyncio.to_thread`),
+  shared with aiofiles and every other `to_thread` call.
+- ``thread``: a dedicated, fixed-size thread pool used only for inference.
+- ``process``: a pool of worker processes, each loading and warming its own
+  copy of the model at start-up. Pre-processing, the forward pass and
+  post-processing happen inside the worker, so they do not compete with the
+  event loop for the GIL. A pool whose worker crashed is replaced and the call
+  is retried once.
+
+Uploads are decoded before they reach any of these backends, on the
+prediction service's own bounded decode pool (`PREDICTION_DECODE_WORKERS`),
+because the decoded image is also needed for near-duplicate lookups and
+thumbnails. Decoding scales images down to `PREDICTION_DECODE_MAX_SIDE`, so the
+pixels pickled to a worker process stay small.
+
+It also holds the worker-side inference functions, which must be importable
+module-level callables so they can be sent to worker processes. The
+CulicidaeLab library is imported inside these functions, on first use, so
+that importing this module does not load the ML stack.
+
+Example:
+    >>> from backend.services.inference_executor import InferenceExecutor, serve_batch
+    >>> executor = InferenceExecutor("process", workers=8)
+    >>> predictions = await executor.run(serve_batch, [image_data])
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import io
+import multiprocessing
+import os
+import pathlib
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Any
+
+from PIL import Image
+
+from backend.services.stage_timing import record_stage
+
+if TYPE_CHECKING:
+    from culicidaelab.predictors import MosquitoClassifier
+
+EXECUTOR_KINDS = ("default", "thread", "process")
+
+_batch_classifiers: dict[tuple[str | None, int], MosquitoClassifier] = {}
+_batch_classifier_lock = threading.Lock()
+
+
+def get_settings():
+    """Return the CulicidaeLab library settings, importing the library on first use."""
+    from culicidaelab.core.settings import get_settings as get_library_settings
+
+    return get_library_settings()
+
+
+def serve(**kwargs: Any):
+    """Classify one image with `culicidaelab.serve.serve`, importing the library on first use.
+
+    Accepts the same keyword arguments as `culicidaelab.serve.serve`.
+    """
+    from culicidaelab.serve import serve as library_serve
+
+    return library_serve(**kwargs)
+
+
+class _FixedWeights:
+    """Weights manager that always returns one ONNX file.
+
+    Lets the library's ONNX classifier backend load a model variant, such as a
+    distilled or quantized export of the production classifier, that is not
+    registered in the library configuration.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+
+    def ensure_weights(self, predictor_type: str, backend_type: str) -> pathlib.Path:
+        return pathlib.Path(self.model_path)
+
+
+def _get_batch_classifier(model_path: str | None = None, generation: int = 0) -> MosquitoClassifier:
+    """Build a serving classifier once per process, model and generation.
+
+    Args:
+        model_path (str | None): ONNX file of a model variant sharing the
+            production classifier's labels and pre-processing, or None for the
+            production classifier itself.
+        generation (int): Model generation. A reloaded model gets a new
+            generation, so it is built afresh even if its path is unchanged.
+    """
+    with _batch_classifier_lock:
+        classifier = _batch_classifiers.get((model_path, generation))
+        if classifier is None:
+            from culicidaelab.predictors import MosquitoClassifier
+            from culicidaelab.predictors.backend_factory import create_backend
+
+            lib_settings = get_settings()
+            if model_path is None:
+                backend = create_backend(predictor_type="classifier", settings=lib_settings, mode="serve")
+            else:
+                from culicidaelab.predictors.backends.classifier._onnx import ClassifierONNXBackend
+
+                backend = ClassifierONNXBackend(
+                    weights_manager=_FixedWeights(model_path),
+                    config=lib_settings.get_config("predictors.classifier"),
+                )
+            classifier = MosquitoClassifier(lib_settings, predictor_type="classifier", backend=backend)
+            _batch_classifiers[model_path, generation] = classifier
+        return classifier
+
+
+def release_classifier(model_path: str | None = None, generation: int = 0):
+    """Unload a cached classifier so its memory can be reclaimed.
+
+    Generation 0 of the production classifier is also the one cached by
+    `culicidaelab.serve.serve`, so that cache is cleared as well.
+
+    Args:
+        model_path (str | None): The model's ONNX file, or None for the production classifier.
+        generation (int): The model generation to release.
+    """
+    with _batch_classifier_lock:
+        classifier = _batch_classifiers.pop((model_path, generation), None)
+    if classifier is not None:
+        classifier.unload_model()
+    if model_path is None and generation == 0:
+        from culicidaelab.serve import clear_serve_cache
+
+        clear_serve_cache()
+
+
+def serve_batch(images: list[Image.Image | bytes], model_path: str | None = None, generation: int = 0) -> list:
+    """Classify several images with one call to the serving classifier.
+
+    `culicidaelab.serve.serve` only accepts a single image, so this helper builds
+    the same ONNX-backed classifier once, keeps it cached for the lifetime of the
+    process, and hands the decoded images to its `predict_batch` method.
+
+    Args:
+        images (list[Image.Image | bytes]): Decoded RGB images, or raw image data
+            that is decoded here, for each item of the batch.
+        model_path (str | None): ONNX file of a model variant to use instead of
+            the production classifier.
+        generation (int): Model generation, see `_get_batch_classifier`.
+
+    Returns:
+        list: One `ClassificationPrediction` per input image, in input order.
+    """
+    classifier = _get_batch_classifier(model_path, generation)
+    decoded = [
+        image if isinstance(image, Image.Image) else Image.open(io.BytesIO(image)).convert("RGB") for image in images
+    ]
+    return classifier.predict_batch(decoded)
+
+
+def serve_variant(image: Image.Image, model_path: str | None = None, generation: int = 0):
+    """Classify one image with a specific model variant or generation.
+
+    Args:
+        image (Image.Image): The decoded RGB image.
+        model_path (str | None): ONNX file of the model variant, or None for
+            the production classifier.
+        generation (int): Model generation, see `_get_batch_classifier`.
+
+    Returns:
+        ClassificationPrediction: The model's prediction for the image.
+    """
+    return _get_batch_classifier(model_path, generation).predict(image)
+
+
+def warm_up_worker(batched: bool = False, model_path: str | None = None, generation: int = 0):
+    """Load the model in a freshly started worker process.
+
+    Runs as the process pool initializer, so the first request routed to a
+    worker does not pay for model loading.
+
+    Args:
+        batched (bool): Warm the classifier used by `serve_batch` instead of the
+            one cached by `culicidaelab.serve.serve`.
+        model_path (str | None): ONNX file of the model to warm, if not the
+            production classifier.
+        generation (int): Model generation to warm.
+    """
+    try:
+        if batched or model_path is not None or generation > 0:
+            _get_batch_classifier(model_path, generation).load_model()
+        else:
+            serve(image=Image.new("RGB", (32, 32)), predictor_type="classifier")
+    except Exception as e:
+        print(f"[WORKER {os.getpid()}] Model warm-up failed: {type(e).__name__} - {e}")
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple, kwargs: dict) -> tuple[Any, float, float]:
+    """Call `fn` on a worker and return its result with the worker-side start and end times.
+
+    `time.perf_counter` uses a system-wide monotonic clock on the platforms we
+    deploy to, so the times can be compared with the submitting process.
+    """
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, started, time.perf_counter()
+
+
+class InferenceExecutor:
+    """Runs synchronous inference callables on the configured execution backend.
+
+    Attributes:
+        kind (str): One of ``default``, ``thread`` or ``process``.
+        workers (int): Size of the dedicated pool; unused for ``default``.
+        batched (bool): Whether process workers should warm the batch classifier.
+        model_path (str | None): Model process workers warm, if not the
+            production classifier.
+        generation (int): Model generation process workers warm.
+        restarts (int): Number of times a broken process pool was replaced.
+
+    Example:
+        >>> executor = InferenceExecutor("thread", workers=4)
+        >>> prediction = await executor.run(serve, image=image_data, predictor_type="classifier")
+        >>> executor.shutdown()
+    """
+
+    def __init__(
+        self,
+        kind: str = "default",
+        workers: int = 0,
+        batched: bool = False,
+        model_path: str | None = None,
+        generation: int = 0,
+    ):
+        """Initialize the executor.
+
+        The pool itself is created lazily on first use.
+
+        Args:
+            kind: Execution backend name.
+            workers: Pool size; 0 means one worker per CPU core.
+            batched: Warm the batch classifier in process workers.
+            model_path: Model warmed in process workers.
+            generation: Model generation warmed in process workers.
+
+        Raises:
+            ValueError: If `kind` is not a known execution backend.
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown inference executor '{kind}'. Valid options are: {', '.join(EXECUTOR_KINDS)}")
+        self.kind = kind
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.batched = batched
+        self.model_path = model_path
+        self.generation = generation
+        self.restarts = 0
+        self._pool: Executor | None = None
+        self._pool_lock = threading.Lock()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run `fn(*args, **kwargs)` on the execution backend and await its result.
+
+        Args:
+            fn: A synchronous, module-level callable (picklable for ``process``).
+            *args: Positional arguments for `fn`.
+            **kwargs: Keyword arguments for `fn`.
+
+        The time spent waiting for a free worker and the time spent running
+        `fn` are recorded as the ``queue_wait`` and ``inference`` stages.
+
+        Returns:
+            Any: The return value of `fn`.
+        """
+        call = functools.partial(_timed_call, fn, args, kwargs)
+        submitted = time.perf_counter()
+        if self.kind == "default":
+            result, started, finished = await asyncio.to_thread(call)
+        else:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            try:
+                result, started, finished = await loop.run_in_executor(pool, call)
+            except BrokenProcessPool:
+                print("[EXECUTOR] Inference worker process died. Restarting the process pool and retrying once.")
+                self._replace_pool(pool)
+                result, started, finished = await loop.run_in_executor(self._get_pool(), call)
+        record_stage("queue_wait", started - submitted)
+        record_stage("inference", finished - started)
+        return result
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the dedicated pool, if one was started."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _get_pool(self) -> Executor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = self._create_pool()
+            return self._pool
+
+    def _replace_pool(self, broken: Executor):
+        with self._pool_lock:
+            if self._pool is broken:
+                self._pool = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _create_pool(self) -> Executor:
+        if self.kind == "thread":
+            return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        # Spawn rather than fork: the server process already runs the event loop
+        # and native inference threads, which must not be duplicated into children.
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up_worker,
+            initargs=(self.batched, self.model_path, self.generation),
+        )
@@ -0,0 +1,255 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+This module provides lightweight counters, gauges and histograms that service
+modules can register at import time and update from request handlers or
+worker threads. The registry is rendered in the Prometheus text format by the
+`/metrics` endpoint, which is the path scraped by the monitoring stack.
+
+Example:
+    >>> from backend.services.metrics import counter, histogram
+    >>> requests_total = counter("culicidaelab_example_total", "Example events", ["outcome"])
+    >>> requests_total.inc(outcome="ok")
+    >>> latency = histogram("culicidaelab_example_seconds", "Example latency")
+    >>> latency.observe(0.042)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections.abc import Callable, Iterator, Sequence
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: dict[str, str] | None = None) -> str:
+    """Render a label set as `{name="value",...}`, or an empty string."""
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.extend(extra.items())
+    if not pairs:
+        return ""
+    rendered = []
+    for name, value in pairs:
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        rendered.append(f'{name}="{escaped}"')
+    return "{" + ",".join(rendered) + "}"
+
+
+class _Metric:
+    """Base class holding the name, help text and label names of a metric."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        """Yield (sample name, rendered labels, value) triples."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing value, optionally split by labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the counter for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        """Return the current value for the given label values."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, or be sampled from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._functions: dict[tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        """Set the gauge for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the gauge for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        """Decrease the gauge for the given label values."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Sample the gauge from `fn` whenever metrics are collected."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels) -> float:
+        """Return the current value for the given label values."""
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        return float(fn()) if fn else self._values.get(key, 0.0)
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = dict(self._values)
+            functions = dict(self._functions)
+        for key, fn in functions.items():
+            try:
+                items[key] = float(fn())
+            except Exception:
+                continue
+        for key, value in items.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram(_Metric):
+    """Cumulative histogram of observed values, optionally split by labels."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b))) + (math.inf,)
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        """Record one observation for the given label values."""
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels) -> int:
+        """Return the number of observations for the given label values."""
+        return sum(self._counts.get(self._key(labels), []))
+
+    def samples(self) -> Iterator[tuple[str, str, float]]:
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = {"le": _format_value(bound)}
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, le), cumulative
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class MetricsRegistry:
+    """Holds every registered metric and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create(self, metric_class: type[_Metric], name: str, documentation: str, **kwargs) -> _Metric:
+        """Return the metric registered under `name`, creating it if needed.
+
+        Raises:
+            ValueError: If a metric of a different type is already registered
+                under the same name.
+        """
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, documentation, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.type_name}")
+            return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in sorted(metrics, key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get or create a counter in the global registry."""
+    return REGISTRY.get_or_create(Counter, name, documentation, labelnames=labelnames)  # type: ignore[return-value]
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Get or create a gauge in the global registry."""
+    return REGISTRY.get_or_create(Gauge, name, documentation, labelnames=labelnames)  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Get or create a histogram in the global registry."""
+    return REGISTRY.get_or_create(  # type: ignore[return-value]
+        Histogram,
+        name,
+        documentation,
+        labelnames=labelnames,
+        buckets=buckets,
+    )
@@ -0,0 +1,200 @@
+"""
+Perceptual-hash index for reusing predictions of near-duplicate photos.
+
+Field users often upload bursts of almost identical photos of one specimen.
+Re-encoding, resizing and EXIF edits change the bytes, so the exact-digest
+`PredictionCache` misses them. This module hashes the decoded image with a
+difference hash (dHash), which stays the same or changes in only a few bits
+under such edits. It keeps recent hashes in memory and looks them up by
+Hamming distance.
+
+The lookup uses multi-index hashing. Each hash is split into
+``max_distance + 1`` bands and stored in one bucket per band. Two hashes
+that differ in at most ``max_distance`` bits must have at least one band in
+common (pigeonhole principle), so a lookup only compares against entries
+sharing a band. It does not scan the whole index.
+
+Images with almost no detail (blank frames, solid colours) hash to nearly
+the same value whatever their content, so they are never indexed.
+
+Example:
+    >>> from backend.services.near_duplicate_index import NearDuplicateIndex, perceptual_hash
+    >>> index = NearDuplicateIndex(max_distance=4, window_seconds=120)
+    >>> image_hash = perceptual_hash(decoded.image)
+    >>> index.add(image_hash, "model-a", result)
+    >>> index.get(perceptual_hash(reencoded.image), "model-a")
+    PredictionResult(...)
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+from PIL import Image, ImageStat
+
+from backend.services.metrics import counter
+
+NEAR_DUPLICATE_LOOKUPS = counter(
+    "culicidaelab_prediction_near_duplicate_lookups_total",
+    "Near-duplicate index lookups by outcome (hit, miss, skipped for images without detail).",
+    ["outcome"],
+)
+
+MIN_DETAIL_STDDEV = 2.0
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 8) -> int | None:
+    """Return the difference hash (dHash) of an image.
+
+    The image is reduced to a ``(hash_size + 1) x hash_size`` grayscale
+    thumbnail, and each bit records whether a pixel is brighter than its
+    right-hand neighbour.
+
+    Args:
+        image (Image.Image): The decoded image.
+        hash_size (int): Rows of the thumbnail; the hash has ``hash_size ** 2`` bits.
+
+    Returns:
+        int | None: The hash, or None if the image has too little detail to
+            be told apart from other images by its hash.
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BOX)
+    if ImageStat.Stat(thumbnail).stddev[0] < MIN_DETAIL_STDDEV:
+        return None
+    pixels = thumbnail.tobytes()
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for column in range(hash_size):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+class NearDuplicateIndex:
+    """Recent prediction results indexed by perceptual hash.
+
+    Attributes:
+        max_distance (int): Largest Hamming distance at which two hashes count
+            as the same photo.
+        window_seconds (float): How long a result can be reused. 0 disables
+            the index.
+        max_entries (int): Maximum number of results kept; the oldest are
+            dropped first.
+        hash_bits (int): Bit length of the hashes stored.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 4,
+        window_seconds: float = 0.0,
+        max_entries: int = 4096,
+        hash_bits: int = 64,
+    ):
+        """Initialize the index.
+
+        Args:
+            max_distance: Hamming distance threshold. Values below 0 are treated as 0.
+            window_seconds: Reuse window; 0 or less disables the index.
+            max_entries: Capacity. Values below 1 are treated as 1.
+            hash_bits: Bit length of the hashes, ``hash_size ** 2`` of `perceptual_hash`.
+        """
+        self.max_distance = max(0, int(max_distance))
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.max_entries = max(1, int(max_entries))
+        self.hash_bits = hash_bits
+        bands = min(self.max_distance + 1, hash_bits)
+        width, extra = divmod(hash_bits, bands)
+        # Band boundaries as (shift, mask); the first `extra` bands get one more bit.
+        self._bands: list[tuple[int, int]] = []
+        shift = hash_bits
+        for band in range(bands):
+            bits = width + (1 if band < extra else 0)
+            shift -= bits
+            self._bands.append((shift, (1 << bits) - 1))
+        self._entries: OrderedDict[int, tuple[int, str, Any, float]] = OrderedDict()
+        self._buckets: dict[tuple[str, int, int], set[int]] = {}
+        self._next_id = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether results are indexed and reused."""
+        return self.window_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, image_hash: int | None, model_key: str) -> Any | None:
+        """Return the result of the closest near-identical image seen within the window.
+
+        Args:
+            image_hash (int | None): Hash of the new image, None if it had too
+                little detail to hash.
+            model_key (str): Identity of the model configuration; results of
+                other models are never returned.
+
+        Returns:
+            Any | None: The stored result with the smallest Hamming distance
+                (the most recent one on ties), or None if no stored image is
+                close enough.
+        """
+        if image_hash is None:
+            NEAR_DUPLICATE_LOOKUPS.inc(outcome="skipped")
+            return None
+        self._prune()
+        best: tuple[tuple[int, float], Any] | None = None
+        for entry_id in self._candidates(image_hash, model_key):
+            stored_hash, _, result, added_at = self._entries[entry_id]
+            distance = (stored_hash ^ image_hash).bit_count()
+            # Closest first, then most recent.
+            rank = (distance, -added_at)
+            if distance <= self.max_distance and (best is None or rank < best[0]):
+                best = (rank, result)
+        NEAR_DUPLICATE_LOOKUPS.inc(outcome="hit" if best is not None else "miss")
+        return best[1] if best is not None else None
+
+    def add(self, image_hash: int | None, model_key: str, result: Any):
+        """Store the result predicted for an image. Images without a hash are not stored."""
+        if image_hash is None:
+            return
+        self._prune()
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (image_hash, model_key, result, time.monotonic())
+        for key in self._band_keys(image_hash, model_key):
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        """Forget every stored result."""
+        self._entries.clear()
+        self._buckets.clear()
+
+    def _band_keys(self, image_hash: int, model_key: str) -> list[tuple[str, int, int]]:
+        return [(model_key, band, (image_hash >> shift) & mask) for band, (shift, mask) in enumerate(self._bands)]
+
+    def _candidates(self, image_hash: int, model_key: str) -> set[int]:
+        candidates: set[int] = set()
+        for key in self._band_keys(image_hash, model_key):
+            candidates.update(self._buckets.get(key, ()))
+        return candidates
+
+    def _prune(self):
+        """Drop entries older than the reuse window."""
+        cutoff = time.monotonic() - self.window_seconds
+        while self._entries:
+            entry_id, (_, _, _, added_at) = next(iter(self._entries.items()))
+            if added_at >= cutoff:
+                break
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: int):
+        image_hash, model_key, _, _ = self._entries.pop(entry_id)
+        for key in self._band_keys(image_hash, model_key):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
@@ -0,0 +1,198 @@
+"""
+Zoom-aware grid aggregation of observations for the map.
+
+At low zoom levels the map cannot show individual observations, so
+`/geo/observations/clusters` returns one cluster per grid cell instead. The
+grid at zoom z is the Web Mercator tile grid of zoom z + `CLUSTER_SUBDIVISIONS`,
+so each 256 px map tile holds at most 4 x 4 clusters of 64 px and a viewport
+holds about the same number of clusters at every zoom level.
+
+`aggregate_cells` computes, for every occupied cell, the number of
+observations, their centroid and a per-species breakdown. The result is a
+`ClusterAggregate` of NumPy arrays covering the whole table at one zoom
+level. Callers cache it per zoom level and filters (see
+`ObservationStore.clusters`) and select the cells in the viewport with
+`ClusterAggregate.select`.
+
+Example:
+    >>> aggregate = aggregate_cells(lat, lon, species, species_names, zoom=3)
+    >>> clusters = aggregate.to_clusters(aggregate.select((-75.0, 40.0, -73.0, 41.0)))
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+CLUSTER_SUBDIVISIONS = 2
+MAX_CLUSTER_ZOOM = 20
+MAX_MERCATOR_LAT = 85.0511287798
+
+
+def cell_x(lon: np.ndarray | float, level: int) -> np.ndarray:
+    """Return the Web Mercator tile column of longitudes at a grid level."""
+    cells = 1 << level
+    x = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * cells)
+    return np.clip(x, 0, cells - 1).astype(np.int64)
+
+
+def cell_y(lat: np.ndarray | float, level: int) -> np.ndarray:
+    """Return the Web Mercator tile row of latitudes at a grid level (0 is the north edge)."""
+    cells = 1 << level
+    phi = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    y = np.floor((1.0 - np.arcsinh(np.tan(phi)) / math.pi) / 2.0 * cells)
+    return np.clip(y, 0, cells - 1).astype(np.int64)
+
+
+def cell_bounds(x: int, y: int, level: int) -> list[float]:
+    """Return the (min_lon, min_lat, max_lon, max_lat) bounds of a grid cell."""
+    cells = 1 << level
+
+    def lat_of(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1.0 - 2.0 * row / cells))))
+
+    return [x / cells * 360.0 - 180.0, lat_of(y + 1), (x + 1) / cells * 360.0 - 180.0, lat_of(y)]
+
+
+@dataclass(frozen=True)
+class ClusterAggregate:
+    """Observation counts per occupied grid cell at one zoom level.
+
+    Attributes:
+        zoom (int): Map zoom level.
+        level (int): Grid level, zoom + CLUSTER_SUBDIVISIONS.
+        x (np.ndarray): Cell columns.
+        y (np.ndarray): Cell rows.
+        count (np.ndarray): Observations per cell.
+        lat (np.ndarray): Centroid latitude per cell.
+        lon (np.ndarray): Centroid longitude per cell.
+        species_offsets (np.ndarray): The species counts of cell i are at
+            species_offsets[i]:species_offsets[i + 1] of the arrays below.
+        species_ids (np.ndarray): Indices into `species_names`.
+        species_counts (np.ndarray): Observations of each species in its cell.
+        species_names (list[str]): Species names by index.
+    """
+
+    zoom: int
+    level: int
+    x: np.ndarray
+    y: np.ndarray
+    count: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    species_offsets: np.ndarray
+    species_ids: np.ndarray
+    species_counts: np.ndarray
+    species_names: list[str]
+
+    def __len__(self) -> int:
+        return len(self.count)
+
+    def select(self, bbox_filter: tuple[float, float, float, float] | None = None) -> np.ndarray:
+        """Return the indices of the cells intersecting a bounding box.
+
+        Cells are selected whole, so their counts may include observations
+        just outside the box.
+
+        Args:
+            bbox_filter (tuple[float, float, float, float] | None): (min_lon,
+                min_lat, max_lon, max_lat); crosses the antimeridian when
+                min_lon > max_lon. None selects every cell.
+
+        Returns:
+            np.ndarray: Cell indices, in row-major cell order.
+        """
+        if not bbox_filter:
+            return np.arange(len(self))
+        min_lon, min_lat, max_lon, max_lat = bbox_filter
+        x0, x1 = int(cell_x(min_lon, self.level)), int(cell_x(max_lon, self.level))
+        y0, y1 = int(cell_y(max_lat, self.level)), int(cell_y(min_lat, self.level))
+        mask = (self.y >= y0) & (self.y <= y1)
+        if min_lon <= max_lon:
+            mask &= (self.x >= x0) & (self.x <= x1)
+        else:
+            mask &= (self.x >= x0) | (self.x <= x1)
+        return np.flatnonzero(mask)
+
+    def to_clusters(self, indices: np.ndarray) -> list[dict]:
+        """Return the selected cells as cluster dicts, largest first.
+
+        Args:
+            indices (np.ndarray): Cell indices, as returned by `select`.
+
+        Returns:
+            list[dict]: Clusters with ``lat``, ``lon`` (centroid), ``count``,
+                ``species`` (counts by name) and ``bbox`` (cell bounds).
+        """
+        indices = indices[np.argsort(-self.count[indices], kind="stable")]
+        clusters = []
+        for i in indices.tolist():
+            start, stop = self.species_offsets[i], self.species_offsets[i + 1]
+            species = {
+                self.species_names[species_id]: count
+                for species_id, count in zip(
+                    self.species_ids[start:stop].tolist(), self.species_counts[start:stop].tolist()
+                )
+            }
+            clusters.append(
+                {
+                    "lat": float(self.lat[i]),
+                    "lon": float(self.lon[i]),
+                    "count": int(self.count[i]),
+                    "species": species,
+                    "bbox": cell_bounds(int(self.x[i]), int(self.y[i]), self.level),
+                }
+            )
+        return clusters
+
+
+def aggregate_cells(
+    lat: np.ndarray,
+    lon: np.ndarray,
+    species: np.ndarray,
+    species_names: list[str],
+    zoom: int,
+) -> ClusterAggregate:
+    """Group observations into the grid cells of a zoom level.
+
+    Args:
+        lat (np.ndarray): Latitudes; observations with NaN coordinates are skipped.
+        lon (np.ndarray): Longitudes.
+        species (np.ndarray): Species codes indexing `species_names`; -1 means
+            unknown and is counted in `count` but not in the species breakdown.
+        species_names (list[str]): Species names by code.
+        zoom (int): Map zoom level, 0 to MAX_CLUSTER_ZOOM.
+
+    Returns:
+        ClusterAggregate: The occupied cells.
+    """
+    level = zoom + CLUSTER_SUBDIVISIONS
+    located = np.isfinite(lat) & np.isfinite(lon)
+    lat, lon, species = lat[located], lon[located], species[located]
+
+    x, y = cell_x(lon, level), cell_y(lat, level)
+    keys, cell_of, count = np.unique((y << level) | x, return_inverse=True, return_counts=True)
+    # Longitudes are averaged directly; cells never straddle the antimeridian.
+    centroid_lat = np.bincount(cell_of, weights=lat, minlength=len(keys)) / count
+    centroid_lon = np.bincount(cell_of, weights=lon, minlength=len(keys)) / count
+
+    known = species >= 0
+    pairs, species_counts = np.unique(
+        cell_of[known] * len(species_names) + species[known].astype(np.int64), return_counts=True
+    )
+    pair_cells = pairs // max(len(species_names), 1)
+    return ClusterAggregate(
+        zoom=zoom,
+        level=level,
+        x=keys & ((1 << level) - 1),
+        y=keys >> level,
+        count=count,
+        lat=centroid_lat,
+        lon=centroid_lon,
+        species_offsets=np.searchsorted(pair_cells, np.arange(len(keys) + 1)),
+        species_ids=pairs % max(len(species_names), 1),
+        species_counts=species_counts,
+        species_names=species_names,
+    )
@@ -13,10 +13,12 @@ Example:
 """
 
 import json
+from datetime import date
+
 from fastapi import HTTPException, status
 
 from backend.schemas.observation_schemas import Observation, ObservationListResponse, Location
-from backend.database_utils.lancedb_manager import get_lancedb_manager
+from backend.database_utils.lancedb_manager import get_lancedb_manager, observation_location, schema_version
 
 
 class ObservationService:
@@ -67,7 +69,7 @@ class ObservationService:
         lancedb_manager = await get_lancedb_manager()
         self.db = lancedb_manager.db
         # Ensure the observations table exists; create it with the proper schema if it doesn't
-        # await lancedb_manager.get_table(self.table_name, OBSERVATIONS_SCHEMA)
+        # await lancedb_manager.get_table(self.table_name, OBSERVATIONS_SCHEMA_V2)
         return self
 
     async def create_observation(self, observation_data: Observation) -> Observation:
@@ -75,7 +77,8 @@ class ObservationService:
 
         This method transforms the Pydantic Observation model into the appropriate
         LanceDB schema format and inserts it into the observations table. It handles
-        JSON serialization for complex fields like metadata and data_source.
+        JSON serialization for complex fields like metadata and data_source, and
+        writes the location and date columns of the table's schema version.
 
         Args:
             observation_data (Observation): The observation data to store in the database.
@@ -113,10 +116,21 @@ class ObservationService:
             elif isinstance(data_source_value, str):
                 data_source_value_str = data_source_value
 
+            table = await self.db.open_table(self.table_name)
+            observed_date = observation_data.observed_at.split("T")[0]
+            location = observation_data.location
+            if schema_version(await table.schema()) >= 2:
+                columns = {
+                    "observed_at": date.fromisoformat(observed_date),
+                    "lat": location.lat,
+                    "lon": location.lng,
+                }
+            else:
+                columns = {"observed_at": observed_date, "coordinates": [location.lat, location.lng]}
+
             record_to_save = {
                 "id": str(observation_data.id),
                 "species_scientific_name": observation_data.species_scientific_name,
-                "observed_at": observation_data.observed_at.split("T")[0],
                 "count": observation_data.count,
                 "observer_id": observation_data.user_id,
                 "location_accuracy_m": observation_data.location_accuracy_m,
@@ -126,13 +140,12 @@ class ObservationService:
                 "model_id": observation_data.model_id,
                 "confidence": observation_data.confidence,
                 "geometry_type": "Point",
-                "coordinates": [observation_data.location.lat, observation_data.location.lng],
                 "metadata": metadata_value_str,
+                **columns,
             }
             # Remove None values to avoid potential issues with LanceDB
             record_to_save = {k: v for k, v in record_to_save.items() if v is not None}
 
-            table = await self.db.open_table(self.table_name)
             await table.add([record_to_save])
 
             return observation_data
@@ -217,12 +230,12 @@ class ObservationService:
             if results:
                 for item in results:
                     try:
-                        location_data = item.get("coordinates")
-                        if isinstance(location_data, list) and len(location_data) == 2:
-                            location_obj = Location(lat=location_data[0], lng=location_data[1])
-                        else:
+                        location_data = observation_location(item)
+                        if location_data is None:
                             continue
+                        location_obj = Location(lat=location_data[0], lng=location_data[1])
 
+                        observed_at = item.get("observed_at")
                         metadata_str = item.get("metadata", "{}")
                         metadata_dict = {}
                         if isinstance(metadata_str, str) and metadata_str.strip():
@@ -236,7 +249,7 @@ class ObservationService:
                             species_scientific_name=item.get("species_scientific_name"),
                             count=item.get("count"),
                             location=location_obj,
-                            observed_at=item.get("observed_at"),
+                            observed_at=observed_at.isoformat() if isinstance(observed_at, date) else observed_at,
                             notes=item.get("notes"),
                             user_id=item.get("user_id") or item.get("observer_id"),
                             location_accuracy_m=item.get("location_accuracy_m"),
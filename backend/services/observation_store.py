@@ -0,0 +1,426 @@
+"""
+Resident columnar snapshot of the observations table for geo filtering.
+
+`/geo/observations` filters by species, bounding box, distance from a point
+and date range. Instead of asking LanceDB for every request,
+`ObservationStore` keeps the columns those filters need in memory as NumPy
+arrays: latitude, longitude, the observed date as days since 1970-01-01, a
+species code and the Lance row id, plus a Z-order spatial index of the
+locations (see `backend.services.spatial_index`). A query takes the
+candidates in the queried area from the spatial index, combines vectorised
+boolean masks over them and fetches only the matching rows from LanceDB, by
+row id.
+
+The snapshot follows the table as new versions are committed. When a new
+version only adds data files (appended observations), only the new
+fragments are read and merged into the spatial index. Any other change, such as deletes, compaction or a
+schema migration, reloads the snapshot. The table version is checked at most
+once per `refresh_seconds`, so a query may miss observations committed less
+than that long ago. Listeners registered with `add_listener` learn about
+every refresh, e.g. to invalidate caches derived from the table.
+
+The snapshot needs the typed columns of the version 2 observations schema
+(see ``backend/scripts/migrate_observations.py``) and holds about 44 bytes
+per observation.
+
+Example:
+    >>> from backend.services.observation_store import ObservationStore
+    >>> store = ObservationStore(refresh_seconds=5.0)
+    >>> store.maybe_refresh(table)
+    >>> matches = store.query(species_list=["Aedes aegypti"], bbox_filter=(-75.0, 40.0, -73.0, 41.0))
+    >>> nearest = store.query(knn=(-74.0, 40.7, 10))
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import date
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from backend.services.metrics import counter, gauge
+from backend.services.observation_clusters import ClusterAggregate, aggregate_cells
+from backend.services.spatial_index import EARTH_RADIUS_KM, SpatialIndex, circle_bbox, haversine_km
+
+STORE_COLUMNS = ["lat", "lon", "observed_at", "species_scientific_name"]
+MISSING_DAY = np.iinfo(np.int32).min
+EPOCH = date(1970, 1, 1)
+KNN_START_RADIUS_KM = 1.0
+HALF_EARTH_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+CLUSTER_CACHE_ENTRIES = 64
+
+STORE_ROWS = gauge(
+    "culicidaelab_observation_store_rows",
+    "Observations held in the resident geo snapshot.",
+)
+STORE_REFRESHES = counter(
+    "culicidaelab_observation_store_refreshes_total",
+    "Refreshes of the resident observation snapshot, by kind (full, incremental).",
+    ["kind"],
+)
+CLUSTER_CACHE_LOOKUPS = counter(
+    "culicidaelab_observation_cluster_cache_lookups_total",
+    "Lookups of per-zoom cluster aggregates by outcome (hit, miss).",
+    ["outcome"],
+)
+
+
+class ObservationMatches(NamedTuple):
+    """Result of `ObservationStore.query`."""
+
+    row_ids: np.ndarray
+    version: int | None
+    distances_km: np.ndarray | None = None
+
+
+@dataclass(frozen=True)
+class _Columns:
+    """Filter columns of the snapshot; replaced as a whole on every refresh."""
+
+    lat: np.ndarray
+    lon: np.ndarray
+    day: np.ndarray
+    species: np.ndarray
+    row_ids: np.ndarray
+    species_codes: dict[str, int]
+    spatial: SpatialIndex
+    version: int | None = None
+
+    @classmethod
+    def empty(cls) -> _Columns:
+        return cls(
+            lat=np.empty(0, dtype=np.float64),
+            lon=np.empty(0, dtype=np.float64),
+            day=np.empty(0, dtype=np.int32),
+            species=np.empty(0, dtype=np.int32),
+            row_ids=np.empty(0, dtype=np.uint64),
+            species_codes={},
+            spatial=SpatialIndex.empty(),
+        )
+
+    def concat(self, other: _Columns) -> _Columns:
+        return _Columns(
+            lat=np.concatenate([self.lat, other.lat]),
+            lon=np.concatenate([self.lon, other.lon]),
+            day=np.concatenate([self.day, other.day]),
+            species=np.concatenate([self.species, other.species]),
+            row_ids=np.concatenate([self.row_ids, other.row_ids]),
+            species_codes=other.species_codes,
+            spatial=self.spatial.merge(other.spatial, offset=len(self.row_ids)),
+        )
+
+
+def _day(value: str | date) -> int:
+    """Return a date, or a YYYY-MM-DD string, as days since 1970-01-01."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return (value - EPOCH).days
+
+
+def _fragment_key(fragment) -> tuple:
+    """Identify a fragment's contents: its data files and its number of live rows."""
+    return tuple(data_file.path for data_file in fragment.data_files()), fragment.count_rows()
+
+
+class ObservationStore:
+    """In-memory columnar snapshot of the observations table.
+
+    Attributes:
+        refresh_seconds (float): Minimum time between two checks of the table
+            version by `maybe_refresh`.
+    """
+
+    def __init__(self, refresh_seconds: float = 5.0):
+        """Initialize an empty store.
+
+        Args:
+            refresh_seconds: Minimum interval between version checks. Values
+                below 0 are treated as 0 (check on every query).
+        """
+        self.refresh_seconds = max(0.0, float(refresh_seconds))
+        self._columns = _Columns.empty()
+        self._fragments: dict[int, tuple] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self._clusters: OrderedDict[tuple, ClusterAggregate] = OrderedDict()
+        self._clusters_lock = threading.Lock()
+        self._listeners: list[Callable[[np.ndarray | None, np.ndarray | None, int], None]] = []
+        STORE_ROWS.set_function(lambda: len(self))
+
+    def __len__(self) -> int:
+        return len(self._columns.row_ids)
+
+    @property
+    def version(self) -> int | None:
+        """Lance version of the table the snapshot reflects, None before the first refresh."""
+        return self._columns.version
+
+    def add_listener(self, listener: Callable[[np.ndarray | None, np.ndarray | None, int], None]):
+        """Call `listener(lat, lon, version)` after every refresh.
+
+        After an incremental refresh, `lat` and `lon` are the locations of the
+        appended observations; after a full reload they are None, as any row
+        may have changed. Listeners run while the store is locked and must not
+        query it.
+
+        Args:
+            listener: The callback, e.g. `TileCache.invalidate`.
+        """
+        self._listeners.append(listener)
+
+    def maybe_refresh(self, table) -> str | None:
+        """Refresh the snapshot if `refresh_seconds` have passed since the last check.
+
+        Args:
+            table: The LanceDB observations table.
+
+        Returns:
+            str | None: "full" or "incremental" if the snapshot was refreshed,
+                None if it was up to date or checked recently.
+        """
+        if time.monotonic() - self._checked_at < self.refresh_seconds:
+            return None
+        return self.refresh(table)
+
+    def refresh(self, table) -> str | None:
+        """Bring the snapshot up to the latest version of the table.
+
+        Args:
+            table: The LanceDB observations table.
+
+        Returns:
+            str | None: "full" or "incremental" if the snapshot was refreshed,
+                None if it already reflected the latest version.
+        """
+        with self._lock:
+            self._checked_at = time.monotonic()
+            dataset = table.to_lance()
+            if dataset.version == self.version:
+                return None
+            fragments = dataset.get_fragments()
+            keys = {fragment.fragment_id: _fragment_key(fragment) for fragment in fragments}
+            appended_only = self.version is not None and all(
+                keys.get(fragment_id) == key for fragment_id, key in self._fragments.items()
+            )
+            if appended_only:
+                new = [fragment for fragment in fragments if fragment.fragment_id not in self._fragments]
+                columns = self._columns
+                appended = _Columns.empty()
+                if new:
+                    appended = self._load(dataset, new, dict(columns.species_codes))
+                    columns = columns.concat(appended)
+                kind = "incremental"
+            else:
+                columns = self._load(dataset, fragments, {})
+                kind = "full"
+            # Queries read `_columns` once, so they never see arrays and codes of different versions.
+            self._columns = replace(columns, version=dataset.version)
+            self._fragments = keys
+            with self._clusters_lock:
+                self._clusters.clear()
+            for listener in self._listeners:
+                if kind == "full":
+                    listener(None, None, dataset.version)
+                else:
+                    listener(appended.lat, appended.lon, dataset.version)
+            STORE_REFRESHES.inc(kind=kind)
+            return kind
+
+    def query(
+        self,
+        species_list: list[str] | None = None,
+        bbox_filter: tuple[float, float, float, float] | None = None,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
+        near: tuple[float, float, float] | None = None,
+        knn: tuple[float, float, int] | None = None,
+        limit: int | None = None,
+    ) -> ObservationMatches:
+        """Return the row ids of the observations matching every filter.
+
+        The filters have the same meaning as in `geo_service.build_observation_filter`:
+        species names, an inclusive (min_lon, min_lat, max_lon, max_lat) box that
+        crosses the antimeridian when min_lon > max_lon, and an inclusive date range.
+        Bounding boxes are answered from the spatial index, so their cost grows
+        with the number of observations in the box.
+
+        `near` keeps the observations within a great-circle radius of a point,
+        and `knn` keeps the k observations closest to a point that match the
+        other filters. Both order the matches by distance.
+
+        Args:
+            species_list (list[str] | None): Species scientific names to keep.
+            bbox_filter (tuple[float, float, float, float] | None): Bounding box.
+            start_date (str | date | None): First date to keep.
+            end_date (str | date | None): Last date to keep.
+            near (tuple[float, float, float] | None): (lon, lat, radius_km).
+            knn (tuple[float, float, int] | None): (lon, lat, k).
+            limit (int | None): Maximum number of row ids returned.
+
+        Returns:
+            ObservationMatches: Row ids of the matches, in table order or by
+                distance, and the table version they belong to.
+
+        Raises:
+            ValueError: If both `near` and `knn` are given.
+        """
+        if near and knn:
+            raise ValueError("Use either near or knn, not both.")
+        columns = self._columns
+        filters = dict(species_list=species_list, bbox_filter=bbox_filter, start_date=start_date, end_date=end_date)
+        distances = None
+        if near:
+            lon, lat, radius_km = near
+            matches, distances = _within(columns, lon, lat, radius_km, **filters)
+        elif knn:
+            lon, lat, k = knn
+            # Widen the search circle until it holds k matches; the k closest are then inside it.
+            radius_km = KNN_START_RADIUS_KM
+            matches, distances = _within(columns, lon, lat, radius_km, **filters)
+            while len(matches) < k and radius_km < HALF_EARTH_CIRCUMFERENCE_KM:
+                radius_km *= 4
+                matches, distances = _within(columns, lon, lat, radius_km, **filters)
+            matches, distances = matches[:k], distances[:k]
+        else:
+            matches = _select(columns, **filters)
+        if limit is not None:
+            matches = matches[:limit]
+            distances = None if distances is None else distances[:limit]
+        return ObservationMatches(columns.row_ids[matches], columns.version, distances)
+
+    def clusters(
+        self,
+        zoom: int,
+        species_list: list[str] | None = None,
+        start_date: str | date | None = None,
+        end_date: str | date | None = None,
+    ) -> ClusterAggregate:
+        """Return the observations matching the filters, aggregated per grid cell of a zoom level.
+
+        Aggregates cover the whole snapshot and are cached per zoom level and
+        filters until the next refresh, so panning the map at a given zoom
+        level only selects cells from a cached aggregate.
+
+        Args:
+            zoom (int): Map zoom level.
+            species_list (list[str] | None): Species scientific names to keep.
+            start_date (str | date | None): First date to keep.
+            end_date (str | date | None): Last date to keep.
+
+        Returns:
+            ClusterAggregate: Counts, centroids and species breakdowns per cell.
+        """
+        columns = self._columns
+        key = (
+            columns.version,
+            zoom,
+            tuple(sorted(species_list or ())),
+            _day(start_date) if start_date else None,
+            _day(end_date) if end_date else None,
+        )
+        with self._clusters_lock:
+            aggregate = self._clusters.get(key)
+            if aggregate is not None:
+                self._clusters.move_to_end(key)
+                CLUSTER_CACHE_LOOKUPS.inc(outcome="hit")
+                return aggregate
+        CLUSTER_CACHE_LOOKUPS.inc(outcome="miss")
+
+        positions = _select(columns, species_list=species_list, start_date=start_date, end_date=end_date)
+        names = [""] * len(columns.species_codes)
+        for name, code in columns.species_codes.items():
+            names[code] = name
+        aggregate = aggregate_cells(
+            columns.lat[positions], columns.lon[positions], columns.species[positions], names, zoom
+        )
+        with self._clusters_lock:
+            self._clusters[key] = aggregate
+            while len(self._clusters) > CLUSTER_CACHE_ENTRIES:
+                self._clusters.popitem(last=False)
+        return aggregate
+
+    def _load(self, dataset, fragments, species_codes: dict[str, int]) -> _Columns:
+        """Read the filter columns of some fragments into arrays, extending `species_codes`."""
+        table = dataset.scanner(columns=STORE_COLUMNS, with_row_id=True, fragments=fragments).to_table()
+        lat = pc.fill_null(table.column("lat"), np.nan).to_numpy().astype(np.float64, copy=False)
+        lon = pc.fill_null(table.column("lon"), np.nan).to_numpy().astype(np.float64, copy=False)
+        return _Columns(
+            lat=lat,
+            lon=lon,
+            day=pc.fill_null(table.column("observed_at").cast(pa.int32()), MISSING_DAY).to_numpy(),
+            species=_encode_species(table.column("species_scientific_name"), species_codes),
+            row_ids=table.column("_rowid").to_numpy().astype(np.uint64, copy=False),
+            species_codes=species_codes,
+            spatial=SpatialIndex.build(lat, lon),
+        )
+
+
+def _encode_species(names: pa.ChunkedArray, species_codes: dict[str, int]) -> np.ndarray:
+    """Map species names to codes, adding unseen names to `species_codes`; nulls become -1."""
+    encoded = names.cast(pa.string()).combine_chunks().dictionary_encode()
+    lookup = np.array(
+        [species_codes.setdefault(name, len(species_codes)) for name in encoded.dictionary.to_pylist()],
+        dtype=np.int32,
+    )
+    indices = pc.fill_null(encoded.indices, -1).to_numpy()
+    codes = np.full(len(indices), -1, dtype=np.int32)
+    present = indices >= 0
+    codes[present] = lookup[indices[present]]
+    return codes
+
+
+def _select(
+    columns: _Columns,
+    species_list: list[str] | None = None,
+    bbox_filter: tuple[float, float, float, float] | None = None,
+    start_date: str | date | None = None,
+    end_date: str | date | None = None,
+    candidates: np.ndarray | None = None,
+) -> np.ndarray:
+    """Return the sorted positions matching every filter, among `candidates` if given."""
+    if bbox_filter:
+        from_index = columns.spatial.candidates(bbox_filter)
+        candidates = from_index if candidates is None else np.intersect1d(candidates, from_index)
+    if candidates is None:
+        candidates = np.arange(len(columns.row_ids))
+
+    mask = np.ones(len(candidates), dtype=bool)
+    if species_list:
+        codes = [columns.species_codes[name] for name in species_list if name in columns.species_codes]
+        mask &= np.isin(columns.species[candidates], codes)
+    if bbox_filter:
+        min_lon, min_lat, max_lon, max_lat = bbox_filter
+        lat, lon = columns.lat[candidates], columns.lon[candidates]
+        mask &= (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            mask &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            mask &= (lon >= min_lon) | (lon <= max_lon)
+    if start_date or end_date:
+        day = columns.day[candidates]
+        mask &= day != MISSING_DAY
+        if start_date:
+            mask &= day >= _day(start_date)
+        if end_date:
+            mask &= day <= _day(end_date)
+    return candidates[mask]
+
+
+def _within(
+    columns: _Columns, lon: float, lat: float, radius_km: float, **filters
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the positions matching `filters` within `radius_km` of a point and their distances, closest first."""
+    candidates = columns.spatial.candidates(circle_bbox(lon, lat, radius_km))
+    positions = _select(columns, candidates=candidates, **filters)
+    distances = haversine_km(columns.lat[positions], columns.lon[positions], lat, lon)
+    inside = distances <= radius_km
+    positions, distances = positions[inside], distances[inside]
+    order = np.argsort(distances, kind="stable")
+    return positions[order], distances[order]
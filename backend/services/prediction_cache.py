@@ -0,0 +1,247 @@
+"""
+Content-addressed cache for species prediction results.
+
+This module provides an LRU cache of `PredictionResult` objects keyed on a
+digest of the uploaded image bytes plus the model ID, so re-uploads of the
+same photo are answered without running the model again. Entries expire after
+a configurable TTL and can optionally be persisted as small JSON files so the
+cache survives restarts. Concurrent requests for the same key share a single
+in-flight computation.
+
+Example:
+    >>> from backend.services.prediction_cache import PredictionCache
+    >>> cache = PredictionCache(max_entries=1024, ttl_seconds=3600)
+    >>> key = cache.make_key(image_data, "classifier_onnx_production")
+    >>> result, error = await cache.get_or_compute(key, lambda: service.run(image_data))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from backend.schemas.prediction_schemas import PredictionResult
+from backend.services.metrics import counter, gauge
+
+CACHE_LOOKUPS = counter(
+    "culicidaelab_prediction_cache_lookups_total",
+    "Prediction cache lookups by outcome (hit, disk_hit, miss, coalesced).",
+    ["outcome"],
+)
+CACHE_ENTRIES = gauge(
+    "culicidaelab_prediction_cache_entries",
+    "Number of prediction results held in the in-memory cache.",
+)
+CACHE_EVICTIONS = counter(
+    "culicidaelab_prediction_cache_evictions_total",
+    "Prediction cache entries removed because of size or TTL limits.",
+)
+
+ComputeResult = tuple[PredictionResult | None, str | None]
+
+
+class PredictionCache:
+    """LRU cache of prediction results with TTL, persistence and single-flight.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept in memory. A value of
+            0 disables the cache entirely; `get_or_compute` then always computes.
+        ttl_seconds (float): Lifetime of an entry in seconds.
+        persist_dir (Path | None): Directory for on-disk persistence, or None to
+            keep the cache in memory only.
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that ran the computation.
+        coalesced (int): Lookups that waited on an identical in-flight computation.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, persist_dir: str | Path | None = None):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory entries; 0 disables caching.
+            ttl_seconds: Entry lifetime in seconds.
+            persist_dir: Optional directory used to persist entries as JSON.
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.ttl_seconds = float(ttl_seconds)
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: OrderedDict[str, tuple[float, PredictionResult]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores results at all."""
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(image_data: bytes | memoryview, model_id: str, digest: str | None = None) -> str:
+        """Build the cache key for an image and model.
+
+        Args:
+            image_data (bytes | memoryview): The raw uploaded image bytes.
+            model_id (str): Identifier of the model producing the result.
+            digest (str | None): Hex SHA-256 of `image_data`, if the caller has
+                already computed it.
+
+        Returns:
+            str: A filesystem-safe key combining the image digest and a hash of
+                the model ID, which may hold paths and separators.
+        """
+        model_hash = hashlib.sha256(model_id.encode("utf-8")).hexdigest()[:16]
+        return f"{digest or hashlib.sha256(image_data).hexdigest()}_{model_hash}"
+
+    def get(self, key: str) -> PredictionResult | None:
+        """Return a fresh in-memory entry and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            CACHE_EVICTIONS.inc()
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key: str, result: PredictionResult, expires_at: float | None = None):
+        """Store a result in memory, evicting the least recently used entries."""
+        if not self.enabled:
+            return
+        self._entries[key] = (expires_at or time.time() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            CACHE_EVICTIONS.inc()
+
+    def clear(self):
+        """Drop all in-memory entries; persisted files are left untouched."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Return cache counters for diagnostics."""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[ComputeResult]]) -> ComputeResult:
+        """Return the cached result for `key`, computing it at most once.
+
+        Lookup order is memory, then disk (if persistence is enabled). On a
+        miss, the first caller runs `compute`; concurrent callers with the same
+        key await that caller's outcome instead of running it again. Only
+        successful results are stored; errors are returned to every waiter but
+        not cached.
+
+        Args:
+            key (str): Key from `make_key`.
+            compute (Callable[[], Awaitable[tuple]]): Coroutine factory returning
+                a `(PredictionResult | None, error | None)` pair.
+
+        Returns:
+            tuple[PredictionResult | None, str | None]: The result/error pair.
+        """
+        if not self.enabled:
+            return await compute()
+
+        cached = self.get(key)
+        if cached is not None:
+            self._record("hit")
+            return cached, None
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self._record("coalesced")
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+                # The request that owned the computation went away; run it ourselves.
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            outcome: ComputeResult | None = None
+            if self.persist_dir is not None:
+                stored = await asyncio.to_thread(self._load, key)
+                if stored is not None:
+                    self.put(key, stored[1], expires_at=stored[0])
+                    self._record("disk_hit")
+                    outcome = (stored[1], None)
+            if outcome is None:
+                self._record("miss")
+                outcome = await compute()
+                result, _ = outcome
+                if result is not None:
+                    self.put(key, result)
+                    if self.persist_dir is not None:
+                        await asyncio.to_thread(self._store, key, result)
+            future.set_result(outcome)
+            return outcome
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it.
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    def _record(self, outcome: str):
+        if outcome in ("hit", "disk_hit"):
+            self.hits += 1
+        elif outcome == "coalesced":
+            self.coalesced += 1
+        else:
+            self.misses += 1
+        CACHE_LOOKUPS.inc(outcome=outcome)
+
+    def _path_for(self, key: str) -> Path:
+        return self.persist_dir / key[:2] / f"{key}.json"  # type: ignore[operator]
+
+    def _load(self, key: str) -> tuple[float, PredictionResult] | None:
+        """Read a persisted entry, ignoring missing, expired or corrupt files."""
+        path = self._path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                payload = json.load(f)
+            expires_at = float(payload["expires_at"])
+            if expires_at < time.time():
+                path.unlink(missing_ok=True)
+                return None
+            return expires_at, PredictionResult.model_validate(payload["result"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[CACHE] Ignoring unreadable cache entry '{path}': {type(e).__name__} - {e}")
+            return None
+
+    def _store(self, key: str, result: PredictionResult):
+        """Persist an entry atomically; failures only disable persistence for this entry."""
+        path = self._path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": time.time() + self.ttl_seconds, "result": result.model_dump()}, f)
+            tmp_path.replace(path)
+        except Exception as e:
+            print(f"[CACHE] Could not persist cache entry '{path}': {type(e).__name__} - {e}")
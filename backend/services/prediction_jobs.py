@@ -0,0 +1,422 @@
+"""
+In-process job store for asynchronous prediction requests.
+
+`POST /predict/jobs` hands its images to a `PredictionJobStore` and returns a
+job id straight away, so the client does not hold a connection open while the
+model runs. A fixed number of worker tasks take jobs from a bounded queue and
+classify their images; clients poll the job or follow its progress as
+server-sent events.
+
+The images of a job are spooled to a temporary directory on disk when the job
+is submitted, and read back one at a time by the worker, so waiting jobs hold
+no image data in memory. The directory is removed when the job finishes.
+
+Finished jobs are kept for a bounded time and up to a bounded count, after
+which the oldest are forgotten. Jobs live in the memory of the worker process
+that accepted them, so clients must poll the same process (sticky sessions
+when running several workers).
+
+Example:
+    >>> from backend.services.prediction_jobs import prediction_jobs
+    >>> job = await prediction_jobs.submit([("trap_001.jpg", image_data)])
+    >>> async for event, data in prediction_jobs.events(job.id):
+    ...     print(event, data)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from backend.config import settings as app_settings
+from backend.services.metrics import counter, gauge, histogram
+from backend.services.prediction_service import prediction_service
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+FINISHED_STATUSES = ("completed", "failed")
+
+JOBS_QUEUE_DEPTH = gauge(
+    "culicidaelab_prediction_jobs_queue_depth",
+    "Prediction jobs waiting for a worker.",
+)
+JOBS_SUBMITTED = counter(
+    "culicidaelab_prediction_jobs_submitted_total",
+    "Prediction jobs accepted.",
+)
+JOBS_REJECTED = counter(
+    "culicidaelab_prediction_jobs_rejected_total",
+    "Prediction jobs rejected because the job queue was full.",
+)
+JOBS_FINISHED = counter(
+    "culicidaelab_prediction_jobs_finished_total",
+    "Prediction jobs finished, by final status (completed, failed).",
+    ["status"],
+)
+JOB_DURATION = histogram(
+    "culicidaelab_prediction_job_seconds",
+    "Time from a prediction job being accepted to it finishing.",
+)
+
+PredictFn = Callable[[bytes, str], Awaitable[tuple[Any, str | None]]]
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the job queue is full."""
+
+
+@dataclass
+class PredictionJob:
+    """State of one asynchronous prediction job.
+
+    Attributes:
+        id (str): Job identifier returned to the client.
+        filenames (list[str]): Names of the submitted images, in upload order.
+        status (str): One of `JOB_STATUSES`.
+        results (list[dict | None]): One entry per image, None until it is
+            classified, then a dict with `index`, `filename` and either
+            `result` (a `PredictionResult`) or `error`.
+        created_at (float): Wall-clock time the job was accepted.
+        started_at (float | None): Wall-clock time a worker picked the job up.
+        finished_at (float | None): Wall-clock time the job finished.
+        error (str | None): Reason the whole job failed, if it did.
+        inputs (list[Path] | None): Spooled image files, one per image, until
+            the job finishes.
+        spool_dir (Path | None): Directory holding `inputs`.
+    """
+
+    id: str
+    filenames: list[str]
+    status: str = "queued"
+    results: list[dict | None] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    inputs: list[Path] | None = field(default=None, repr=False)
+    spool_dir: Path | None = field(default=None, repr=False)
+    events: list[tuple[str, dict]] = field(default_factory=list, repr=False)
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+
+    @property
+    def total(self) -> int:
+        """Number of images in the job."""
+        return len(self.filenames)
+
+    @property
+    def completed(self) -> int:
+        """Number of images classified successfully."""
+        return sum(1 for item in self.results if item is not None and "result" in item)
+
+    @property
+    def failed(self) -> int:
+        """Number of images that could not be classified."""
+        return sum(1 for item in self.results if item is not None and "error" in item)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has reached a final status."""
+        return self.status in FINISHED_STATUSES
+
+    def progress(self) -> dict:
+        """Return the job status without the per-image results."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+    def snapshot(self) -> dict:
+        """Return the job status including every per-image result known so far."""
+        return {**self.progress(), "results": [item for item in self.results if item is not None]}
+
+
+class PredictionJobStore:
+    """Queues prediction jobs, runs them on a worker pool and retains their results.
+
+    Attributes:
+        predict_fn (PredictFn): Coroutine function classifying one image,
+            `PredictionService.predict_species` in the application.
+        workers (int): Number of jobs processed at the same time.
+        max_queue (int): Maximum number of jobs waiting for a worker.
+        image_concurrency (int): Images of one job classified at the same time.
+        max_retained (int): Maximum number of finished jobs kept.
+        retention_seconds (float): How long a finished job is kept.
+        spool_dir (Path | None): Directory for the spooled images of jobs, or
+            None for the system temporary directory.
+    """
+
+    def __init__(
+        self,
+        predict_fn: PredictFn,
+        workers: int = 2,
+        max_queue: int = 64,
+        image_concurrency: int = 4,
+        max_retained: int = 1000,
+        retention_seconds: float = 3600.0,
+        spool_dir: str | Path | None = None,
+    ):
+        """Initialize the store.
+
+        The queue and worker tasks are created lazily on the first submitted
+        job, so the store can be constructed at import time.
+
+        Args:
+            predict_fn: Function classifying one image.
+            workers: Worker count. Values below 1 are treated as 1.
+            max_queue: Queue capacity. Values below 1 are treated as 1.
+            image_concurrency: Per-job image concurrency. Values below 1 are treated as 1.
+            max_retained: Finished jobs kept. Values below 0 are treated as 0.
+            retention_seconds: Lifetime of a finished job.
+            spool_dir: Directory for spooled job images.
+        """
+        self.predict_fn = predict_fn
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.image_concurrency = max(1, int(image_concurrency))
+        self.max_retained = max(0, int(max_retained))
+        self.retention_seconds = max(0.0, float(retention_seconds))
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self._jobs: OrderedDict[str, PredictionJob] = OrderedDict()
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        JOBS_QUEUE_DEPTH.set_function(lambda: self.queue_depth)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, images: Iterable[tuple[str, bytes]] | AsyncIterable[tuple[str, bytes]]) -> PredictionJob:
+        """Spool the given images to disk and queue a job classifying them.
+
+        Args:
+            images (Iterable[tuple[str, bytes]] | AsyncIterable[tuple[str, bytes]]):
+                Pairs of filename and raw image data. They are consumed one at
+                a time, so only one image needs to be in memory.
+
+        Returns:
+            PredictionJob: The queued job.
+
+        Raises:
+            JobQueueFull: If `max_queue` jobs are already waiting.
+            ValueError: If there are no images.
+        """
+        queue = self._ensure_workers()
+        self._check_capacity(queue)
+        self._prune()
+        if self.spool_dir is not None:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+        spool_dir = Path(tempfile.mkdtemp(prefix="prediction-job-", dir=self.spool_dir))
+        filenames: list[str] = []
+        inputs: list[Path] = []
+        try:
+            async for filename, image_data in _aiter(images):
+                path = spool_dir / str(len(inputs))
+                await asyncio.to_thread(path.write_bytes, image_data)
+                filenames.append(filename)
+                inputs.append(path)
+            if not inputs:
+                raise ValueError("No images found in the upload")
+            # Other jobs may have been queued while the images were written.
+            self._check_capacity(queue)
+        except BaseException:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+            raise
+
+        job = PredictionJob(
+            id=uuid.uuid4().hex,
+            filenames=filenames,
+            results=[None] * len(filenames),
+            inputs=inputs,
+            spool_dir=spool_dir,
+        )
+        job.events.append(("progress", job.progress()))
+        self._jobs[job.id] = job
+        queue.put_nowait(job)
+        JOBS_SUBMITTED.inc()
+        return job
+
+    def _check_capacity(self, queue: asyncio.Queue):
+        if queue.full():
+            JOBS_REJECTED.inc()
+            raise JobQueueFull(f"Prediction job queue is full ({self.max_queue} jobs waiting).")
+
+    def get(self, job_id: str) -> PredictionJob | None:
+        """Return a job by id, or None if it is unknown or has expired."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def events(self, job_id: str, heartbeat_seconds: float = 15.0) -> AsyncIterator[tuple[str, dict | None]]:
+        """Follow a job's progress from the start until it finishes.
+
+        Yields ``("progress", status)`` whenever the job changes status,
+        ``("item", result)`` for every classified image, and finally
+        ``("done", snapshot)``. If nothing happens for `heartbeat_seconds`,
+        ``("heartbeat", None)`` is yielded so that proxies keep the
+        connection open. Events already emitted are replayed first, so a
+        client that connects late still sees every result.
+
+        Args:
+            job_id (str): The job to follow.
+            heartbeat_seconds (float): Idle time before a heartbeat is yielded.
+
+        Yields:
+            tuple[str, dict | None]: Event name and payload.
+
+        Raises:
+            KeyError: If the job is unknown or has expired.
+        """
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        cursor = 0
+        while True:
+            async with job.changed:
+                if cursor == len(job.events) and not job.finished:
+                    try:
+                        await asyncio.wait_for(job.changed.wait(), heartbeat_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                pending, cursor = job.events[cursor:], len(job.events)
+                finished = job.finished
+            if not pending and not finished:
+                yield "heartbeat", None
+            for event in pending:
+                yield event
+            if finished and cursor == len(job.events):
+                yield "done", job.snapshot()
+                return
+
+    async def close(self):
+        """Stop the workers. Jobs still queued or running are marked as failed."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+        for job in self._jobs.values():
+            if not job.finished:
+                await self._finish(job, "failed", "Server shut down before the job finished.")
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        """Create the queue and worker tasks for the running loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._loop = loop
+            self._tasks = [loop.create_task(self._run()) for _ in range(self.workers)]
+        return self._queue
+
+    def _prune(self):
+        """Forget expired finished jobs and the oldest ones beyond `max_retained`."""
+        cutoff = time.time() - self.retention_seconds
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - self.max_retained
+        for job in finished:
+            if excess > 0 or job.finished_at < cutoff:
+                del self._jobs[job.id]
+                excess -= 1
+
+    async def _run(self):
+        """Worker loop: take a job from the queue and process it."""
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._process(job)
+            except Exception as e:
+                await self._finish(job, "failed", f"{type(e).__name__} - {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def _process(self, job: PredictionJob):
+        """Classify every image of a job, recording each result as it completes."""
+        job.status = "running"
+        job.started_at = time.time()
+        await self._emit(job, "progress", job.progress())
+
+        semaphore = asyncio.Semaphore(self.image_concurrency)
+
+        async def _predict(index: int):
+            async with semaphore:
+                filename, path = job.filenames[index], job.inputs[index]
+                try:
+                    image_data = await asyncio.to_thread(path.read_bytes)
+                    result, error = await self.predict_fn(image_data, filename)
+                    del image_data
+                except Exception as e:
+                    # One unreadable or failing image is recorded against that image only.
+                    result, error = None, f"{type(e).__name__} - {str(e)}"
+            item: dict = {"index": index, "filename": filename}
+            if result is not None:
+                item["result"] = result.model_dump()
+            else:
+                item["error"] = error or "Prediction failed with no specific error"
+            job.results[index] = item
+            await asyncio.to_thread(path.unlink, missing_ok=True)
+            await self._emit(job, "item", item)
+
+        # A task group cancels and awaits the other images if one fails, so none
+        # of them still reads from the spool directory when _finish removes it.
+        try:
+            async with asyncio.TaskGroup() as tasks:
+                for index in range(job.total):
+                    tasks.create_task(_predict(index))
+        except ExceptionGroup as group:
+            raise group.exceptions[0]
+        await self._finish(job, "completed")
+
+    async def _finish(self, job: PredictionJob, status: str, error: str | None = None):
+        # Clean up before the status changes, so followers see the final event right after it.
+        if job.spool_dir is not None:
+            await asyncio.to_thread(shutil.rmtree, job.spool_dir, True)
+        job.inputs = None
+        job.spool_dir = None
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        JOBS_FINISHED.inc(status=status)
+        JOB_DURATION.observe(job.finished_at - job.created_at)
+        await self._emit(job, "progress", job.progress())
+
+    async def _emit(self, job: PredictionJob, event: str, data: dict):
+        async with job.changed:
+            job.events.append((event, data))
+            job.changed.notify_all()
+
+
+async def _aiter(items: Iterable | AsyncIterable) -> AsyncIterator:
+    """Iterate over a sync or async iterable."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+prediction_jobs = PredictionJobStore(
+    prediction_service.predict_species,
+    workers=app_settings.PREDICTION_JOBS_WORKERS,
+    max_queue=app_settings.PREDICTION_JOBS_MAX_QUEUE,
+    image_concurrency=app_settings.PREDICTION_BATCH_STREAM_CONCURRENCY,
+    max_retained=app_settings.PREDICTION_JOBS_MAX_RETAINED,
+    retention_seconds=app_settings.PREDICTION_JOBS_RETENTION_SECONDS,
+    spool_dir=app_settings.PREDICTION_JOBS_SPOOL_DIR,
+)
@@ -5,6 +5,30 @@ This module provides functionality for predicting mosquito species from images
 using a trained MosquitoClassifier model. It handles model loading, image processing,
 and prediction with confidence scoring and species identification.
 
+Importing this module is cheap: the CulicidaeLab library and the model are
+only loaded when the first prediction runs or the service is warmed up.
+
+When `PREDICTION_FAST_MODEL_PATH` is set, inference is tiered: a cheaper
+variant of the classifier runs first, and only images whose top confidence is
+below `PREDICTION_ESCALATION_THRESHOLD` are also run through the full model.
+
+Uploads are decoded, and their perceptual hashes computed, on a dedicated,
+bounded thread pool (`PREDICTION_DECODE_WORKERS`) rather than the shared
+default executor or the event loop, so a burst of large photos cannot starve
+other `to_thread` work or stall requests.
+
+Hashing, decoding, inference and result mapping report their durations as
+stages (see `backend.services.stage_timing`), so a slow prediction can be
+broken down per stage.
+
+Photos that differ from a recent upload only by re-encoding, resizing or
+metadata reuse its result when `PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS` is
+set (see `backend.services.near_duplicate_index`).
+
+The full classifier can be replaced without a restart: `reload_model` loads
+and warms a new `ModelVersion` next to the active one, switches new requests
+to it, and releases the old one once its in-flight requests have finished.
+
 Example:
     >>> from backend.services.prediction_service import prediction_service
     >>> result, error = await prediction_service.predict_species(image_data, "mosquito.jpg")
@@ -15,18 +39,103 @@ Example:
 from __future__ import annotations
 
 import asyncio
-import io
+import functools
+import hashlib
+import os
 import re
-from datetime import datetime
+import threading
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Iterator
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
-import aiofiles
-
 from PIL import Image
 from backend.schemas.prediction_schemas import PredictionResult
 from backend.config import settings as app_settings
-from culicidaelab.core.settings import get_settings
-from culicidaelab.serve import serve
+from backend.services.inference_batcher import InferenceBatcher
+from backend.services.image_pipeline import DecodedImage, decode_image
+from backend.services.image_writer import PredictedImageWriter, predicted_image_name, predicted_image_url
+from backend.services.inference_executor import (
+    InferenceExecutor,
+    get_settings,
+    release_classifier,
+    serve,
+    serve_batch,
+    serve_variant,
+)
+from backend.services.metrics import counter, gauge, histogram
+from backend.services.near_duplicate_index import NearDuplicateIndex, perceptual_hash
+from backend.services.prediction_cache import PredictionCache
+from backend.services.stage_timing import timed_stage
+
+TIERS = ("fast", "full")
+
+PREDICTION_TIER_TOTAL = counter(
+    "culicidaelab_prediction_tier_total",
+    "Classifier runs by tier (fast, full) and outcome (accepted, escalated, error).",
+    ["tier", "outcome"],
+)
+PREDICTION_TIER_SECONDS = histogram(
+    "culicidaelab_prediction_tier_seconds",
+    "Time taken by one classifier run, by tier.",
+    ["tier"],
+)
+MODEL_RELOADS = counter(
+    "culicidaelab_model_reloads_total",
+    "Classifier reloads by outcome (ok, failed).",
+    ["outcome"],
+)
+MODEL_GENERATION = gauge(
+    "culicidaelab_model_generation",
+    "Generation of the classifier serving new requests; increases with every reload.",
+)
+
+
+class ReloadInProgress(Exception):
+    """Raised when a model reload is requested while another one is running."""
+
+
+@dataclass
+class ModelVersion:
+    """One loaded version of the full classifier and the schedulers that serve it.
+
+    Attributes:
+        generation (int): 0 for the model loaded at start-up, incremented by
+            every reload.
+        model_path (str | None): ONNX file of the model, or None for the
+            classifier configured in the CulicidaeLab library.
+        executor (InferenceExecutor): Execution backend running this version.
+            Process pools warm a specific model, so each version gets its own;
+            thread pools are shared between versions.
+        batcher (InferenceBatcher | None): Micro-batching scheduler for this version.
+        fast_batcher (InferenceBatcher | None): Micro-batching scheduler for the
+            fast tier, bound to this version's executor.
+        model_id (str | None): Model ID reported in results, resolved lazily for
+            generation 0.
+        in_flight (int): Requests currently using this version.
+    """
+
+    generation: int
+    model_path: str | None
+    executor: InferenceExecutor
+    batcher: InferenceBatcher | None = None
+    fast_batcher: InferenceBatcher | None = None
+    model_id: str | None = None
+    in_flight: int = 0
+    idle: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def uses_library_serve(self) -> bool:
+        """Whether this version is the classifier cached by `culicidaelab.serve.serve`."""
+        return self.generation == 0 and self.model_path is None
+
+
+def _decode_and_hash(image_data: bytes | memoryview, max_side: int, with_hash: bool) -> tuple[DecodedImage, int | None]:
+    """Decode an upload and compute its perceptual hash; runs on the service's decode pool."""
+    decoded = decode_image(image_data=image_data, max_side=max_side)
+    return decoded, perceptual_hash(decoded.image) if with_hash else None
 
 
 class PredictionService:
@@ -39,6 +148,28 @@ class PredictionService:
     Attributes:
         save_predicted_images_enabled (bool): Whether to save predicted images.
         model_id (str): The identifier for the machine learning model being used.
+        batcher (InferenceBatcher | None): Micro-batching scheduler used when
+            `PREDICTION_BATCH_MAX_SIZE` is greater than 1, otherwise None.
+        fast_model_path (str | None): ONNX file of the fast tier, or None when
+            inference is not tiered.
+        escalation_threshold (float): Fast tier confidence below which the full
+            model is run as well.
+        fast_batcher (InferenceBatcher | None): Micro-batching scheduler for the
+            fast tier, if both batching and tiering are enabled.
+        cache (PredictionCache): Content-addressed cache of prediction results.
+        near_duplicates (NearDuplicateIndex): Recent results by perceptual hash,
+            reused for near-identical photos within
+            `PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS`.
+        executor (InferenceExecutor): Execution backend that runs the classifier,
+            selected with `PREDICTION_EXECUTOR`.
+        active (ModelVersion): The classifier version serving new requests;
+            `executor`, `batcher` and `fast_batcher` belong to it.
+        reload_status (dict): State of the last reload: ``state`` (idle,
+            loading, failed), ``error`` and ``generation``.
+        image_writer (PredictedImageWriter): Bounded background writer that saves
+            predicted images and their thumbnails.
+        decode_workers (int): Size of the thread pool decoding uploads,
+            from `PREDICTION_DECODE_WORKERS`.
 
     Example:
         >>> service = PredictionService()
@@ -48,25 +179,118 @@ class PredictionService:
     def __init__(self):
         """Initialize the PredictionService and retrieve the model configuration.
 
-        Sets up the service based on application settings and fetches the model
-        architecture information from the CulicidaeLab library settings to generate
-        a descriptive model ID.
+        Sets up the service based on application settings. The model ID is read
+        from the CulicidaeLab library settings on first access, so constructing
+        the service does not import the library.
         """
         self.save_predicted_images_enabled = app_settings.SAVE_PREDICTED_IMAGES
-        self.model_id = self._get_model_id()
-
-    def _get_model_id(self) -> str:
+        self.fast_model_path = app_settings.PREDICTION_FAST_MODEL_PATH or None
+        self.escalation_threshold = app_settings.PREDICTION_ESCALATION_THRESHOLD
+        self.active = self._create_version(0, None)
+        self.reload_status: dict = {"state": "idle", "error": None, "generation": 0}
+        self._retiring: dict[asyncio.Task, ModelVersion] = {}
+        self._reload_task: asyncio.Task | None = None
+        MODEL_GENERATION.set_function(lambda: self.active.generation)
+        self.cache = PredictionCache(
+            max_entries=app_settings.PREDICTION_CACHE_MAX_ENTRIES,
+            ttl_seconds=app_settings.PREDICTION_CACHE_TTL_SECONDS,
+            persist_dir=app_settings.PREDICTION_CACHE_DIR,
+        )
+        self.near_duplicates = NearDuplicateIndex(
+            max_distance=app_settings.PREDICTION_NEAR_DUPLICATE_MAX_DISTANCE,
+            window_seconds=app_settings.PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS,
+            max_entries=app_settings.PREDICTION_NEAR_DUPLICATE_MAX_ENTRIES,
+        )
+        self.image_writer = PredictedImageWriter(
+            max_queue=app_settings.PREDICTED_IMAGE_WRITER_QUEUE_SIZE,
+            workers=app_settings.PREDICTED_IMAGE_WRITER_WORKERS,
+            decode_max_side=app_settings.PREDICTION_DECODE_MAX_SIDE,
+        )
+        self.decode_workers = app_settings.PREDICTION_DECODE_WORKERS or min(8, os.cpu_count() or 1)
+        self._decode_pool: ThreadPoolExecutor | None = None
+        self._decode_pool_lock = threading.Lock()
+
+    def _create_version(self, generation: int, model_path: str | None) -> ModelVersion:
+        """Build the executor and schedulers for one classifier version.
+
+        Nothing is loaded here; the model is loaded by the first inference.
+        """
+        batched = app_settings.PREDICTION_BATCH_MAX_SIZE > 1
+        executor = None
+        if generation > 0 and self.active.executor.kind != "process":
+            executor = self.active.executor
+        if executor is None:
+            executor = InferenceExecutor(
+                app_settings.PREDICTION_EXECUTOR,
+                workers=app_settings.PREDICTION_EXECUTOR_WORKERS,
+                batched=batched,
+                model_path=model_path,
+                generation=generation,
+            )
+        version = ModelVersion(generation=generation, model_path=model_path, executor=executor)
+        if batched:
+            version.batcher = self._make_batcher(
+                functools.partial(serve_batch, model_path=model_path, generation=generation),
+                executor,
+            )
+            if self.fast_model_path:
+                version.fast_batcher = self._make_batcher(
+                    functools.partial(serve_batch, model_path=self.fast_model_path),
+                    executor,
+                )
+        return version
+
+    @staticmethod
+    def _make_batcher(batch_fn, executor: InferenceExecutor) -> InferenceBatcher:
+        """Return a micro-batching scheduler running `batch_fn` on `executor`."""
+        return InferenceBatcher(
+            batch_fn,
+            max_batch_size=app_settings.PREDICTION_BATCH_MAX_SIZE,
+            max_wait_ms=app_settings.PREDICTION_BATCH_MAX_WAIT_MS,
+            run_in_executor=executor.run,
+            max_concurrent_batches=executor.workers,
+        )
+
+    @property
+    def executor(self) -> InferenceExecutor:
+        """Execution backend of the active classifier version."""
+        return self.active.executor
+
+    @property
+    def batcher(self) -> InferenceBatcher | None:
+        """Micro-batching scheduler of the active classifier version."""
+        return self.active.batcher
+
+    @property
+    def fast_batcher(self) -> InferenceBatcher | None:
+        """Fast tier micro-batching scheduler of the active classifier version."""
+        return self.active.fast_batcher
+
+    @property
+    def model_id(self) -> str:
+        """The identifier of the active classifier model, resolved on first access."""
+        if self.active.model_id is None:
+            self.active.model_id = self._get_model_id()
+        return self.active.model_id
+
+    def _get_model_id(self, model_path: str | None = None) -> str:
         """Retrieves and formats the model ID from the library's settings.
 
         This method mirrors the logic from the previous implementation to ensure
         a consistent and descriptive model identifier.
 
+        Args:
+            model_path (str | None): ONNX file of a reloaded model. Its file name
+                is appended to the architecture, so results name the weights.
+
         Returns:
             A sanitized string representing the model architecture.
         """
         try:
             lib_settings = get_settings()
             model_arch = lib_settings.get_config("predictors.classifier").model_arch
+            if model_path:
+                model_arch = f"{model_arch}_{Path(model_path).stem}"
             # Sanitize the model architecture string to create a valid ID
             model_id = re.sub(r'[<>:"/\\|?*. ]', "_", model_arch).strip("_")
             return model_id
@@ -74,18 +298,27 @@ class PredictionService:
             print(f"Warning: Could not dynamically determine model ID. Falling back to default. Error: {e}")
             return "classifier_onnx_production"
 
-    async def save_predicted_image(self, image_data: bytes, filename: str, quiet: bool = True):
+    async def save_predicted_image(
+        self,
+        image_data: bytes,
+        filename: str,
+        quiet: bool = True,
+        decoded: DecodedImage | None = None,
+    ):
         """Asynchronously save the predicted image in multiple sizes.
 
         This method saves the original image along with resized versions (224x224
-        and 100x100) to the static images directory. Failures are handled silently
-        to not disrupt the prediction flow unless quiet mode is disabled.
+        and 100x100) to the static images directory and waits for the files to be
+        written. Predictions use the background `image_writer` instead. Failures
+        are handled silently unless quiet mode is disabled.
 
         Args:
             image_data (bytes): The raw image data to save.
             filename (str): The filename to use for the saved images.
             quiet (bool, optional): If False, exceptions will be raised instead
                 of being handled silently. Defaults to True.
+            decoded (DecodedImage | None, optional): The image as already decoded
+                for inference. If omitted, `image_data` is decoded here.
 
         Raises:
             Exception: If quiet=False and an error occurs during image saving,
@@ -96,106 +329,434 @@ class PredictionService:
             >>> await service.save_predicted_image(image_bytes, "mosquito_001.jpg")
         """
         try:
-            base_path = Path("backend/static/images/predicted")
-            original_path = base_path / "original"
-            size_224_path = base_path / "224x224"
-            size_100_path = base_path / "100x100"
+            await self.image_writer.write(image_data, filename, decoded)
+        except Exception:
+            if not quiet:
+                raise
 
-            # Create directories asynchronously if they don't exist
-            await asyncio.gather(
-                asyncio.to_thread(lambda p: p.mkdir(parents=True, exist_ok=True), original_path),
-                asyncio.to_thread(lambda p: p.mkdir(parents=True, exist_ok=True), size_224_path),
-                asyncio.to_thread(lambda p: p.mkdir(parents=True, exist_ok=True), size_100_path),
-            )
+    def tier_model_id(self, tier: str, version: ModelVersion | None = None) -> str:
+        """Return the model ID reported for predictions made by `tier`.
 
-            image = Image.open(io.BytesIO(image_data))
-            image_format = image.format or "JPEG"
+        Without tiering the plain model ID is reported, so results look the
+        same as before tiering existed.
+        """
+        model_id = version.model_id if version is not None else self.model_id
+        return f"{model_id}:{tier}" if self.fast_model_path else model_id
 
-            # --- Save original image ---
-            original_file_path = original_path / filename
-            async with aiofiles.open(original_file_path, "wb") as f:
-                await f.write(image_data)
+    @contextmanager
+    def _using_model(self) -> Iterator[ModelVersion]:
+        """Pin the active classifier version for the duration of a request.
 
-            # --- Resize and save 224x224 version ---
-            image.thumbnail((224, 224))
-            buffer_224 = io.BytesIO()
-            image.save(buffer_224, format=image_format)
-            async with aiofiles.open(size_224_path / filename, "wb") as f:
-                await f.write(buffer_224.getvalue())
+        A reload switches `active` for new requests only; the pinned version
+        stays loaded until every request using it has left this block.
+        """
+        version = self.active
+        if version.model_id is None:
+            version.model_id = self._get_model_id(version.model_path)
+        version.in_flight += 1
+        version.idle.clear()
+        try:
+            yield version
+        finally:
+            version.in_flight -= 1
+            if version.in_flight == 0:
+                version.idle.set()
 
-            # --- Resize and save 100x100 version ---
-            image.thumbnail((100, 100))
-            buffer_100 = io.BytesIO()
-            image.save(buffer_100, format=image_format)
-            async with aiofiles.open(size_100_path / filename, "wb") as f:
-                await f.write(buffer_100.getvalue())
+    async def _classify(self, image: Image.Image, tier: str = "full", version: ModelVersion | None = None):
+        """Run one tier of the classifier for one image, batching with concurrent requests if enabled.
 
-        except Exception as e:
-            print(f"Error saving predicted image '{filename}': {type(e).__name__} - {str(e)}")
-            if not quiet:
-                raise
+        Args:
+            image (Image.Image): The decoded RGB image.
+            tier (str): "full" for the production classifier or "fast" for the
+                variant loaded from `fast_model_path`.
+            version (ModelVersion | None): Classifier version to use; the active
+                one if omitted.
+
+        Returns:
+            ClassificationPrediction: The library's prediction for the image.
+        """
+        version = version or self.active
+        if tier == "fast":
+            if version.fast_batcher is not None:
+                return await version.fast_batcher.submit(image)
+            return await version.executor.run(serve_variant, image, self.fast_model_path)
+        if version.batcher is not None:
+            return await version.batcher.submit(image)
+        if not version.uses_library_serve:
+            return await version.executor.run(serve_variant, image, version.model_path, version.generation)
+        # The `serve` function is synchronous, so run it on the configured
+        # executor to avoid blocking the asyncio event loop.
+        return await version.executor.run(
+            serve,
+            image=image,
+            predictor_type="classifier",
+        )
+
+    async def _classify_tiered(self, image: Image.Image, version: ModelVersion | None = None):
+        """Classify an image with the fast tier first, escalating to the full model if unsure.
+
+        Returns:
+            tuple[ClassificationPrediction, str]: The prediction that answers the
+                request and the tier that produced it.
+        """
+        if self.fast_model_path:
+            predictions = await self._timed_classify(image, "fast", version)
+            top_prediction = predictions.top_prediction()
+            if top_prediction and top_prediction.confidence >= self.escalation_threshold:
+                PREDICTION_TIER_TOTAL.inc(tier="fast", outcome="accepted")
+                return predictions, "fast"
+            PREDICTION_TIER_TOTAL.inc(tier="fast", outcome="escalated")
+        predictions = await self._timed_classify(image, "full", version)
+        PREDICTION_TIER_TOTAL.inc(tier="full", outcome="accepted")
+        return predictions, "full"
+
+    async def _timed_classify(self, image: Image.Image, tier: str, version: ModelVersion | None = None):
+        """Run `_classify` for one tier, recording its latency and failures."""
+        started = time.perf_counter()
+        try:
+            return await self._classify(image, tier, version)
+        except Exception:
+            PREDICTION_TIER_TOTAL.inc(tier=tier, outcome="error")
+            raise
+        finally:
+            PREDICTION_TIER_SECONDS.observe(time.perf_counter() - started, tier=tier)
+
+    def _model_key(self, version: ModelVersion) -> str:
+        """Identify the model configuration that produced a result, for reusing it.
+
+        Results are only reused by requests served by the same model version
+        and the same tiering settings.
+        """
+        if version.model_id is None:
+            version.model_id = self._get_model_id(version.model_path)
+        model_key = version.model_id
+        if version.generation:
+            model_key += f"|generation={version.generation}"
+        if self.fast_model_path:
+            model_key += f"|{self.fast_model_path}|{self.escalation_threshold}"
+        return model_key
+
+    async def _decode(self, image_data: bytes | memoryview) -> tuple[DecodedImage, int | None]:
+        """Decode an upload and hash it for near-duplicate lookups on the decode pool, created on first use.
+
+        Returns:
+            tuple[DecodedImage, int | None]: The decoded image and its perceptual
+                hash, None if the near-duplicate index is disabled or the image
+                has too little detail.
+        """
+        with self._decode_pool_lock:
+            if self._decode_pool is None:
+                self._decode_pool = ThreadPoolExecutor(max_workers=self.decode_workers, thread_name_prefix="decode")
+            pool = self._decode_pool
+        return await asyncio.get_running_loop().run_in_executor(
+            pool,
+            _decode_and_hash,
+            image_data,
+            app_settings.PREDICTION_DECODE_MAX_SIDE,
+            self.near_duplicates.enabled,
+        )
+
+    def _find_near_duplicate(self, image_hash: int | None, model_key: str) -> PredictionResult | None:
+        """Look up a recent result for a near-identical photo by its perceptual hash."""
+        if not self.near_duplicates.enabled:
+            return None
+        with timed_stage("near_duplicate"):
+            return self.near_duplicates.get(image_hash, model_key)
 
     async def predict_species(
         self,
-        image_data: bytes,
+        image_data: bytes | memoryview,
         filename: str,
     ) -> tuple[PredictionResult | None, str | None]:
         """Predict mosquito species from image data using the `serve` API.
 
         This method processes image data using the high-performance `serve`
-        function. It translates the library's output into the backend's
-        `PredictionResult` schema, including the correct model ID.
+        function, or the micro-batching scheduler when batching is enabled, so
+        that concurrent uploads share one batched model call. It translates the
+        library's output into the backend's `PredictionResult` schema, including
+        the correct model ID.
 
         Args:
-            image_data (bytes): The raw image data (e.g., JPEG, PNG).
+            image_data (bytes | memoryview): The raw image data (e.g., JPEG, PNG).
+                A memoryview over the upload buffer is read in place; it only
+                needs to stay valid until this call returns.
             filename (str): The original filename of the image.
 
+        Results are cached by image digest and model ID, so re-uploads of the
+        same photo, including concurrent ones, run the model only once. The same
+        digest names the saved image files. With tiered inference the result's
+        `model_id` ends in ":fast" or ":full" to record which tier answered.
+
         Returns:
             A tuple containing the `PredictionResult` or None, and an error
             message or None.
         """
+        cache_model_id = self._model_key(self.active)
+        with timed_stage("hash"):
+            digest = hashlib.sha256(image_data).hexdigest()
+            key = self.cache.make_key(image_data, cache_model_id, digest=digest)
+        return await self.cache.get_or_compute(key, lambda: self._predict_uncached(image_data, filename, digest))
+
+    async def _predict_uncached(
+        self,
+        image_data: bytes | memoryview,
+        filename: str,
+        digest: str,
+    ) -> tuple[PredictionResult | None, str | None]:
+        """Run the model for an image and build its `PredictionResult`, bypassing the cache."""
         image_url_species = None
         try:
-            # The `serve` function is synchronous, so run it in a thread pool
-            # to avoid blocking the asyncio event loop.
-            predictions = await asyncio.to_thread(
-                serve,
-                image=image_data,
-                predictor_type="classifier",
-            )
+            # Decode once; the classifier and the thumbnails share the result.
+            with timed_stage("decode"):
+                decoded, image_hash = await self._decode(image_data)
+            with self._using_model() as version:
+                model_key = self._model_key(version)
+                previous = self._find_near_duplicate(image_hash, model_key)
+                if previous is None:
+                    predictions, tier = await self._classify_tiered(decoded.image, version)
 
-            top_prediction = predictions.top_prediction()  # type: ignore
-            if not top_prediction:
-                return None, f"Prediction failed for file '{filename}': Model returned no results."
+            if self.save_predicted_images_enabled:
+                stored_filename = predicted_image_name(digest, decoded.format)
+                image_url_species = predicted_image_url("224x224", stored_filename)
 
-            top_species = top_prediction.species_name
-            top_confidence = top_prediction.confidence
-            species_id = top_species.replace(" ", "_").lower()
-            unique_id = f"{hash(top_species) % 10000:04d}"
-            date_str = datetime.now().strftime("%d%m%Y")
-            result_id = f"{species_id}_{unique_id}_{date_str}"
+            if previous is not None:
+                # The species comes from the earlier photo; the image URL is this upload's own.
+                result = previous.model_copy(update={"image_url_species": image_url_species})
+            else:
+                with timed_stage("postprocess"):
+                    top_prediction = predictions.top_prediction()  # type: ignore
+                    if not top_prediction:
+                        return None, f"Prediction failed for file '{filename}': Model returned no results."
+
+                    top_species = top_prediction.species_name
+                    top_confidence = top_prediction.confidence
+                    species_id = top_species.replace(" ", "_").lower()
+
+                    result = PredictionResult(
+                        scientific_name=top_species,
+                        probabilities={p.species_name: float(p.confidence) for p in predictions.predictions[:2]},
+                        id=species_id,
+                        model_id=self.tier_model_id(tier, version),
+                        confidence=float(top_confidence),
+                        image_url_species=image_url_species,
+                    )
+                self.near_duplicates.add(image_hash, model_key, result)
 
             if self.save_predicted_images_enabled:
-                extension = Path(filename).suffix or ".jpg"
-                new_filename = f"{result_id}{extension}"
-                asyncio.create_task(self.save_predicted_image(image_data, new_filename))
-                image_url_species = f"/static/images/predicted/224x224/{new_filename}"
+                with timed_stage("save"):
+                    self.image_writer.submit(image_data, stored_filename, decoded)
             else:
                 print("[SERVICE] Feature flag 'SAVE_PREDICTED_IMAGES' is False. Skipping image save.")
-
-            result = PredictionResult(
-                scientific_name=top_species,
-                probabilities={p.species_name: float(p.confidence) for p in predictions.predictions[:2]},
-                id=species_id,
-                model_id=self.model_id,  # Use the dynamically fetched model ID
-                confidence=float(top_confidence),
-                image_url_species=image_url_species,
-            )
             return result, None
 
         except Exception as e:
             error_msg = f"Error predicting species for file '{filename}': {type(e).__name__} - {str(e)}"
             return None, error_msg
 
+    async def predict_many(
+        self,
+        images: AsyncIterable[tuple[str, bytes]],
+        concurrency: int = 4,
+    ) -> AsyncIterator[tuple[int, str, PredictionResult | None, str | None]]:
+        """Predict species for a stream of images, yielding results as they complete.
+
+        Images are pulled from `images` only when a slot is free, so at most
+        `concurrency` images are held in memory at once regardless of how many
+        the caller supplies. Results are yielded in completion order; each one
+        carries the zero-based position of its image in the input stream.
+
+        Args:
+            images (AsyncIterable[tuple[str, bytes]]): Pairs of filename and raw
+                image data.
+            concurrency (int, optional): Maximum number of images classified at
+                the same time. Defaults to 4.
+
+        Yields:
+            tuple[int, str, PredictionResult | None, str | None]: The input index,
+                the filename, and the `predict_species` result/error pair.
+
+        Example:
+            >>> async for index, name, result, error in service.predict_many(images):
+            ...     print(index, name, result.scientific_name if result else error)
+        """
+
+        async def _predict(index: int, filename: str, image_data: bytes):
+            result, error = await self.predict_species(image_data, filename)
+            return index, filename, result, error
+
+        pending: set[asyncio.Task] = set()
+        try:
+            index = 0
+            async for filename, image_data in images:
+                pending.add(asyncio.create_task(_predict(index, filename, image_data)))
+                index += 1
+                if len(pending) >= max(1, concurrency):
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def warm_up(self, iterations: int = 1):
+        """Load the classifier and run synthetic inferences to warm it up.
+
+        The inferences are submitted concurrently so that, with a dedicated
+        pool, several workers are started and warmed. They bypass the result
+        cache and image saving. With tiered inference both tiers are warmed.
+
+        Args:
+            iterations (int, optional): Number of synthetic inferences. Values
+                below 1 skip the warm-up. Defaults to 1.
+
+        Raises:
+            Exception: If the model cannot be loaded or run.
+        """
+        if iterations < 1:
+            return
+        image = Image.effect_noise((224, 224), 64).convert("RGB")
+        tiers = TIERS if self.fast_model_path else ("full",)
+        await asyncio.gather(*(self._classify(image, tier) for tier in tiers for _ in range(iterations)))
+
+    def model_status(self) -> dict:
+        """Return the active classifier version and the state of the last reload."""
+        return {
+            "model_id": self.model_id,
+            "generation": self.active.generation,
+            "in_flight": self.active.in_flight,
+            "retiring_generations": sorted(version.generation for version in self._retiring.values()),
+            "reload_state": self.reload_status["state"],
+            "reload_generation": self.reload_status["generation"],
+            "reload_error": self.reload_status["error"],
+        }
+
+    def start_reload(self, model_path: str | None = None, warmup_iterations: int = 1) -> int:
+        """Start reloading the full classifier in the background.
+
+        Args:
+            model_path (str | None): ONNX file of the new model. None reloads the
+                classifier configured in the CulicidaeLab library, e.g. after
+                its weights were replaced on disk.
+            warmup_iterations (int): Synthetic inferences run on the new model
+                before it receives traffic.
+
+        Returns:
+            int: The generation the new model will have.
+
+        Raises:
+            ReloadInProgress: If a reload is already running.
+        """
+        if self._reload_task is not None and not self._reload_task.done():
+            raise ReloadInProgress(f"Generation {self.reload_status['generation']} is still loading.")
+        generation = self.active.generation + 1
+        self.reload_status = {"state": "loading", "error": None, "generation": generation}
+
+        async def _reload():
+            try:
+                await self.reload_model(model_path, warmup_iterations)
+            except Exception as e:
+                self.reload_status = {
+                    "state": "failed",
+                    "error": f"{type(e).__name__}: {e}",
+                    "generation": generation,
+                }
+
+        self._reload_task = asyncio.create_task(_reload())
+        return generation
+
+    async def reload_model(self, model_path: str | None = None, warmup_iterations: int = 1) -> ModelVersion:
+        """Load and warm a new version of the full classifier, then switch to it.
+
+        The new version is built next to the active one, so requests keep being
+        served while it loads. Once it has answered `warmup_iterations`
+        synthetic inferences it becomes `active`: requests that start after
+        the switch use it, while requests already running finish on the old
+        version, which is released when the last of them is done. If loading
+        or warming fails, the active version is left untouched.
+
+        Args:
+            model_path (str | None): ONNX file of the new model, or None for the
+                classifier configured in the CulicidaeLab library.
+            warmup_iterations (int): Synthetic inferences run before the
+                switch. Values below 1 are treated as 1.
+
+        Returns:
+            ModelVersion: The version now serving requests.
+
+        Raises:
+            Exception: If the new model cannot be loaded or run.
+        """
+        previous = self.active
+        version = self._create_version(previous.generation + 1, model_path)
+        started = time.perf_counter()
+        try:
+            version.model_id = self._get_model_id(model_path)
+            image = Image.effect_noise((224, 224), 64).convert("RGB")
+            tiers = TIERS if self.fast_model_path else ("full",)
+            await asyncio.gather(
+                *(self._classify(image, tier, version) for tier in tiers for _ in range(max(1, warmup_iterations))),
+            )
+        except Exception as e:
+            MODEL_RELOADS.inc(outcome="failed")
+            print(f"[SERVICE] Reload of generation {version.generation} failed: {type(e).__name__} - {e}")
+            await self._release_version(version)
+            raise
+
+        self.active = version
+        MODEL_RELOADS.inc(outcome="ok")
+        self.reload_status = {"state": "idle", "error": None, "generation": version.generation}
+        print(
+            f"[SERVICE] Switched to model '{version.model_id}' (generation {version.generation}) "
+            f"after {time.perf_counter() - started:.2f}s of loading.",
+        )
+        task = asyncio.create_task(self._retire(previous))
+        self._retiring[task] = previous
+        task.add_done_callback(lambda done: self._retiring.pop(done, None))
+        return version
+
+    async def _retire(self, version: ModelVersion):
+        """Wait for the requests still using `version` to finish, then release it."""
+        if version.in_flight:
+            await version.idle.wait()
+        await self._release_version(version)
+        print(f"[SERVICE] Released model generation {version.generation}.")
+
+    async def _release_version(self, version: ModelVersion):
+        """Stop a version's schedulers and free its model."""
+        for batcher in (version.batcher, version.fast_batcher):
+            if batcher is not None:
+                await batcher.close()
+        if version.executor is not self.active.executor:
+            # A process pool warmed for this version only; stopping it frees the model.
+            await asyncio.to_thread(version.executor.shutdown)
+        else:
+            await asyncio.to_thread(release_classifier, version.model_path, version.generation)
+
+    async def close(self):
+        """Drain pending image saves, stop the batching schedulers and shut down the executors and decode pool."""
+        await self.image_writer.close(app_settings.PREDICTED_IMAGE_WRITER_DRAIN_SECONDS)
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            await asyncio.gather(self._reload_task, return_exceptions=True)
+        for task, version in list(self._retiring.items()):
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            for batcher in (version.batcher, version.fast_batcher):
+                if batcher is not None:
+                    await batcher.close()
+            await asyncio.to_thread(version.executor.shutdown)
+        for batcher in (self.batcher, self.fast_batcher):
+            if batcher is not None:
+                await batcher.close()
+        await asyncio.to_thread(self.executor.shutdown)
+        with self._decode_pool_lock:
+            decode_pool, self._decode_pool = self._decode_pool, None
+        if decode_pool is not None:
+            await asyncio.to_thread(decode_pool.shutdown)
+
 
 prediction_service = PredictionService()
@@ -0,0 +1,151 @@
+"""
+Start-up warm-up and readiness tracking.
+
+This module warms the expensive parts of the backend after the application
+starts: it opens the LanceDB table handles used by the API, loads the
+resident observation snapshot behind the map endpoints and loads the
+classifier with a few synthetic inferences. Progress is recorded in a
+`ReadinessState`, which the readiness endpoint reports so that load balancers
+only route traffic to workers that have finished warming up.
+
+Example:
+    >>> from backend.services.readiness_service import ReadinessState, run_startup_warmup
+    >>> readiness = ReadinessState(["database", "model"])
+    >>> await run_startup_warmup(readiness, db, prediction_service, iterations=2)
+    >>> readiness.is_ready
+    True
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from backend.database_utils.lancedb_manager import get_lancedb_manager
+from backend.services.database import get_table
+from backend.services.geo_service import load_observation_store
+
+WARMUP_TABLES = ["species", "diseases", "regions", "data_sources", "observations"]
+
+
+class ReadinessState:
+    """Tracks the warm-up status of named start-up components.
+
+    Each component is "pending" until it is marked "ready" or "failed". The
+    application is ready once every component is ready.
+
+    Attributes:
+        components (dict[str, str]): Status of each component.
+        errors (dict[str, str]): Error message for each failed component.
+        started_at (float): Time the state was created.
+        completed_at (float | None): Time the last component finished, if any.
+    """
+
+    def __init__(self, components: list[str]):
+        self.components: dict[str, str] = {name: "pending" for name in components}
+        self.errors: dict[str, str] = {}
+        self.started_at = time.time()
+        self.completed_at: float | None = None
+
+    @property
+    def is_ready(self) -> bool:
+        """True once every component has finished warming up successfully."""
+        return all(status == "ready" for status in self.components.values())
+
+    def mark_ready(self, component: str):
+        """Record that a component finished warming up."""
+        self.components[component] = "ready"
+        self.errors.pop(component, None)
+        self._update_completion()
+
+    def mark_failed(self, component: str, error: str):
+        """Record that a component failed to warm up."""
+        self.components[component] = "failed"
+        self.errors[component] = error
+        self._update_completion()
+
+    def as_dict(self) -> dict:
+        """Return a JSON-serialisable summary for the readiness endpoint."""
+        return {
+            "ready": self.is_ready,
+            "components": dict(self.components),
+            "errors": dict(self.errors),
+            "warmup_seconds": (self.completed_at or time.time()) - self.started_at,
+        }
+
+    def _update_completion(self):
+        if all(status != "pending" for status in self.components.values()):
+            self.completed_at = time.time()
+
+
+async def open_table_handles(db: object, table_names: list[str] = WARMUP_TABLES) -> list[str]:
+    """Open the LanceDB tables used by the API so the first requests find them warm.
+
+    Both the synchronous connection used by the catalog and geo services and
+    the asynchronous manager used by the observation service are opened.
+
+    Args:
+        db (object): The synchronous LanceDB connection.
+        table_names (list[str]): Tables to open.
+
+    Returns:
+        list[str]: The names of the tables that were opened.
+
+    Raises:
+        ValueError: If a table cannot be opened.
+    """
+    opened = []
+    for table_name in table_names:
+        await asyncio.to_thread(get_table, db, table_name)
+        opened.append(table_name)
+
+    manager = await get_lancedb_manager()
+    for table_name in table_names:
+        await manager.db.open_table(table_name)
+    return opened
+
+
+async def _load_observation_snapshot(db: object):
+    """Load the observation snapshot; a failure is only logged, as map requests load it on demand."""
+    try:
+        started = time.perf_counter()
+        if await asyncio.to_thread(load_observation_store, db):
+            print(f"[WARMUP] Observation snapshot loaded in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"[WARMUP] Failed to load the observation snapshot: {type(e).__name__} - {e}")
+
+
+async def run_startup_warmup(readiness: ReadinessState, db: object, prediction_service=None, iterations: int = 1):
+    """Warm up the database and the model, recording the outcome in `readiness`.
+
+    Only the components listed in `readiness` are warmed, so a catalog-only
+    worker never loads the model and an inference-only worker never opens the
+    catalog tables. Failures are recorded rather than raised, so a worker whose
+    model cannot be loaded keeps serving catalog endpoints while reporting
+    itself as not ready.
+
+    Args:
+        readiness (ReadinessState): State with "database" and/or "model" components.
+        db (object): The synchronous LanceDB connection, or None if not used.
+        prediction_service (PredictionService | None): Service whose model is warmed.
+        iterations (int): Number of synthetic inferences to run.
+    """
+    if "database" in readiness.components:
+        try:
+            opened = await open_table_handles(db)
+            print(f"[WARMUP] Opened LanceDB tables: {', '.join(opened)}")
+            await _load_observation_snapshot(db)
+            readiness.mark_ready("database")
+        except Exception as e:
+            print(f"[WARMUP] Failed to open LanceDB tables: {type(e).__name__} - {e}")
+            readiness.mark_failed("database", f"{type(e).__name__}: {e}")
+
+    if "model" in readiness.components:
+        try:
+            started = time.perf_counter()
+            await prediction_service.warm_up(iterations)
+            print(f"[WARMUP] Model warmed with {iterations} inference(s) in {time.perf_counter() - started:.2f}s")
+            readiness.mark_ready("model")
+        except Exception as e:
+            print(f"[WARMUP] Model warm-up failed: {type(e).__name__} - {e}")
+            readiness.mark_failed("model", f"{type(e).__name__}: {e}")
@@ -0,0 +1,221 @@
+"""
+Z-order spatial index over observation locations.
+
+`SpatialIndex` quantizes longitude and latitude to 16 bits each and
+interleaves the bits into a 32-bit Morton (Z-order) key. Keys are kept sorted
+together with the position of each point in the caller's arrays, so points
+that are close on the map are mostly close in the sorted keys.
+
+A bounding box is decomposed into a bounded number of quadtree cells; every
+cell is one contiguous key range, found by binary search. The index returns
+the positions in those ranges, a superset of the points in the box, about
+the size of the box's contents rather than of the whole table. Callers test
+the exact box on the returned positions.
+
+The index is immutable. Appended points are merged into a new index without
+re-sorting the existing keys.
+
+Example:
+    >>> from backend.services.spatial_index import SpatialIndex
+    >>> index = SpatialIndex.build(lat, lon)
+    >>> positions = index.candidates((-75.0, 40.0, -73.0, 41.0))
+"""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+KEY_BITS = 16
+EARTH_RADIUS_KM = 6371.0088
+# Partially covered cells are no longer split once a level has this many.
+MAX_PARTIAL_CELLS = 256
+
+
+def _quantize(values: np.ndarray, low: float, high: float) -> np.ndarray:
+    """Map coordinates in [low, high] to integer cells in [0, 2**KEY_BITS)."""
+    cells = np.floor((np.asarray(values, dtype=np.float64) - low) * ((1 << KEY_BITS) / (high - low)))
+    return np.clip(cells, 0, (1 << KEY_BITS) - 1).astype(np.uint64)
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Insert a zero bit above every bit of 16-bit values."""
+    values = values & 0xFFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    return (values | (values << 1)) & 0x55555555
+
+
+def _interleave(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Morton key of quantized (x, y) cells."""
+    return _spread_bits(x) | (_spread_bits(y) << 1)
+
+
+def morton_keys(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Return the Z-order key of each (lat, lon) point.
+
+    Args:
+        lat (np.ndarray): Latitudes in degrees.
+        lon (np.ndarray): Longitudes in degrees.
+
+    Returns:
+        np.ndarray: uint32 keys.
+    """
+    return _interleave(_quantize(lon, -180.0, 180.0), _quantize(lat, -90.0, 90.0)).astype(np.uint32)
+
+
+def _key_ranges(x0: int, y0: int, x1: int, y1: int) -> tuple[np.ndarray, np.ndarray]:
+    """Cover the inclusive cell box [x0, x1] x [y0, y1] with Z-order key ranges.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: First and last key of each range, sorted
+            and with adjacent ranges merged.
+    """
+    cx = np.zeros(1, dtype=np.uint64)
+    cy = np.zeros(1, dtype=np.uint64)
+    firsts, lasts = [], []
+    for level in range(KEY_BITS + 1):
+        shift = KEY_BITS - level
+        xlo, ylo = cx << shift, cy << shift
+        xhi, yhi = xlo + ((1 << shift) - 1), ylo + ((1 << shift) - 1)
+        done = (xlo >= x0) & (xhi <= x1) & (ylo >= y0) & (yhi <= y1)
+        if level == KEY_BITS or len(cx) > MAX_PARTIAL_CELLS:
+            done[:] = True
+        first = _interleave(xlo[done], ylo[done])
+        firsts.append(first)
+        lasts.append(first + ((1 << (2 * shift)) - 1))
+        if done.all():
+            break
+        # Split the partially covered cells and drop the children outside the box.
+        cx = np.repeat(cx[~done] << 1, 4) + np.tile(np.array([0, 1, 0, 1], dtype=np.uint64), int((~done).sum()))
+        cy = np.repeat(cy[~done] << 1, 4) + np.tile(np.array([0, 0, 1, 1], dtype=np.uint64), int((~done).sum()))
+        size = (1 << (shift - 1)) - 1
+        keep = ((cx << (shift - 1)) <= x1) & (((cx << (shift - 1)) + size) >= x0)
+        keep &= ((cy << (shift - 1)) <= y1) & (((cy << (shift - 1)) + size) >= y0)
+        cx, cy = cx[keep], cy[keep]
+        if len(cx) == 0:
+            break
+
+    first = np.concatenate(firsts)
+    last = np.concatenate(lasts)
+    order = np.argsort(first)
+    first, last = first[order], last[order]
+    if len(first) == 0:
+        return first, last
+    starts = np.concatenate([[True], first[1:] != last[:-1] + 1])
+    ends = np.concatenate([starts[1:], [True]])
+    return first[starts], last[ends]
+
+
+def haversine_km(lat: np.ndarray, lon: np.ndarray, center_lat: float, center_lon: float) -> np.ndarray:
+    """Return the great-circle distance in km from each point to a center point."""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat0, lon0 = math.radians(center_lat), math.radians(center_lon)
+    a = np.sin((lat1 - lat0) / 2) ** 2 + math.cos(lat0) * np.cos(lat1) * np.sin((lon1 - lon0) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def circle_bbox(lon: float, lat: float, radius_km: float) -> tuple[float, float, float, float]:
+    """Return a (min_lon, min_lat, max_lon, max_lat) box containing a circle on the sphere.
+
+    The box crosses the antimeridian (min_lon > max_lon) when the circle does,
+    and spans every longitude when the circle contains a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    min_lat = lat - math.degrees(angle)
+    max_lat = lat + math.degrees(angle)
+    if min_lat <= -90.0 or max_lat >= 90.0 or math.sin(angle) >= math.cos(math.radians(lat)):
+        return -180.0, max(min_lat, -90.0), 180.0, min(max_lat, 90.0)
+    delta = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+    min_lon, max_lon = lon - delta, lon + delta
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return min_lon, min_lat, max_lon, max_lat
+
+
+class SpatialIndex:
+    """Sorted Z-order keys of points and their positions.
+
+    Attributes:
+        keys (np.ndarray): Sorted uint32 Morton keys.
+        positions (np.ndarray): Position of the point with each key in the
+            indexed arrays. Points without a location are not indexed.
+    """
+
+    def __init__(self, keys: np.ndarray, positions: np.ndarray):
+        self.keys = keys
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @classmethod
+    def empty(cls) -> SpatialIndex:
+        return cls(np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def build(cls, lat: np.ndarray, lon: np.ndarray) -> SpatialIndex:
+        """Index points, skipping those with a missing (NaN) coordinate.
+
+        Args:
+            lat (np.ndarray): Latitudes in degrees.
+            lon (np.ndarray): Longitudes in degrees.
+
+        Returns:
+            SpatialIndex: The index, with positions into `lat` and `lon`.
+        """
+        positions = np.flatnonzero(np.isfinite(lat) & np.isfinite(lon))
+        keys = morton_keys(lat[positions], lon[positions])
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], positions[order].astype(np.int64))
+
+    def merge(self, other: SpatialIndex, offset: int) -> SpatialIndex:
+        """Return an index of both sets of points.
+
+        Args:
+            other (SpatialIndex): Index of points appended after the ones indexed here.
+            offset (int): Added to the positions of `other`.
+
+        Returns:
+            SpatialIndex: The merged index. Neither input is modified.
+        """
+        slots = np.searchsorted(self.keys, other.keys, side="right")
+        return SpatialIndex(
+            np.insert(self.keys, slots, other.keys),
+            np.insert(self.positions, slots, other.positions + offset),
+        )
+
+    def candidates(self, bbox: tuple[float, float, float, float]) -> np.ndarray:
+        """Return the positions of the points in the key ranges covering a box.
+
+        Args:
+            bbox (tuple[float, float, float, float]): (min_lon, min_lat, max_lon,
+                max_lat), inclusive. The box crosses the antimeridian when
+                min_lon > max_lon.
+
+        Returns:
+            np.ndarray: Sorted positions of every point in the box and of some
+                points near it.
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        if min_lat > max_lat:
+            return np.empty(0, dtype=np.int64)
+        if min_lon > max_lon:
+            boxes = [(min_lon, 180.0), (-180.0, max_lon)]
+        else:
+            boxes = [(min_lon, max_lon)]
+        y0, y1 = (int(cell) for cell in _quantize([min_lat, max_lat], -90.0, 90.0))
+        firsts, lasts = [], []
+        for low, high in boxes:
+            x0, x1 = (int(cell) for cell in _quantize([low, high], -180.0, 180.0))
+            first, last = _key_ranges(x0, y0, x1, y1)
+            firsts.append(first)
+            lasts.append(last)
+        starts = np.searchsorted(self.keys, np.concatenate(firsts).astype(np.uint32), side="left")
+        stops = np.searchsorted(self.keys, np.concatenate(lasts).astype(np.uint32), side="right")
+        slices = [self.positions[start:stop] for start, stop in zip(starts, stops) if stop > start]
+        return np.unique(np.concatenate(slices)) if slices else np.empty(0, dtype=np.int64)
@@ -0,0 +1,132 @@
+"""
+Per-stage timing of prediction requests.
+
+A prediction passes through several stages, and when it is slow the total
+latency alone does not say which one to optimise. Code on the prediction
+path reports the time it spent with `record_stage` or the `timed_stage`
+context manager. Every report is observed in the
+``culicidaelab_prediction_stage_seconds`` histogram and, while a request is
+collecting its stages with `collect_stages`, also added to that request's
+`StageTimings`, which can be rendered as a ``Server-Timing`` header.
+
+Stages:
+    - ``read``: receiving the request body and parsing the multipart form.
+    - ``hash``: hashing the upload for the result cache.
+    - ``decode``: decoding and downscaling the image, and computing its
+      perceptual hash when near-duplicate reuse is enabled.
+    - ``near_duplicate``: looking up near-duplicates of the decoded image.
+    - ``batch_wait``: waiting in the micro-batching queue for a batch to form.
+    - ``queue_wait``: waiting for a free inference worker (thread or process).
+    - ``inference``: running the classifier on the worker.
+    - ``postprocess``: mapping the classifier output to a `PredictionResult`.
+    - ``save``: handing the image to the background writer.
+
+Example:
+    >>> from backend.services.stage_timing import collect_stages, timed_stage
+    >>> with collect_stages() as stages:
+    ...     with timed_stage("decode"):
+    ...         decoded = decode_image(image_data)
+    >>> stages.server_timing()
+    'decode;dur=3.1'
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from backend.services.metrics import histogram
+
+STAGES = (
+    "read",
+    "hash",
+    "decode",
+    "near_duplicate",
+    "batch_wait",
+    "queue_wait",
+    "inference",
+    "postprocess",
+    "save",
+)
+
+STAGE_SECONDS = histogram(
+    "culicidaelab_prediction_stage_seconds",
+    "Time spent in each stage of a prediction (read, hash, decode, near_duplicate, batch_wait, queue_wait, "
+    "inference, postprocess, save).",
+    ["stage"],
+)
+
+_current_stages: ContextVar[StageTimings | None] = ContextVar("prediction_stage_timings", default=None)
+
+
+class StageTimings:
+    """Accumulated stage durations of one request.
+
+    Attributes:
+        durations (dict[str, float]): Seconds spent per stage, in the order the
+            stages were first reported. A stage reported more than once, such
+            as inference with tiered models, is summed.
+    """
+
+    def __init__(self):
+        self.durations: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        """Add `seconds` to a stage."""
+        self.durations[stage] = self.durations.get(stage, 0.0) + max(0.0, seconds)
+
+    def merge(self, other: StageTimings):
+        """Add every stage of `other` to this request."""
+        for stage, seconds in other.durations.items():
+            self.add(stage, seconds)
+
+    def server_timing(self) -> str:
+        """Render the stages as a ``Server-Timing`` header value, in milliseconds."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.durations.items())
+
+
+@contextmanager
+def collect_stages() -> Iterator[StageTimings]:
+    """Collect the stages reported by the current task and the code it awaits.
+
+    Yields:
+        StageTimings: The durations reported inside the block.
+    """
+    stages = StageTimings()
+    token = _current_stages.set(stages)
+    try:
+        yield stages
+    finally:
+        _current_stages.reset(token)
+
+
+def current_stages() -> StageTimings | None:
+    """Return the stages being collected for the current request, if any."""
+    return _current_stages.get()
+
+
+def record_stage(stage: str, seconds: float, stages: StageTimings | None = None):
+    """Observe a stage duration and add it to a request's stages.
+
+    Args:
+        stage (str): One of `STAGES`.
+        seconds (float): Time spent in the stage.
+        stages (StageTimings | None): Request to add the duration to; the one
+            being collected by the current task if omitted.
+    """
+    STAGE_SECONDS.observe(max(0.0, seconds), stage=stage)
+    stages = stages if stages is not None else _current_stages.get()
+    if stages is not None:
+        stages.add(stage, seconds)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Record the time spent inside the block as `stage`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
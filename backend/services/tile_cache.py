@@ -0,0 +1,262 @@
+"""
+Cache of rendered observation map tiles.
+
+Map tiles are addressed by zoom, column and row (z/x/y) in the Web Mercator
+tile grid, so every user browsing the same area at the same zoom level asks
+for the same tiles. `TileCache` keeps rendered tiles in a bounded LRU in
+memory and, optionally, in a bounded directory on disk so the cache survives
+restarts.
+
+Each tile records the table version it was rendered from. The cache learns
+about new observations from the observation store (`ObservationStore.add_listener`):
+appended observations invalidate only the tiles that contain them, at every
+zoom level, and any other change to the table invalidates every tile rendered
+before it. Invalid entries are dropped when they are next looked up.
+
+Example:
+    >>> from backend.services.tile_cache import TileCache
+    >>> cache = TileCache(max_entries=4096)
+    >>> key = cache.make_key(5, 9, 12, "mvt", species_list=["Aedes aegypti"])
+    >>> content = cache.get(key, (5, 9, 12))
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from backend.services.metrics import counter, gauge
+from backend.services.observation_clusters import cell_x, cell_y
+
+MAX_TILE_ZOOM = 20
+# Tracking more invalidated tiles than this invalidates every tile instead.
+MAX_TRACKED_TILES = 1_000_000
+_VERSION_BYTES = 8
+
+TILE_CACHE_LOOKUPS = counter(
+    "culicidaelab_tile_cache_lookups_total",
+    "Observation tile cache lookups by outcome (hit, disk_hit, miss).",
+    ["outcome"],
+)
+TILE_CACHE_ENTRIES = gauge(
+    "culicidaelab_tile_cache_entries",
+    "Observation tiles held in the in-memory tile cache.",
+)
+
+Tile = tuple[int, int, int]
+
+
+class TileCache:
+    """Bounded memory and disk cache of rendered tiles, invalidated by new observations.
+
+    Attributes:
+        max_entries (int): Maximum number of tiles kept in memory. A value of
+            0 disables the cache; `get` then always misses.
+        persist_dir (Path | None): Directory for on-disk tiles, or None to keep
+            the cache in memory only.
+        max_disk_entries (int): Maximum number of tiles kept on disk.
+    """
+
+    def __init__(self, max_entries: int = 4096, persist_dir: str | Path | None = None, max_disk_entries: int = 65536):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of in-memory tiles; 0 disables caching.
+            persist_dir: Optional directory used to persist tiles.
+            max_disk_entries: Maximum number of persisted tiles.
+        """
+        self.max_entries = max(0, int(max_entries))
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.max_disk_entries = max(0, int(max_disk_entries))
+        self._entries: OrderedDict[str, tuple[int, bytes]] = OrderedDict()
+        self._disk: OrderedDict[str, None] = OrderedDict()
+        self._baseline_version = -1
+        self._touched: dict[Tile, int] = {}
+        self._lock = threading.Lock()
+        if self.persist_dir is not None:
+            self._scan_disk()
+        TILE_CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache stores tiles at all."""
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(
+        z: int,
+        x: int,
+        y: int,
+        fmt: str,
+        species_list: list[str] | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+    ) -> str:
+        """Build the cache key of a tile rendered with some filters.
+
+        Args:
+            z (int): Zoom level.
+            x (int): Tile column.
+            y (int): Tile row.
+            fmt (str): Tile encoding, used as the file extension.
+            species_list (list[str] | None): Species filter.
+            start_date (str | None): Start date filter.
+            end_date (str | None): End date filter.
+
+        Returns:
+            str: A filesystem-safe key, "z/x/y/<filters digest>.fmt".
+        """
+        filters = json.dumps([sorted(species_list or []), start_date, end_date])
+        digest = hashlib.sha256(filters.encode("utf-8")).hexdigest()[:16]
+        return f"{z}/{x}/{y}/{digest}.{fmt}"
+
+    def get(self, key: str, tile: Tile) -> bytes | None:
+        """Return a valid cached tile from memory or disk, or None.
+
+        Args:
+            key (str): Key from `make_key`.
+            tile (Tile): The (z, x, y) of the key.
+
+        Returns:
+            bytes | None: The rendered tile, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._is_valid(tile, entry[0]):
+                    self._entries.move_to_end(key)
+                    TILE_CACHE_LOOKUPS.inc(outcome="hit")
+                    return entry[1]
+                del self._entries[key]
+
+        stored = self._load(key) if self.persist_dir is not None else None
+        with self._lock:
+            if stored is not None and self._is_valid(tile, stored[0]):
+                self._remember(key, stored[0], stored[1])
+                TILE_CACHE_LOOKUPS.inc(outcome="disk_hit")
+                return stored[1]
+        if stored is not None:
+            self._delete(key)
+        TILE_CACHE_LOOKUPS.inc(outcome="miss")
+        return None
+
+    def put(self, key: str, tile: Tile, version: int | None, content: bytes):
+        """Store a tile rendered from a table version.
+
+        Args:
+            key (str): Key from `make_key`.
+            tile (Tile): The (z, x, y) of the key.
+            version (int | None): Table version the tile was rendered from;
+                None stores nothing.
+            content (bytes): The rendered tile.
+        """
+        if not self.enabled or version is None:
+            return
+        with self._lock:
+            if not self._is_valid(tile, version):
+                return
+            self._remember(key, version, content)
+        if self.persist_dir is not None:
+            self._store(key, version, content)
+
+    def invalidate(self, lat: np.ndarray | None, lon: np.ndarray | None, version: int):
+        """Invalidate the tiles changed by a new table version.
+
+        Args:
+            lat (np.ndarray | None): Latitudes of the observations appended in
+                `version`, or None if the table changed in other ways, which
+                invalidates every tile rendered before `version`.
+            lon (np.ndarray | None): Longitudes of the appended observations.
+            version (int): The new table version.
+        """
+        with self._lock:
+            if lat is None or lon is None:
+                self._reset(version)
+                return
+            located = np.isfinite(lat) & np.isfinite(lon)
+            lat, lon = lat[located], lon[located]
+            for z in range(MAX_TILE_ZOOM + 1):
+                tiles = np.unique((cell_y(lat, z) << z) | cell_x(lon, z))
+                for key in tiles.tolist():
+                    self._touched[(z, key & ((1 << z) - 1), key >> z)] = version
+            if len(self._touched) > MAX_TRACKED_TILES:
+                self._reset(version)
+
+    def clear(self):
+        """Drop all in-memory tiles; persisted tiles are left untouched."""
+        with self._lock:
+            self._entries.clear()
+
+    def _reset(self, version: int):
+        self._baseline_version = version
+        self._touched.clear()
+        self._entries.clear()
+
+    def _is_valid(self, tile: Tile, version: int) -> bool:
+        """Whether a tile rendered from `version` still reflects the table."""
+        return version >= self._baseline_version and version >= self._touched.get(tile, -1)
+
+    def _remember(self, key: str, version: int, content: bytes):
+        self._entries[key] = (version, content)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path_for(self, key: str) -> Path:
+        return self.persist_dir / key  # type: ignore[operator]
+
+    def _scan_disk(self):
+        """Index the tiles persisted by earlier runs, oldest first."""
+        paths = [path for path in self.persist_dir.rglob("*") if path.is_file() and path.suffix != ".tmp"]
+        for path in sorted(paths, key=lambda path: path.stat().st_mtime):
+            self._disk[path.relative_to(self.persist_dir).as_posix()] = None
+
+    def _load(self, key: str) -> tuple[int, bytes] | None:
+        """Read a persisted tile, ignoring missing or corrupt files."""
+        path = self._path_for(key)
+        try:
+            data = path.read_bytes()
+            if len(data) < _VERSION_BYTES:
+                raise ValueError("truncated tile")
+            return int.from_bytes(data[:_VERSION_BYTES], "big"), data[_VERSION_BYTES:]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[TILE CACHE] Ignoring unreadable tile '{path}': {type(e).__name__} - {e}")
+            return None
+
+    def _store(self, key: str, version: int, content: bytes):
+        """Persist a tile atomically, evicting the oldest persisted tiles beyond the limit."""
+        path = self._path_for(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(version.to_bytes(_VERSION_BYTES, "big") + content)
+            tmp_path.replace(path)
+        except Exception as e:
+            print(f"[TILE CACHE] Could not persist tile '{path}': {type(e).__name__} - {e}")
+            return
+        with self._lock:
+            self._disk[key] = None
+            self._disk.move_to_end(key)
+            evicted = []
+            while len(self._disk) > self.max_disk_entries:
+                evicted.append(self._disk.popitem(last=False)[0])
+        for old_key in evicted:
+            self._delete(old_key)
+
+    def _delete(self, key: str):
+        with self._lock:
+            self._disk.pop(key, None)
+        try:
+            os.remove(self._path_for(key))
+        except OSError:
+            pass
@@ -0,0 +1,270 @@
+"""
+Size-capped, low-copy handling of uploaded images.
+
+Two pieces bound the memory a single upload can take:
+
+- `UploadSizeLimitMiddleware` enforces a maximum request body size per route
+  while the body is still streaming in. Requests that declare a larger
+  ``Content-Length`` are rejected before any of the body is read, and chunked
+  requests are cut off as soon as they cross the limit, with
+  ``413 Request Entity Too Large`` in both cases.
+- `upload_buffer` exposes an uploaded file as a read-only `memoryview` without
+  copying it into a new `bytes` object. Small uploads stay in the multipart
+  parser's in-memory buffer; larger ones are spooled to a temporary file by
+  the parser and memory-mapped here, so their pages are loaded on demand.
+
+Zip archives of images are bounded as well: `check_archive_limits` rejects
+archives whose headers declare too many members or too many uncompressed
+bytes, and `read_archive_member` decompresses a member with a hard byte limit,
+so a small archive cannot expand to gigabytes in memory or on disk.
+
+Streamed responses outlive the endpoint that created them, but FastAPI closes
+uploaded files as soon as the endpoint returns. `take_upload_file` hands the
+parser's spooled file over to the caller before that happens.
+
+The middleware also notes when the application starts reading the body of a
+limited route, so `upload_read_seconds` can report how long receiving and
+parsing the upload took.
+
+Example:
+    >>> from backend.services.upload_service import UploadSizeLimitMiddleware, upload_buffer
+    >>> app.add_middleware(UploadSizeLimitMiddleware, limits={"/api/predict": 20 * 1024 * 1024})
+    >>> with upload_buffer(file) as image_data:
+    ...     result, error = await prediction_service.predict_species(image_data, file.filename)
+"""
+
+from __future__ import annotations
+
+import io
+import mmap
+import time
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import BinaryIO
+
+from fastapi import Request, UploadFile, status
+from starlette.exceptions import HTTPException
+
+from backend.services.metrics import counter
+
+UPLOAD_STARTED_STATE_KEY = "upload_started_at"
+
+UPLOADS_REJECTED = counter(
+    "culicidaelab_uploads_rejected_total",
+    "Requests rejected with 413 because the body exceeded the route's upload limit.",
+    ["path"],
+)
+
+
+class UploadTooLarge(HTTPException):
+    """Raised when a request body exceeds the upload limit of its route."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the maximum size of {max_bytes} bytes",
+        )
+        self.max_bytes = max_bytes
+
+
+class ArchiveTooLarge(HTTPException):
+    """Raised when a zip archive holds too many members or expands to too many bytes."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware that caps the request body size of selected routes.
+
+    Attributes:
+        app (ASGIApp): The wrapped application.
+        limits (dict[str, int]): Maximum body size in bytes by exact request path.
+            A limit of 0 or less disables the check for that path, but the
+            start of its upload is still recorded.
+    """
+
+    def __init__(self, app, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        max_bytes = self.limits[path]
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        declared = int(content_length) if content_length is not None and content_length.isdigit() else None
+        if max_bytes > 0 and declared is not None and declared > max_bytes:
+            UPLOADS_REJECTED.inc(path=path)
+            await self._reject(send, max_bytes)
+            return
+
+        state = scope.setdefault("state", {})
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            state.setdefault(UPLOAD_STARTED_STATE_KEY, time.perf_counter())
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if max_bytes > 0 and received > max_bytes:
+                    UPLOADS_REJECTED.inc(path=path)
+                    raise UploadTooLarge(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, max_bytes: int):
+        """Send a 413 response without reading the request body."""
+        error = UploadTooLarge(max_bytes)
+        body = f'{{"detail": "{error.detail}"}}'.encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": error.status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"connection", b"close"),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def upload_read_seconds(request: Request) -> float | None:
+    """Return the time since the application started reading the request body.
+
+    Called when an endpoint starts running, this is the time spent receiving
+    the body and parsing the multipart form. Returns None for routes not
+    covered by `UploadSizeLimitMiddleware`.
+    """
+    started = getattr(request.state, UPLOAD_STARTED_STATE_KEY, None)
+    return time.perf_counter() - started if started is not None else None
+
+
+@contextmanager
+def upload_buffer(file: UploadFile) -> Iterator[memoryview]:
+    """Expose the contents of an uploaded file as a read-only memoryview.
+
+    The view is only valid inside the `with` block. Code that needs the data
+    afterwards, such as the background image writer, must copy it.
+
+    Args:
+        file (UploadFile): A fully received multipart upload.
+
+    Yields:
+        memoryview: The file contents, without an intermediate `bytes` copy.
+    """
+    spooled = file.file
+    # SpooledTemporaryFile keeps small uploads in a BytesIO until it rolls over to disk.
+    inner = getattr(spooled, "_file", spooled)
+    mapped: mmap.mmap | None = None
+    if isinstance(inner, io.BytesIO):
+        view = inner.getbuffer()
+    else:
+        inner.flush()
+        size = inner.seek(0, io.SEEK_END)
+        inner.seek(0)
+        if size == 0:
+            yield memoryview(b"")
+            return
+        try:
+            mapped = mmap.mmap(inner.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, io.UnsupportedOperation):
+            # Not backed by a real file; fall back to reading it.
+            yield memoryview(inner.read())
+            return
+        view = memoryview(mapped)
+
+    readonly = view.toreadonly()
+    try:
+        yield readonly
+    finally:
+        readonly.release()
+        view.release()
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller kept a slice of the view; the mapping is freed with it.
+                pass
+
+
+def take_upload_file(file: UploadFile) -> BinaryIO:
+    """Take over the spooled file of an upload, rewound to its start.
+
+    FastAPI closes every `UploadFile` of a request once the endpoint returns,
+    which is before the body of a `StreamingResponse` is produced. The
+    upload's file is swapped for an empty buffer, so that closing the
+    `UploadFile` no longer closes the data; the caller must close the
+    returned file itself.
+
+    Args:
+        file (UploadFile): A fully received multipart upload.
+
+    Returns:
+        BinaryIO: The upload's data, without a copy.
+    """
+    spooled = file.file
+    file.file = io.BytesIO()
+    spooled.seek(0)
+    return spooled
+
+
+def check_archive_limits(archive: zipfile.ZipFile, max_member_bytes: int, max_total_bytes: int, max_members: int):
+    """Check the sizes an archive declares before any member is decompressed.
+
+    Args:
+        archive (zipfile.ZipFile): An opened archive.
+        max_member_bytes (int): Largest uncompressed size of one member.
+        max_total_bytes (int): Largest uncompressed size of all members together.
+        max_members (int): Largest number of members.
+
+    Limits of 0 or less are not checked.
+
+    Raises:
+        ArchiveTooLarge: If the archive declares more than one of the limits allows.
+    """
+    members = archive.infolist()
+    if max_members > 0 and len(members) > max_members:
+        raise ArchiveTooLarge(f"Zip archive holds {len(members)} members, more than the maximum of {max_members}")
+    for member in members:
+        if max_member_bytes > 0 and member.file_size > max_member_bytes:
+            raise ArchiveTooLarge(
+                f"Zip archive member '{member.filename}' exceeds the maximum size of {max_member_bytes} bytes"
+            )
+    total = sum(member.file_size for member in members)
+    if max_total_bytes > 0 and total > max_total_bytes:
+        raise ArchiveTooLarge(f"Zip archive expands to {total} bytes, more than the maximum of {max_total_bytes}")
+
+
+def read_archive_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, max_bytes: int) -> bytes:
+    """Decompress one archive member, reading at most `max_bytes` of it.
+
+    The limit applies to the bytes actually decompressed, not to the size the
+    member's header declares.
+
+    Args:
+        archive (zipfile.ZipFile): The archive holding `member`.
+        member (zipfile.ZipInfo): The member to read.
+        max_bytes (int): Largest number of bytes to accept; 0 or less reads it whole.
+
+    Returns:
+        bytes: The member's contents.
+
+    Raises:
+        ArchiveTooLarge: If the member decompresses to more than `max_bytes`.
+    """
+    with archive.open(member) as f:
+        data = f.read(max_bytes + 1) if max_bytes > 0 else f.read()
+    if max_bytes > 0 and len(data) > max_bytes:
+        raise ArchiveTooLarge(f"Zip archive member '{member.filename}' exceeds the maximum size of {max_bytes} bytes")
+    return data
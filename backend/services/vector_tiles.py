@@ -0,0 +1,144 @@
+"""
+Mapbox Vector Tile encoding of observation points.
+
+Encodes a single layer of point features in the Mapbox Vector Tile format
+(version 2.1, https://github.com/mapbox/vector-tile-spec). Only what the
+observation tiles need is implemented: point geometries and scalar feature
+properties. The protobuf wire format is written directly, so no protobuf
+schema or extra dependency is needed.
+
+Example:
+    >>> from backend.services.vector_tiles import encode_point_layer, tile_pixels
+    >>> px, py = tile_pixels(lat, lon, z=5, x=9, y=12)
+    >>> content = encode_point_layer("observations", px, py, [{"species": "Aedes aegypti"}] * len(px))
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from typing import Any
+
+import numpy as np
+
+from backend.services.observation_clusters import MAX_MERCATOR_LAT
+
+MVT_EXTENT = 4096
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+_VARINT = 0
+_FIXED64 = 1
+_LENGTH_DELIMITED = 2
+_POINT = 1
+_MOVE_TO = 1
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _key(field: int, wire_type: int) -> bytes:
+    return _varint((field << 3) | wire_type)
+
+
+def _message(field: int, payload: bytes) -> bytes:
+    return _key(field, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed(field: int, values: list[int]) -> bytes:
+    return _message(field, b"".join(_varint(value) for value in values))
+
+
+def _value(value: str | bool | int | float) -> bytes:
+    """Encode a Tile.Value message."""
+    if isinstance(value, bool):
+        return _key(7, _VARINT) + _varint(int(value))
+    if isinstance(value, int):
+        return _key(6, _VARINT) + _varint(_zigzag(value))
+    if isinstance(value, float):
+        return _key(3, _FIXED64) + struct.pack("<d", value)
+    return _message(1, value.encode("utf-8"))
+
+
+def tile_pixels(
+    lat: np.ndarray, lon: np.ndarray, z: int, x: int, y: int, extent: int = MVT_EXTENT
+) -> tuple[np.ndarray, np.ndarray]:
+    """Project points to integer pixel coordinates within a Web Mercator tile.
+
+    Args:
+        lat (np.ndarray): Latitudes in degrees.
+        lon (np.ndarray): Longitudes in degrees.
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+        extent (int): Pixels along each side of the tile.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Pixel columns and rows, (0, 0) being the
+            tile's north-west corner.
+    """
+    cells = 1 << z
+    phi = np.radians(np.clip(np.asarray(lat, dtype=np.float64), -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    world_x = (np.asarray(lon, dtype=np.float64) + 180.0) / 360.0 * cells
+    world_y = (1.0 - np.arcsinh(np.tan(phi)) / math.pi) / 2.0 * cells
+    return (
+        np.round((world_x - x) * extent).astype(np.int64),
+        np.round((world_y - y) * extent).astype(np.int64),
+    )
+
+
+def encode_point_layer(
+    name: str,
+    px: np.ndarray,
+    py: np.ndarray,
+    properties: list[dict[str, Any]],
+    extent: int = MVT_EXTENT,
+) -> bytes:
+    """Encode point features as a vector tile with one layer.
+
+    Args:
+        name (str): Layer name.
+        px (np.ndarray): Pixel column of each point, from `tile_pixels`.
+        py (np.ndarray): Pixel row of each point.
+        properties (list[dict[str, Any]]): Properties of each point. Values
+            that are not strings, booleans or numbers, and NaN, are left out.
+        extent (int): Pixels along each side of the tile.
+
+    Returns:
+        bytes: The encoded tile.
+    """
+    keys: dict[str, int] = {}
+    values: dict[tuple[type, Any], int] = {}
+    features = []
+    for point_x, point_y, props in zip(px.tolist(), py.tolist(), properties):
+        tags = []
+        for prop_key, prop_value in props.items():
+            if not isinstance(prop_value, (str, bool, int, float)):
+                continue
+            if isinstance(prop_value, float) and not math.isfinite(prop_value):
+                continue
+            tags.append(keys.setdefault(prop_key, len(keys)))
+            tags.append(values.setdefault((type(prop_value), prop_value), len(values)))
+        # A single MoveTo command with one point; coordinates are zigzag-encoded.
+        geometry = [_MOVE_TO | (1 << 3), _zigzag(point_x), _zigzag(point_y)]
+        feature = _packed(2, tags) + _key(3, _VARINT) + _varint(_POINT) + _packed(4, geometry)
+        features.append(_message(2, feature))
+
+    layer = _key(15, _VARINT) + _varint(2) + _message(1, name.encode("utf-8"))
+    layer += b"".join(features)
+    layer += b"".join(_message(3, key.encode("utf-8")) for key in keys)
+    layer += b"".join(_message(4, _value(value)) for _, value in values)
+    layer += _key(5, _VARINT) + _varint(extent)
+    return _message(3, layer)
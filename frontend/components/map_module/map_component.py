@@ -13,6 +13,7 @@ import solara.lab
 import ipyleaflet as L
 from ipywidgets import HTML
 import json
+import math
 import httpx
 
 import i18n
@@ -34,6 +35,8 @@ from frontend.config import (
     DEFAULT_MAP_ZOOM,
     SPECIES_COLORS,
     OBSERVATIONS_ENDPOINT,
+    OBSERVATION_CLUSTERS_ENDPOINT,
+    CLUSTER_MAX_ZOOM,
 )
 from frontend.state import all_available_species_reactive
 
@@ -43,6 +46,35 @@ i18n.add_translation("map.html_popup.observed_at", "Observed At", locale="en")
 i18n.add_translation("map.html_popup.observed_at", "Дата наблюдения", locale="ru")
 i18n.add_translation("map.html_popup.species", "Species", locale="en")
 i18n.add_translation("map.html_popup.species", "Вид", locale="ru")
+i18n.add_translation("map.html_popup.observations", "Observations", locale="en")
+i18n.add_translation("map.html_popup.observations", "Наблюдения", locale="ru")
+
+
+def bounds_to_bbox(bounds: tuple[tuple[float, float], tuple[float, float]] | None) -> str | None:
+    """
+    Converts Leaflet map bounds into the backend's bbox query parameter.
+
+    Leaflet reports bounds as ((south, west), (north, east)) and longitudes
+    outside [-180, 180] when the map is panned across the antimeridian. The
+    longitudes are wrapped back into range; the backend treats a box whose
+    west edge is east of its east edge as crossing the antimeridian.
+
+    Args:
+        bounds: The map bounds, or `None` if they are not known yet.
+
+    Returns:
+        A "min_lon,min_lat,max_lon,max_lat" string, or `None` if the bounds
+        are unknown or span every longitude.
+    """
+    if not bounds:
+        return None
+    (south, west), (north, east) = bounds
+    if east - west >= 360:
+        return None
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    south, north = max(south, -90.0), min(north, 90.0)
+    return f"{west},{south},{east},{north}"
 
 
 async def fetch_geojson_data(
@@ -270,15 +302,23 @@ class LeafletMapManager:
         of markers based on the provided GeoJSON data. It uses a MarkerCluster
         for performance with a large number of points. Each marker is styled
         based on its species and has a popup with detailed information.
+        Server-side clusters, fetched at low zoom levels, are drawn with one
+        marker per cluster instead.
 
         Args:
             observations_json: A GeoJSON dictionary containing point features
-                for species observations. If `None` or empty, the layer will
+                for species observations, or an observation clusters response
+                with a `clusters` list. If `None` or empty, the layer will
                 be cleared.
         """
         self.observations_layer_group.clear_layers()
 
-        if not observations_json or not observations_json.get("features") or not show_observed_data_reactive.value:
+        if not observations_json or not show_observed_data_reactive.value:
+            return
+        if "clusters" in observations_json:
+            self._add_cluster_markers(observations_json["clusters"])
+            return
+        if not observations_json.get("features"):
             return
 
         markers = []
@@ -315,6 +355,46 @@ class LeafletMapManager:
             marker_cluster = L.MarkerCluster(markers=markers, name="Observations")
             self.observations_layer_group.add_layer(marker_cluster)
 
+    def _add_cluster_markers(self, clusters: list[dict[str, Any]]) -> None:
+        """
+        Adds one marker per server-side observation cluster.
+
+        Clusters come from the observation clusters endpoint, which aggregates
+        observations per grid cell at low zoom levels. Each marker is placed at
+        the cluster's centroid, sized by its observation count and colored by
+        its most observed species; its popup lists the counts per species.
+
+        Args:
+            clusters: Cluster dictionaries with `lat`, `lon`, `count` and
+                `species` (counts by species name).
+        """
+        markers = []
+        for cluster in clusters:
+            species_counts = cluster.get("species") or {}
+            main_species = max(species_counts, key=species_counts.get) if species_counts else None
+            marker_color = self._get_species_color(main_species)
+
+            marker = L.CircleMarker(
+                location=(cluster["lat"], cluster["lon"]),
+                radius=min(6 + 4 * math.log10(max(cluster["count"], 1)), 30),
+                color=marker_color,
+                fill_color=marker_color,
+                fill_opacity=0.6,
+                weight=1,
+                name=str(main_species) if main_species else "Observations",
+            )
+            popup_html = (
+                "<p style='margin: 2px 0; font-size: 0.9em;'>"
+                f"{i18n.t('map.html_popup.observations')}: {cluster['count']}</p>"
+            )
+            for species_name, count in sorted(species_counts.items(), key=lambda item: -item[1]):
+                popup_html += f"<p style='margin: 2px 0; font-size: 0.9em;'>{species_name}: {count}</p>"
+            marker.popup = HTML(popup_html)
+            markers.append(marker)
+
+        if markers:
+            self.observations_layer_group.add_layer(L.LayerGroup(layers=markers, name="Observation clusters"))
+
     def get_widget(self):
         """
         Returns the underlying ipyleaflet map widget.
@@ -343,6 +423,9 @@ def MapDisplay():
     - `selected_species_reactive`: Filters data to the selected species.
     - `selected_date_range_reactive`: Filters data by date.
     - `observations_data_reactive`: Holds the fetched GeoJSON data.
+    - `current_map_zoom_reactive` and `current_map_bounds_reactive`: Up to
+      `CLUSTER_MAX_ZOOM`, server-side clusters of the viewport are fetched
+      instead of individual observations.
 
     The component itself is self-contained and does not require any props.
 
@@ -368,6 +451,11 @@ def MapDisplay():
         dependencies=[tuple(all_species)],  # Depend on an immutable tuple of species
     )
 
+    # Panning only matters while the map shows clusters; individual observations are fetched for the whole world.
+    cluster_view = None
+    if current_map_zoom_reactive.value <= CLUSTER_MAX_ZOOM:
+        cluster_view = (current_map_zoom_reactive.value, current_map_bounds_reactive.value)
+
     async def load_observations_data_task():
         if not show_observed_data_reactive.value or not selected_species_reactive.value:
             observations_data_reactive.value = None
@@ -381,7 +469,17 @@ def MapDisplay():
         if e_date_obj:
             params["end_date"] = e_date_obj.strftime("%Y-%m-%d")
 
-        data = await fetch_geojson_data(OBSERVATIONS_ENDPOINT, params, observations_loading_reactive)
+        url = OBSERVATIONS_ENDPOINT
+        if cluster_view is not None:
+            # At low zoom levels fetch one aggregate per grid cell of the viewport instead of every point.
+            url = OBSERVATION_CLUSTERS_ENDPOINT
+            zoom, bounds = cluster_view
+            params["zoom"] = zoom
+            bbox = bounds_to_bbox(bounds)
+            if bbox:
+                params["bbox"] = bbox
+
+        data = await fetch_geojson_data(url, params, observations_loading_reactive)
         observations_data_reactive.value = data if data is not None else None
 
     solara.lab.use_task(  # noqa: SH101
@@ -390,6 +488,7 @@ def MapDisplay():
             selected_species_reactive.value,
             show_observed_data_reactive.value,
             selected_date_range_reactive.value,
+            cluster_view,
         ],
     )
 
@@ -130,6 +130,9 @@ STATIC_FILES_URL = os.getenv("STATIC_FILES_URL", CLIENT_BACKEND_URL)
 # Backward compatibility
 BACKEND_URL = CLIENT_BACKEND_URL
 OBSERVATIONS_ENDPOINT = f"{API_BASE_URL}/geo/observations"
+OBSERVATION_CLUSTERS_ENDPOINT = f"{API_BASE_URL}/geo/observations/clusters"
+# Up to this zoom level the map shows server-side clusters instead of individual observations.
+CLUSTER_MAX_ZOOM = 7
 SPECIES_INFO_ENDPOINT = f"{API_BASE_URL}/species_info"
 DISEASE_LIST_ENDPOINT = f"{SERVER_API_BASE_URL}/diseases"  # Server-side endpoint
 DISEASE_DETAIL_ENDPOINT_TEMPLATE = f"{SERVER_API_BASE_URL}/diseases/{{disease_id}}"  # Server-side endpoint
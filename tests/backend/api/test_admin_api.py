@@ -0,0 +1,80 @@
+"""Tests for the admin API endpoints."""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from backend.services.prediction_service import ReloadInProgress
+
+TOKEN = "test-admin-token"
+
+
+class TestAdminAPI:
+    """Test cases for the model status and reload endpoints."""
+
+    @pytest.fixture(autouse=True)
+    def admin_token(self, monkeypatch):
+        """Configure an admin token for every test."""
+        monkeypatch.setattr("backend.dependencies.settings.ADMIN_TOKEN", TOKEN)
+
+    def test_admin_api_disabled_without_token(self, client: TestClient, monkeypatch):
+        """Test that the admin API is refused when no token is configured."""
+        monkeypatch.setattr("backend.dependencies.settings.ADMIN_TOKEN", None)
+
+        response = client.get("/api/admin/model", headers={"X-Admin-Token": TOKEN})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_wrong_token_is_rejected(self, client: TestClient):
+        """Test that a missing or wrong token is rejected."""
+        assert client.get("/api/admin/model").status_code == status.HTTP_401_UNAUTHORIZED
+        response = client.get("/api/admin/model", headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_model_status(self, client: TestClient):
+        """Test that the active model version is reported."""
+        response = client.get("/api/admin/model", headers={"X-Admin-Token": TOKEN})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["generation"] >= 0
+        assert data["reload_state"] in ("idle", "loading", "failed")
+        assert isinstance(data["model_id"], str)
+
+    def test_reload_is_accepted(self, client: TestClient, tmp_path):
+        """Test that a reload of an existing model file is started in the background."""
+        model_file = tmp_path / "classifier_v2.onnx"
+        model_file.write_bytes(b"onnx")
+
+        with patch("backend.routers.admin.prediction_service.start_reload", return_value=1) as start_reload:
+            response = client.post(
+                "/api/admin/model/reload",
+                json={"model_path": str(model_file), "warmup_iterations": 2},
+                headers={"X-Admin-Token": TOKEN},
+            )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        start_reload.assert_called_once_with(str(model_file), 2)
+
+    def test_reload_of_missing_file_is_rejected(self, client: TestClient, tmp_path):
+        """Test that a model path that is not a file is rejected before loading."""
+        response = client.post(
+            "/api/admin/model/reload",
+            json={"model_path": str(tmp_path / "missing.onnx")},
+            headers={"X-Admin-Token": TOKEN},
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_concurrent_reload_conflicts(self, client: TestClient):
+        """Test that a reload requested while another runs returns 409."""
+        with patch(
+            "backend.routers.admin.prediction_service.start_reload",
+            side_effect=ReloadInProgress("Generation 1 is still loading."),
+        ):
+            response = client.post("/api/admin/model/reload", json={}, headers={"X-Admin-Token": TOKEN})
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert "still loading" in response.json()["detail"]
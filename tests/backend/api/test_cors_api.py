@@ -0,0 +1,53 @@
+"""Tests for CORS headers on responses of the main application's middlewares."""
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from backend.config import settings
+from backend.services.admission_control import AdmissionControlMiddleware
+from backend.services.upload_service import UploadSizeLimitMiddleware
+
+ORIGIN = "http://localhost:8765"
+
+
+def _middleware_options(app, cls) -> dict:
+    """Return the keyword arguments a middleware class was added with."""
+    return next(middleware.kwargs for middleware in app.user_middleware if middleware.cls is cls)
+
+
+class TestRejectedRequestsCORS:
+    """Test that requests rejected by a middleware still carry the CORS headers."""
+
+    @pytest.fixture
+    def main_app(self):
+        from backend.main import app
+
+        assert ORIGIN in settings.cors_origins
+        return app
+
+    def test_bulkhead_rejection_has_cors_headers(self, main_app, monkeypatch):
+        """Test that a 429 from admission control can be read by a browser client."""
+        bulkhead = _middleware_options(main_app, AdmissionControlMiddleware)["bulkheads"]["catalog"]
+        monkeypatch.setattr(bulkhead, "active", bulkhead.max_concurrency)
+        monkeypatch.setattr(bulkhead, "max_queue", 0)
+
+        response = TestClient(main_app).get("/api/species", headers={"Origin": ORIGIN})
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "retry-after" in response.headers
+        assert response.headers["access-control-allow-origin"] == ORIGIN
+
+    def test_upload_limit_rejection_has_cors_headers(self, main_app, monkeypatch):
+        """Test that a 413 from the upload size limit can be read by a browser client."""
+        limits = _middleware_options(main_app, UploadSizeLimitMiddleware)["limits"]
+        monkeypatch.setitem(limits, f"{settings.API_V1_STR}/predict", 16)
+
+        response = TestClient(main_app).post(
+            "/api/predict",
+            files={"file": ("a.jpg", b"x" * 1024, "image/jpeg")},
+            headers={"Origin": ORIGIN},
+        )
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert response.headers["access-control-allow-origin"] == ORIGIN
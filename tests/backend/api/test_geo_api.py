@@ -0,0 +1,161 @@
+"""Tests for the geo API endpoints."""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from backend.schemas.geo_schemas import GeoJSONFeatureCollection, ObservationCluster, ObservationClusterCollection
+from backend.services import database
+
+
+class TestGeoAPI:
+    """Test cases for the near and knn parameters of the geo endpoint."""
+
+    @pytest.fixture
+    def geo_layer(self, test_app):
+        """Patch stream_geo_layer and the database dependency; yield the stream_geo_layer mock."""
+        test_app.dependency_overrides[database.get_db] = lambda: MagicMock()
+        with patch("backend.routers.geo.geo_service.stream_geo_layer") as mock_stream_geo_layer:
+            mock_stream_geo_layer.return_value = iter([b'{"type":"FeatureCollection",', b'"features":[]}'])
+            yield mock_stream_geo_layer
+        test_app.dependency_overrides.pop(database.get_db)
+
+    def test_layer_is_streamed(self, client: TestClient, geo_layer):
+        """Test that the streamed chunks form the response body."""
+        response = client.get("/api/geo/observations?species=Aedes%20aegypti")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "application/json"
+        assert GeoJSONFeatureCollection.model_validate_json(response.content).features == []
+        assert geo_layer.call_args.kwargs["layer_type"] == "observations"
+
+    def test_near_is_parsed(self, client: TestClient, geo_layer):
+        """Test that near is passed to the service as (lon, lat, radius_km)."""
+        response = client.get("/api/geo/observations?near=-74.0,40.7,5")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert geo_layer.call_args.kwargs["near"] == (-74.0, 40.7, 5.0)
+        assert geo_layer.call_args.kwargs["knn"] is None
+
+    def test_knn_is_parsed(self, client: TestClient, geo_layer):
+        """Test that knn is passed to the service as (lon, lat, k)."""
+        response = client.get("/api/geo/observations?knn=-74.0,40.7,10&species=Aedes%20aegypti")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert geo_layer.call_args.kwargs["knn"] == (-74.0, 40.7, 10)
+        assert geo_layer.call_args.kwargs["species_list"] == ["Aedes aegypti"]
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "near=-74.0,40.7",
+            "near=-74.0,40.7,0",
+            "near=-74.0,95.0,5",
+            "near=nan,40.7,5",
+            "knn=-74.0,40.7,2.5",
+            "knn=-74.0,40.7,100000",
+            "near=-74.0,40.7,5&knn=-74.0,40.7,10",
+        ],
+    )
+    def test_invalid_point_queries_are_rejected(self, client: TestClient, geo_layer, query):
+        """Test that malformed or conflicting near and knn parameters return 400."""
+        response = client.get(f"/api/geo/observations?{query}")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        geo_layer.assert_not_called()
+
+
+class TestObservationClustersAPI:
+    """Test cases for the observation clusters endpoint."""
+
+    @pytest.fixture
+    def get_clusters(self, test_app):
+        """Patch get_observation_clusters and the database dependency; yield the mock."""
+        test_app.dependency_overrides[database.get_db] = lambda: MagicMock()
+        with patch("backend.routers.geo.geo_service.get_observation_clusters") as mock_get_clusters:
+            mock_get_clusters.return_value = ObservationClusterCollection(
+                zoom=3,
+                total=5,
+                clusters=[
+                    ObservationCluster(
+                        lat=40.7, lon=-74.0, count=5, species={"Aedes aegypti": 5}, bbox=[-78.75, 40.0, -67.5, 48.9]
+                    )
+                ],
+            )
+            yield mock_get_clusters
+        test_app.dependency_overrides.pop(database.get_db)
+
+    def test_clusters_are_returned(self, client: TestClient, get_clusters):
+        """Test that zoom, viewport and filters are passed to the service and clusters returned."""
+        response = client.get("/api/geo/observations/clusters?zoom=3&bbox=-80,35,-70,45&species=Aedes%20aegypti")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["clusters"][0]["species"] == {"Aedes aegypti": 5}
+        kwargs = get_clusters.call_args.kwargs
+        assert kwargs["zoom"] == 3
+        assert kwargs["bbox_filter"] == (-80.0, 35.0, -70.0, 45.0)
+        assert kwargs["species_list"] == ["Aedes aegypti"]
+
+    @pytest.mark.parametrize(
+        "query, expected_status",
+        [
+            ("", status.HTTP_422_UNPROCESSABLE_ENTITY),
+            ("zoom=21", status.HTTP_422_UNPROCESSABLE_ENTITY),
+            ("zoom=3&bbox=-80,35,-70", status.HTTP_400_BAD_REQUEST),
+            ("zoom=3&start_date=2024-13-01", status.HTTP_400_BAD_REQUEST),
+        ],
+    )
+    def test_invalid_requests_are_rejected(self, client: TestClient, get_clusters, query, expected_status):
+        """Test that a missing or out-of-range zoom and malformed filters are rejected."""
+        response = client.get(f"/api/geo/observations/clusters?{query}")
+
+        assert response.status_code == expected_status
+        get_clusters.assert_not_called()
+
+
+class TestObservationTilesAPI:
+    """Test cases for the observation tiles endpoint."""
+
+    @pytest.fixture
+    def get_tile(self, test_app):
+        """Patch get_observation_tile and the database dependency; yield the mock."""
+        test_app.dependency_overrides[database.get_db] = lambda: MagicMock()
+        with patch("backend.routers.geo.geo_service.get_observation_tile") as mock_get_tile:
+            mock_get_tile.return_value = b"tile"
+            yield mock_get_tile
+        test_app.dependency_overrides.pop(database.get_db)
+
+    @pytest.mark.parametrize(
+        "fmt, media_type",
+        [("mvt", "application/vnd.mapbox-vector-tile"), ("geojson", "application/geo+json")],
+    )
+    def test_tile_is_returned(self, client: TestClient, get_tile, fmt, media_type):
+        """Test that the tile address, format and filters are passed to the service."""
+        response = client.get(f"/api/geo/observations/tiles/10/301/385.{fmt}?species=Aedes%20aegypti")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"tile"
+        assert response.headers["content-type"] == media_type
+        kwargs = get_tile.call_args.kwargs
+        assert (kwargs["z"], kwargs["x"], kwargs["y"], kwargs["fmt"]) == (10, 301, 385, fmt)
+        assert kwargs["species_list"] == ["Aedes aegypti"]
+
+    @pytest.mark.parametrize(
+        "path, expected_status",
+        [
+            ("21/0/0.mvt", status.HTTP_422_UNPROCESSABLE_ENTITY),
+            ("2/0/-1.mvt", status.HTTP_422_UNPROCESSABLE_ENTITY),
+            ("2/4/0.mvt", status.HTTP_400_BAD_REQUEST),
+            ("2/0/4.geojson", status.HTTP_400_BAD_REQUEST),
+            ("2/0/0.png", status.HTTP_400_BAD_REQUEST),
+            ("2/0/0.mvt?end_date=2024-02-30", status.HTTP_400_BAD_REQUEST),
+        ],
+    )
+    def test_invalid_requests_are_rejected(self, client: TestClient, get_tile, path, expected_status):
+        """Test that tiles outside the grid, unknown formats and malformed filters are rejected."""
+        response = client.get(f"/api/geo/observations/tiles/{path}")
+
+        assert response.status_code == expected_status
+        get_tile.assert_not_called()
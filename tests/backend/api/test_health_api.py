@@ -0,0 +1,91 @@
+"""Tests for the health and readiness endpoints."""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from backend.services.readiness_service import ReadinessState
+
+
+class TestReadinessAPI:
+    """Test cases for the readiness endpoint defined on the main application."""
+
+    @pytest.fixture
+    def main_app(self):
+        """Return the main application with readiness state reset afterwards."""
+        from backend.main import app
+
+        yield app
+        if hasattr(app.state, "READINESS"):
+            del app.state.READINESS
+
+    def test_ready_returns_503_before_warmup(self, main_app):
+        """Test that a worker without readiness state is reported as not ready."""
+        response = TestClient(main_app).get("/ready")
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["ready"] is False
+
+    def test_ready_returns_503_while_pending(self, main_app):
+        """Test that pending components keep the worker out of rotation."""
+        main_app.state.READINESS = ReadinessState(["database", "model"])
+        main_app.state.READINESS.mark_ready("database")
+
+        response = TestClient(main_app).get("/api/ready")
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.json()["components"]["model"] == "pending"
+
+    def test_ready_returns_200_after_warmup(self, main_app):
+        """Test that the worker is ready once every component is warm."""
+        main_app.state.READINESS = ReadinessState(["database", "model"])
+        main_app.state.READINESS.mark_ready("database")
+        main_app.state.READINESS.mark_ready("model")
+
+        response = TestClient(main_app).get("/ready")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["ready"] is True
+
+
+class TestDeploymentRole:
+    """Test cases for starting the application with a deployment role."""
+
+    @staticmethod
+    def _inspect_app(role: str) -> dict:
+        """Import the application in a fresh interpreter and describe what it loaded."""
+        script = (
+            "import json, sys\n"
+            "from backend.main import app\n"
+            "paths = sorted(app.openapi()['paths'])\n"
+            "print(json.dumps({'ml_loaded': 'culicidaelab' in sys.modules, 'paths': paths}))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "CULICIDAELAB_DEPLOYMENT_ROLE": role},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_catalog_role_does_not_load_the_ml_stack(self):
+        """Test that a catalog-only worker has no prediction routes and never imports the ML library."""
+        loaded = self._inspect_app("catalog")
+
+        assert not loaded["ml_loaded"]
+        assert "/api/species" in loaded["paths"]
+        assert "/api/predict" not in loaded["paths"]
+
+    def test_inference_role_serves_only_prediction(self):
+        """Test that an inference-only worker has prediction but no catalog routes."""
+        loaded = self._inspect_app("inference")
+
+        assert "/api/predict" in loaded["paths"]
+        assert "/api/species" not in loaded["paths"]
+        assert "/api/ready" in loaded["paths"]
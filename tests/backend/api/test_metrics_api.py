@@ -0,0 +1,21 @@
+"""Tests for the metrics API endpoint."""
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from backend.services.metrics import counter
+
+
+class TestMetricsAPI:
+    """Test cases for the Prometheus metrics endpoint."""
+
+    def test_metrics_endpoint_renders_registry(self, client: TestClient):
+        """Test that registered metrics appear in the text exposition."""
+        counter("culicidaelab_test_api_total", "Test counter").inc()
+
+        response = client.get("/api/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "culicidaelab_test_api_total 1" in response.text
+        assert "culicidaelab_prediction_cache_lookups_total" in response.text
@@ -5,6 +5,8 @@ focusing on image upload and species prediction functionality.
 """
 
 import io
+import json
+import zipfile
 from unittest.mock import AsyncMock, patch
 from PIL import Image
 import pytest
@@ -45,6 +47,33 @@ class TestPredictionAPI:
         assert data["model_id"] == "mosquito_classifier_v1"
         assert "probabilities" in data
 
+    def test_predict_species_server_timing_header(self, client: TestClient, mock_image_data: bytes, monkeypatch):
+        """Test that stage timings are returned in a Server-Timing header when enabled."""
+        from backend.services.stage_timing import record_stage
+
+        mock_result = PredictionResult(
+            id="aedes_aegypti",
+            scientific_name="Aedes aegypti",
+            probabilities={"aedes_aegypti": 0.95},
+            model_id="mosquito_classifier_v1",
+            confidence=0.95,
+        )
+
+        async def fake_predict_species(image_data, filename):
+            record_stage("inference", 0.0125)
+            return mock_result, None
+
+        with patch("backend.routers.prediction.prediction_service") as mock_service:
+            mock_service.predict_species = fake_predict_species
+            files = {"file": ("test_image.jpg", mock_image_data, "image/jpeg")}
+            default = client.post("/api/predict", files=files)
+            monkeypatch.setattr("backend.routers.prediction.settings.PREDICTION_SERVER_TIMING", True)
+            timed = client.post("/api/predict", files=files)
+
+        assert "server-timing" not in default.headers
+        assert timed.status_code == status.HTTP_200_OK
+        assert timed.headers["server-timing"] == "inference;dur=12.5"
+
     def test_predict_species_invalid_file_type(self, client: TestClient):
         """Test prediction with invalid file type."""
         text_content = b"This is not an image"
@@ -176,4 +205,207 @@ class TestPredictionAPI:
         assert response.status_code == status.HTTP_200_OK
         data = response.json()
         assert data["scientific_name"] == "Anopheles gambiae"
-        assert data["image_url_species"] == "http://testserver/static/predictions/test.png"
\ No newline at end of file
+        assert data["image_url_species"] == "http://testserver/static/predictions/test.png"
+
+
+class TestPredictionBatchAPI:
+    """Test cases for the streaming batch prediction endpoint."""
+
+    @staticmethod
+    def _fake_predict_species(image_data: bytes, filename: str):
+        """Return a deterministic result, or an error for files named 'bad*'."""
+        if filename.startswith("bad"):
+            return None, f"Error predicting species for file '{filename}'"
+        return (
+            PredictionResult(
+                id="aedes_aegypti",
+                scientific_name="Aedes aegypti",
+                probabilities={"Aedes aegypti": 0.9},
+                model_id="mosquito_classifier_v1",
+                confidence=0.9,
+            ),
+            None,
+        )
+
+    def _post_batch(self, client: TestClient, files):
+        with patch(
+            "backend.routers.prediction.prediction_service.predict_species",
+            AsyncMock(side_effect=self._fake_predict_species),
+        ):
+            return client.post("/api/predict/batch", files=files)
+
+    def test_predict_batch_streams_one_line_per_image(self, client: TestClient, mock_image_data: bytes):
+        """Test that each uploaded image produces one NDJSON line."""
+        response = self._post_batch(
+            client,
+            [
+                ("files", ("a.png", mock_image_data, "image/png")),
+                ("files", ("b.png", mock_image_data, "image/png")),
+                ("files", ("bad.png", mock_image_data, "image/png")),
+            ],
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        by_name = {line["filename"]: line for line in lines}
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert by_name["a.png"]["result"]["scientific_name"] == "Aedes aegypti"
+        assert "error" in by_name["bad.png"]
+
+    def test_predict_batch_accepts_zip_archive(self, client: TestClient, mock_image_data: bytes):
+        """Test that image members of a zip archive are classified and others skipped."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("trap/one.png", mock_image_data)
+            zf.writestr("trap/two.jpg", mock_image_data)
+            zf.writestr("trap/readme.txt", b"not an image")
+
+        response = self._post_batch(
+            client,
+            [("files", ("campaign.zip", archive.getvalue(), "application/zip"))],
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        filenames = sorted(json.loads(line)["filename"] for line in response.text.splitlines())
+        assert filenames == ["trap/one.png", "trap/two.jpg"]
+
+    def test_predict_batch_rejects_non_image_part(self, client: TestClient, mock_image_data: bytes):
+        """Test that a non-image, non-zip part is rejected before streaming."""
+        response = self._post_batch(
+            client,
+            [
+                ("files", ("a.png", mock_image_data, "image/png")),
+                ("files", ("notes.txt", b"hello", "text/plain")),
+            ],
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "must be an image or a zip archive" in response.json()["detail"]
+
+    def test_predict_batch_rejects_invalid_zip_archive(self, client: TestClient):
+        """Test that an invalid zip archive is rejected before streaming."""
+        response = self._post_batch(client, [("files", ("campaign.zip", b"not a zip", "application/zip"))])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Invalid zip archive" in response.json()["detail"]
+
+    def test_predict_batch_rejects_oversized_zip_members(self, client: TestClient, mock_image_data: bytes, monkeypatch):
+        """Test that an archive member expanding beyond the per-image limit is rejected before streaming."""
+        monkeypatch.setattr("backend.routers.prediction.settings.PREDICTION_MAX_UPLOAD_BYTES", 64 * 1024)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("trap/one.png", mock_image_data)
+            zf.writestr("trap/bomb.png", b"\0" * (10 * 1024 * 1024))
+
+        response = self._post_batch(client, [("files", ("campaign.zip", archive.getvalue(), "application/zip"))])
+
+        assert len(archive.getvalue()) < 64 * 1024
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert "trap/bomb.png" in response.json()["detail"]
+
+    def test_predict_batch_rejects_archives_with_too_many_members(
+        self, client: TestClient, mock_image_data: bytes, monkeypatch
+    ):
+        """Test that an archive holding more members than allowed is rejected before streaming."""
+        monkeypatch.setattr("backend.routers.prediction.settings.PREDICTION_ARCHIVE_MAX_MEMBERS", 2)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            for i in range(3):
+                zf.writestr(f"trap/{i}.png", mock_image_data)
+
+        response = self._post_batch(client, [("files", ("campaign.zip", archive.getvalue(), "application/zip"))])
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert "3 members" in response.json()["detail"]
+
+    def test_predict_batch_rejects_empty_part(self, client: TestClient):
+        """Test that an empty image part is rejected."""
+        response = self._post_batch(client, [("files", ("empty.png", b"", "image/png"))])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "Empty file" in response.json()["detail"]
+
+
+class TestPredictionJobsAPI:
+    """Test cases for the asynchronous prediction job endpoints."""
+
+    def _submit(self, client: TestClient, files):
+        return client.post("/api/predict/jobs", files=files)
+
+    def test_job_results_are_streamed_and_polled(self, client: TestClient, mock_image_data: bytes):
+        """Test that a submitted job reports every image over SSE and when polled."""
+        with patch(
+            "backend.routers.prediction.prediction_jobs.predict_fn",
+            AsyncMock(side_effect=TestPredictionBatchAPI._fake_predict_species),
+        ):
+            response = self._submit(
+                client,
+                [
+                    ("files", ("a.png", mock_image_data, "image/png")),
+                    ("files", ("bad.png", mock_image_data, "image/png")),
+                ],
+            )
+            assert response.status_code == status.HTTP_202_ACCEPTED
+            job_id = response.json()["id"]
+            assert response.json()["total"] == 2
+
+            events = client.get(f"/api/predict/jobs/{job_id}/events")
+
+        assert events.headers["content-type"].startswith("text/event-stream")
+        names = [line.split(": ", 1)[1] for line in events.text.splitlines() if line.startswith("event: ")]
+        assert names.count("item") == 2
+        assert names[-1] == "done"
+
+        job = client.get(f"/api/predict/jobs/{job_id}").json()
+        assert job["status"] == "completed"
+        assert (job["completed"], job["failed"]) == (1, 1)
+        by_name = {item["filename"]: item for item in job["results"]}
+        assert by_name["a.png"]["result"]["scientific_name"] == "Aedes aegypti"
+        assert by_name["bad.png"]["error"]
+
+    def test_unknown_job_returns_404(self, client: TestClient):
+        """Test that polling or following an unknown job returns 404."""
+        assert client.get("/api/predict/jobs/unknown").status_code == status.HTTP_404_NOT_FOUND
+        assert client.get("/api/predict/jobs/unknown/events").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_full_job_queue_returns_429(self, client: TestClient, mock_image_data: bytes):
+        """Test that submissions beyond the job queue capacity are rejected."""
+        from backend.services.prediction_jobs import JobQueueFull
+
+        with patch(
+            "backend.routers.prediction.prediction_jobs.submit",
+            side_effect=JobQueueFull("Prediction job queue is full (64 jobs waiting)."),
+        ):
+            response = self._submit(client, [("files", ("a.png", mock_image_data, "image/png"))])
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "retry-after" in response.headers
+
+    def test_zip_without_images_is_rejected(self, client: TestClient):
+        """Test that a job must contain at least one image."""
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("readme.txt", b"not an image")
+
+        response = self._submit(client, [("files", ("empty.zip", archive.getvalue(), "application/zip"))])
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "No images" in response.json()["detail"]
+
+    def test_oversized_zip_members_are_rejected_before_spooling(
+        self, client: TestClient, mock_image_data: bytes, monkeypatch, tmp_path
+    ):
+        """Test that a zip bomb is rejected with 413 and nothing is written to the spool directory."""
+        monkeypatch.setattr("backend.routers.prediction.settings.PREDICTION_MAX_UPLOAD_BYTES", 64 * 1024)
+        monkeypatch.setattr("backend.routers.prediction.prediction_jobs.spool_dir", tmp_path)
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("trap/one.png", mock_image_data)
+            zf.writestr("trap/bomb.png", b"\0" * (10 * 1024 * 1024))
+
+        response = self._submit(client, [("files", ("campaign.zip", archive.getvalue(), "application/zip"))])
+
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert "trap/bomb.png" in response.json()["detail"]
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,103 @@
+"""
+Tests for the prediction benchmark's report helpers.
+"""
+
+import pytest
+
+from backend.scripts.benchmark_prediction import compare_reports, drive, parse_list, summarize
+
+
+def _run(images_per_second: float, p95: float | None, concurrency: int = 1) -> dict:
+    return {
+        "target": "service",
+        "executor": "default",
+        "workers": 0,
+        "batch_size": 1,
+        "concurrency": concurrency,
+        "images_per_second": images_per_second,
+        "latency_ms": {"p95": p95} if p95 is not None else {},
+    }
+
+
+class TestSummarize:
+    """Test cases for summarize."""
+
+    def test_latencies_and_stages(self):
+        """Test that throughput counts successful requests and stages are averaged over all requests."""
+        summary = summarize([0.01, 0.02, 0.03, 0.04], errors=1, elapsed=2.0, stages={"decode": 0.5})
+
+        assert summary["requests"] == 5
+        assert summary["errors"] == 1
+        assert summary["images_per_second"] == 2.0
+        assert summary["latency_ms"]["mean"] == pytest.approx(25.0)
+        assert summary["latency_ms"]["p50"] == pytest.approx(25.0)
+        assert summary["latency_ms"]["max"] == pytest.approx(40.0)
+        assert summary["stages_ms"] == {"decode": 100.0}
+
+    def test_run_without_successes(self):
+        """Test that a run where every request failed has no latencies and no throughput."""
+        summary = summarize([], errors=3, elapsed=0.0)
+
+        assert summary["images_per_second"] == 0.0
+        assert summary["latency_ms"] == {}
+        assert "stages_ms" not in summary
+
+
+class TestCompareReports:
+    """Test cases for compare_reports."""
+
+    def test_regressions_beyond_the_threshold_are_flagged(self):
+        """Test that a throughput drop or a p95 increase beyond max_regression is a regression."""
+        baseline = {"runs": [_run(100.0, 10.0, 1), _run(100.0, 10.0, 8), _run(100.0, 10.0, 32)]}
+        current = {"runs": [_run(95.0, 10.5, 1), _run(80.0, 10.0, 8), _run(100.0, 12.0, 32)]}
+
+        comparisons = compare_reports(baseline, current, max_regression=0.1)
+
+        assert [entry["regressed"] for entry in comparisons] == [False, True, True]
+        assert comparisons[0]["run"]["concurrency"] == 1
+        assert comparisons[0]["images_per_second"] == [100.0, 95.0]
+        assert comparisons[0]["throughput_change"] == pytest.approx(-0.05)
+        assert comparisons[2]["p95_change"] == pytest.approx(0.2)
+
+    def test_runs_without_a_usable_baseline_are_skipped(self):
+        """Test that runs missing from the baseline, or without baseline results, are not compared."""
+        baseline = {"runs": [_run(0.0, None, 1), _run(100.0, 10.0, 8)]}
+        current = {"runs": [_run(100.0, 10.0, 1), _run(100.0, 10.0, 16)]}
+
+        assert compare_reports(baseline, current, max_regression=0.1) == []
+
+    def test_run_without_successes_regresses(self):
+        """Test that a run that lost all its latencies counts as a regression."""
+        comparisons = compare_reports({"runs": [_run(100.0, 10.0)]}, {"runs": [_run(0.0, None)]}, 0.1)
+
+        assert comparisons[0]["regressed"]
+
+
+class TestParseList:
+    """Test cases for parse_list."""
+
+    def test_values_are_converted_and_blanks_skipped(self):
+        """Test that items are stripped, converted and empty items dropped."""
+        assert parse_list("1, 8,32,") == [1, 8, 32]
+        assert parse_list("default , process", str) == ["default", "process"]
+        assert parse_list("") == []
+
+    def test_invalid_values_raise(self):
+        """Test that an item of the wrong kind raises, which argparse reports as a usage error."""
+        with pytest.raises(ValueError):
+            parse_list("1,eight")
+
+
+@pytest.mark.asyncio
+async def test_progress_goes_to_stderr(capsys):
+    """Test that failures are reported on stderr, so stdout only carries the report."""
+
+    async def predict(filename, image_data):
+        raise RuntimeError("connection refused")
+
+    summary = await drive([("a.jpg", b"data")], predict, concurrency=1, rounds=2)
+
+    captured = capsys.readouterr()
+    assert summary["errors"] == 2
+    assert captured.out == ""
+    assert "[BENCH] Request for 'a.jpg' failed: RuntimeError - connection refused" in captured.err
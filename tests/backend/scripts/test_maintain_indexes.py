@@ -0,0 +1,90 @@
+"""
+Tests for scalar index maintenance.
+"""
+
+import pyarrow as pa
+import pytest
+
+from backend.database_utils.lancedb_manager import (
+    DISEASES_SCHEMA,
+    OBSERVATIONS_SCHEMA,
+    OBSERVATIONS_SCHEMA_V2,
+    LanceDBManager,
+)
+
+
+def _rows(schema: pa.Schema, count: int, start: int = 0) -> list[dict]:
+    rows = []
+    for i in range(start, start + count):
+        row = {field.name: None for field in schema}
+        row.update(id=f"row_{i:03d}")
+        if "species_scientific_name" in schema.names:
+            row.update(species_scientific_name="Aedes aegypti", observer_id=f"user_{i % 3}")
+        if "vectors" in schema.names:
+            row.update(vectors=["aedes_aegypti"])
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+async def manager(tmp_path):
+    """A manager connected to an empty database."""
+    manager = LanceDBManager(uri=str(tmp_path / "db"))
+    await manager.connect()
+    return manager
+
+
+class TestScalarIndexes:
+    """Test cases for LanceDBManager.index_status and ensure_indexes."""
+
+    async def test_created_tables_are_indexed(self, manager):
+        """Tables created through the manager get their scalar indexes straight away."""
+        await manager.create_or_overwrite_table("diseases", _rows(DISEASES_SCHEMA, 5), DISEASES_SCHEMA)
+
+        status = {entry["column"]: entry for entry in await manager.index_status("diseases")}
+
+        assert status["id"]["status"] == "current"
+        assert status["vectors"]["index_type"] == "LABEL_LIST"
+        assert status["vectors"]["status"] == "current"
+        assert status["vectors"]["indexed_rows"] == 5
+
+    async def test_appended_rows_are_reported_and_indexed(self, manager):
+        """Rows appended after indexing show up as stale and are indexed by ensure_indexes."""
+        await manager.create_or_overwrite_table("observations", _rows(OBSERVATIONS_SCHEMA, 10), OBSERVATIONS_SCHEMA)
+        table = await manager.get_table("observations")
+        await table.add(_rows(OBSERVATIONS_SCHEMA, 4, start=10))
+
+        stale = {entry["column"]: entry for entry in await manager.index_status("observations")}
+        current = {entry["column"]: entry for entry in await manager.ensure_indexes("observations")}
+
+        assert stale["observer_id"]["status"] == "stale"
+        assert stale["observer_id"]["unindexed_rows"] == 4
+        assert current["observer_id"]["status"] == "current"
+        assert current["observer_id"]["indexed_rows"] == 14
+
+    async def test_missing_indexes_are_created(self, manager):
+        """Indexes missing from an existing table are reported and then created."""
+        await manager.db.create_table("observations", data=_rows(OBSERVATIONS_SCHEMA, 3), schema=OBSERVATIONS_SCHEMA)
+
+        before = await manager.index_status("observations")
+        after = await manager.ensure_indexes("observations")
+
+        assert {entry["status"] for entry in before} == {"missing"}
+        assert {entry["status"] for entry in after} == {"current"}
+        # Version 1 tables have no lat/lon columns to index.
+        assert [entry["column"] for entry in after] == ["id", "species_scientific_name", "observer_id", "observed_at"]
+
+    async def test_dictionary_columns_are_unsupported(self, manager):
+        """Dictionary-encoded columns cannot carry a scalar index and are reported as such."""
+        rows = _rows(OBSERVATIONS_SCHEMA_V2, 3)
+        await manager.create_or_overwrite_table("observations", rows, OBSERVATIONS_SCHEMA_V2)
+
+        status = {entry["column"]: entry for entry in await manager.index_status("observations")}
+
+        assert status["species_scientific_name"]["status"] == "unsupported"
+        assert status["lat"]["status"] == "current"
+
+    async def test_unknown_table_reports_nothing(self, manager):
+        """A table that does not exist has no index status."""
+        assert await manager.index_status("observations") == []
+        assert await manager.ensure_indexes("observations") == []
@@ -0,0 +1,135 @@
+"""
+Tests for the observations schema migration.
+"""
+
+from datetime import date
+
+import lancedb
+import pyarrow as pa
+import pytest
+
+from backend.database_utils.lancedb_manager import (
+    OBSERVATIONS_SCHEMA,
+    OBSERVATIONS_SCHEMA_V2,
+    observation_location,
+    schema_version,
+)
+from backend.scripts.migrate_observations import (
+    MigrationError,
+    migrate_observations,
+    rollback_observations,
+    upgrade_v1_to_v2,
+)
+
+
+def _v1_row(index: int, **overrides) -> dict:
+    row = {field.name: None for field in OBSERVATIONS_SCHEMA}
+    row.update(
+        id=f"obs_{index:03d}",
+        species_scientific_name="Aedes aegypti" if index % 2 else "Culex pipiens",
+        observed_at=f"2024-01-{index % 28 + 1:02d}",
+        count=index,
+        geometry_type="Point",
+        coordinates=[40.0 + index, -74.0],
+        metadata="{}",
+    )
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A LanceDB database with a version 1 observations table of 25 rows."""
+    connection = lancedb.connect(str(tmp_path / "db"))
+    connection.create_table("observations", data=[_v1_row(i) for i in range(25)], schema=OBSERVATIONS_SCHEMA)
+    return connection
+
+
+class TestUpgradeV1ToV2:
+    """Test cases for converting version 1 batches."""
+
+    def test_converts_dates_locations_and_species(self):
+        """Dates become date32, coordinates split into lat/lon and species are dictionary-encoded."""
+        rows = [
+            _v1_row(0, observed_at="2023-06-15T10:30:00Z", coordinates=[40.5, -74.25]),
+            _v1_row(1, observed_at="not-a-date", coordinates=[1.0]),
+            _v1_row(2, observed_at=None, coordinates=None),
+        ]
+        batch = pa.RecordBatch.from_pylist(rows, schema=OBSERVATIONS_SCHEMA)
+
+        upgraded = upgrade_v1_to_v2(batch)
+
+        assert upgraded.schema == OBSERVATIONS_SCHEMA_V2
+        assert schema_version(upgraded.schema) == 2
+        assert upgraded.column("observed_at").to_pylist() == [date(2023, 6, 15), None, None]
+        assert upgraded.column("lat").to_pylist() == [40.5, None, None]
+        assert upgraded.column("lon").to_pylist() == [-74.25, None, None]
+        species = upgraded.column("species_scientific_name")
+        assert pa.types.is_dictionary(species.type)
+        assert species.to_pylist() == ["Culex pipiens", "Aedes aegypti", "Culex pipiens"]
+        assert upgraded.column("id").to_pylist() == ["obs_000", "obs_001", "obs_002"]
+
+
+class TestMigrateObservations:
+    """Test cases for migrating a table in place."""
+
+    def test_migrates_table_in_batches(self, db):
+        """The table is rewritten in the version 2 schema as a single new version."""
+        report = migrate_observations(db, batch_size=7)
+
+        table = db.open_table("observations")
+        assert report["migrated"] is True
+        assert report["rows"] == 25
+        assert report["version"] == report["previous_version"] + 1
+        assert schema_version(table.schema) == 2
+        assert table.count_rows() == 25
+        rows = {row["id"]: row for row in table.to_arrow().to_pylist()}
+        assert rows["obs_003"]["observed_at"] == date(2024, 1, 4)
+        assert observation_location(rows["obs_003"]) == [43.0, -74.0]
+
+    def test_filters_run_as_lance_predicates(self, db):
+        """Date, location and species filters work on the migrated columns."""
+        migrate_observations(db)
+
+        results = (
+            db.open_table("observations")
+            .search()
+            .where("species_scientific_name IN ('Aedes aegypti') AND observed_at >= DATE '2024-01-10' AND lat < 60")
+            .to_list()
+        )
+
+        assert sorted(row["id"] for row in results) == [f"obs_{i:03d}" for i in (9, 11, 13, 15, 17, 19)]
+
+    def test_current_table_is_left_alone(self, db):
+        """Migrating a table already at the target version does not write a new version."""
+        migrate_observations(db)
+        version = db.open_table("observations").version
+
+        report = migrate_observations(db)
+
+        assert report["migrated"] is False
+        assert db.open_table("observations").version == version
+
+    def test_unknown_version_is_rejected(self, db):
+        """Migrating to a version without a schema fails without touching the table."""
+        with pytest.raises(MigrationError):
+            migrate_observations(db, to_version=99)
+
+        assert schema_version(db.open_table("observations").schema) == 1
+
+    def test_rollback_restores_previous_version(self, db):
+        """Rolling back restores the version 1 rows the migration started from."""
+        migrate_observations(db)
+
+        report = rollback_observations(db)
+
+        table = db.open_table("observations")
+        assert report["to_schema"] == 1
+        assert schema_version(table.schema) == 1
+        assert "coordinates" in table.schema.names
+        assert table.count_rows() == 25
+
+    def test_rollback_without_migration_fails(self, db):
+        """A table that was not migrated cannot be rolled back."""
+        with pytest.raises(MigrationError):
+            rollback_observations(db)
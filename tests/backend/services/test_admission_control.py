@@ -0,0 +1,158 @@
+"""
+Tests for admission control and per-route-group bulkheads.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from backend.services.admission_control import (
+    AdmissionControlMiddleware,
+    Bulkhead,
+    BulkheadFull,
+    build_bulkheads,
+    route_group,
+)
+
+
+class TestBulkhead:
+    """Test cases for the Bulkhead class."""
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_admitted_in_order(self):
+        """Test that queued requests get slots in FIFO order as slots are released."""
+        bulkhead = Bulkhead("test_fifo", max_concurrency=1, max_queue=2)
+        await bulkhead.acquire()
+        order = []
+
+        async def waiter(name):
+            await bulkhead.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter("first")), asyncio.create_task(waiter("second"))]
+        await asyncio.sleep(0)
+        assert bulkhead.queue_depth == 2
+
+        bulkhead.release()
+        await asyncio.sleep(0)
+        bulkhead.release()
+        await asyncio.gather(*tasks)
+
+        assert order == ["first", "second"]
+        assert bulkhead.active == 1
+        assert bulkhead.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_is_full(self):
+        """Test that requests beyond concurrency plus queue are rejected immediately."""
+        bulkhead = Bulkhead("test_reject", max_concurrency=1, max_queue=0, retry_after_seconds=3)
+        await bulkhead.acquire()
+
+        with pytest.raises(BulkheadFull) as exc_info:
+            await bulkhead.acquire()
+
+        assert exc_info.value.bulkhead.retry_after_seconds == 3
+        bulkhead.release()
+        assert bulkhead.active == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test that a client that disconnects while queued does not hold a slot."""
+        bulkhead = Bulkhead("test_cancel", max_concurrency=1, max_queue=1)
+        await bulkhead.acquire()
+        task = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert bulkhead.queue_depth == 0
+        bulkhead.release()
+        assert bulkhead.active == 0
+
+
+class TestRouteGroup:
+    """Test cases for mapping requests to route groups."""
+
+    @pytest.mark.parametrize(
+        "method, path, expected",
+        [
+            ("POST", "/api/predict", "inference"),
+            ("POST", "/api/predict/batch", "inference"),
+            ("POST", "/api/predict/jobs", "writes"),
+            ("GET", "/api/predict/jobs/abc/events", None),
+            ("GET", "/api/geo/observations", "geo"),
+            ("GET", "/api/species", "catalog"),
+            ("GET", "/api/species/aedes-aegypti", "catalog"),
+            ("GET", "/api/diseases/malaria/vectors", "catalog"),
+            ("GET", "/api/filter_options", "catalog"),
+            ("POST", "/api/observations", "writes"),
+            ("GET", "/api/observations", None),
+            ("GET", "/api/health", None),
+            ("GET", "/api/metrics", None),
+            ("GET", "/static/images/species/a.jpg", None),
+        ],
+    )
+    def test_route_group(self, method, path, expected):
+        """Test that each endpoint is assigned to the expected group."""
+        assert route_group(method, path) == expected
+
+    def test_build_bulkheads_reads_settings(self):
+        """Test that one bulkhead per group is created from the settings."""
+        settings = SimpleNamespace(ADMISSION_RETRY_AFTER_SECONDS=2)
+        for group, limit in [("inference", 2), ("geo", 3), ("catalog", 4), ("writes", 5)]:
+            setattr(settings, f"ADMISSION_{group.upper()}_CONCURRENCY", limit)
+            setattr(settings, f"ADMISSION_{group.upper()}_QUEUE", limit * 10)
+
+        bulkheads = build_bulkheads(settings)
+
+        assert bulkheads["inference"].max_concurrency == 2
+        assert bulkheads["writes"].max_queue == 50
+        assert all(b.retry_after_seconds == 2 for b in bulkheads.values())
+
+
+class TestAdmissionControlMiddleware:
+    """Test cases for the AdmissionControlMiddleware class."""
+
+    @pytest.mark.asyncio
+    async def test_saturated_group_returns_429_without_blocking_others(self):
+        """Test that a full inference group is rejected while catalog reads still succeed."""
+        release = asyncio.Event()
+        app = FastAPI()
+
+        @app.post("/api/predict")
+        async def predict():
+            await release.wait()
+            return {"ok": True}
+
+        @app.get("/api/species")
+        async def species():
+            return {"species": []}
+
+        bulkheads = {
+            "inference": Bulkhead("test_mw_inference", max_concurrency=1, max_queue=0, retry_after_seconds=5),
+            "catalog": Bulkhead("test_mw_catalog", max_concurrency=1, max_queue=0),
+        }
+        app.add_middleware(AdmissionControlMiddleware, bulkheads=bulkheads)
+
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = asyncio.create_task(client.post("/api/predict"))
+            while bulkheads["inference"].active == 0:
+                await asyncio.sleep(0.01)
+
+            rejected = await client.post("/api/predict")
+            catalog = await client.get("/api/species")
+
+            release.set()
+            admitted = await first
+
+        assert rejected.status_code == 429
+        assert rejected.headers["retry-after"] == "5"
+        assert "inference" in rejected.json()["detail"]
+        assert catalog.status_code == 200
+        assert admitted.status_code == 200
+        assert bulkheads["inference"].active == 0
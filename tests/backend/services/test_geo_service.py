@@ -2,15 +2,25 @@
 Tests for the geo service.
 """
 
+import json
 from unittest.mock import MagicMock, patch
+import lancedb
 import pytest
-from datetime import datetime
+from datetime import date, datetime
 
+from backend.database_utils.lancedb_manager import OBSERVATIONS_SCHEMA, OBSERVATIONS_SCHEMA_V2
 from backend.schemas.geo_schemas import GeoJSONFeatureCollection, GeoJSONFeature, GeoJSONGeometry
 from backend.services.geo_service import (
+    build_observation_filter,
     is_valid_date_str,
     get_geo_layer,
+    get_observation_clusters,
+    get_observation_tile,
+    load_observation_store,
+    stream_geo_layer,
 )
+from backend.services.observation_store import ObservationStore
+from backend.services.tile_cache import TileCache
 from tests.factories.mock_factory import MockFactory
 
 
@@ -52,6 +62,27 @@ class TestGeoServiceHelpers:
         assert is_valid_date_str({}) == False
 
 
+class TestBuildObservationFilter:
+    """Test cases for compiling observation filters into a LanceDB predicate."""
+
+    def test_no_filters(self):
+        """Test that no expression is built without filters."""
+        assert build_observation_filter() is None
+        assert build_observation_filter(species_list=[], start_date_str="not-a-date") is None
+
+    def test_species_names_are_quoted(self):
+        """Test that quotes in species names are escaped."""
+        expression = build_observation_filter(species_list=["Aedes aegypti", "O'Brien's mosquito"])
+
+        assert expression == "species_scientific_name IN ('Aedes aegypti', 'O''Brien''s mosquito')"
+
+    def test_bbox_crossing_antimeridian(self):
+        """Test that a box with min_lon > max_lon matches both sides of the antimeridian."""
+        expression = build_observation_filter(bbox_filter=(170.0, -20.0, -170.0, -10.0), version=2)
+
+        assert expression == "(lon >= 170.0 OR lon <= -170.0) AND lat >= -20.0 AND lat <= -10.0"
+
+
 class TestGeoServiceIntegration:
     """Test cases for the geo service integration with database."""
 
@@ -69,6 +100,7 @@ class TestGeoServiceIntegration:
         mock_table.where.return_value = mock_table
         mock_table.limit.return_value = mock_table
         mock_table.to_list.return_value = []
+        mock_table.schema = OBSERVATIONS_SCHEMA
         return mock_table
 
     @pytest.fixture
@@ -142,9 +174,9 @@ class TestGeoServiceIntegration:
         assert isinstance(result, GeoJSONFeatureCollection)
         assert len(result.features) == 1
         assert result.features[0].properties["species_scientific_name"] == "Aedes aegypti"
-        
+
         # Verify species filter was applied
-        mock_table.where.assert_called_once_with("species_scientific_name = 'Aedes aegypti'")
+        mock_table.where.assert_called_once_with("species_scientific_name IN ('Aedes aegypti')")
         mock_table.limit.assert_called_once_with(100)
 
     @patch("backend.services.geo_service.get_table")
@@ -161,64 +193,43 @@ class TestGeoServiceIntegration:
 
         assert isinstance(result, GeoJSONFeatureCollection)
         assert len(result.features) == 2
-        
-        # Verify multiple species filter was applied with OR logic
-        expected_filter = "species_scientific_name = 'Aedes aegypti' OR species_scientific_name = 'Culex pipiens'"
+
+        expected_filter = "species_scientific_name IN ('Aedes aegypti', 'Culex pipiens')"
         mock_table.where.assert_called_once_with(expected_filter)
 
     @patch("backend.services.geo_service.get_table")
-    @patch("backend.services.geo_service.box")
-    @patch("backend.services.geo_service.Point")
-    def test_get_geo_layer_with_bbox_filter(self, mock_point_class, mock_box, mock_get_table, mock_table, sample_observation_records):
-        """Test get_geo_layer with bounding box filtering using Shapely geometry."""
-        mock_table.to_list.return_value = sample_observation_records
+    def test_get_geo_layer_with_bbox_filter(self, mock_get_table, mock_table, sample_observation_records):
+        """Test that the bounding box is pushed down as lat/lon range comparisons."""
+        mock_table.to_list.return_value = sample_observation_records[:1]
         mock_get_table.return_value = mock_table
-        
-        # Mock Shapely geometry operations
-        mock_bbox_polygon = MagicMock()
-        mock_box.return_value = mock_bbox_polygon
-        
-        # Mock Point creation and containment check
-        mock_point1 = MagicMock()
-        mock_point2 = MagicMock()
-        mock_point_class.side_effect = [mock_point1, mock_point2]
-        
-        # First point is inside bbox, second is outside
-        mock_bbox_polygon.contains.side_effect = [True, False]
 
-        bbox = (-75.0, 40.0, -73.0, 41.0)  # NYC area bounding box
         result = get_geo_layer(
             db=MagicMock(),
             layer_type="observations",
-            bbox_filter=bbox
+            bbox_filter=(-75.0, 40.0, -73.0, 41.0)
         )
 
-        assert isinstance(result, GeoJSONFeatureCollection)
-        assert len(result.features) == 1  # Only one point should be inside bbox
-        assert result.features[0].properties["id"] == "obs_001"
-        
-        # Verify Shapely operations were called correctly
-        mock_box.assert_called_once_with(*bbox)
-        assert mock_point_class.call_count == 2
-        mock_point_class.assert_any_call([-74.0060, 40.7128])
-        mock_point_class.assert_any_call([-73.9857, 40.7484])
+        assert len(result.features) == 1
+        mock_table.where.assert_called_once_with(
+            "coordinates[2] >= -75.0 AND coordinates[2] <= -73.0 AND coordinates[1] >= 40.0 AND coordinates[1] <= 41.0"
+        )
 
     @patch("backend.services.geo_service.get_table")
     def test_get_geo_layer_with_date_range_filter(self, mock_get_table, mock_table, sample_observation_records):
-        """Test get_geo_layer with date range filtering."""
-        mock_table.to_list.return_value = sample_observation_records
+        """Test that the date range is pushed down as string comparisons on version 1 tables."""
+        mock_table.to_list.return_value = sample_observation_records[1:]
         mock_get_table.return_value = mock_table
 
         result = get_geo_layer(
             db=MagicMock(),
             layer_type="observations",
-            start_date_str="2023-07-16",  # Should exclude first record (2023-07-15)
+            start_date_str="2023-07-16",
             end_date_str="2023-07-25"
         )
 
-        assert isinstance(result, GeoJSONFeatureCollection)
-        assert len(result.features) == 1  # Only second record should match
+        assert len(result.features) == 1
         assert result.features[0].properties["observed_at"] == "2023-07-20"
+        mock_table.where.assert_called_once_with("observed_at >= '2023-07-16' AND observed_at <= '2023-07-25'")
 
     @patch("backend.services.geo_service.get_table")
     def test_get_geo_layer_with_invalid_date_filter(self, mock_get_table, mock_table, sample_observation_records):
@@ -236,6 +247,7 @@ class TestGeoServiceIntegration:
         # Should return all records since date filters are invalid
         assert isinstance(result, GeoJSONFeatureCollection)
         assert len(result.features) == 2
+        mock_table.where.assert_not_called()
 
     @patch("backend.services.geo_service.get_table")
     def test_get_geo_layer_with_record_missing_coordinates(self, mock_get_table, mock_table):
@@ -258,49 +270,12 @@ class TestGeoServiceIntegration:
         mock_table.to_list.return_value = records_with_missing_coords
         mock_get_table.return_value = mock_table
 
-        result = get_geo_layer(
-            db=MagicMock(),
-            layer_type="observations",
-            bbox_filter=(-75.0, 40.0, -73.0, 41.0)
-        )
+        result = get_geo_layer(db=MagicMock(), layer_type="observations")
 
-        # Should include both records since bbox filtering only applies to records with coordinates
+        # Records without a location are returned without coordinates
         assert isinstance(result, GeoJSONFeatureCollection)
         assert len(result.features) == 2
-
-    @patch("backend.services.geo_service.get_table")
-    def test_get_geo_layer_with_invalid_observed_at_date(self, mock_get_table, mock_table):
-        """Test get_geo_layer with records having invalid observed_at dates."""
-        records_with_invalid_dates = [
-            {
-                "id": "obs_001",
-                "species_scientific_name": "Aedes aegypti",
-                "coordinates": [-74.0060, 40.7128],
-                "geometry_type": "Point",
-                "observed_at": "invalid-date",
-            },
-            {
-                "id": "obs_002",
-                "species_scientific_name": "Culex pipiens",
-                "coordinates": [-73.9857, 40.7484],
-                "geometry_type": "Point",
-                "observed_at": "2023-07-20",
-            },
-        ]
-        mock_table.to_list.return_value = records_with_invalid_dates
-        mock_get_table.return_value = mock_table
-
-        result = get_geo_layer(
-            db=MagicMock(),
-            layer_type="observations",
-            start_date_str="2023-07-15",
-            end_date_str="2023-07-25"
-        )
-
-        # Should only include the record with valid date
-        assert isinstance(result, GeoJSONFeatureCollection)
-        assert len(result.features) == 1
-        assert result.features[0].properties["observed_at"] == "2023-07-20"
+        assert result.features[0].geometry.coordinates is None
 
     def test_get_geo_layer_unsupported_layer_type(self):
         """Test get_geo_layer with unsupported layer type."""
@@ -343,66 +318,41 @@ class TestGeoServiceIntegration:
 
     @patch("backend.services.geo_service.get_table")
     def test_get_geo_layer_complex_filtering(self, mock_get_table, mock_table):
-        """Test get_geo_layer with multiple filters applied simultaneously."""
-        complex_records = [
+        """Test that all filters are combined into one predicate on version 2 tables."""
+        mock_table.schema = OBSERVATIONS_SCHEMA_V2
+        mock_table.to_list.return_value = [
             {
                 "id": "obs_001",
                 "species_scientific_name": "Aedes aegypti",
-                "coordinates": [-74.0060, 40.7128],  # Inside NYC bbox
+                "lat": 40.7128,
+                "lon": -74.0060,
                 "geometry_type": "Point",
-                "observed_at": "2023-07-15",  # Within date range
-                "observer_id": "user_123",
-            },
-            {
-                "id": "obs_002",
-                "species_scientific_name": "Culex pipiens",  # Different species
-                "coordinates": [-74.0060, 40.7128],  # Same location
-                "geometry_type": "Point",
-                "observed_at": "2023-07-15",
-                "observer_id": "user_456",
-            },
-            {
-                "id": "obs_003",
-                "species_scientific_name": "Aedes aegypti",
-                "coordinates": [-120.0, 35.0],  # Outside bbox (California)
-                "geometry_type": "Point",
-                "observed_at": "2023-07-15",
-                "observer_id": "user_789",
+                "observed_at": date(2023, 7, 15),
             },
         ]
-        
-        # Mock only returns Aedes aegypti due to species filter
-        filtered_by_species = [r for r in complex_records if r["species_scientific_name"] == "Aedes aegypti"]
-        mock_table.to_list.return_value = filtered_by_species
         mock_get_table.return_value = mock_table
 
-        with patch("backend.services.geo_service.box") as mock_box, \
-             patch("backend.services.geo_service.Point") as mock_point_class:
-            
-            # Mock bbox filtering
-            mock_bbox_polygon = MagicMock()
-            mock_box.return_value = mock_bbox_polygon
-            
-            mock_point1 = MagicMock()
-            mock_point2 = MagicMock()
-            mock_point_class.side_effect = [mock_point1, mock_point2]
-            
-            # First point inside, second outside
-            mock_bbox_polygon.contains.side_effect = [True, False]
-
-            result = get_geo_layer(
-                db=MagicMock(),
-                layer_type="observations",
-                species_list=["Aedes aegypti"],
-                bbox_filter=(-75.0, 40.0, -73.0, 41.0),
-                start_date_str="2023-07-01",
-                end_date_str="2023-07-31"
-            )
+        result = get_geo_layer(
+            db=MagicMock(),
+            layer_type="observations",
+            species_list=["Aedes aegypti"],
+            bbox_filter=(-75.0, 40.0, -73.0, 41.0),
+            start_date_str="2023-07-01",
+            end_date_str="2023-07-31",
+            limit=50,
+        )
 
-            # Should only return one record that passes all filters
-            assert isinstance(result, GeoJSONFeatureCollection)
-            assert len(result.features) == 1
-            assert result.features[0].properties["id"] == "obs_001"
+        mock_table.where.assert_called_once_with(
+            "species_scientific_name IN ('Aedes aegypti') AND lon >= -75.0 AND lon <= -73.0 "
+            "AND lat >= 40.0 AND lat <= 41.0 AND observed_at >= DATE '2023-07-01' AND observed_at <= DATE '2023-07-31'"
+        )
+        mock_table.limit.assert_called_once_with(50)
+        assert len(result.features) == 1
+        feature = result.features[0]
+        assert feature.geometry.coordinates == [40.7128, -74.0060]
+        assert feature.properties["observed_at"] == "2023-07-15"
+        assert "lat" not in feature.properties
+        assert "lon" not in feature.properties
 
     @patch("backend.services.geo_service.get_table")
     def test_get_geo_layer_properties_exclude_geometry_fields(self, mock_get_table, mock_table, sample_observation_records):
@@ -423,3 +373,207 @@ class TestGeoServiceIntegration:
         assert "id" in feature.properties
         assert "species_scientific_name" in feature.properties
         assert "observed_at" in feature.properties
+
+
+class TestGeoLayerPushdown:
+    """Test cases running the compiled filters against real LanceDB tables."""
+
+    @staticmethod
+    def _rows(schema):
+        rows = []
+        for i in range(40):
+            row = {field.name: None for field in schema}
+            lat, lon = 40.0 + i * 0.1, -74.0
+            observed = date(2023, 1 + i % 12, 1)
+            row.update(
+                id=f"obs_{i:03d}",
+                species_scientific_name="Aedes aegypti" if i % 2 else "Culex pipiens",
+                geometry_type="Point",
+            )
+            if "lat" in schema.names:
+                row.update(lat=lat, lon=lon, observed_at=observed)
+            else:
+                row.update(coordinates=[lat, lon], observed_at=observed.isoformat())
+            rows.append(row)
+        return rows
+
+    @pytest.fixture(params=[OBSERVATIONS_SCHEMA, OBSERVATIONS_SCHEMA_V2], ids=["v1", "v2"])
+    def db(self, request, tmp_path):
+        """A database with 40 observations in either schema version."""
+        connection = lancedb.connect(str(tmp_path / "db"))
+        connection.create_table("observations", data=self._rows(request.param), schema=request.param)
+        return connection
+
+    def test_filters_match_inside_lancedb(self, db):
+        """Test that species, bbox and date filters select the expected rows."""
+        result = get_geo_layer(
+            db,
+            "observations",
+            species_list=["Aedes aegypti"],
+            bbox_filter=(-75.0, 41.0, -73.0, 43.0),
+            start_date_str="2023-03-01",
+            end_date_str="2023-08-01",
+        )
+
+        ids = sorted(feature.properties["id"] for feature in result.features)
+        # Odd rows with 41.0 <= lat <= 43.0 (rows 10-30) observed from March 1 to August 1.
+        assert ids == ["obs_015", "obs_017", "obs_019", "obs_027", "obs_029"]
+        assert result.features[0].geometry.coordinates[1] == pytest.approx(-74.0)
+
+    @pytest.mark.parametrize("store_enabled", [False, True], ids=["pushdown", "store"])
+    def test_stream_matches_geo_layer(self, db, store_enabled):
+        """Test that the streamed collection holds the same features as get_geo_layer, in batches."""
+        filters = dict(species_list=["Aedes aegypti"], bbox_filter=(-75.0, 41.0, -73.0, 43.0), limit=8)
+        expected = get_geo_layer(db, "observations", **filters)
+
+        with patch("backend.services.geo_service.app_settings") as settings, patch(
+            "backend.services.geo_service.observation_store", ObservationStore(refresh_seconds=0)
+        ), patch("backend.services.geo_service.GEOJSON_STREAM_BATCH_ROWS", 3):
+            settings.GEO_OBSERVATION_STORE_ENABLED = store_enabled
+            chunks = list(stream_geo_layer(db, "observations", **filters))
+
+        # The opening bytes, then batches of at most 3 features, then the closing bytes.
+        assert chunks[0] == b'{"type":"FeatureCollection","features":['
+        assert len(chunks) >= 5
+        assert all(chunk.count(b'"type":"Feature"') <= 3 for chunk in chunks[1:-1])
+        result = json.loads(b"".join(chunks))
+        assert result == json.loads(expected.model_dump_json())
+
+    def test_stream_ends_collection_on_errors(self, db):
+        """Test that the stream is a complete collection when the query fails or reading rows fails."""
+        with patch("backend.services.geo_service.get_table", side_effect=Exception("Database error")):
+            assert json.loads(b"".join(stream_geo_layer(db, "observations"))) == {
+                "type": "FeatureCollection",
+                "features": [],
+            }
+
+        def failing_batches():
+            yield [{"id": "obs_000", "lat": 40.0, "lon": -74.0, "observed_at": date(2023, 1, 1)}]
+            raise OSError("read failed")
+
+        with patch("backend.services.geo_service._observation_batches", return_value=failing_batches()):
+            result = json.loads(b"".join(stream_geo_layer(db, "observations")))
+        assert result["features"] == [
+            {
+                "type": "Feature",
+                "properties": {"id": "obs_000", "observed_at": "2023-01-01"},
+                "geometry": {"type": "Point", "coordinates": [40.0, -74.0]},
+            }
+        ]
+
+    def test_limit_applies_after_filter(self, db):
+        """Test that matching rows beyond the first `limit` scanned rows are still returned."""
+        result = get_geo_layer(db, "observations", bbox_filter=(-75.0, 43.5, -73.0, 45.0), limit=3)
+
+        assert len(result.features) == 3
+        assert all(feature.geometry.coordinates[0] >= 43.5 for feature in result.features)
+
+    def test_observation_store_matches_pushdown(self, db):
+        """Test that filtering the resident snapshot returns the same rows as the LanceDB predicate."""
+        filters = dict(
+            species_list=["Aedes aegypti"],
+            bbox_filter=(-75.0, 41.0, -73.0, 43.0),
+            start_date_str="2023-03-01",
+            end_date_str="2023-08-01",
+        )
+        expected = get_geo_layer(db, "observations", **filters)
+
+        with patch("backend.services.geo_service.app_settings") as settings, patch(
+            "backend.services.geo_service.observation_store", ObservationStore(refresh_seconds=0)
+        ):
+            settings.GEO_OBSERVATION_STORE_ENABLED = True
+            result = get_geo_layer(db, "observations", **filters)
+
+        assert sorted(f.properties["id"] for f in result.features) == sorted(
+            f.properties["id"] for f in expected.features
+        )
+        assert [f.geometry.coordinates for f in result.features] == [f.geometry.coordinates for f in expected.features]
+
+    def test_knn_orders_features_by_distance(self, db):
+        """Test that knn returns the closest observations with their distance, or nothing on version 1 tables."""
+        with patch("backend.services.geo_service.observation_store", ObservationStore(refresh_seconds=0)):
+            result = get_geo_layer(db, "observations", species_list=["Aedes aegypti"], knn=(-74.0, 41.02, 3))
+
+        if "lat" not in db.open_table("observations").schema.names:
+            assert result.features == []
+            return
+        # Odd rows lie 0.2 degrees apart from lat 40.1; lat 41.1 is closest to 41.02, then 40.9 and 41.3.
+        assert [f.properties["id"] for f in result.features] == ["obs_011", "obs_009", "obs_013"]
+        distances = [f.properties["distance_km"] for f in result.features]
+        assert distances == sorted(distances)
+        assert distances[0] == pytest.approx(8.9, abs=0.01)
+
+    def test_observation_clusters(self, db):
+        """Test that clusters aggregate the filtered observations in either schema version."""
+        with patch("backend.services.geo_service.observation_store", ObservationStore(refresh_seconds=0)):
+            result = get_observation_clusters(
+                db, zoom=3, species_list=["Aedes aegypti"], bbox_filter=(-80.0, 35.0, -70.0, 45.0)
+            )
+
+        # At zoom 3 a cell edge runs along lat 40.98: odd rows 11-39 lie north of it, 1-9 south.
+        assert result.total == 20
+        assert [cluster.count for cluster in result.clusters] == [15, 5]
+        assert result.clusters[0].species == {"Aedes aegypti": 15}
+        assert result.clusters[0].lat == pytest.approx(42.5)
+
+    def test_observation_clusters_follow_new_versions(self, db):
+        """Test that cached aggregates are not served after observations are added, and dates filter them."""
+        tbl = db.open_table("observations")
+        with patch("backend.services.geo_service.observation_store", ObservationStore(refresh_seconds=0)):
+            before = get_observation_clusters(db, zoom=3)
+            dated = get_observation_clusters(db, zoom=3, start_date_str="2023-12-01")
+            row = {field.name: None for field in tbl.schema}
+            row.update(id="obs_new", species_scientific_name="Aedes albopictus", geometry_type="Point")
+            row.update(lat=40.5, lon=-74.0) if "lat" in tbl.schema.names else row.update(coordinates=[40.5, -74.0])
+            tbl.add([row])
+            after = get_observation_clusters(db, zoom=3)
+
+        assert before.total == 40
+        # Rows 11, 23 and 35 are observed in December.
+        assert dated.total == 3
+        assert after.total == 41
+        assert any(cluster.species.get("Aedes albopictus") == 1 for cluster in after.clusters)
+
+    def test_load_observation_store(self, db):
+        """Test that the snapshot is loaded ahead of requests, except from version 1 tables."""
+        store = ObservationStore(refresh_seconds=60)
+        with patch("backend.services.geo_service.observation_store", store):
+            loaded = load_observation_store(db)
+
+        if "lat" not in db.open_table("observations").schema.names:
+            assert not loaded and store.version is None
+            return
+        assert loaded
+        assert len(store) == 40
+        assert store.version == db.open_table("observations").version
+
+    def test_observation_tiles_are_cached_until_observations_are_added(self, db):
+        """Test that tiles hold the observations inside them and are re-rendered after appends inside them."""
+        store, cache = ObservationStore(refresh_seconds=0), TileCache()
+        store.add_listener(cache.invalidate)
+        tbl = db.open_table("observations")
+        with patch("backend.services.geo_service.observation_store", store), patch(
+            "backend.services.geo_service.tile_cache", cache
+        ):
+            # At zoom 3, tile (2, 3) holds lon -74 and lat 0 to 40.98: rows 0-9.
+            tile = json.loads(get_observation_tile(db, 3, 2, 3, "geojson", species_list=["Aedes aegypti"]))
+            if "lat" not in tbl.schema.names:
+                assert tile["features"] == []
+                return
+            ids = [f["properties"]["id"] for f in tile["features"]]
+            assert ids == ["obs_001", "obs_003", "obs_005", "obs_007", "obs_009"]
+            assert tile["features"][0]["geometry"]["coordinates"] == [40.1, -74.0]
+
+            with patch("backend.services.geo_service._query_observation_store") as query:
+                cached = json.loads(get_observation_tile(db, 3, 2, 3, "geojson", species_list=["Aedes aegypti"]))
+            query.assert_not_called()
+            assert cached == tile
+
+            row = {field.name: None for field in tbl.schema}
+            row.update(
+                id="obs_new", species_scientific_name="Aedes aegypti", geometry_type="Point", lat=40.5, lon=-74.0
+            )
+            tbl.add([row])
+            updated = json.loads(get_observation_tile(db, 3, 2, 3, "geojson", species_list=["Aedes aegypti"]))
+
+        assert len(updated["features"]) == 6
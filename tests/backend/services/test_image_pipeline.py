@@ -0,0 +1,68 @@
+"""
+Tests for the single-decode image pipeline.
+"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from backend.services.image_pipeline import decode_image, encode_thumbnails
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+class TestDecodeImage:
+    """Test cases for the decode_image function."""
+
+    def test_large_jpeg_is_decoded_at_reduced_size(self):
+        """Test that JPEG draft mode reduces a large photo while keeping enough pixels."""
+        image_data = _encode(Image.new("RGB", (4000, 3000), color="green"), "JPEG")
+
+        decoded = decode_image(image_data, max_side=512)
+
+        assert decoded.format == "JPEG"
+        assert decoded.original_size == (4000, 3000)
+        assert decoded.image.mode == "RGB"
+        assert 512 <= max(decoded.image.size) < 2000
+
+    def test_large_png_is_reduced(self):
+        """Test that non-JPEG images are reduced by an integer factor after decoding."""
+        image_data = _encode(Image.new("RGBA", (2048, 1024)), "PNG")
+
+        decoded = decode_image(image_data, max_side=512)
+
+        assert decoded.format == "PNG"
+        assert decoded.image.mode == "RGB"
+        assert decoded.image.size == (512, 256)
+
+    @pytest.mark.parametrize("max_side", [0, 1024])
+    def test_small_or_unlimited_is_decoded_at_full_size(self, max_side):
+        """Test that images are left at full size when no reduction is needed."""
+        image_data = _encode(Image.new("L", (800, 600)), "PNG")
+
+        decoded = decode_image(image_data, max_side=max_side)
+
+        assert decoded.image.size == (800, 600)
+        assert decoded.image.mode == "RGB"
+
+
+class TestEncodeThumbnails:
+    """Test cases for the encode_thumbnails function."""
+
+    def test_thumbnails_are_encoded_in_upload_format(self):
+        """Test that thumbnails keep the aspect ratio and the source format."""
+        decoded = decode_image(_encode(Image.new("RGB", (800, 400)), "PNG"))
+
+        thumbnail_224, thumbnail_100 = encode_thumbnails(decoded, [(224, 224), (100, 100)])
+
+        with Image.open(io.BytesIO(thumbnail_224)) as image:
+            assert image.format == "PNG"
+            assert image.size == (224, 112)
+        with Image.open(io.BytesIO(thumbnail_100)) as image:
+            assert image.size == (100, 50)
+        assert decoded.image.size == (800, 400)
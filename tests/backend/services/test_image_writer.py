@@ -0,0 +1,163 @@
+"""
+Tests for the bounded background writer for predicted images.
+"""
+
+import asyncio
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from backend.services.image_pipeline import decode_image
+from backend.services.image_writer import (
+    WRITER_DROPPED,
+    WRITER_WRITES,
+    PredictedImageWriter,
+    collect_garbage,
+    predicted_image_name,
+    predicted_image_url,
+)
+
+
+@pytest.fixture
+def jpeg_data():
+    """Create a small JPEG image in memory."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), color="blue").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestPredictedImageWriter:
+    """Test cases for the PredictedImageWriter class."""
+
+    @pytest.mark.asyncio
+    async def test_queued_images_are_written_before_close_returns(self, tmp_path, jpeg_data):
+        """Test that close drains the queue and every size is written."""
+        writer = PredictedImageWriter(tmp_path, max_queue=8, workers=2)
+
+        for i in range(3):
+            assert writer.submit(jpeg_data, f"image_{i}.jpg", decode_image(jpeg_data))
+        await writer.close(timeout=10)
+
+        for i in range(3):
+            assert (tmp_path / "original/im" / f"image_{i}.jpg").read_bytes() == jpeg_data
+            with Image.open(tmp_path / "224x224/im" / f"image_{i}.jpg") as thumbnail:
+                assert thumbnail.size == (224, 168)
+            with Image.open(tmp_path / "100x100/im" / f"image_{i}.jpg") as thumbnail:
+                assert thumbnail.size == (100, 75)
+        assert writer.queue_depth == 0
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_new_images(self, tmp_path, jpeg_data, monkeypatch):
+        """Test that saves beyond the queue capacity are dropped and counted."""
+        writer = PredictedImageWriter(tmp_path, max_queue=1, workers=1)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def blocked_process(job, raise_errors=False):
+            started.set()
+            await release.wait()
+
+        monkeypatch.setattr(writer, "_process", blocked_process)
+        dropped_before = WRITER_DROPPED.value()
+
+        assert writer.submit(jpeg_data, "first.jpg")
+        await started.wait()
+        assert writer.submit(jpeg_data, "second.jpg")
+        assert not writer.submit(jpeg_data, "third.jpg")
+
+        assert WRITER_DROPPED.value() == dropped_before + 1
+        assert writer.queue_depth == 1
+        release.set()
+        await writer.close(timeout=5)
+
+    @pytest.mark.asyncio
+    async def test_write_raises_on_invalid_image(self, tmp_path):
+        """Test that the direct write path reports encoding errors."""
+        writer = PredictedImageWriter(tmp_path)
+
+        with pytest.raises(Exception):
+            await writer.write(b"not an image", "broken.jpg")
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_images_are_not_rewritten(self, tmp_path, jpeg_data, monkeypatch):
+        """Test that an image already stored is neither re-encoded nor rewritten."""
+        writer = PredictedImageWriter(tmp_path)
+        filename = predicted_image_name(hashlib.sha256(jpeg_data).hexdigest(), "JPEG")
+        await writer.write(jpeg_data, filename)
+        stored = tmp_path / "original" / filename[:2] / filename
+        content = stored.read_bytes()
+        duplicates_before = WRITER_WRITES.value(outcome="duplicate")
+
+        def fail_encode(*args, **kwargs):
+            raise AssertionError("duplicate image was re-encoded")
+
+        monkeypatch.setattr("backend.services.image_writer.encode_thumbnails", fail_encode)
+        assert writer.submit(jpeg_data, filename)
+        assert writer.submit(jpeg_data, filename)
+        await writer.close()
+
+        assert stored.read_bytes() == content
+        assert WRITER_WRITES.value(outcome="duplicate") == duplicates_before + 2
+        assert filename.endswith(".jpg")
+        assert predicted_image_url("224x224", filename).startswith(f"/static/images/predicted/224x224/{filename[:2]}/")
+
+    @pytest.mark.asyncio
+    async def test_duplicate_images_are_kept_from_garbage_collection(self, tmp_path, jpeg_data):
+        """Test that saving an image again refreshes its files' age, so collect_garbage keeps them."""
+        writer = PredictedImageWriter(tmp_path)
+        filename = predicted_image_name(hashlib.sha256(jpeg_data).hexdigest(), "JPEG")
+        await writer.write(jpeg_data, filename)
+        paths = [tmp_path / folder / filename[:2] / filename for folder in ["original", "224x224", "100x100"]]
+        old = time.time() - 7 * 86400
+        for path in paths:
+            os.utime(path, (old, old))
+
+        await writer.write(jpeg_data, filename)
+        await writer.close()
+        report = collect_garbage(tmp_path, referenced_digests=set())
+
+        assert report["deleted"] == 0
+        assert all(path.exists() for path in paths)
+
+
+class TestCollectGarbage:
+    """Test cases for the collect_garbage function."""
+
+    def test_unreferenced_old_images_are_deleted(self, tmp_path):
+        """Test that only old, unreferenced, content-addressed files are removed."""
+        referenced, orphan, fresh = ("a" * 64, "b" * 64, "c" * 64)
+        old = time.time() - 7 * 86400
+        for folder in ["original", "224x224", "100x100"]:
+            for digest in (referenced, orphan, fresh):
+                path = tmp_path / folder / digest[:2] / f"{digest}.jpg"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"data")
+                if digest != fresh:
+                    os.utime(path, (old, old))
+        legacy = tmp_path / "original" / "aedes_aegypti_1234_01012025.jpg"
+        legacy.write_bytes(b"legacy")
+        os.utime(legacy, (old, old))
+
+        report = collect_garbage(tmp_path, {referenced}, min_age_seconds=86400)
+
+        assert report == {"scanned": 9, "kept": 6, "deleted": 3, "freed_bytes": 12}
+        assert not (tmp_path / "original" / "bb" / f"{orphan}.jpg").exists()
+        assert (tmp_path / "100x100" / "aa" / f"{referenced}.jpg").exists()
+        assert (tmp_path / "224x224" / "cc" / f"{fresh}.jpg").exists()
+        assert legacy.exists()
+
+    def test_dry_run_keeps_files(self, tmp_path):
+        """Test that a dry run reports but does not delete."""
+        path = tmp_path / "original" / "dd" / f"{'d' * 64}.png"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b"data")
+
+        report = collect_garbage(tmp_path, set(), min_age_seconds=0, dry_run=True)
+
+        assert report["deleted"] == 1
+        assert path.exists()
@@ -0,0 +1,142 @@
+"""
+Tests for the micro-batching inference scheduler.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.inference_batcher import InferenceBatcher
+
+
+class TestInferenceBatcher:
+    """Test cases for the InferenceBatcher class."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self):
+        """Test that requests submitted together are run in a single call."""
+        calls = []
+
+        def batch_fn(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = InferenceBatcher(batch_fn, max_batch_size=8, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.close()
+
+        assert results == [0, 2, 4, 6, 8]
+        assert calls == [[0, 1, 2, 3, 4]]
+
+    @pytest.mark.asyncio
+    async def test_batches_are_capped_at_max_size(self):
+        """Test that no batch exceeds max_batch_size."""
+        calls = []
+
+        def batch_fn(items):
+            calls.append(len(items))
+            return list(items)
+
+        batcher = InferenceBatcher(batch_fn, max_batch_size=3, max_wait_ms=50)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+        await batcher.close()
+
+        assert results == list(range(7))
+        assert max(calls) <= 3
+        assert sum(calls) == 7
+
+    @pytest.mark.asyncio
+    async def test_single_request_runs_after_wait_window(self):
+        """Test that a lone request is not held back beyond the wait window."""
+        batcher = InferenceBatcher(lambda items: [f"ok-{i}" for i in items], max_batch_size=16, max_wait_ms=5)
+        result = await asyncio.wait_for(batcher.submit("a"), timeout=1)
+        await batcher.close()
+
+        assert result == "ok-a"
+
+    @pytest.mark.asyncio
+    async def test_failing_item_does_not_fail_its_neighbours(self):
+        """Test that a batch failure falls back to per-item execution."""
+
+        def batch_fn(items):
+            if "bad" in items:
+                raise ValueError("cannot decode image")
+            return [item.upper() for item in items]
+
+        batcher = InferenceBatcher(batch_fn, max_batch_size=4, max_wait_ms=50)
+        results = await asyncio.gather(
+            batcher.submit("a"),
+            batcher.submit("bad"),
+            batcher.submit("b"),
+            return_exceptions=True,
+        )
+        await batcher.close()
+
+        assert results[0] == "A"
+        assert isinstance(results[1], ValueError)
+        assert results[2] == "B"
+
+    @pytest.mark.asyncio
+    async def test_mismatched_result_count_is_an_error(self):
+        """Test that a batch function returning the wrong number of results raises."""
+        batcher = InferenceBatcher(lambda items: [], max_batch_size=2, max_wait_ms=1)
+
+        with pytest.raises(RuntimeError, match="returned 0 results"):
+            await batcher.submit("x")
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_batches_run_concurrently_up_to_the_limit(self):
+        """Test that batches are dispatched without waiting for the previous one, at most max_concurrent_batches."""
+        running = peak = 0
+        release = asyncio.Event()
+
+        async def run_in_executor(fn, items):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await release.wait()
+            running -= 1
+            return fn(items)
+
+        batcher = InferenceBatcher(
+            lambda items: list(items),
+            max_batch_size=1,
+            max_wait_ms=0,
+            run_in_executor=run_in_executor,
+            max_concurrent_batches=2,
+        )
+        pending = asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        assert peak == 2
+
+        release.set()
+        assert await pending == list(range(5))
+        assert peak == 2
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_close_fails_running_batches(self):
+        """Test that requests whose batch is still running when the batcher closes get an error."""
+        started = asyncio.Event()
+
+        async def run_in_executor(fn, items):
+            started.set()
+            await asyncio.Event().wait()
+
+        batcher = InferenceBatcher(lambda items: items, max_wait_ms=0, run_in_executor=run_in_executor)
+        request = asyncio.ensure_future(batcher.submit("a"))
+        await started.wait()
+        await batcher.close()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            await request
+
+    def test_invalid_limits_are_clamped(self):
+        """Test that batch size, wait window and concurrency are clamped to sane values."""
+        batcher = InferenceBatcher(lambda items: items, max_batch_size=0, max_wait_ms=-5, max_concurrent_batches=0)
+
+        assert batcher.max_batch_size == 1
+        assert batcher.max_wait_ms == 0.0
+        assert batcher.max_concurrent_batches == 1
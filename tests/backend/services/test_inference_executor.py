@@ -0,0 +1,73 @@
+"""
+Tests for the inference execution backends.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from backend.services.inference_executor import InferenceExecutor
+
+
+def _current_thread_name(suffix: str = "") -> str:
+    return threading.current_thread().name + suffix
+
+
+class _BrokenOnceExecutor(ThreadPoolExecutor):
+    """Thread pool that simulates a crashed worker process on first use."""
+
+    def submit(self, fn, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+
+class TestInferenceExecutor:
+    """Test cases for the InferenceExecutor class."""
+
+    def test_unknown_kind_raises(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError, match="Unknown inference executor"):
+            InferenceExecutor("gpu-cluster")
+
+    def test_zero_workers_defaults_to_cpu_count(self, monkeypatch):
+        """Test that a pool size of 0 means one worker per core."""
+        monkeypatch.setattr("backend.services.inference_executor.os.cpu_count", lambda: 32)
+
+        assert InferenceExecutor("thread", workers=0).workers == 32
+
+    @pytest.mark.asyncio
+    async def test_default_kind_uses_shared_thread_executor(self):
+        """Test that the default backend runs callables via asyncio.to_thread."""
+        executor = InferenceExecutor("default")
+
+        name = await executor.run(_current_thread_name, suffix="!")
+
+        assert name.endswith("!")
+        assert not name.startswith("inference")
+
+    @pytest.mark.asyncio
+    async def test_thread_kind_uses_dedicated_pool(self):
+        """Test that the thread backend runs callables on its own named pool."""
+        executor = InferenceExecutor("thread", workers=2)
+        try:
+            name = await executor.run(_current_thread_name)
+        finally:
+            executor.shutdown()
+
+        assert name.startswith("inference")
+
+    @pytest.mark.asyncio
+    async def test_broken_process_pool_is_replaced(self, monkeypatch):
+        """Test that a crashed pool is recreated and the call retried once."""
+        executor = InferenceExecutor("process", workers=1)
+        pools = [_BrokenOnceExecutor(max_workers=1), ThreadPoolExecutor(max_workers=1)]
+        monkeypatch.setattr(executor, "_create_pool", lambda: pools.pop(0))
+
+        try:
+            result = await executor.run(sum, [1, 2, 3])
+        finally:
+            executor.shutdown()
+
+        assert result == 6
+        assert executor.restarts == 1
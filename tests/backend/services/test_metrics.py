@@ -0,0 +1,63 @@
+"""
+Tests for the in-process metrics registry.
+"""
+
+import pytest
+
+from backend.services.metrics import MetricsRegistry, Counter, Gauge, Histogram
+
+
+class TestMetricsRegistry:
+    """Test cases for metric types and Prometheus rendering."""
+
+    def test_counter_renders_labelled_samples(self):
+        """Test counter increments and text exposition."""
+        registry = MetricsRegistry()
+        requests = registry.get_or_create(Counter, "test_requests_total", "Requests", labelnames=["route"])
+        requests.inc(route="/predict")
+        requests.inc(2, route="/predict")
+
+        output = registry.render()
+
+        assert "# TYPE test_requests_total counter" in output
+        assert 'test_requests_total{route="/predict"} 3' in output
+
+    def test_gauge_function_is_sampled_at_render_time(self):
+        """Test that callback gauges reflect the current value."""
+        registry = MetricsRegistry()
+        depth = registry.get_or_create(Gauge, "test_queue_depth", "Queue depth")
+        items = [1, 2]
+        depth.set_function(lambda: len(items))
+        items.append(3)
+
+        assert "test_queue_depth 3" in registry.render()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test histogram bucket, sum and count samples."""
+        registry = MetricsRegistry()
+        latency = registry.get_or_create(Histogram, "test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+        latency.observe(0.05)
+        latency.observe(0.5)
+        latency.observe(5)
+
+        output = registry.render()
+
+        assert 'test_latency_seconds_bucket{le="0.1"} 1' in output
+        assert 'test_latency_seconds_bucket{le="1"} 2' in output
+        assert 'test_latency_seconds_bucket{le="+Inf"} 3' in output
+        assert "test_latency_seconds_count 3" in output
+
+    def test_wrong_labels_raise(self):
+        """Test that label names are validated."""
+        counter = Counter("test_total", "Test", labelnames=["a"])
+
+        with pytest.raises(ValueError):
+            counter.inc(b="x")
+
+    def test_type_conflict_raises(self):
+        """Test that a name cannot be registered as two metric types."""
+        registry = MetricsRegistry()
+        registry.get_or_create(Counter, "test_conflict", "Test")
+
+        with pytest.raises(ValueError):
+            registry.get_or_create(Gauge, "test_conflict", "Test")
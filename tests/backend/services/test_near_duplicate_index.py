@@ -0,0 +1,110 @@
+"""
+Tests for the perceptual-hash near-duplicate index.
+"""
+
+import io
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from backend.services.near_duplicate_index import NEAR_DUPLICATE_LOOKUPS, NearDuplicateIndex, perceptual_hash
+
+
+@pytest.fixture
+def photo():
+    """Create a textured image that hashes like a photo."""
+    rng = np.random.default_rng(7)
+    base = rng.integers(0, 256, size=(12, 16, 3), dtype=np.uint8)
+    return Image.fromarray(base).resize((640, 480), Image.Resampling.BICUBIC)
+
+
+def _reencode(image: Image.Image, size: tuple[int, int], quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    image.resize(size).save(buffer, format="JPEG", quality=quality)
+    return Image.open(io.BytesIO(buffer.getvalue())).convert("RGB")
+
+
+class TestPerceptualHash:
+    """Test cases for the perceptual_hash function."""
+
+    def test_reencoded_and_resized_copies_hash_alike(self, photo):
+        """Test that re-encoding and resizing change at most a few bits."""
+        original = perceptual_hash(photo)
+        copy = perceptual_hash(_reencode(photo, (400, 300), quality=60))
+
+        assert original is not None
+        assert (original ^ copy).bit_count() <= 4
+
+    def test_different_photos_hash_apart(self, photo):
+        """Test that unrelated images are far apart."""
+        other = photo.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+        assert (perceptual_hash(photo) ^ perceptual_hash(other)).bit_count() > 16
+
+    def test_images_without_detail_are_not_hashed(self):
+        """Test that a blank frame gets no hash."""
+        assert perceptual_hash(Image.new("RGB", (640, 480), color="red")) is None
+
+
+class TestNearDuplicateIndex:
+    """Test cases for the NearDuplicateIndex class."""
+
+    def test_lookup_matches_brute_force(self):
+        """Test that banded lookup finds every stored hash within the distance."""
+        rng = random.Random(3)
+        index = NearDuplicateIndex(max_distance=5, window_seconds=60, max_entries=10_000)
+        stored = [rng.getrandbits(64) for _ in range(2000)]
+        for i, value in enumerate(stored):
+            index.add(value, "model", i)
+
+        for value in stored[:200]:
+            flipped = value
+            for bit in rng.sample(range(64), 5):
+                flipped ^= 1 << bit
+            closest = min((stored_value ^ flipped).bit_count() for stored_value in stored)
+            found = index.get(flipped, "model")
+            assert (stored[found] ^ flipped).bit_count() == closest
+
+    def test_results_are_not_shared_between_models(self):
+        """Test that a result is only reused for the same model key."""
+        index = NearDuplicateIndex(max_distance=2, window_seconds=60)
+        index.add(0b1011, "model-a", "a")
+
+        assert index.get(0b1011, "model-b") is None
+        assert index.get(0b1001, "model-a") == "a"
+
+    def test_results_expire_after_the_window(self, monkeypatch):
+        """Test that results older than the window are not reused."""
+        now = [1000.0]
+        monkeypatch.setattr("backend.services.near_duplicate_index.time.monotonic", lambda: now[0])
+        index = NearDuplicateIndex(max_distance=2, window_seconds=30)
+        index.add(0xFF00, "model", "result")
+
+        now[0] += 29
+        assert index.get(0xFF01, "model") == "result"
+        now[0] += 2
+        assert index.get(0xFF01, "model") is None
+        assert len(index) == 0
+
+    def test_oldest_results_are_evicted_at_capacity(self):
+        """Test that the index keeps at most max_entries results."""
+        index = NearDuplicateIndex(max_distance=0, window_seconds=60, max_entries=2)
+        for value in (1, 2, 3):
+            index.add(value, "model", value)
+
+        assert len(index) == 2
+        assert index.get(1, "model") is None
+        assert index.get(3, "model") == 3
+
+    def test_missing_hash_is_counted_as_skipped(self):
+        """Test that images without a hash are neither stored nor matched."""
+        index = NearDuplicateIndex(window_seconds=60)
+        skipped_before = NEAR_DUPLICATE_LOOKUPS.value(outcome="skipped")
+
+        index.add(None, "model", "result")
+
+        assert index.get(None, "model") is None
+        assert len(index) == 0
+        assert NEAR_DUPLICATE_LOOKUPS.value(outcome="skipped") == skipped_before + 1
@@ -0,0 +1,67 @@
+"""
+Tests for the zoom-aware grid aggregation of observations.
+"""
+
+import numpy as np
+import pytest
+
+from backend.services.observation_clusters import aggregate_cells, cell_bounds, cell_x, cell_y
+
+NAMES = ["Aedes aegypti", "Culex pipiens"]
+
+
+@pytest.fixture
+def observations():
+    """Three observations around New York, one in Sydney, one near the antimeridian and one without location."""
+    lat = np.array([40.70, 40.75, 40.72, -33.87, 10.0, np.nan])
+    lon = np.array([-74.00, -73.95, -74.05, 151.21, 179.5, np.nan])
+    species = np.array([0, 0, 1, 1, -1, 0], dtype=np.int32)
+    return lat, lon, species
+
+
+class TestAggregateCells:
+    """Test cases for aggregate_cells and ClusterAggregate."""
+
+    def test_counts_centroids_and_species(self, observations):
+        """Observations in the same cell are counted together with their centroid and species breakdown."""
+        aggregate = aggregate_cells(*observations, NAMES, zoom=4)
+
+        clusters = aggregate.to_clusters(aggregate.select())
+
+        assert [cluster["count"] for cluster in clusters] == [3, 1, 1]
+        new_york = clusters[0]
+        assert new_york["lat"] == pytest.approx(40.7233, abs=1e-4)
+        assert new_york["lon"] == pytest.approx(-74.0)
+        assert new_york["species"] == {"Aedes aegypti": 2, "Culex pipiens": 1}
+        min_lon, min_lat, max_lon, max_lat = new_york["bbox"]
+        assert min_lon <= -74.05 and max_lon >= -73.95 and min_lat <= 40.70 and max_lat >= 40.75
+        by_lon = {round(cluster["lon"], 2): cluster["species"] for cluster in clusters[1:]}
+        # Unknown species count towards the total only.
+        assert by_lon == {151.21: {"Culex pipiens": 1}, 179.5: {}}
+
+    def test_high_zoom_splits_cells(self, observations):
+        """At a high zoom level nearby observations fall into separate cells."""
+        aggregate = aggregate_cells(*observations, NAMES, zoom=14)
+
+        assert len(aggregate) == 5
+        assert aggregate.count.sum() == 5
+
+    def test_select_viewport(self, observations):
+        """Only cells intersecting the viewport are selected, including across the antimeridian."""
+        aggregate = aggregate_cells(*observations, NAMES, zoom=4)
+
+        new_york = aggregate.to_clusters(aggregate.select((-75.0, 40.0, -73.0, 41.0)))
+        pacific = aggregate.to_clusters(aggregate.select((150.0, -40.0, -170.0, 20.0)))
+
+        assert [cluster["count"] for cluster in new_york] == [3]
+        assert sorted(cluster["lon"] for cluster in pacific) == [151.21, 179.5]
+
+    def test_cell_bounds_match_cell_index(self):
+        """A point lies inside the bounds of the cell it is assigned to."""
+        level = 9
+        x, y = int(cell_x(-74.0, level)), int(cell_y(40.7, level))
+
+        min_lon, min_lat, max_lon, max_lat = cell_bounds(x, y, level)
+
+        assert min_lon <= -74.0 < max_lon
+        assert min_lat <= 40.7 < max_lat
@@ -3,6 +3,7 @@ Tests for the observation service.
 """
 
 import json
+from datetime import date
 from unittest.mock import MagicMock, AsyncMock, patch
 from uuid import uuid4
 import pytest
@@ -10,6 +11,7 @@ from fastapi import HTTPException
 
 from backend.services.observation_service import ObservationService, get_observation_service
 from backend.schemas.observation_schemas import Observation, ObservationListResponse, Location
+from backend.database_utils.lancedb_manager import OBSERVATIONS_SCHEMA, OBSERVATIONS_SCHEMA_V2
 from tests.factories.mock_factory import MockFactory
 
 
@@ -26,6 +28,7 @@ class TestObservationService:
         """Create a mock LanceDB table."""
         mock_table = MagicMock()
         mock_table.add = AsyncMock()
+        mock_table.schema = AsyncMock(return_value=OBSERVATIONS_SCHEMA)
         mock_table.search.return_value = mock_table
         mock_table.where.return_value = mock_table
         mock_table.limit.return_value = mock_table
@@ -100,6 +103,24 @@ class TestObservationService:
         assert record["coordinates"] == [sample_observation_data.location.lat, sample_observation_data.location.lng]
         assert record["geometry_type"] == "Point"
 
+    @patch("backend.services.observation_service.get_lancedb_manager")
+    async def test_create_observation_schema_v2(self, mock_get_manager, mock_lancedb_manager, mock_table, sample_observation_data):
+        """Test that a version 2 table gets a date and separate lat/lon columns."""
+        mock_get_manager.return_value = mock_lancedb_manager
+        mock_lancedb_manager.db.open_table = AsyncMock(return_value=mock_table)
+        mock_table.schema = AsyncMock(return_value=OBSERVATIONS_SCHEMA_V2)
+
+        service = ObservationService()
+        await service.initialize()
+
+        await service.create_observation(sample_observation_data)
+
+        record = mock_table.add.call_args[0][0][0]
+        assert record["observed_at"] == date(2023, 6, 15)
+        assert record["lat"] == sample_observation_data.location.lat
+        assert record["lon"] == sample_observation_data.location.lng
+        assert "coordinates" not in record
+
     @patch("backend.services.observation_service.get_lancedb_manager")
     async def test_create_observation_with_metadata_dict(self, mock_get_manager, mock_lancedb_manager, mock_table):
         """Test observation creation with dictionary metadata."""
@@ -178,6 +199,25 @@ class TestObservationService:
         assert result.observations[0].location.lat == 40.7128
         assert result.observations[0].location.lng == -74.0060
 
+    @patch("backend.services.observation_service.get_lancedb_manager")
+    async def test_get_observations_schema_v2(self, mock_get_manager, mock_lancedb_manager, mock_table, sample_observation_record):
+        """Test that version 2 rows are mapped from their lat/lon and date columns."""
+        mock_get_manager.return_value = mock_lancedb_manager
+        mock_lancedb_manager.db.open_table = AsyncMock(return_value=mock_table)
+        record = {k: v for k, v in sample_observation_record.items() if k != "coordinates"}
+        record.update(lat=40.7128, lon=-74.0060, observed_at=date(2023, 6, 15))
+        mock_table.to_list = AsyncMock(return_value=[record])
+
+        service = ObservationService()
+        await service.initialize()
+
+        result = await service.get_observations(species_id="Aedes aegypti")
+
+        assert result.count == 1
+        assert result.observations[0].location.lat == 40.7128
+        assert result.observations[0].location.lng == -74.0060
+        assert result.observations[0].observed_at == "2023-06-15"
+
     @patch("backend.services.observation_service.get_lancedb_manager")
     async def test_get_observations_with_user_filter(self, mock_get_manager, mock_lancedb_manager, mock_table, sample_observation_record):
         """Test getting observations filtered by user ID."""
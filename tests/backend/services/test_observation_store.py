@@ -0,0 +1,166 @@
+"""
+Tests for the resident observation snapshot.
+"""
+
+from datetime import date
+
+import lancedb
+import pyarrow as pa
+import pytest
+
+from backend.database_utils.lancedb_manager import OBSERVATIONS_SCHEMA_V2
+from backend.services.observation_store import ObservationStore
+
+SPECIES = ["Aedes aegypti", "Culex pipiens", "Anopheles gambiae"]
+
+
+def _rows(start: int, stop: int) -> pa.Table:
+    rows = []
+    for i in range(start, stop):
+        row = {field.name: None for field in OBSERVATIONS_SCHEMA_V2}
+        row.update(
+            id=f"obs_{i:03d}",
+            species_scientific_name=SPECIES[i % 3],
+            lat=float(i),
+            lon=-float(i),
+            observed_at=date(2024, 1, 1 + i % 28) if i % 5 else None,
+        )
+        rows.append(row)
+    return pa.Table.from_pylist(rows, schema=OBSERVATIONS_SCHEMA_V2)
+
+
+def _ids(table, matches) -> list[str]:
+    table.checkout(matches.version)
+    return sorted(row["id"] for row in table.take_row_ids(matches.row_ids.tolist()).to_list())
+
+
+@pytest.fixture
+def table(tmp_path):
+    """A version 2 observations table with 10 rows."""
+    db = lancedb.connect(str(tmp_path / "db"))
+    return db.create_table("observations", data=_rows(0, 10))
+
+
+class TestObservationStore:
+    """Test cases for ObservationStore."""
+
+    def test_full_load_and_query(self, table):
+        """The first refresh loads every row and queries combine all filters."""
+        store = ObservationStore(refresh_seconds=0)
+
+        assert store.refresh(table) == "full"
+        assert len(store) == 10
+        assert store.version == table.version
+
+        matches = store.query(species_list=["Culex pipiens", "Unknown"], bbox_filter=(-8.0, 0.0, 0.0, 8.0))
+        assert _ids(table, matches) == ["obs_001", "obs_004", "obs_007"]
+
+    def test_appends_are_loaded_incrementally(self, table):
+        """Rows appended in a new version are added without reloading the rest."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+        table.add(_rows(10, 15))
+
+        assert store.refresh(table) == "incremental"
+        assert store.refresh(table) is None
+        assert len(store) == 15
+        matches = store.query(species_list=["Aedes aegypti"])
+        assert _ids(table, matches) == ["obs_000", "obs_003", "obs_006", "obs_009", "obs_012"]
+
+    def test_deletes_reload_the_snapshot(self, table):
+        """Any change other than an append reloads the whole snapshot."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+        table.delete("id = 'obs_003'")
+
+        assert store.refresh(table) == "full"
+        assert len(store) == 9
+        matches = store.query(species_list=["Aedes aegypti"])
+        assert _ids(table, matches) == ["obs_000", "obs_006", "obs_009"]
+
+    def test_date_range_skips_missing_dates(self, table):
+        """Date filters are inclusive and never match observations without a date."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+
+        matches = store.query(start_date="2024-01-01", end_date=date(2024, 1, 6), limit=10)
+        assert _ids(table, matches) == ["obs_001", "obs_002", "obs_003", "obs_004"]
+
+    def test_bbox_crossing_antimeridian(self, table):
+        """A box with min_lon greater than max_lon keeps both sides of the antimeridian."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+
+        matches = store.query(bbox_filter=(179.0, 0.0, -8.0, 90.0), limit=2)
+        assert _ids(table, matches) == ["obs_008", "obs_009"]
+
+    def test_near_orders_by_distance(self, table):
+        """near keeps the observations within the radius, closest first, with their distances."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+
+        # obs_i lies at (lat i, lon -i): obs_003 is at the center, obs_002 and obs_004 about 157 km away.
+        matches = store.query(near=(-3.0, 3.0, 200.0))
+
+        table.checkout(matches.version)
+        taken = table.take_row_ids(matches.row_ids.tolist()).with_row_id().to_list()
+        rows = {row["_rowid"]: row["id"] for row in taken}
+        assert [rows[row_id] for row_id in matches.row_ids.tolist()][0] == "obs_003"
+        assert sorted(rows.values()) == ["obs_002", "obs_003", "obs_004"]
+        assert matches.distances_km[0] == 0.0
+        assert list(matches.distances_km) == sorted(matches.distances_km)
+
+    def test_knn_widens_until_k_matches(self, table):
+        """knn returns the k closest observations matching the other filters, however far they are."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+        table.add(_rows(10, 13))
+        store.refresh(table)
+
+        matches = store.query(knn=(-12.0, 12.0, 2), species_list=["Culex pipiens"])
+
+        assert _ids(table, matches) == ["obs_007", "obs_010"]
+        assert matches.distances_km[0] < matches.distances_km[1]
+
+    def test_near_and_knn_are_exclusive(self, table):
+        """A query cannot combine near and knn."""
+        with pytest.raises(ValueError):
+            ObservationStore().query(near=(0.0, 0.0, 1.0), knn=(0.0, 0.0, 1))
+
+    def test_cluster_aggregates_are_cached_per_version(self, table):
+        """Cluster aggregates are reused for the same zoom and filters until the table changes."""
+        store = ObservationStore(refresh_seconds=0)
+        store.refresh(table)
+
+        first = store.clusters(2, species_list=["Aedes aegypti"])
+        assert store.clusters(2, species_list=["Aedes aegypti"]) is first
+        assert first.count.sum() == 4
+
+        table.add(_rows(10, 13))
+        store.refresh(table)
+        updated = store.clusters(2, species_list=["Aedes aegypti"])
+        assert updated is not first
+        assert updated.count.sum() == 5
+
+    def test_listeners_see_appended_locations(self, table):
+        """Listeners get the appended locations after an incremental refresh and None after a reload."""
+        store = ObservationStore(refresh_seconds=0)
+        calls = []
+        store.add_listener(lambda lat, lon, version: calls.append((lat, lon, version)))
+        store.refresh(table)
+        table.add(_rows(10, 12))
+        store.refresh(table)
+
+        assert calls[0][:2] == (None, None)
+        assert list(calls[1][0]) == [10.0, 11.0]
+        assert list(calls[1][1]) == [-10.0, -11.0]
+        assert calls[1][2] == table.version == store.version
+
+    def test_refresh_is_throttled(self, table):
+        """maybe_refresh does not look at the table again within refresh_seconds."""
+        store = ObservationStore(refresh_seconds=3600)
+        store.maybe_refresh(table)
+        table.add(_rows(10, 12))
+
+        assert store.maybe_refresh(table) is None
+        assert len(store) == 10
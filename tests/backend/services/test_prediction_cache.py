@@ -0,0 +1,156 @@
+"""
+Tests for the content-addressed prediction result cache.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.schemas.prediction_schemas import PredictionResult
+from backend.services.prediction_cache import PredictionCache
+
+
+def _result(name: str = "Aedes aegypti") -> PredictionResult:
+    return PredictionResult(
+        id=name.replace(" ", "_").lower(),
+        scientific_name=name,
+        probabilities={name: 0.9},
+        model_id="test_model",
+        confidence=0.9,
+    )
+
+
+class TestPredictionCache:
+    """Test cases for the PredictionCache class."""
+
+    def test_make_key_depends_on_image_and_model(self):
+        """Test that keys differ by image bytes and by model ID."""
+        key = PredictionCache.make_key(b"image", "model_a")
+
+        assert key == PredictionCache.make_key(b"image", "model_a")
+        assert key != PredictionCache.make_key(b"image", "model_b")
+        assert key != PredictionCache.make_key(b"other", "model_a")
+
+    @pytest.mark.asyncio
+    async def test_model_ids_with_paths_are_persisted_under_their_shard(self, tmp_path):
+        """Test that model IDs holding paths and separators still map to one file in the cache directory."""
+        model_id = "convnext|generation=2|/models/fast/mobilenet.onnx|0.8"
+        key = PredictionCache.make_key(b"image", model_id)
+
+        async def compute():
+            return _result(), None
+
+        await PredictionCache(max_entries=10, persist_dir=tmp_path).get_or_compute(key, compute)
+
+        assert "/" not in key and "|" not in key
+        assert [path.relative_to(tmp_path).as_posix() for path in tmp_path.rglob("*.json")] == [
+            f"{key[:2]}/{key}.json"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_second_lookup_is_a_hit(self):
+        """Test that a computed result is served from cache afterwards."""
+        cache = PredictionCache(max_entries=10)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return _result(), None
+
+        first = await cache.get_or_compute("k", compute)
+        second = await cache.get_or_compute("k", compute)
+
+        assert first == second
+        assert calls == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_lookups_share_one_computation(self):
+        """Test single-flight behaviour for concurrent identical keys."""
+        cache = PredictionCache(max_entries=10)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return _result(), None
+
+        outcomes = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+        assert calls == 1
+        assert all(result.scientific_name == "Aedes aegypti" for result, _ in outcomes)
+        assert cache.coalesced == 4
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        """Test that error outcomes are recomputed on the next lookup."""
+        cache = PredictionCache(max_entries=10)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return None, "model failed"
+
+        assert await cache.get_or_compute("k", compute) == (None, "model failed")
+        assert await cache.get_or_compute("k", compute) == (None, "model failed")
+        assert calls == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = PredictionCache(max_entries=2)
+        cache.put("a", _result("A a"))
+        cache.put("b", _result("B b"))
+        cache.get("a")
+        cache.put("c", _result("C c"))
+
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+
+    def test_expired_entries_are_dropped(self, monkeypatch):
+        """Test that entries past their TTL are not returned."""
+        cache = PredictionCache(max_entries=2, ttl_seconds=10)
+        cache.put("a", _result())
+
+        monkeypatch.setattr("backend.services.prediction_cache.time.time", lambda: 10**12)
+
+        assert cache.get("a") is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_computes(self):
+        """Test that max_entries=0 bypasses the cache."""
+        cache = PredictionCache(max_entries=0)
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            return _result(), None
+
+        await cache.get_or_compute("k", compute)
+        await cache.get_or_compute("k", compute)
+
+        assert calls == 2
+
+    @pytest.mark.asyncio
+    async def test_persisted_entries_survive_a_new_instance(self, tmp_path):
+        """Test that on-disk persistence is used after an in-memory miss."""
+
+        async def compute():
+            return _result(), None
+
+        await PredictionCache(max_entries=10, persist_dir=tmp_path).get_or_compute("abc_model", compute)
+
+        async def must_not_run():
+            raise AssertionError("should have been served from disk")
+
+        fresh = PredictionCache(max_entries=10, persist_dir=tmp_path)
+        result, error = await fresh.get_or_compute("abc_model", must_not_run)
+
+        assert error is None
+        assert result.scientific_name == "Aedes aegypti"
+        assert (tmp_path / "ab" / "abc_model.json").exists()
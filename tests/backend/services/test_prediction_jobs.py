@@ -0,0 +1,196 @@
+"""
+Tests for the in-process prediction job store.
+"""
+
+import asyncio
+
+import pytest
+
+from backend.schemas.prediction_schemas import PredictionResult
+from backend.services.prediction_jobs import JOBS_REJECTED, JobQueueFull, PredictionJobStore
+
+
+async def fake_predict(image_data: bytes, filename: str):
+    """Return a result, or an error for images whose data is b'bad'."""
+    if image_data == b"bad":
+        return None, f"Error predicting species for file '{filename}'"
+    return (
+        PredictionResult(
+            id="aedes_aegypti",
+            scientific_name="Aedes aegypti",
+            probabilities={"Aedes aegypti": 0.9},
+            model_id="test",
+            confidence=0.9,
+        ),
+        None,
+    )
+
+
+async def collect_events(store: PredictionJobStore, job_id: str) -> list[tuple[str, dict | None]]:
+    return [event async for event in store.events(job_id)]
+
+
+class TestPredictionJobStore:
+    """Test cases for the PredictionJobStore class."""
+
+    @pytest.mark.asyncio
+    async def test_job_runs_to_completion(self):
+        """Test that every image is classified and reported as an event."""
+        store = PredictionJobStore(fake_predict, workers=1)
+        job = await store.submit([("a.jpg", b"good"), ("b.jpg", b"bad")])
+
+        events = await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        names = [name for name, _ in events]
+        assert names[0] == "progress" and names[-1] == "done"
+        assert names.count("item") == 2
+        snapshot = events[-1][1]
+        assert snapshot["status"] == "completed"
+        assert (snapshot["completed"], snapshot["failed"]) == (1, 1)
+        assert [item["index"] for item in snapshot["results"]] == [0, 1]
+        assert job.inputs is None and job.spool_dir is None
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_images_are_spooled_to_disk_until_the_job_finishes(self, tmp_path):
+        """Test that a queued job keeps its images on disk, not in memory, and removes them when done."""
+        release = asyncio.Event()
+
+        async def blocked_predict(image_data, filename):
+            await release.wait()
+            return await fake_predict(image_data, filename)
+
+        store = PredictionJobStore(blocked_predict, workers=1, spool_dir=tmp_path / "spool")
+        job = await store.submit([("a.jpg", b"good"), ("b.jpg", b"bad")])
+
+        assert job.spool_dir.parent == tmp_path / "spool"
+        assert [path.read_bytes() for path in job.inputs] == [b"good", b"bad"]
+        release.set()
+        events = await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        assert (events[-1][1]["completed"], events[-1][1]["failed"]) == (1, 1)
+        assert list((tmp_path / "spool").iterdir()) == []
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_unreadable_image_fails_only_that_item(self, tmp_path):
+        """Test that an image whose spooled file cannot be read is an item error, not a failed job."""
+        release = asyncio.Event()
+
+        async def blocked_predict(image_data, filename):
+            await release.wait()
+            return await fake_predict(image_data, filename)
+
+        store = PredictionJobStore(blocked_predict, workers=1, image_concurrency=1, spool_dir=tmp_path)
+        job = await store.submit([("a.jpg", b"good"), ("b.jpg", b"good"), ("c.jpg", b"good")])
+        job.inputs[1].unlink()
+        release.set()
+
+        events = await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        snapshot = events[-1][1]
+        assert snapshot["status"] == "completed"
+        assert (snapshot["completed"], snapshot["failed"]) == (2, 1)
+        assert snapshot["results"][1]["error"].startswith("FileNotFoundError")
+        assert list(tmp_path.iterdir()) == []
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_job_without_images_is_rejected(self, tmp_path):
+        """Test that submitting no images raises ValueError and leaves nothing on disk."""
+        store = PredictionJobStore(fake_predict, workers=1, spool_dir=tmp_path)
+
+        with pytest.raises(ValueError):
+            await store.submit([])
+
+        assert list(tmp_path.iterdir()) == []
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_late_subscriber_replays_events(self):
+        """Test that following a finished job still delivers every result."""
+        store = PredictionJobStore(fake_predict, workers=1)
+        job = await store.submit([("a.jpg", b"good")])
+        await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        events = await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        assert [name for name, _ in events] == ["progress", "progress", "item", "progress", "done"]
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_idle(self):
+        """Test that a heartbeat is yielded while a job makes no progress."""
+        release = asyncio.Event()
+
+        async def slow_predict(image_data, filename):
+            await release.wait()
+            return await fake_predict(image_data, filename)
+
+        store = PredictionJobStore(slow_predict, workers=1)
+        job = await store.submit([("a.jpg", b"good")])
+        stream = store.events(job.id, heartbeat_seconds=0.01)
+
+        names = [(await anext(stream))[0] for _ in range(3)]
+        assert "heartbeat" in names
+        release.set()
+        await stream.aclose()
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_full_queue_rejects_jobs(self):
+        """Test that jobs beyond the queue capacity are rejected and counted."""
+        release = asyncio.Event()
+
+        async def blocked_predict(image_data, filename):
+            await release.wait()
+            return await fake_predict(image_data, filename)
+
+        store = PredictionJobStore(blocked_predict, workers=1, max_queue=1)
+        await store.submit([("a.jpg", b"good")])
+        await asyncio.sleep(0)
+        await store.submit([("b.jpg", b"good")])
+        rejected_before = JOBS_REJECTED.value()
+
+        with pytest.raises(JobQueueFull):
+            await store.submit([("c.jpg", b"good")])
+
+        assert JOBS_REJECTED.value() == rejected_before + 1
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_close_fails_unfinished_jobs(self):
+        """Test that jobs still running at shutdown are marked as failed."""
+        store = PredictionJobStore(lambda data, name: asyncio.Event().wait(), workers=1)
+        job = await store.submit([("a.jpg", b"good")])
+        await asyncio.sleep(0)
+
+        await store.close()
+
+        assert job.status == "failed"
+        assert "shut down" in job.error
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_are_pruned(self):
+        """Test that only the newest `max_retained` finished jobs are kept."""
+        store = PredictionJobStore(fake_predict, workers=1, max_retained=1)
+        first = await store.submit([("a.jpg", b"good")])
+        await asyncio.wait_for(collect_events(store, first.id), 5)
+        second = await store.submit([("b.jpg", b"good")])
+        await asyncio.wait_for(collect_events(store, second.id), 5)
+
+        assert store.get(first.id) is None
+        assert store.get(second.id) is second
+        await store.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_jobs_are_pruned(self):
+        """Test that finished jobs older than the retention period are forgotten."""
+        store = PredictionJobStore(fake_predict, workers=1, retention_seconds=0)
+        job = await store.submit([("a.jpg", b"good")])
+        await asyncio.wait_for(collect_events(store, job.id), 5)
+
+        assert store.get(job.id) is None
+        with pytest.raises(KeyError):
+            await anext(store.events(job.id))
+        await store.close()
@@ -3,9 +3,14 @@ Tests for the prediction service.
 """
 
 import asyncio
+import hashlib
+import io
+import threading
 from unittest.mock import MagicMock, AsyncMock, patch
 import pytest
+from PIL import Image
 
+from backend.services.image_pipeline import decode_image
 from backend.services.prediction_service import PredictionService, prediction_service
 from backend.schemas.prediction_schemas import PredictionResult
 from tests.factories.mock_factory import MockFactory
@@ -15,9 +20,10 @@ class TestPredictionService:
     """Test cases for the PredictionService class."""
 
     @pytest.fixture(autouse=True)
-    def setup(self):
+    def setup(self, tmp_path):
         """Set up test fixtures."""
         self.service = PredictionService()
+        self.service.image_writer.base_dir = tmp_path / "predicted"
 
     @pytest.mark.asyncio
     async def test_service_initialization(self):
@@ -69,7 +75,9 @@ class TestPredictionService:
         assert result.confidence == 0.95
         assert result.model_id == self.service.model_id
         assert "Aedes aegypti" in result.probabilities
-        mock_serve.assert_called_once_with(image=mock_image_data, predictor_type="classifier")
+        mock_serve.assert_called_once()
+        assert isinstance(mock_serve.call_args.kwargs["image"], Image.Image)
+        assert mock_serve.call_args.kwargs["predictor_type"] == "classifier"
 
     @pytest.mark.asyncio
     async def test_predict_species_with_image_saving_enabled(self, monkeypatch, mock_image_data):
@@ -84,9 +92,8 @@ class TestPredictionService:
             return func(**kwargs)
         monkeypatch.setattr("asyncio.to_thread", mock_to_thread)
         
-        # Mock the save_predicted_image method
-        mock_save_task = AsyncMock()
-        monkeypatch.setattr("asyncio.create_task", lambda coro: mock_save_task)
+        # Mock the background image writer
+        self.service.image_writer.submit = MagicMock(return_value=True)
         
         result, error = await self.service.predict_species(mock_image_data, "test_image.jpg")
 
@@ -94,6 +101,13 @@ class TestPredictionService:
         assert isinstance(result, PredictionResult)
         assert result.image_url_species is not None
         assert "/static/images/predicted/224x224/" in result.image_url_species
+        self.service.image_writer.submit.assert_called_once()
+        image_data, filename, decoded = self.service.image_writer.submit.call_args.args
+        digest = hashlib.sha256(mock_image_data).hexdigest()
+        assert image_data == mock_image_data
+        assert filename == f"{digest}.png"
+        assert result.image_url_species == f"/static/images/predicted/224x224/{digest[:2]}/{digest}.png"
+        assert decoded is not None
 
     @pytest.mark.asyncio
     async def test_predict_species_with_image_saving_disabled(self, monkeypatch, mock_image_data):
@@ -151,36 +165,33 @@ class TestPredictionService:
         assert "Model inference error" in error
 
     @pytest.mark.asyncio
-    async def test_save_predicted_image_success(self, monkeypatch, mock_image_data):
+    async def test_save_predicted_image_success(self, tmp_path):
         """Test successful image saving with multiple sizes."""
-        # Mock PIL Image operations
-        mock_image = MockFactory.create_pil_image_mock()
-        monkeypatch.setattr("PIL.Image.open", lambda data: mock_image)
-        
-        # Mock Path operations
-        mock_path = MagicMock()
-        mock_path.mkdir = MagicMock()
-        monkeypatch.setattr("pathlib.Path", lambda path: mock_path)
-        
-        # Mock asyncio operations with proper awaitables
-        async def mock_gather(*args):
-            return None
-        async def mock_to_thread(func, *args):
-            return func(*args) if args else func()
-        
-        monkeypatch.setattr("asyncio.gather", mock_gather)
-        monkeypatch.setattr("asyncio.to_thread", mock_to_thread)
-        
-        # Mock aiofiles
-        mock_file_context = MockFactory.create_async_context_manager_mock()
-        monkeypatch.setattr("aiofiles.open", lambda *args, **kwargs: mock_file_context)
-        
-        # Should not raise an exception
-        await self.service.save_predicted_image(mock_image_data, "test.jpg")
-        
-        # Verify PIL operations were called
-        mock_image.thumbnail.assert_called()
-        mock_image.save.assert_called()
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), color="red").save(buffer, format="JPEG")
+        image_data = buffer.getvalue()
+
+        await self.service.save_predicted_image(image_data, "test.jpg", quiet=False)
+
+        base_path = tmp_path / "predicted"
+        assert (base_path / "original/te/test.jpg").read_bytes() == image_data
+        with Image.open(base_path / "224x224/te/test.jpg") as thumbnail:
+            assert thumbnail.size == (224, 168)
+            assert thumbnail.format == "JPEG"
+        with Image.open(base_path / "100x100/te/test.jpg") as thumbnail:
+            assert thumbnail.size == (100, 75)
+
+    @pytest.mark.asyncio
+    async def test_save_predicted_image_reuses_decoded_image(self, monkeypatch, tmp_path, mock_image_data):
+        """Test that an image decoded for inference is not decoded again for thumbnails."""
+        decoded = decode_image(mock_image_data)
+        mock_open = MagicMock(side_effect=AssertionError("image decoded twice"))
+        monkeypatch.setattr("PIL.Image.open", mock_open)
+
+        await self.service.save_predicted_image(mock_image_data, "test.png", quiet=False, decoded=decoded)
+
+        mock_open.assert_not_called()
+        assert (tmp_path / "predicted/100x100/te/test.png").exists()
 
     @pytest.mark.asyncio
     async def test_save_predicted_image_exception_quiet(self, monkeypatch, mock_image_data):
@@ -256,3 +267,339 @@ class TestPredictionService:
         assert len(result.probabilities) == 2
         assert result.probabilities["Aedes aegypti"] == 0.95
         assert result.probabilities["Culex pipiens"] == 0.05
+
+    @pytest.mark.asyncio
+    async def test_predict_species_uses_batcher_when_enabled(self, monkeypatch, mock_image_data):
+        """Test that predictions go through the micro-batching scheduler when configured."""
+        monkeypatch.setattr("backend.services.prediction_service.app_settings.PREDICTION_BATCH_MAX_SIZE", 8)
+        service = PredictionService()
+        service.save_predicted_images_enabled = False
+        assert service.batcher is not None
+
+        mock_predictions = MockFactory.create_culicidaelab_mock().serve.serve.return_value
+        mock_serve = MagicMock()
+        monkeypatch.setattr("backend.services.prediction_service.serve", mock_serve)
+        service.batcher.submit = AsyncMock(return_value=mock_predictions)
+
+        result, error = await service.predict_species(mock_image_data, "test_image.jpg")
+
+        assert error is None
+        assert result.scientific_name == "Aedes aegypti"
+        service.batcher.submit.assert_awaited_once()
+        assert isinstance(service.batcher.submit.await_args.args[0], Image.Image)
+        mock_serve.assert_not_called()
+
+    def test_batcher_disabled_by_default(self):
+        """Test that batching is off with the default batch size of 1."""
+        assert self.service.batcher is None
+
+    @pytest.mark.asyncio
+    async def test_predict_many_bounds_concurrency(self, monkeypatch):
+        """Test that predict_many yields every image and respects the concurrency limit."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_predict_species(image_data, filename):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return MockFactory.create_prediction_result_data(), None
+
+        monkeypatch.setattr(self.service, "predict_species", fake_predict_species)
+
+        async def images():
+            for i in range(7):
+                yield f"img_{i}.jpg", b"data"
+
+        results = [item async for item in self.service.predict_many(images(), concurrency=3)]
+
+        assert sorted(index for index, _, _, _ in results) == list(range(7))
+        assert all(error is None for _, _, _, error in results)
+        assert peak <= 3
+
+    @pytest.mark.asyncio
+    async def test_repeated_upload_is_served_from_cache(self, monkeypatch, mock_image_data):
+        """Test that the same image bytes run the model only once."""
+        mock_predictions = MockFactory.create_culicidaelab_mock().serve.serve.return_value
+        mock_serve = MagicMock(return_value=mock_predictions)
+        monkeypatch.setattr("backend.services.prediction_service.serve", mock_serve)
+
+        async def mock_to_thread(func, **kwargs):
+            return func(**kwargs)
+
+        monkeypatch.setattr("asyncio.to_thread", mock_to_thread)
+
+        first, _ = await self.service.predict_species(mock_image_data, "a.jpg")
+        second, _ = await self.service.predict_species(mock_image_data, "b.jpg")
+
+        assert first == second
+        mock_serve.assert_called_once()
+        assert self.service.cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_predict_species_runs_on_configured_executor(self, monkeypatch, mock_image_data):
+        """Test that the classifier call is routed through the inference executor."""
+        mock_predictions = MockFactory.create_culicidaelab_mock().serve.serve.return_value
+        self.service.executor.run = AsyncMock(return_value=mock_predictions)
+
+        result, error = await self.service.predict_species(mock_image_data, "test_image.jpg")
+
+        assert error is None
+        assert result.scientific_name == "Aedes aegypti"
+        self.service.executor.run.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_runs_synthetic_inferences(self):
+        """Test that warm-up classifies the requested number of synthetic images."""
+        self.service._classify = AsyncMock()
+
+        await self.service.warm_up(3)
+
+        assert self.service._classify.await_count == 3
+        image = self.service._classify.await_args.args[0]
+        assert isinstance(image, Image.Image)
+        assert image.mode == "RGB"
+
+    @pytest.mark.asyncio
+    async def test_warm_up_skipped_for_zero_iterations(self):
+        """Test that zero iterations skip the warm-up."""
+        self.service._classify = AsyncMock()
+
+        await self.service.warm_up(0)
+
+        self.service._classify.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_uploads_are_decoded_on_the_decode_pool(self, mock_image_data):
+        """Test that decoding and hashing run on the service's own bounded pool, which close() shuts down."""
+        threads = []
+
+        def record_thread(**kwargs):
+            threads.append(threading.current_thread().name)
+            return decode_image(**kwargs)
+
+        def record_hash(image):
+            threads.append(threading.current_thread().name)
+            return 42
+
+        with patch("backend.services.prediction_service.decode_image", side_effect=record_thread), patch(
+            "backend.services.prediction_service.perceptual_hash", side_effect=record_hash
+        ), patch.object(type(self.service.near_duplicates), "enabled", True):
+            decoded, image_hash = await self.service._decode(mock_image_data)
+
+        assert decoded.image.mode == "RGB"
+        assert image_hash == 42
+        assert len(threads) == 2 and all(name.startswith("decode") for name in threads)
+        assert self.service._decode_pool._max_workers == self.service.decode_workers
+        await self.service.close()
+        assert self.service._decode_pool is None
+
+
+class TestTieredInference:
+    """Test cases for the fast-then-full classifier cascade."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Create a service with a fast tier and a recording `_classify`."""
+        self.service = PredictionService()
+        self.service.save_predicted_images_enabled = False
+        self.service.fast_model_path = "fast.onnx"
+        self.service.escalation_threshold = 0.8
+        self.confidence = {"fast": 0.9, "full": 0.97}
+        self.tiers_run = []
+
+        async def fake_classify(image, tier="full", version=None):
+            self.tiers_run.append(tier)
+            predictions = MockFactory.create_culicidaelab_mock().serve.serve.return_value
+            predictions.top_prediction.return_value.confidence = self.confidence[tier]
+            return predictions
+
+        self.service._classify = fake_classify
+
+    @pytest.mark.asyncio
+    async def test_confident_fast_prediction_is_accepted(self, mock_image_data):
+        """Test that the full model is skipped when the fast tier is confident."""
+        from backend.services.prediction_service import PREDICTION_TIER_TOTAL
+
+        accepted_before = PREDICTION_TIER_TOTAL.value(tier="fast", outcome="accepted")
+
+        result, error = await self.service.predict_species(mock_image_data, "a.jpg")
+
+        assert error is None
+        assert self.tiers_run == ["fast"]
+        assert result.model_id == f"{self.service.model_id}:fast"
+        assert result.confidence == 0.9
+        assert PREDICTION_TIER_TOTAL.value(tier="fast", outcome="accepted") == accepted_before + 1
+
+    @pytest.mark.asyncio
+    async def test_unsure_fast_prediction_is_escalated(self, mock_image_data):
+        """Test that a low-confidence fast prediction is replaced by the full model's."""
+        self.confidence["fast"] = 0.5
+
+        result, error = await self.service.predict_species(mock_image_data, "a.jpg")
+
+        assert error is None
+        assert self.tiers_run == ["fast", "full"]
+        assert result.model_id == f"{self.service.model_id}:full"
+        assert result.confidence == 0.97
+
+    @pytest.mark.asyncio
+    async def test_untiered_results_keep_the_plain_model_id(self, mock_image_data):
+        """Test that without a fast model only the full tier runs."""
+        self.service.fast_model_path = None
+
+        result, _ = await self.service.predict_species(mock_image_data, "a.jpg")
+
+        assert self.tiers_run == ["full"]
+        assert result.model_id == self.service.model_id
+
+    @pytest.mark.asyncio
+    async def test_warm_up_warms_both_tiers(self):
+        """Test that warm-up loads the fast and the full model."""
+        await self.service.warm_up(2)
+
+        assert sorted(self.tiers_run) == ["fast", "fast", "full", "full"]
+
+
+class TestModelReload:
+    """Test cases for swapping the classifier while requests are being served."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch):
+        """Create a service whose `_classify` can hold requests on generation 0."""
+        mock_settings = MagicMock()
+        mock_settings.get_config.return_value.model_arch = "EfficientNet-B0"
+        monkeypatch.setattr("backend.services.prediction_service.get_settings", lambda: mock_settings)
+        self.released = []
+        monkeypatch.setattr(
+            "backend.services.prediction_service.release_classifier",
+            lambda model_path=None, generation=0: self.released.append((model_path, generation)),
+        )
+        self.service = PredictionService()
+        self.service.save_predicted_images_enabled = False
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.fail_generations = set()
+        self.generations_run = []
+
+        async def fake_classify(image, tier="full", version=None):
+            version = version or self.service.active
+            self.generations_run.append(version.generation)
+            if version.generation in self.fail_generations:
+                raise RuntimeError("model file is corrupt")
+            if version.generation == 0:
+                await self.gate.wait()
+            return MockFactory.create_culicidaelab_mock().serve.serve.return_value
+
+        self.service._classify = fake_classify
+
+    @pytest.mark.asyncio
+    async def test_reload_switches_new_requests_and_drains_old_ones(self, mock_image_data):
+        """Test that a request running during the swap finishes on the old model, which is then released."""
+        self.gate.clear()
+        in_flight = asyncio.create_task(self.service.predict_species(mock_image_data, "old.jpg"))
+        while not self.generations_run:
+            await asyncio.sleep(0.01)
+        assert self.service.active.in_flight == 1
+
+        version = await self.service.reload_model("classifier_v2.onnx")
+
+        assert self.service.active is version
+        assert version.generation == 1
+        assert version.model_id == "EfficientNet-B0_classifier_v2"
+        assert self.service.model_status()["retiring_generations"] == [0]
+        assert self.released == []
+
+        image = Image.new("RGB", (64, 64), color="green")
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG")
+        new_result, _ = await self.service.predict_species(buffer.getvalue(), "new.jpg")
+        assert new_result.model_id == "EfficientNet-B0_classifier_v2"
+
+        self.gate.set()
+        old_result, _ = await in_flight
+        await asyncio.gather(*self.service._retiring)
+
+        assert old_result.model_id == "EfficientNet-B0"
+        assert self.released == [(None, 0)]
+        assert self.service.model_status()["retiring_generations"] == []
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_the_active_model(self):
+        """Test that a model failing its warm-up never receives traffic and is released."""
+        from backend.services.prediction_service import MODEL_RELOADS
+
+        failed_before = MODEL_RELOADS.value(outcome="failed")
+        self.fail_generations.add(1)
+
+        with pytest.raises(RuntimeError):
+            await self.service.reload_model("broken.onnx")
+
+        assert self.service.active.generation == 0
+        assert self.released == [("broken.onnx", 1)]
+        assert MODEL_RELOADS.value(outcome="failed") == failed_before + 1
+
+    @pytest.mark.asyncio
+    async def test_start_reload_runs_in_background_and_rejects_overlap(self):
+        """Test that only one background reload runs at a time and failures are reported."""
+        from backend.services.prediction_service import ReloadInProgress
+
+        self.fail_generations.add(1)
+        assert self.service.start_reload("broken.onnx") == 1
+        with pytest.raises(ReloadInProgress):
+            self.service.start_reload("other.onnx")
+
+        await self.service._reload_task
+
+        status = self.service.model_status()
+        assert status["generation"] == 0
+        assert status["reload_state"] == "failed"
+        assert "model file is corrupt" in status["reload_error"]
+
+
+class TestNearDuplicateReuse:
+    """Test cases for reusing predictions of near-identical photos."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, monkeypatch):
+        """Create a service with the near-duplicate index enabled and a counting `_classify`."""
+        monkeypatch.setattr(
+            "backend.services.prediction_service.app_settings.PREDICTION_NEAR_DUPLICATE_WINDOW_SECONDS",
+            60.0,
+        )
+        self.service = PredictionService()
+        self.service.save_predicted_images_enabled = False
+        self.service._classify = AsyncMock(
+            return_value=MockFactory.create_culicidaelab_mock().serve.serve.return_value,
+        )
+
+    @staticmethod
+    def _jpeg(image: Image.Image, quality: int) -> bytes:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality)
+        return buffer.getvalue()
+
+    @pytest.mark.asyncio
+    async def test_reencoded_photo_reuses_the_previous_result(self):
+        """Test that a re-encoded copy of a recent upload skips inference."""
+        pattern = Image.linear_gradient("L").resize((320, 240)).convert("RGB")
+        pattern.paste((20, 200, 60), (40, 30, 140, 120))
+
+        first, _ = await self.service.predict_species(self._jpeg(pattern, 95), "first.jpg")
+        second, error = await self.service.predict_species(self._jpeg(pattern, 70), "second.jpg")
+
+        assert error is None
+        assert self.service._classify.await_count == 1
+        assert second == first
+
+    @pytest.mark.asyncio
+    async def test_blank_photos_are_always_classified(self, mock_image_data):
+        """Test that images without detail never reuse a result."""
+        await self.service.predict_species(mock_image_data, "red.png")
+        buffer = io.BytesIO()
+        Image.new("RGB", (10, 10), color="blue").save(buffer, format="PNG")
+        await self.service.predict_species(buffer.getvalue(), "blue.png")
+
+        assert self.service._classify.await_count == 2
@@ -0,0 +1,121 @@
+"""
+Tests for start-up warm-up and readiness tracking.
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from backend.services.readiness_service import ReadinessState, run_startup_warmup
+
+
+class TestReadinessState:
+    """Test cases for the ReadinessState class."""
+
+    def test_not_ready_until_all_components_ready(self):
+        """Test that readiness requires every component."""
+        readiness = ReadinessState(["database", "model"])
+        assert not readiness.is_ready
+
+        readiness.mark_ready("database")
+        assert not readiness.is_ready
+        assert readiness.completed_at is None
+
+        readiness.mark_ready("model")
+        assert readiness.is_ready
+        assert readiness.completed_at is not None
+
+    def test_failed_component_is_reported(self):
+        """Test that failures are exposed with their error message."""
+        readiness = ReadinessState(["model"])
+        readiness.mark_failed("model", "RuntimeError: weights missing")
+
+        summary = readiness.as_dict()
+
+        assert summary["ready"] is False
+        assert summary["components"]["model"] == "failed"
+        assert summary["errors"]["model"] == "RuntimeError: weights missing"
+
+
+class TestRunStartupWarmup:
+    """Test cases for run_startup_warmup."""
+
+    @pytest.mark.asyncio
+    async def test_successful_warmup_marks_everything_ready(self, monkeypatch):
+        """Test that tables are opened and the model warmed."""
+        monkeypatch.setattr(
+            "backend.services.readiness_service.open_table_handles",
+            AsyncMock(return_value=["species"]),
+        )
+        service = MagicMock()
+        service.warm_up = AsyncMock()
+        readiness = ReadinessState(["database", "model"])
+
+        await run_startup_warmup(readiness, MagicMock(), service, iterations=3)
+
+        assert readiness.is_ready
+        service.warm_up.assert_awaited_once_with(3)
+
+    @pytest.mark.asyncio
+    async def test_model_failure_keeps_worker_not_ready(self, monkeypatch):
+        """Test that a model load failure is recorded instead of raised."""
+        monkeypatch.setattr(
+            "backend.services.readiness_service.open_table_handles",
+            AsyncMock(return_value=["species"]),
+        )
+        service = MagicMock()
+        service.warm_up = AsyncMock(side_effect=RuntimeError("no weights"))
+        readiness = ReadinessState(["database", "model"])
+
+        await run_startup_warmup(readiness, MagicMock(), service)
+
+        assert not readiness.is_ready
+        assert readiness.components == {"database": "ready", "model": "failed"}
+        assert "no weights" in readiness.errors["model"]
+
+    @pytest.mark.asyncio
+    async def test_database_failure_is_recorded(self, monkeypatch):
+        """Test that a missing table marks the database component as failed."""
+        monkeypatch.setattr(
+            "backend.services.readiness_service.open_table_handles",
+            AsyncMock(side_effect=ValueError("Table 'species' not found or error opening.")),
+        )
+        service = MagicMock()
+        service.warm_up = AsyncMock()
+        readiness = ReadinessState(["database", "model"])
+
+        await run_startup_warmup(readiness, MagicMock(), service)
+
+        assert readiness.components["database"] == "failed"
+        assert readiness.components["model"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_catalog_role_skips_the_model(self, monkeypatch):
+        """Test that only the components of the worker's role are warmed."""
+        monkeypatch.setattr(
+            "backend.services.readiness_service.open_table_handles",
+            AsyncMock(return_value=["species"]),
+        )
+        readiness = ReadinessState(["database"])
+
+        await run_startup_warmup(readiness, MagicMock(), None)
+
+        assert readiness.is_ready
+        assert "model" not in readiness.components
+
+    @pytest.mark.asyncio
+    async def test_observation_snapshot_is_loaded_without_blocking_readiness(self, monkeypatch):
+        """Test that the observation snapshot is loaded with the tables, and a failure only gets logged."""
+        monkeypatch.setattr(
+            "backend.services.readiness_service.open_table_handles",
+            AsyncMock(return_value=["observations"]),
+        )
+        load = MagicMock(side_effect=RuntimeError("corrupt fragment"))
+        monkeypatch.setattr("backend.services.readiness_service.load_observation_store", load)
+        db = MagicMock()
+        readiness = ReadinessState(["database"])
+
+        await run_startup_warmup(readiness, db, None)
+
+        load.assert_called_once_with(db)
+        assert readiness.is_ready
@@ -0,0 +1,93 @@
+"""
+Tests for the Z-order spatial index.
+"""
+
+import numpy as np
+import pytest
+
+from backend.services.spatial_index import SpatialIndex, circle_bbox, haversine_km
+
+
+def _in_bbox(lat, lon, bbox) -> np.ndarray:
+    min_lon, min_lat, max_lon, max_lat = bbox
+    mask = (lat >= min_lat) & (lat <= max_lat)
+    if min_lon <= max_lon:
+        return np.flatnonzero(mask & (lon >= min_lon) & (lon <= max_lon))
+    return np.flatnonzero(mask & ((lon >= min_lon) | (lon <= max_lon)))
+
+
+@pytest.fixture(scope="module")
+def points():
+    """20,000 random points, one in a hundred without a location."""
+    rng = np.random.default_rng(7)
+    lat = rng.uniform(-90.0, 90.0, 20_000)
+    lon = rng.uniform(-180.0, 180.0, 20_000)
+    lat[::100] = np.nan
+    return lat, lon
+
+
+class TestSpatialIndex:
+    """Test cases for SpatialIndex."""
+
+    @pytest.mark.parametrize(
+        "bbox",
+        [
+            (-75.0, 40.0, -73.0, 41.0),
+            (-10.0, -60.0, 30.0, 10.0),
+            (170.0, -20.0, -170.0, 20.0),
+            (-180.0, -90.0, 180.0, 90.0),
+            (12.5, 45.0, 12.5, 45.0),
+        ],
+    )
+    def test_candidates_cover_the_box(self, points, bbox):
+        """Every point in the box is a candidate, and candidates stay close to the box's contents."""
+        lat, lon = points
+        index = SpatialIndex.build(lat, lon)
+
+        candidates = index.candidates(bbox)
+        expected = _in_bbox(lat, lon, bbox)
+
+        assert np.isin(expected, candidates).all()
+        assert len(np.unique(candidates)) == len(candidates)
+        assert len(candidates) <= max(2 * len(expected), 50)
+
+    def test_points_without_location_are_not_indexed(self, points):
+        """NaN coordinates are left out of the index."""
+        lat, lon = points
+
+        index = SpatialIndex.build(lat, lon)
+
+        assert len(index) == np.isfinite(lat).sum()
+        assert not np.isin(np.flatnonzero(np.isnan(lat)), index.candidates((-180.0, -90.0, 180.0, 90.0))).any()
+
+    def test_merge_matches_a_full_build(self, points):
+        """Merging the index of appended points gives the index of all points."""
+        lat, lon = points
+
+        merged = SpatialIndex.build(lat[:12_000], lon[:12_000]).merge(
+            SpatialIndex.build(lat[12_000:], lon[12_000:]), offset=12_000
+        )
+        full = SpatialIndex.build(lat, lon)
+
+        np.testing.assert_array_equal(merged.keys, full.keys)
+        bbox = (0.0, 0.0, 45.0, 45.0)
+        np.testing.assert_array_equal(merged.candidates(bbox), full.candidates(bbox))
+
+
+class TestCircleBbox:
+    """Test cases for circle_bbox and haversine_km."""
+
+    @pytest.mark.parametrize(
+        "lon, lat, radius_km",
+        [(-74.0, 40.7, 5.0), (179.9, 10.0, 100.0), (0.0, 89.0, 500.0), (30.0, -45.0, 2000.0)],
+    )
+    def test_box_contains_the_circle(self, points, lon, lat, radius_km):
+        """Every point within the radius lies in the circle's bounding box."""
+        all_lat, all_lon = points
+        inside = np.flatnonzero(haversine_km(all_lat, all_lon, lat, lon) <= radius_km)
+
+        assert np.isin(inside, _in_bbox(all_lat, all_lon, circle_bbox(lon, lat, radius_km))).all()
+
+    def test_haversine_distance(self):
+        """One degree of latitude is about 111.2 km."""
+        assert haversine_km(np.array([41.0]), np.array([-74.0]), 40.0, -74.0)[0] == pytest.approx(111.195, abs=0.01)
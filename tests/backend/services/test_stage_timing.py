@@ -0,0 +1,87 @@
+"""
+Tests for per-stage timing of prediction requests.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from backend.services.inference_batcher import InferenceBatcher
+from backend.services.inference_executor import InferenceExecutor
+from backend.services.stage_timing import STAGE_SECONDS, collect_stages, record_stage, timed_stage
+
+
+def _sleep_and_return(seconds: float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _slow_batch(items: list) -> list:
+    time.sleep(0.1)
+    return items
+
+
+class TestStageTimings:
+    """Test cases for collecting and reporting stage durations."""
+
+    def test_stages_are_collected_and_rendered(self):
+        """Test that repeated stages are summed and rendered in milliseconds."""
+        with collect_stages() as stages:
+            record_stage("decode", 0.002)
+            record_stage("inference", 0.010)
+            record_stage("inference", 0.005)
+
+        assert stages.durations == pytest.approx({"decode": 0.002, "inference": 0.015})
+        assert stages.server_timing() == "decode;dur=2.0, inference;dur=15.0"
+
+    def test_stages_are_observed_without_a_collecting_request(self):
+        """Test that the histogram is updated even when no request collects stages."""
+        before = STAGE_SECONDS.count(stage="hash")
+
+        with timed_stage("hash"):
+            pass
+
+        assert STAGE_SECONDS.count(stage="hash") == before + 1
+
+    @pytest.mark.asyncio
+    async def test_pool_wait_is_separate_from_inference(self):
+        """Test that time spent waiting for a busy worker is reported as queue_wait."""
+        executor = InferenceExecutor("thread", workers=1)
+
+        async def timed_run():
+            with collect_stages() as stages:
+                await executor.run(_sleep_and_return, 0.1)
+            return stages.durations
+
+        first, second = await asyncio.gather(timed_run(), timed_run())
+        executor.shutdown()
+
+        waits = sorted([first["queue_wait"], second["queue_wait"]])
+        assert waits[0] < 0.05
+        assert waits[1] >= 0.08
+        assert first["inference"] >= 0.09 and second["inference"] >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_batched_requests_receive_batch_stages(self):
+        """Test that every request of a batch gets the batch wait and the batched call's stages."""
+        executor = InferenceExecutor("thread", workers=1)
+        batcher = InferenceBatcher(
+            _slow_batch,
+            max_batch_size=4,
+            max_wait_ms=20,
+            run_in_executor=executor.run,
+        )
+
+        async def timed_submit(item):
+            with collect_stages() as stages:
+                assert await batcher.submit(item) == item
+            return stages.durations
+
+        results = await asyncio.gather(*(timed_submit(i) for i in range(3)))
+        await batcher.close()
+        executor.shutdown()
+
+        for durations in results:
+            assert set(durations) == {"batch_wait", "queue_wait", "inference"}
+            assert durations["inference"] >= 0.09
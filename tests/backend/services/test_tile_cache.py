@@ -0,0 +1,96 @@
+"""
+Tests for the observation map tile cache.
+"""
+
+import numpy as np
+
+from backend.services.tile_cache import TileCache
+
+# The tile holding New York City (lat 40.7, lon -74.0) at zoom 10, and a tile far from it.
+NYC_TILE = (10, 301, 385)
+OTHER_TILE = (10, 0, 0)
+
+
+def _key(tile, fmt="mvt", **filters):
+    return TileCache.make_key(*tile, fmt, **filters)
+
+
+class TestTileCache:
+    """Test cases for the TileCache class."""
+
+    def test_make_key_depends_on_tile_format_and_filters(self):
+        """Keys differ by tile, format and filters, but not by species order."""
+        key = _key(NYC_TILE, species_list=["Aedes aegypti", "Culex pipiens"])
+
+        assert key.startswith("10/301/385/") and key.endswith(".mvt")
+        assert key == _key(NYC_TILE, species_list=["Culex pipiens", "Aedes aegypti"])
+        assert key != _key(NYC_TILE, "geojson", species_list=["Aedes aegypti", "Culex pipiens"])
+        assert key != _key(NYC_TILE, species_list=["Aedes aegypti"])
+        assert key != _key(NYC_TILE, species_list=["Aedes aegypti", "Culex pipiens"], start_date="2024-01-01")
+        assert key != _key(OTHER_TILE, species_list=["Aedes aegypti", "Culex pipiens"])
+
+    def test_put_then_get(self):
+        """A stored tile is returned until it is evicted."""
+        cache = TileCache(max_entries=1)
+        cache.put(_key(NYC_TILE), NYC_TILE, 1, b"nyc")
+
+        assert cache.get(_key(NYC_TILE), NYC_TILE) == b"nyc"
+        cache.put(_key(OTHER_TILE), OTHER_TILE, 1, b"other")
+        assert cache.get(_key(NYC_TILE), NYC_TILE) is None
+        assert cache.get(_key(OTHER_TILE), OTHER_TILE) == b"other"
+
+    def test_appends_invalidate_only_their_tiles(self):
+        """An appended observation invalidates the tiles containing it, at every zoom level."""
+        cache = TileCache()
+        world = (0, 0, 0)
+        for tile in (NYC_TILE, OTHER_TILE, world):
+            cache.put(_key(tile), tile, 1, b"tile")
+
+        cache.invalidate(np.array([40.7]), np.array([-74.0]), 2)
+
+        assert cache.get(_key(NYC_TILE), NYC_TILE) is None
+        assert cache.get(_key(world), world) is None
+        assert cache.get(_key(OTHER_TILE), OTHER_TILE) == b"tile"
+        # Tiles rendered from the new version are cached again.
+        cache.put(_key(NYC_TILE), NYC_TILE, 2, b"new")
+        assert cache.get(_key(NYC_TILE), NYC_TILE) == b"new"
+
+    def test_reload_invalidates_every_older_tile(self):
+        """A change other than an append invalidates every tile rendered before it."""
+        cache = TileCache()
+        cache.put(_key(OTHER_TILE), OTHER_TILE, 1, b"tile")
+
+        cache.invalidate(None, None, 2)
+
+        assert cache.get(_key(OTHER_TILE), OTHER_TILE) is None
+        # A tile rendered from an older snapshot after the change is not stored.
+        cache.put(_key(OTHER_TILE), OTHER_TILE, 1, b"stale")
+        assert cache.get(_key(OTHER_TILE), OTHER_TILE) is None
+
+    def test_disabled_cache_stores_nothing(self):
+        """A cache with max_entries=0 always misses."""
+        cache = TileCache(max_entries=0)
+        cache.put(_key(NYC_TILE), NYC_TILE, 1, b"nyc")
+
+        assert not cache.enabled
+        assert cache.get(_key(NYC_TILE), NYC_TILE) is None
+
+    def test_persisted_tiles_survive_restarts(self, tmp_path):
+        """Tiles persisted on disk are served by a new cache and still invalidated by appends."""
+        TileCache(persist_dir=tmp_path).put(_key(NYC_TILE), NYC_TILE, 3, b"nyc")
+        TileCache(persist_dir=tmp_path).put(_key(OTHER_TILE), OTHER_TILE, 3, b"other")
+
+        cache = TileCache(persist_dir=tmp_path)
+        assert cache.get(_key(OTHER_TILE), OTHER_TILE) == b"other"
+        cache.invalidate(np.array([40.7]), np.array([-74.0]), 4)
+        assert cache.get(_key(NYC_TILE), NYC_TILE) is None
+        assert not (tmp_path / _key(NYC_TILE)).exists()
+
+    def test_disk_entries_are_bounded(self, tmp_path):
+        """The oldest persisted tiles are deleted beyond max_disk_entries."""
+        cache = TileCache(persist_dir=tmp_path, max_disk_entries=1)
+        cache.put(_key(NYC_TILE), NYC_TILE, 1, b"nyc")
+        cache.put(_key(OTHER_TILE), OTHER_TILE, 1, b"other")
+
+        assert not (tmp_path / _key(NYC_TILE)).exists()
+        assert (tmp_path / _key(OTHER_TILE)).exists()
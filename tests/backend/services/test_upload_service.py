@@ -0,0 +1,215 @@
+"""
+Tests for size-capped, low-copy upload handling.
+"""
+
+import io
+import tempfile
+import zipfile
+
+import pytest
+from fastapi import FastAPI, File, Request, UploadFile
+from httpx import ASGITransport, AsyncClient
+
+from backend.services.upload_service import (
+    ArchiveTooLarge,
+    UploadSizeLimitMiddleware,
+    check_archive_limits,
+    read_archive_member,
+    take_upload_file,
+    upload_buffer,
+    upload_read_seconds,
+)
+
+
+@pytest.fixture
+def limited_app():
+    """Create an app with a 1 KB upload limit on /api/predict."""
+    app = FastAPI()
+
+    @app.post("/api/predict")
+    async def predict(file: UploadFile = File(...)):
+        with upload_buffer(file) as contents:
+            return {"size": len(contents), "head": bytes(contents[:4]).decode()}
+
+    @app.post("/api/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/api/predict": 1024})
+    return app
+
+
+class TestUploadSizeLimitMiddleware:
+    """Test cases for the UploadSizeLimitMiddleware class."""
+
+    @pytest.mark.asyncio
+    async def test_upload_within_limit_is_accepted(self, limited_app):
+        """Test that a small upload reaches the endpoint unchanged."""
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post("/api/predict", files={"file": ("a.jpg", b"JPEG" + b"x" * 100, "image/jpeg")})
+
+        assert response.status_code == 200
+        assert response.json() == {"size": 104, "head": "JPEG"}
+
+    @pytest.mark.asyncio
+    async def test_declared_oversized_upload_is_rejected(self, limited_app):
+        """Test that a Content-Length above the limit is rejected with 413."""
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post("/api/predict", files={"file": ("a.jpg", b"x" * 4096, "image/jpeg")})
+
+        assert response.status_code == 413
+        assert "1024 bytes" in response.json()["detail"]
+
+    @pytest.mark.asyncio
+    async def test_streamed_oversized_upload_is_rejected(self, limited_app):
+        """Test that a chunked body is cut off once it crosses the limit."""
+
+        async def body():
+            yield (
+                b"--abc\r\n"
+                b'Content-Disposition: form-data; name="file"; filename="a.jpg"\r\n'
+                b"Content-Type: image/jpeg\r\n\r\n"
+            )
+            for _ in range(8):
+                yield b"x" * 512
+
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post(
+                "/api/predict",
+                content=body(),
+                headers={"content-type": "multipart/form-data; boundary=abc"},
+            )
+
+        assert response.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_other_routes_are_not_limited(self, limited_app):
+        """Test that routes without a configured limit accept large bodies."""
+        async with AsyncClient(transport=ASGITransport(app=limited_app), base_url="http://test") as client:
+            response = await client.post("/api/other", files={"file": ("a.bin", b"x" * 4096, "image/jpeg")})
+
+        assert response.status_code == 200
+        assert response.json() == {"size": 4096}
+
+    @pytest.mark.asyncio
+    async def test_upload_read_time_is_recorded_for_listed_routes(self):
+        """Test that the body read is timed on listed routes, even without a size limit."""
+        app = FastAPI()
+
+        @app.post("/api/predict")
+        async def predict(request: Request, file: UploadFile = File(...)):
+            return {"read_seconds": upload_read_seconds(request)}
+
+        @app.post("/api/other")
+        async def other(request: Request, file: UploadFile = File(...)):
+            return {"read_seconds": upload_read_seconds(request)}
+
+        app.add_middleware(UploadSizeLimitMiddleware, limits={"/api/predict": 0})
+        files = {"file": ("a.jpg", b"x" * 4096, "image/jpeg")}
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            listed = await client.post("/api/predict", files=files)
+            unlisted = await client.post("/api/other", files=files)
+
+        assert listed.status_code == 200
+        assert listed.json()["read_seconds"] >= 0
+        assert unlisted.json()["read_seconds"] is None
+
+
+class TestUploadBuffer:
+    """Test cases for the upload_buffer context manager."""
+
+    def test_in_memory_upload(self):
+        """Test that a small spooled upload is exposed as a read-only view."""
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+        spooled.write(b"small image")
+        upload = UploadFile(spooled, filename="a.jpg")
+
+        with upload_buffer(upload) as contents:
+            assert isinstance(contents, memoryview)
+            assert contents.readonly
+            assert bytes(contents) == b"small image"
+
+        spooled.close()
+
+    def test_upload_spooled_to_disk_is_memory_mapped(self):
+        """Test that a rolled-over upload is read through a memory map."""
+        spooled = tempfile.SpooledTemporaryFile(max_size=16)
+        spooled.write(b"y" * 4096)
+        upload = UploadFile(spooled, filename="a.jpg")
+
+        with upload_buffer(upload) as contents:
+            assert len(contents) == 4096
+            assert contents[0] == ord("y")
+
+        spooled.close()
+
+    def test_empty_upload(self):
+        """Test that an empty file yields an empty view."""
+        spooled = tempfile.SpooledTemporaryFile(max_size=16)
+        spooled.rollover()
+        upload = UploadFile(spooled, filename="a.jpg")
+
+        with upload_buffer(upload) as contents:
+            assert len(contents) == 0
+
+
+class TestTakeUploadFile:
+    """Test cases for take_upload_file."""
+
+    @pytest.mark.asyncio
+    async def test_taken_file_survives_closing_the_upload(self):
+        """Test that the taken file stays readable after the UploadFile is closed."""
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+        spooled.write(b"image")
+        upload = UploadFile(spooled, filename="a.jpg")
+
+        taken = take_upload_file(upload)
+        await upload.close()
+
+        assert taken is spooled
+        assert taken.read() == b"image"
+        taken.close()
+
+
+def _archive(**members: bytes) -> zipfile.ZipFile:
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, contents in members.items():
+            zf.writestr(name, contents)
+    return zipfile.ZipFile(data)
+
+
+class TestArchiveLimits:
+    """Test cases for check_archive_limits and read_archive_member."""
+
+    def test_archives_within_the_limits_pass(self):
+        """Test that an archive within every limit is accepted, and 0 disables a limit."""
+        archive = _archive(a=b"x" * 100, b=b"x" * 100)
+
+        check_archive_limits(archive, max_member_bytes=100, max_total_bytes=200, max_members=2)
+        check_archive_limits(archive, max_member_bytes=0, max_total_bytes=0, max_members=0)
+
+    @pytest.mark.parametrize(
+        "limits,message",
+        [
+            (dict(max_member_bytes=99, max_total_bytes=0, max_members=0), "member 'a'"),
+            (dict(max_member_bytes=0, max_total_bytes=199, max_members=0), "expands to 200 bytes"),
+            (dict(max_member_bytes=0, max_total_bytes=0, max_members=1), "holds 2 members"),
+        ],
+    )
+    def test_declared_sizes_beyond_a_limit_are_rejected(self, limits, message):
+        """Test that the member size, total size and member count declared by the headers are checked."""
+        with pytest.raises(ArchiveTooLarge, match=message) as error:
+            check_archive_limits(_archive(a=b"x" * 100, b=b"x" * 100), **limits)
+
+        assert error.value.status_code == 413
+
+    def test_members_are_read_with_a_hard_limit(self):
+        """Test that a highly compressible member is cut off at the limit instead of read whole."""
+        archive = _archive(**{"bomb.png": b"\0" * 1_000_000})
+        member = archive.getinfo("bomb.png")
+
+        assert member.compress_size < 10_000
+        with pytest.raises(ArchiveTooLarge, match="bomb.png"):
+            read_archive_member(archive, member, max_bytes=1024)
+        assert read_archive_member(archive, member, max_bytes=0) == b"\0" * 1_000_000
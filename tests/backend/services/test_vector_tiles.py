@@ -0,0 +1,124 @@
+"""
+Tests for the Mapbox Vector Tile encoder.
+"""
+
+import struct
+
+import numpy as np
+
+from backend.services.vector_tiles import MVT_EXTENT, encode_point_layer, tile_pixels
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    value, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, pos
+
+
+def _fields(data: bytes) -> list[tuple[int, int | bytes]]:
+    """Decode a protobuf message into (field, value) pairs."""
+    fields, pos = [], 0
+    while pos < len(data):
+        key, pos = _read_varint(data, pos)
+        field, wire_type = key >> 3, key & 0x7
+        if wire_type == 0:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == 1:
+            value, pos = data[pos : pos + 8], pos + 8
+        else:
+            length, pos = _read_varint(data, pos)
+            value, pos = data[pos : pos + length], pos + length
+        fields.append((field, value))
+    return fields
+
+
+def _packed(data: bytes) -> list[int]:
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _decode_value(data: bytes):
+    field, value = _fields(data)[0]
+    return {1: lambda: value.decode(), 3: lambda: struct.unpack("<d", value)[0], 6: lambda: _unzigzag(value)}.get(
+        field, lambda: bool(value)
+    )()
+
+
+def _decode_layer(tile: bytes) -> dict:
+    """Decode a single-layer tile into its name, extent and features."""
+    [(field, layer)] = _fields(tile)
+    assert field == 3
+    fields = _fields(layer)
+    keys = [value.decode() for field, value in fields if field == 3]
+    values = [_decode_value(value) for field, value in fields if field == 4]
+    features = []
+    for feature in (value for field, value in fields if field == 2):
+        parts = dict(_fields(feature))
+        tags = _packed(parts[2])
+        command, x, y = _packed(parts[4])
+        features.append(
+            {
+                "type": parts[3],
+                "command": command,
+                "point": (_unzigzag(x), _unzigzag(y)),
+                "properties": {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])},
+            }
+        )
+    return {
+        "version": dict(fields)[15],
+        "name": dict(fields)[1].decode(),
+        "extent": dict(fields)[5],
+        "features": features,
+    }
+
+
+class TestVectorTiles:
+    """Test cases for the vector tile encoder."""
+
+    def test_tile_pixels(self):
+        """Tile corners map to pixel 0 and the extent; the world tile's center to its middle."""
+        px, py = tile_pixels(np.array([0.0, 85.0511287798]), np.array([0.0, -180.0]), 0, 0, 0)
+        assert list(px) == [MVT_EXTENT // 2, 0]
+        assert list(py) == [MVT_EXTENT // 2, 0]
+
+        # Points outside the tile get coordinates beyond its extent.
+        px, py = tile_pixels(np.array([0.0]), np.array([0.0]), 1, 0, 0)
+        assert list(px) == [MVT_EXTENT] and list(py) == [MVT_EXTENT]
+
+    def test_encode_point_layer_round_trips(self):
+        """Points and their scalar properties decode back; other values are left out."""
+        properties = [
+            {"id": "obs_1", "count": 3, "confidence": 0.5, "verified": True, "metadata": {"a": 1}},
+            {"id": "obs_2", "count": -2, "confidence": float("nan"), "location_accuracy_m": None},
+        ]
+
+        tile = encode_point_layer("observations", np.array([10, 4000]), np.array([20, 5]), properties)
+        layer = _decode_layer(tile)
+
+        assert layer["version"] == 2
+        assert layer["name"] == "observations"
+        assert layer["extent"] == MVT_EXTENT
+        assert [feature["type"] for feature in layer["features"]] == [1, 1]
+        assert [feature["command"] for feature in layer["features"]] == [9, 9]
+        assert [feature["point"] for feature in layer["features"]] == [(10, 20), (4000, 5)]
+        assert layer["features"][0]["properties"] == {"id": "obs_1", "count": 3, "confidence": 0.5, "verified": True}
+        assert layer["features"][1]["properties"] == {"id": "obs_2", "count": -2}
+
+    def test_empty_layer(self):
+        """A tile without points still has its layer."""
+        layer = _decode_layer(encode_point_layer("observations", np.array([]), np.array([]), []))
+
+        assert layer["name"] == "observations"
+        assert layer["features"] == []
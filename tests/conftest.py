@@ -63,7 +63,7 @@ def pytest_runtest_makereport(item, call):
 def test_app():
     """Create a test FastAPI application without database initialization."""
     from backend.config import settings
-    from backend.routers import filters, species, geo, diseases, prediction, observation
+    from backend.routers import admin, filters, species, geo, diseases, prediction, observation, metrics
     
     # Create a test app without the lifespan that initializes the database
     app = FastAPI(title=settings.APP_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
@@ -75,6 +75,8 @@ def test_app():
     app.include_router(geo.router, prefix=settings.API_V1_STR, tags=["GeoData"])
     app.include_router(prediction.router, prefix=settings.API_V1_STR, tags=["Prediction"])
     app.include_router(observation.router, prefix=settings.API_V1_STR, tags=["Observation"])
+    app.include_router(metrics.router, prefix=settings.API_V1_STR, tags=["Metrics"])
+    app.include_router(admin.router, prefix=settings.API_V1_STR, tags=["Admin"])
     
     # Mock the app state that would normally be initialized in lifespan
     app.state.REGION_TRANSLATIONS = {}
@@ -169,6 +169,43 @@ def test_update_observations_layer(map_manager, mock_observations_data):
     assert hasattr(map_manager, 'update_observations_layer')
 
 
+def test_update_observations_layer_with_clusters(map_manager):
+    """Test that a clusters response is drawn with one marker per cluster."""
+    map_manager.observations_layer_group.clear_layers = MagicMock()
+    map_manager.observations_layer_group.add_layer = MagicMock()
+    clusters_data = {
+        "zoom": 3,
+        "total": 12,
+        "clusters": [
+            {"lat": 41.9, "lon": 12.5, "count": 10, "species": {"Culex pipiens": 7, "Aedes aegypti": 3}, "bbox": []},
+            {"lat": 40.4, "lon": -3.7, "count": 2, "species": {}, "bbox": []},
+        ],
+    }
+
+    show_observed_data_reactive.value = True
+    with patch("frontend.components.map_module.map_component.L.CircleMarker") as mock_marker:
+        map_manager.update_observations_layer(clusters_data)
+
+    assert mock_marker.call_count == 2
+    assert mock_marker.call_args_list[0].kwargs["location"] == (41.9, 12.5)
+    assert mock_marker.call_args_list[0].kwargs["name"] == "Culex pipiens"
+    assert map_manager.observations_layer_group.add_layer.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "bounds, expected",
+    [
+        (None, None),
+        (((35.0, -10.0), (45.0, 5.0)), "-10.0,35.0,5.0,45.0"),
+        (((-10.0, 170.0), (10.0, 190.0)), "170.0,-10.0,-170.0,10.0"),
+        (((-90.0, -400.0), (90.0, 400.0)), None),
+    ],
+)
+def test_bounds_to_bbox(bounds, expected):
+    """Test that map bounds are converted to the backend bbox parameter."""
+    assert map_component.bounds_to_bbox(bounds) == expected
+
+
 @patch("frontend.components.map_module.map_component.fetch_geojson_data")
 @patch("frontend.components.map_module.map_component.LeafletMapManager")
 @patch("solara.use_memo")